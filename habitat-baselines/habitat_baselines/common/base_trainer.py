@@ -6,7 +6,16 @@
 
 import os
 import time
-from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import torch
 from numpy import ndarray
@@ -136,20 +145,42 @@ class BaseTrainer:
                 )
             else:
                 # evaluate multiple checkpoints in order
+                num_checkpoints = self.config.habitat_baselines.num_checkpoints
                 while True:
-                    current_ckpt = None
+                    current_ckpt: Optional[str] = None
                     while current_ckpt is None:
                         current_ckpt = poll_checkpoint_folder(
                             self.config.habitat_baselines.eval_ckpt_path_dir,
                             prev_ckpt_ind,
                         )
                         time.sleep(2)  # sleep for 2 secs before polling again
-                    logger.info(f"=======current_ckpt: {current_ckpt}=======")  # type: ignore
-                    prev_ckpt_ind += 1
-                    self._eval_checkpoint(
-                        checkpoint_path=current_ckpt,
+                    # The next checkpoints that are already there are
+                    # evaluated at the same time
+                    ckpts = [current_ckpt]
+                    while (
+                        len(ckpts)
+                        < self.config.habitat_baselines.eval.concurrent_checkpoints
+                        and prev_ckpt_ind + len(ckpts) + 1 != num_checkpoints
+                    ):
+                        next_ckpt = poll_checkpoint_folder(
+                            self.config.habitat_baselines.eval_ckpt_path_dir,
+                            prev_ckpt_ind + len(ckpts),
+                        )
+                        if next_ckpt is None:
+                            break
+                        ckpts.append(next_ckpt)
+                    for ckpt in ckpts:
+                        logger.info(f"=======current_ckpt: {ckpt}=======")
+                    ckpt_indices = list(
+                        range(
+                            prev_ckpt_ind + 1, prev_ckpt_ind + len(ckpts) + 1
+                        )
+                    )
+                    prev_ckpt_ind += len(ckpts)
+                    self._eval_checkpoints(
+                        checkpoint_paths=ckpts,
                         writer=writer,
-                        checkpoint_index=prev_ckpt_ind,
+                        checkpoint_indices=ckpt_indices,
                     )
 
                     # We save a resume state during evaluation so that
@@ -164,9 +195,7 @@ class BaseTrainer:
                         filename_key="eval",
                     )
 
-                    if (
-                        prev_ckpt_ind + 1
-                    ) == self.config.habitat_baselines.num_checkpoints:
+                    if (prev_ckpt_ind + 1) == num_checkpoints:
                         break
 
     def _eval_checkpoint(
@@ -177,6 +206,26 @@ class BaseTrainer:
     ) -> None:
         raise NotImplementedError
 
+    def _eval_checkpoints(
+        self,
+        checkpoint_paths: List[str],
+        writer: TensorboardWriter,
+        checkpoint_indices: List[int],
+    ) -> None:
+        r"""Evaluates several checkpoints, see
+        :py:`eval.concurrent_checkpoints`. Trainers that can evaluate them
+        at the same time override this, by default they are evaluated one
+        after the other.
+        """
+        for checkpoint_path, checkpoint_index in zip(
+            checkpoint_paths, checkpoint_indices
+        ):
+            self._eval_checkpoint(
+                checkpoint_path=checkpoint_path,
+                writer=writer,
+                checkpoint_index=checkpoint_index,
+            )
+
     def save_checkpoint(self, file_name) -> None:
         raise NotImplementedError
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import copy
+import os
+import os.path as osp
+import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Optional
+
+import numpy as np
+import torch
+
+from habitat.core.utils import atomic_write
+
+
+def snapshot_state(state: Any) -> Any:
+    r"""Copies the tensors of :p:`state` to the cpu, and its dicts, lists,
+    tuples, deques and numpy arrays, so that it can be saved while the
+    training keeps updating the originals in place. The other objects are
+    not copied.
+    """
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    elif isinstance(state, np.ndarray):
+        return state.copy()
+    elif isinstance(state, dict):
+        # A shallow copy keeps the type and e.g. the default_factory of a
+        # defaultdict
+        state_copy = copy.copy(state)
+        for k, v in state.items():
+            state_copy[k] = snapshot_state(v)
+        return state_copy
+    elif isinstance(state, deque):
+        return deque((snapshot_state(v) for v in state), maxlen=state.maxlen)
+    elif isinstance(state, list):
+        return [snapshot_state(v) for v in state]
+    elif isinstance(state, tuple) and not hasattr(state, "_fields"):
+        return tuple(snapshot_state(v) for v in state)
+    return state
+
+
+def save_atomic(state: Any, path: str, latest_path: Optional[str] = None):
+    r"""Saves :p:`state` with :py:`torch.save` and
+    :ref:`habitat.core.utils.atomic_write`, so that :p:`path` is either
+    missing, the previous file or the complete new one, even if the process
+    dies while writing. The temporary file starts with a dot, so it is not
+    picked up by :ref:`habitat_baselines.utils.common.poll_checkpoint_folder`.
+
+    :param latest_path: also make this file a hard link to :p:`path`
+        (replaced atomically as well), or a copy if the filesystem doesn't
+        support hard links.
+    """
+    atomic_write(path, lambda f: torch.save(state, f), fsync=True)
+
+    if latest_path is None:
+        return
+    tmp_latest_path = osp.join(
+        osp.dirname(osp.abspath(latest_path)),
+        f".{osp.basename(latest_path)}.{os.getpid()}.tmp",
+    )
+    try:
+        try:
+            os.link(path, tmp_latest_path)
+        except OSError:
+            shutil.copyfile(path, tmp_latest_path)
+        os.replace(tmp_latest_path, latest_path)
+    except BaseException:
+        if osp.exists(tmp_latest_path):
+            os.remove(tmp_latest_path)
+        raise
+
+
+class AsyncCheckpointWriter:
+    r"""Saves checkpoints and resume states with :ref:`save_atomic` from a
+    background thread, so that the training only waits for the copy of the
+    state to the cpu (:ref:`snapshot_state`) and not for the serialization
+    and the filesystem.
+
+    At most :p:`max_in_flight` saves are pending, :ref:`save` waits for the
+    oldest one to finish before snapshotting a new state, which bounds the
+    memory of the snapshots. The saves are done in order. An error of a
+    background save is raised by the next call.
+
+    :param max_in_flight: the number of pending saves.
+    """
+
+    def __init__(self, max_in_flight: int = 1) -> None:
+        assert max_in_flight > 0, "max_in_flight must be positive"
+        self._max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="AsyncCheckpointWriter"
+        )
+        self._pending: Deque[Future] = deque()
+
+    @property
+    def num_pending(self) -> int:
+        self._pop_done()
+        return len(self._pending)
+
+    def _pop_done(self) -> None:
+        while len(self._pending) > 0 and self._pending[0].done():
+            # Raises the error of the save if there was one
+            self._pending.popleft().result()
+
+    def save(
+        self, state: Any, path: str, latest_path: Optional[str] = None
+    ) -> None:
+        r"""Snapshots :p:`state` and saves it in the background, see
+        :ref:`save_atomic` for :p:`latest_path`.
+        """
+        self._pop_done()
+        while len(self._pending) >= self._max_in_flight:
+            self._pending.popleft().result()
+        snapshot = snapshot_state(state)
+        self._pending.append(
+            self._executor.submit(save_atomic, snapshot, path, latest_path)
+        )
+
+    def wait(self) -> None:
+        r"""Waits for all the pending saves, e.g. before the job exits to be
+        requeued.
+        """
+        while len(self._pending) > 0:
+            self._pending.popleft().result()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "AsyncCheckpointWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -2,9 +2,13 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import heapq
+import json
 import os
 import random
-from typing import TYPE_CHECKING, Any, List, Type
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+import numpy as np
 
 from habitat import ThreadedVectorEnv, VectorEnv, logger, make_dataset
 from habitat.config import read_write
@@ -14,11 +18,93 @@ if TYPE_CHECKING:
     from omegaconf import DictConfig
 
 
+def get_scene_weights(
+    config: "DictConfig",
+    dataset: Any,
+    scenes: List[str],
+    is_first_rank: bool = True,
+) -> Optional[Dict[str, float]]:
+    r"""Returns the expected simulation cost of each scene, its number of
+    episodes times its cost per step from the
+    :py:`habitat_baselines.scene_cost_profile` file, if any.
+
+    :return: The weights, or :py:`None` if neither the episode counts nor
+        a cost profile are available.
+    """
+    episode_counts = dataset.get_scene_episode_counts(config.habitat.dataset)
+
+    step_costs: Dict[str, float] = {}
+    if config.habitat_baselines.scene_cost_profile != "":
+        with open(config.habitat_baselines.scene_cost_profile, "r") as f:
+            step_costs = json.load(f)
+
+    if episode_counts is None and len(step_costs) == 0:
+        if is_first_rank:
+            logger.warn(
+                "The episode count of the scenes of the dataset are not known"
+                " and there is no scene_cost_profile, using round robin scene"
+                " partitioning."
+            )
+        return None
+
+    known_costs = [step_costs[s] for s in scenes if s in step_costs]
+    default_cost = float(np.mean(known_costs)) if known_costs else 1.0
+    return {
+        scene: (1 if episode_counts is None else episode_counts.get(scene, 0))
+        * step_costs.get(scene, default_cost)
+        for scene in scenes
+    }
+
+
+def partition_scenes(
+    scenes: List[str], num_partitions: int, scene_weights: Dict[str, float]
+) -> List[List[str]]:
+    r"""Splits the scenes into :p:`num_partitions` partitions of similar total
+    weight. The heaviest remaining scene is always added to the lightest
+    partition (longest processing time first), which is at most 4/3 of the
+    optimal largest partition. Each partition gets at least one scene if
+    there are enough scenes.
+    """
+    # Ties are broken by number of scenes so that scenes of weight 0 are
+    # still spread between the partitions
+    heap = [(0.0, 0, idx) for idx in range(num_partitions)]
+    partitions: List[List[str]] = [[] for _ in range(num_partitions)]
+    for scene in sorted(scenes, key=lambda s: scene_weights[s], reverse=True):
+        load, num_scenes, idx = heapq.heappop(heap)
+        partitions[idx].append(scene)
+        heapq.heappush(
+            heap, (load + scene_weights[scene], num_scenes + 1, idx)
+        )
+    return partitions
+
+
+def _log_partition_imbalance(
+    scenes: List[str],
+    scene_splits: List[List[str]],
+    num_environments: int,
+    scene_weights: Dict[str, float],
+) -> None:
+    def _imbalance(splits: List[List[str]]) -> float:
+        loads = [sum(scene_weights[s] for s in split) for split in splits]
+        mean_load = np.mean(loads)
+        return float(np.max(loads) / mean_load) if mean_load > 0 else 1.0
+
+    round_robin_splits: List[List[str]] = [
+        scenes[idx::num_environments] for idx in range(num_environments)
+    ]
+    logger.info(
+        "Expected environment load imbalance (max / mean):"
+        f" {_imbalance(scene_splits):.3f} with episode count partitioning,"
+        f" {_imbalance(round_robin_splits):.3f} with round robin."
+    )
+
+
 def construct_envs(
     config: "DictConfig",
     workers_ignore_signals: bool = False,
     enforce_scenes_greater_eq_environments: bool = False,
     is_first_rank: bool = True,
+    split_scenes: bool = True,
 ) -> VectorEnv:
     r"""Create VectorEnv object with specified config and env class type.
     To allow better performance, dataset are split into small ones for
@@ -30,6 +116,9 @@ def construct_envs(
     :param enforce_scenes_greater_eq_environments: Make sure that there are more (or equal)
         scenes than environments. This is needed for correct evaluation.
     :param is_first_rank: If these environments are being constructed on the rank0 GPU.
+    :param split_scenes: If false, every environment loads all the scenes,
+        e.g. when the episodes are handed out to the environments by an
+        :ref:`EvalEpisodeScheduler`.
 
     :return: VectorEnv object created according to specification.
     """
@@ -52,7 +141,9 @@ def construct_envs(
     random.shuffle(scenes)
 
     scene_splits: List[List[str]] = [[] for _ in range(num_environments)]
-    if len(scenes) < num_environments:
+    if not split_scenes:
+        scene_splits = [list(scenes) for _ in range(num_environments)]
+    elif len(scenes) < num_environments:
         msg = f"There are less scenes ({len(scenes)}) than environments ({num_environments}). "
         if enforce_scenes_greater_eq_environments:
             logger.warn(
@@ -70,8 +161,28 @@ def construct_envs(
             for split in scene_splits:
                 split.append(scene)
     else:
-        for idx, scene in enumerate(scenes):
-            scene_splits[idx % len(scene_splits)].append(scene)
+        scene_weights = None
+        if config.habitat_baselines.scene_partitioning == "episode_count":
+            scene_weights = get_scene_weights(
+                config, dataset, scenes, is_first_rank
+            )
+        elif config.habitat_baselines.scene_partitioning != "round_robin":
+            raise ValueError(
+                "Unknown scene_partitioning"
+                f" {config.habitat_baselines.scene_partitioning}"
+            )
+
+        if scene_weights is None:
+            for idx, scene in enumerate(scenes):
+                scene_splits[idx % len(scene_splits)].append(scene)
+        else:
+            scene_splits = partition_scenes(
+                scenes, num_environments, scene_weights
+            )
+            if is_first_rank:
+                _log_partition_imbalance(
+                    scenes, scene_splits, num_environments, scene_weights
+                )
         assert sum(map(len, scene_splits)) == len(scenes)
 
     for env_index in range(num_environments):
@@ -105,6 +216,9 @@ def construct_envs(
         make_env_fn=make_gym_from_config,
         env_fn_args=tuple((c,) for c in configs),
         workers_ignore_signals=workers_ignore_signals,
+        shared_memory_observations=config.habitat_baselines.shared_memory_observations,
+        top_down_map_deltas=config.habitat_baselines.top_down_map_deltas,
+        episode_descriptors=config.habitat_baselines.episode_descriptors,
     )
 
     if config.habitat.simulator.renderer.enable_batch_renderer:
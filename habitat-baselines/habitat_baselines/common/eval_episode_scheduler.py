@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+EpisodeKey = Tuple[str, str]
+
+
+class EvalEpisodeScheduler:
+    r"""Hands out the evaluation episodes to the environments as they free
+    up, instead of each environment evaluating the episodes of its own split
+    of the scenes, so that no environment idles while others still have a
+    long list of episodes to run.
+
+    The environments load all the scenes and take their episodes from an
+    :ref:`habitat.core.dataset.EpisodeQueue`. As they reset themselves as
+    soon as an episode is over, each environment has a current episode and
+    one queued episode, that it starts when the current one ends. An
+    environment is given the next episode of the scene of its last episode
+    while there is one, to avoid scene reloads, and otherwise the next
+    episode of the scene with the most remaining episodes, preferably one
+    that no other environment is running.
+
+    Each episode is handed out :p:`evals_per_ep` times and each handed out
+    episode is counted once, when the environment running it is done with
+    it (see :ref:`episode_done`).
+
+    :param episode_keys: the :py:`(scene_id, episode_id)` of the episodes to
+        evaluate.
+    :param evals_per_ep: the number of times each episode is evaluated.
+    :param num_envs: the number of environments.
+    """
+
+    def __init__(
+        self,
+        episode_keys: Sequence[EpisodeKey],
+        evals_per_ep: int,
+        num_envs: int,
+    ) -> None:
+        self._remaining: Dict[str, Deque[EpisodeKey]] = OrderedDict()
+        for key in episode_keys:
+            self._remaining.setdefault(key[0], deque()).extend(
+                [key] * evals_per_ep
+            )
+        self.num_episodes = len(episode_keys) * evals_per_ep
+        assert self.num_episodes > 0, "No episodes to evaluate"
+        # Queued in the environments without episodes so that they can be
+        # reset before they are paused
+        self._filler_key = episode_keys[0]
+        # The current and queued episodes of each environment
+        self._env_episodes: List[List[Optional[EpisodeKey]]] = [
+            [None, None] for _ in range(num_envs)
+        ]
+        self._env_scenes: List[Optional[str]] = [None] * num_envs
+
+    @property
+    def num_envs(self) -> int:
+        return len(self._env_episodes)
+
+    @property
+    def num_remaining(self) -> int:
+        r"""The number of episodes that were not handed out yet."""
+        return sum(len(keys) for keys in self._remaining.values())
+
+    def _next_scene(self, env_idx: int) -> Optional[str]:
+        scene = self._env_scenes[env_idx]
+        if scene in self._remaining:
+            return scene
+        if len(self._remaining) == 0:
+            return None
+        busy_scenes = {
+            s
+            for i, s in enumerate(self._env_scenes)
+            if i != env_idx and s in self._remaining
+        }
+        return max(
+            self._remaining,
+            key=lambda s: (s not in busy_scenes, len(self._remaining[s])),
+        )
+
+    def _hand_out(self, env_idx: int) -> Optional[EpisodeKey]:
+        scene = self._next_scene(env_idx)
+        if scene is None:
+            return None
+        key = self._remaining[scene].popleft()
+        if len(self._remaining[scene]) == 0:
+            del self._remaining[scene]
+        self._env_scenes[env_idx] = scene
+        return key
+
+    def start(self) -> List[List[EpisodeKey]]:
+        r"""Hands out the first episodes, to be queued in the environments
+        before they are reset. Environments that get no episode because
+        there are fewer episodes than environments must be paused after
+        their first step.
+
+        :return: the episodes to queue in each environment, in order.
+        """
+        env_queues: List[List[EpisodeKey]] = []
+        for env_idx, env_episodes in enumerate(self._env_episodes):
+            assert env_episodes == [None, None], "Scheduler already started"
+            # One episode per environment before the queued ones
+            env_episodes[0] = self._hand_out(env_idx)
+        for env_idx, env_episodes in enumerate(self._env_episodes):
+            env_episodes[1] = self._hand_out(env_idx)
+            env_queues.append(
+                [k for k in env_episodes if k is not None]
+                or [self._filler_key]
+            )
+        return env_queues
+
+    def current_episode(self, env_idx: int) -> Optional[EpisodeKey]:
+        r"""The episode the environment is running, :py:`None` if it has no
+        episode left to evaluate and must be paused.
+        """
+        return self._env_episodes[env_idx][0]
+
+    def episode_done(
+        self, env_idx: int
+    ) -> Tuple[EpisodeKey, Optional[EpisodeKey]]:
+        r"""Called when the current episode of an environment is over. The
+        environment has started its queued episode.
+
+        :return: the episode that is over, and the episode to queue in the
+            environment, if any.
+        """
+        env_episodes = self._env_episodes[env_idx]
+        done_key = env_episodes[0]
+        assert done_key is not None, f"Environment {env_idx} has no episode"
+        next_key = self._hand_out(env_idx) if env_episodes[1] else None
+        self._env_episodes[env_idx] = [env_episodes[1], next_key]
+        return done_key, next_key
+
+    def pause_envs(self, env_idxs: Sequence[int]) -> None:
+        r"""Removes the environments that are paused, the indices of the next
+        environments are shifted like in :ref:`habitat.VectorEnv.pause_at`.
+        """
+        for env_idx in sorted(env_idxs, reverse=True):
+            assert self._env_episodes[env_idx] == [
+                None,
+                None,
+            ], f"Environment {env_idx} still has episodes to evaluate"
+            del self._env_episodes[env_idx]
+            del self._env_scenes[env_idx]
@@ -21,6 +21,31 @@ from habitat_baselines.utils.common import get_action_space_info
 from habitat_baselines.utils.timing import g_timer
 
 
+def _reverse_discounted_cumsum(
+    x: torch.Tensor, discounts: torch.Tensor, last: torch.Tensor
+) -> torch.Tensor:
+    r"""Computes :py:`out[t] = x[t] + discounts[t] * out[t + 1]` backwards
+    in time, with :py:`out[len(x)] = last`.
+
+    The recurrence is sequential, so a GPU implementation needs a few tiny
+    kernels per step. Instead the inputs are copied to the CPU once and the
+    loop runs over numpy arrays. The elementwise operations are the same as
+    the ones of a step by step loop on the tensors, so the result is
+    bitwise identical.
+    """
+    x_np = x.cpu().numpy()
+    discounts_np = discounts.cpu().numpy()
+    out = np.empty_like(x_np)
+    discounted = np.empty_like(x_np[0])
+    acc = last.cpu().numpy()
+    for t in reversed(range(len(x_np))):
+        np.multiply(discounts_np[t], acc, out=discounted)
+        np.add(x_np[t], discounted, out=out[t])
+        acc = out[t]
+
+    return torch.from_numpy(out).to(device=x.device)
+
+
 @baseline_registry.register_storage
 class RolloutStorage(Storage):
     r"""Class for storing rollout information for RL trainers."""
@@ -173,36 +198,32 @@ class RolloutStorage(Storage):
 
     @g_timer.avg_time("rollout_storage.compute_returns", level=1)
     def compute_returns(self, next_value, use_gae, gamma, tau):
+        num_steps = self.current_rollout_step_idx
+        assert isinstance(self.buffers["rewards"], torch.Tensor)
+        assert isinstance(self.buffers["masks"], torch.Tensor)
+        assert isinstance(self.buffers["returns"], torch.Tensor)
+        rewards = self.buffers["rewards"][:num_steps]
+        next_masks = self.buffers["masks"][1 : num_steps + 1]
+
         if use_gae:
             assert isinstance(self.buffers["value_preds"], torch.Tensor)
-            self.buffers["value_preds"][
-                self.current_rollout_step_idx
-            ] = next_value
-            gae = 0.0
-            for step in reversed(range(self.current_rollout_step_idx)):
-                delta = (
-                    self.buffers["rewards"][step]
-                    + gamma
-                    * self.buffers["value_preds"][step + 1]
-                    * self.buffers["masks"][step + 1]
-                    - self.buffers["value_preds"][step]
-                )
-                gae = (
-                    delta + gamma * tau * gae * self.buffers["masks"][step + 1]
-                )
-                self.buffers["returns"][step] = (  # type: ignore
-                    gae + self.buffers["value_preds"][step]  # type: ignore
-                )
+            self.buffers["value_preds"][num_steps] = next_value
+            values = self.buffers["value_preds"][: num_steps + 1]
+            deltas = rewards + gamma * values[1:] * next_masks - values[:-1]
+            advantages = _reverse_discounted_cumsum(
+                deltas,
+                gamma * tau * next_masks,
+                torch.zeros_like(deltas[0]),
+            )
+            self.buffers["returns"][:num_steps] = advantages + values[:-1]
 
         else:
-            self.buffers["returns"][self.current_rollout_step_idx] = next_value
-            for step in reversed(range(self.current_rollout_step_idx)):
-                self.buffers["returns"][step] = (
-                    gamma
-                    * self.buffers["returns"][step + 1]
-                    * self.buffers["masks"][step + 1]
-                    + self.buffers["rewards"][step]
-                )
+            self.buffers["returns"][num_steps] = next_value
+            self.buffers["returns"][:num_steps] = _reverse_discounted_cumsum(
+                rewards,
+                gamma * next_masks,
+                self.buffers["returns"][num_steps],
+            )
 
     def data_generator(
         self,
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import copy
+import os
+import os.path as osp
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import imageio
+import numpy as np
+import torch
+
+from habitat import logger
+from habitat.utils.visualizations.utils import (
+    get_video_file_name,
+    observations_to_image,
+    overlay_frame,
+)
+from habitat_baselines.common.tensorboard_utils import TensorboardWriter
+from habitat_baselines.utils.common import get_video_name
+
+_FRAME = "frame"
+_EPISODE_DONE = "episode_done"
+_DISCARD = "discard"
+_CLOSE = "close"
+
+
+class StreamingVideoWriter:
+    r"""Writes the evaluation videos of the environments while their
+    episodes run, instead of keeping all the frames of each episode and
+    writing them with :ref:`habitat_baselines.utils.common.generate_video`
+    when the episode is over.
+
+    The observations of each step are put in a bounded queue and a worker
+    thread builds the frames (:ref:`observations_to_image` and
+    :ref:`overlay_frame`) and appends them to a temporary ``.mp4`` file per
+    episode, that is renamed to the name of the video when the metrics of
+    the episode are known. The evaluation loop only copies the observations
+    of the step, and only waits for the worker when the queue is full, so
+    at most :p:`max_queued_frames` frames per environment are held in
+    memory. For the "tensorboard" :p:`video_option`, the video is read back
+    from the file once the episode is over, so only the frames of one
+    episode at a time are held in memory.
+
+    Errors of the worker thread are raised by the next call.
+
+    :param video_option: "disk" and/or "tensorboard".
+    :param video_dir: the directory of the videos, also used for the
+        temporary files with the "tensorboard" :p:`video_option` only.
+    :param num_envs: the number of environments.
+    :param checkpoint_idx: the checkpoint index for the video names.
+    :param tb_writer: the writer of the "tensorboard" videos.
+    :param fps: the frames per second of the videos.
+    :param max_queued_frames: the number of frames per environment the
+        worker can fall behind before the evaluation loop waits for it.
+    :param keys_to_include_in_name: the metrics in the video names, see
+        :ref:`habitat_baselines.utils.common.get_video_name`.
+    """
+
+    def __init__(
+        self,
+        video_option: List[str],
+        video_dir: str,
+        num_envs: int,
+        checkpoint_idx: int,
+        tb_writer: TensorboardWriter,
+        fps: int = 10,
+        max_queued_frames: int = 4,
+        keys_to_include_in_name: Optional[List[str]] = None,
+    ) -> None:
+        self._video_option = video_option
+        self._video_dir = video_dir
+        self._checkpoint_idx = checkpoint_idx
+        self._tb_writer = tb_writer
+        self._fps = fps
+        self._keys_to_include_in_name = keys_to_include_in_name
+        os.makedirs(video_dir, exist_ok=True)
+
+        # The episodes that are written get new ids, as the environments
+        # are reindexed when some are paused
+        self._next_stream_id = 0
+        self._env_streams: List[int] = [
+            self._new_stream_id() for _ in range(num_envs)
+        ]
+        self._queue: "queue.Queue[tuple]" = queue.Queue(
+            maxsize=max(max_queued_frames * num_envs, 1)
+        )
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._worker_loop, name="StreamingVideoWriter", daemon=True
+        )
+        self._thread.start()
+
+    def _new_stream_id(self) -> int:
+        stream_id = self._next_stream_id
+        self._next_stream_id += 1
+        return stream_id
+
+    @property
+    def num_envs(self) -> int:
+        return len(self._env_streams)
+
+    def _put(self, item: tuple) -> None:
+        if self._error is not None:
+            raise RuntimeError(
+                "The video writer thread failed"
+            ) from self._error
+        assert not self._closed, "The video writer is closed"
+        self._queue.put(item)
+
+    def add_frame(
+        self,
+        env_idx: int,
+        observation: Dict[str, Union[torch.Tensor, np.ndarray]],
+        info: Dict[str, Any],
+        blank: bool = False,
+    ) -> None:
+        r"""Adds the frame of a step of an environment to the video of its
+        current episode.
+
+        :param observation: the observations of the environment. They are
+            copied, so the batch they are from can be reused.
+        :param info: the info of the step, overlaid on the frame. It is
+            copied too, as its arrays can be updated in place by the next
+            step (e.g. the top down map with :py:`top_down_map_deltas`).
+        :param blank: show black observations, for the last step of an
+            episode whose observations are those of the next episode.
+        """
+        observation = {
+            k: v.to("cpu", copy=True)
+            if isinstance(v, torch.Tensor)
+            else np.array(v)
+            for k, v in observation.items()
+        }
+        self._put(
+            (
+                _FRAME,
+                self._env_streams[env_idx],
+                observation,
+                copy.deepcopy(info),
+                blank,
+            )
+        )
+
+    def episode_done(
+        self,
+        env_idx: int,
+        episode_id: Union[int, str],
+        metrics: Dict[str, float],
+    ) -> None:
+        r"""Finishes the video of the current episode of an environment,
+        the next frames of the environment go to a new video.
+        """
+        video_name = get_video_name(
+            episode_id,
+            self._checkpoint_idx,
+            metrics,
+            self._keys_to_include_in_name,
+        )
+        self._put(
+            (
+                _EPISODE_DONE,
+                self._env_streams[env_idx],
+                video_name,
+                f"episode{episode_id}",
+            )
+        )
+        self._env_streams[env_idx] = self._new_stream_id()
+
+    def pause_envs(self, env_idxs: Sequence[int]) -> None:
+        r"""Drops the unfinished videos of the environments that are paused,
+        the indices of the next environments are shifted like in
+        :ref:`habitat.VectorEnv.pause_at`.
+        """
+        for env_idx in sorted(env_idxs, reverse=True):
+            self._put((_DISCARD, self._env_streams.pop(env_idx)))
+
+    def close(self) -> None:
+        r"""Waits for the worker to write the finished videos, the unfinished
+        ones are dropped.
+        """
+        if self._closed:
+            return
+        if self._error is None:
+            self._queue.put((_CLOSE,))
+        self._closed = True
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(
+                "The video writer thread failed"
+            ) from self._error
+
+    def __enter__(self) -> "StreamingVideoWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _temp_path(self, stream_id: int) -> str:
+        return osp.join(
+            self._video_dir, f".stream-{os.getpid()}-{stream_id}.mp4"
+        )
+
+    def _worker_loop(self) -> None:
+        writers: Dict[int, Any] = {}
+        try:
+            while True:
+                item = self._queue.get()
+                if item[0] == _FRAME:
+                    _, stream_id, observation, info, blank = item
+                    if blank:
+                        observation = {
+                            k: v * 0.0 for k, v in observation.items()
+                        }
+                    frame = overlay_frame(
+                        observations_to_image(observation, info), info
+                    )
+                    if stream_id not in writers:
+                        writers[stream_id] = imageio.get_writer(
+                            self._temp_path(stream_id),
+                            fps=self._fps,
+                            quality=5,
+                        )
+                    writers[stream_id].append_data(frame)
+                elif item[0] == _EPISODE_DONE:
+                    _, stream_id, video_name, tb_video_name = item
+                    if stream_id in writers:
+                        writers.pop(stream_id).close()
+                        self._finish_video(
+                            self._temp_path(stream_id),
+                            video_name,
+                            tb_video_name,
+                        )
+                elif item[0] == _DISCARD:
+                    _, stream_id = item
+                    if stream_id in writers:
+                        writers.pop(stream_id).close()
+                        os.remove(self._temp_path(stream_id))
+                else:
+                    break
+        except BaseException as e:
+            logger.error(f"Video writer thread failed: {e!r}")
+            self._error = e
+            # Unblock the evaluation loop if it is waiting on a full queue
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        finally:
+            for stream_id, writer in writers.items():
+                writer.close()
+                os.remove(self._temp_path(stream_id))
+
+    def _finish_video(
+        self, temp_path: str, video_name: str, tb_video_name: str
+    ) -> None:
+        if "tensorboard" in self._video_option:
+            with imageio.get_reader(temp_path) as reader:
+                images = [np.asarray(frame) for frame in reader]
+            self._tb_writer.add_video_from_np_images(
+                tb_video_name, self._checkpoint_idx, images, fps=self._fps
+            )
+        if "disk" in self._video_option:
+            video_path = osp.join(
+                self._video_dir, get_video_file_name(video_name)
+            )
+            os.replace(temp_path, video_path)
+            logger.info(f"Video created: {video_path}")
+        else:
+            os.remove(temp_path)
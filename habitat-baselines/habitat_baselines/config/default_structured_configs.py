@@ -44,10 +44,36 @@ class EvalConfig(HabitatBaselinesBaseConfig):
     # The number of time to run each episode through evaluation.
     # Only works when evaluating on all episodes.
     evals_per_ep: int = 1
+    # How the evaluation episodes are split between the environments.
+    # "static" gives each environment the episodes of its own split of the
+    # scenes. "work_stealing" hands out the next episode to whichever
+    # environment finishes one, preferring the scene it already loaded, so
+    # that no environment idles until the end of the evaluation. Every
+    # environment then loads the episodes of all the scenes.
+    episode_scheduling: str = "static"
+    # Keep the environments alive between the checkpoints of an evaluation
+    # of a checkpoint folder instead of creating them for each checkpoint.
+    # Their episode iterators are reset for each checkpoint, and they are
+    # only recreated if the environment config of the checkpoint differs.
+    keep_envs_alive: bool = False
+    # The number of checkpoints of a checkpoint folder that are evaluated
+    # at the same time, each on its own subset of the num_environments
+    # environments. The checkpoints that are already in the folder are
+    # evaluated together, the evaluation doesn't wait for the next ones.
+    # Requires episode_scheduling "work_stealing", so that every subset of
+    # the environments runs all the episodes.
+    concurrent_checkpoints: int = 1
     video_option: List[str] = field(
         # available options are "disk" and "tensorboard"
         default_factory=list
     )
+    # Write the videos of video_option while the episodes run, from a
+    # background thread that builds and encodes the frames, instead of
+    # keeping all the frames of each episode until it is over. The
+    # evaluation loop waits for the thread when it is more than
+    # video_max_queued_frames frames per environment behind.
+    stream_videos: bool = False
+    video_max_queued_frames: int = 4
     extra_sim_sensors: Dict[str, SimulatorSensorConfig] = field(
         default_factory=dict
     )
@@ -310,6 +336,11 @@ class PPOConfig(HabitatBaselinesBaseConfig):
     # policy inference time during rollout generation
     # Not that this does not change the memory requirements
     use_double_buffered_sampler: bool = False
+    # Batch the observations of the environments in the order they finish
+    # stepping instead of in index order, so that the observations of the
+    # first environments are copied to the GPU while waiting for the
+    # slowest. The rollouts are the same as without it.
+    use_pipelined_env_results: bool = False
 
 
 @dataclass
@@ -402,12 +433,39 @@ class HabitatBaselinesConfig(HabitatBaselinesBaseConfig):
     eval_ckpt_path_dir: str = "data/checkpoints"
     num_environments: int = 16
     num_processes: int = -1  # deprecated
+    # If true, the environment workers write their observations into shared
+    # memory buffers and only rewards, dones and infos are sent through the
+    # pipe. This removes most of the pickling cost for large visual sensors.
+    shared_memory_observations: bool = False
+    # If true, the environment workers send the top down map and fog of war
+    # mask of the "top_down_map" measure once per episode and then only the
+    # regions that changed at each step.
+    top_down_map_deltas: bool = False
+    # If true, the environment workers send the scene id and episode id of
+    # their new episode with the step and reset results that start one, so
+    # that getting the current episodes of the environments (twice per step
+    # in evaluation) doesn't need a round trip to every worker.
+    episode_descriptors: bool = False
+    # How the scenes are split between the environments. "round_robin"
+    # deals the shuffled scenes one by one, "episode_count" balances the
+    # number of episodes of each environment (weighted by
+    # scene_cost_profile if it is set) with a greedy bin-packing.
+    scene_partitioning: str = "round_robin"
+    # Optional JSON file mapping scene names to their relative cost per
+    # step (i.e. measured steps per second inverted). Scenes that are not
+    # in the profile have the average cost.
+    scene_cost_profile: str = ""
     rollout_storage_name: str = "RolloutStorage"
     checkpoint_folder: str = "data/checkpoints"
     num_updates: int = 10000
     num_checkpoints: int = 10
     # Number of model updates between checkpoints
     checkpoint_interval: int = -1
+    # Save the checkpoints and resume states from a background thread, the
+    # training only waits for the copy of their tensors to the cpu, and for
+    # the oldest save when max_in_flight_checkpoints saves are pending.
+    async_checkpointing: bool = False
+    max_in_flight_checkpoints: int = 1
     total_num_steps: float = -1.0
     log_interval: int = 10
     log_file: str = "train.log"
@@ -61,7 +61,9 @@ class NavDataset(wds.Dataset):
         """
         self.config = config.habitat
         self.env = env
-        self.episodes: List[NavigationEpisode] = self.env._dataset.episodes
+        self.episodes: List[NavigationEpisode] = list(
+            self.env._dataset.episodes
+        )
         self.max_controller_actions = max_controller_actions
         self.device = device
         self.sim = self.env.sim
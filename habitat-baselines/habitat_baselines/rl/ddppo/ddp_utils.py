@@ -30,6 +30,10 @@ from omegaconf import DictConfig
 from torch import distributed as distrib
 
 from habitat import logger
+from habitat_baselines.common.checkpoint_writer import (
+    AsyncCheckpointWriter,
+    save_atomic,
+)
 
 T = TypeVar("T")
 
@@ -184,20 +188,29 @@ def save_resume_state(
     state: Any,
     filename_or_config: Union[DictConfig, str],
     filename_key: str = "",
+    checkpoint_writer: Optional[AsyncCheckpointWriter] = None,
 ):
     r"""Saves the resume job state to the specified filename.
         This is useful when working with preemptable job partitions.
 
+    The file is replaced atomically, so a job that is killed while saving
+    leaves the previous resume state.
+
     :param state: The state to save
     :param filename_or_config: The filename of the saved state or the config to construct it.
     :param filename_key: If generating the filename from the config, append this to the name.
+    :param checkpoint_writer: Save the state in the background with this
+        writer. Its pending saves must be waited for before the job exits.
     """
     if isinstance(filename_or_config, DictConfig):
         filename = resume_state_filename(filename_or_config, filename_key)
     else:
         filename = filename_or_config
 
-    torch.save(state, filename)
+    if checkpoint_writer is not None:
+        checkpoint_writer.save(state, filename)
+    else:
+        save_atomic(state, filename)
 
 
 def load_resume_state(
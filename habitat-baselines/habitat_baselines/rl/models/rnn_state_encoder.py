@@ -6,6 +6,7 @@
 
 from typing import Dict, Optional, Tuple
 
+import numba
 import numpy as np
 import torch
 import torch.nn as nn
@@ -30,8 +31,66 @@ def _np_invert_permutation(permutation: np.ndarray) -> np.ndarray:
     return np.argsort(permutation.ravel()).reshape(permutation.shape)
 
 
-# This is some pretty wild code. I recommend you just trust
-# the unit test on it and leave it be.
+@numba.jit(nopython=True)
+def _build_select_inds(
+    lengths: np.ndarray, sequence_starts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Steps through the sequences (sorted by decreasing length) one time
+    step at a time and lists the index of the step of each sequence that
+    is still running.
+    """
+    max_length = lengths[0]
+    num_seqs_at_step = np.empty((max_length,), dtype=np.int64)
+    select_inds = np.empty((lengths.sum(),), dtype=np.int64)
+    num_valid = lengths.shape[0]
+    offset = 0
+    for step in range(max_length):
+        while lengths[num_valid - 1] <= step:
+            num_valid -= 1
+        num_seqs_at_step[step] = num_valid
+        for i in range(num_valid):
+            select_inds[offset] = sequence_starts[i] + step
+            offset += 1
+
+    return select_inds, num_seqs_at_step
+
+
+@numba.jit(nopython=True)
+def _first_and_last_sequences(
+    rnn_state_batch_inds: np.ndarray,
+    episode_ids: np.ndarray,
+    sequence_starts: np.ndarray,
+    num_environments: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    r"""Finds the first and last sequence (i.e. smallest and largest
+    episode ID) of each environment.
+    """
+    first_seq = np.full((num_environments,), -1, dtype=np.int64)
+    last_seq = np.full((num_environments,), -1, dtype=np.int64)
+    for i in range(rnn_state_batch_inds.shape[0]):
+        env = rnn_state_batch_inds[i]
+        if first_seq[env] < 0 or episode_ids[i] < episode_ids[first_seq[env]]:
+            first_seq[env] = i
+        if last_seq[env] < 0 or episode_ids[i] > episode_ids[last_seq[env]]:
+            last_seq[env] = i
+
+    first_sequence_in_batch_mask = np.zeros(
+        (rnn_state_batch_inds.shape[0],), dtype=np.bool_
+    )
+    last_sequence_in_batch_mask = np.zeros_like(first_sequence_in_batch_mask)
+    first_step_for_env = np.empty((num_environments,), dtype=np.int64)
+    for env in range(num_environments):
+        first_sequence_in_batch_mask[first_seq[env]] = True
+        last_sequence_in_batch_mask[last_seq[env]] = True
+        first_step_for_env[env] = sequence_starts[first_seq[env]]
+
+    return (
+        first_sequence_in_batch_mask,
+        last_sequence_in_batch_mask,
+        first_step_for_env,
+    )
+
+
 def build_pack_info_from_episode_ids(
     episode_ids: np.ndarray,
     environment_ids: np.ndarray,
@@ -60,56 +119,25 @@ def build_pack_info_from_episode_ids(
     # put things into an order such that each episode is a contiguous
     # block. This makes all the following logic MUCH easier
     sort_keys = episode_ids * (step_ids.max() + 1) + step_ids
-    assert np.unique(sort_keys).size == sort_keys.size
-    episode_id_sorting = np.argsort(
-        episode_ids * (step_ids.max() + 1) + step_ids
-    )
+    episode_id_sorting = np.argsort(sort_keys)
+    sorted_keys = sort_keys[episode_id_sorting]
+    assert np.all(sorted_keys[1:] != sorted_keys[:-1])
     episode_ids = episode_ids[episode_id_sorting]
 
-    unique_episode_ids, sequence_lengths = np.unique(
-        episode_ids, return_counts=True
+    # Episodes are contiguous, so their starts are where the ID changes
+    sequence_starts = np.flatnonzero(
+        np.concatenate(([True], episode_ids[1:] != episode_ids[:-1]))
     )
-    # Exclusive cumsum
-    sequence_starts = np.cumsum(sequence_lengths) - sequence_lengths
+    sequence_lengths = np.diff(np.append(sequence_starts, episode_ids.size))
 
     sorted_indices = np.argsort(-sequence_lengths)
     lengths = sequence_lengths[sorted_indices]
-    #  print(lengths)
-
-    unique_episode_ids = unique_episode_ids[sorted_indices]
     sequence_starts = sequence_starts[sorted_indices]
 
-    max_length = int(lengths[0])
-
-    select_inds = np.empty((episode_ids.size,), dtype=np.int64)
-
     # num_seqs_at_step is *always* on the CPU
-    num_seqs_at_step = np.empty((max_length,), dtype=np.int64)
-
-    offset = 0
-    prev_len = 0
-    num_valid_for_length = lengths.shape[0]
-    #  print(lengths)
-
-    for next_len in np.unique(lengths):
-        num_valid_for_length = np.count_nonzero(
-            lengths[0:num_valid_for_length] > prev_len
-        )
-
-        num_seqs_at_step[prev_len:next_len] = num_valid_for_length
-
-        new_inds = (
-            sequence_starts[0:num_valid_for_length][np.newaxis, :]
-            + np.arange(prev_len, next_len)[:, np.newaxis]
-        ).reshape(-1)
-
-        select_inds[offset : offset + new_inds.size] = new_inds
-
-        offset += new_inds.size
-
-        prev_len = int(next_len)
-
-    assert offset == select_inds.size
+    select_inds, num_seqs_at_step = _build_select_inds(
+        lengths, sequence_starts
+    )
 
     select_inds = episode_id_sorting[select_inds]
     sequence_starts = select_inds[0 : num_seqs_at_step[0]]
@@ -118,21 +146,16 @@ def build_pack_info_from_episode_ids(
     unique_environment_ids, rnn_state_batch_inds = np.unique(
         episode_environment_ids, return_inverse=True
     )
-    episode_ids_for_starts = unsorted_episode_ids[sequence_starts]
-    last_sequence_in_batch_mask = np.zeros_like(episode_environment_ids == 0)
-    first_sequence_in_batch_mask = np.zeros_like(last_sequence_in_batch_mask)
-    first_step_for_env = []
-    for env_id in unique_environment_ids:
-        env_eps = episode_environment_ids == env_id
-        env_eps_ids = episode_ids_for_starts[env_eps]
-
-        last_sequence_in_batch_mask[env_eps] = env_eps_ids == env_eps_ids.max()
-        first_ep_mask = env_eps_ids == env_eps_ids.min()
-        first_sequence_in_batch_mask[env_eps] = first_ep_mask
-
-        first_step_for_env.append(
-            sequence_starts[env_eps][first_ep_mask].item()
-        )
+    (
+        first_sequence_in_batch_mask,
+        last_sequence_in_batch_mask,
+        first_step_for_env,
+    ) = _first_and_last_sequences(
+        rnn_state_batch_inds,
+        unsorted_episode_ids[sequence_starts],
+        sequence_starts,
+        len(unique_environment_ids),
+    )
 
     return {
         "select_inds": select_inds,
@@ -148,7 +171,7 @@ def build_pack_info_from_episode_ids(
         "first_episode_in_batch_inds": np.nonzero(
             first_sequence_in_batch_mask
         )[0],
-        "first_step_for_env": np.asarray(first_step_for_env),
+        "first_step_for_env": first_step_for_env,
     }
 
 
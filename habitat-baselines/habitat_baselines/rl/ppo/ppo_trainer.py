@@ -9,7 +9,7 @@ import os
 import random
 import time
 from collections import defaultdict, deque
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import torch
@@ -28,13 +28,23 @@ from habitat.utils.visualizations.utils import (
 )
 from habitat_baselines.common.base_trainer import BaseRLTrainer
 from habitat_baselines.common.baseline_registry import baseline_registry
+from habitat_baselines.common.checkpoint_writer import (
+    AsyncCheckpointWriter,
+    save_atomic,
+)
 from habitat_baselines.common.construct_vector_env import construct_envs
 from habitat_baselines.common.env_spec import EnvironmentSpec
+from habitat_baselines.common.eval_episode_scheduler import (
+    EvalEpisodeScheduler,
+)
 from habitat_baselines.common.obs_transformers import (
     apply_obs_transforms_batch,
     apply_obs_transforms_obs_space,
     get_active_obs_transforms,
 )
+from habitat_baselines.common.streaming_video_writer import (
+    StreamingVideoWriter,
+)
 from habitat_baselines.common.tensorboard_utils import (
     TensorboardWriter,
     get_writer,
@@ -57,6 +67,7 @@ from habitat_baselines.rl.ppo.single_agent_access_mgr import (  # noqa: F401.
     SingleAgentAccessMgr,
 )
 from habitat_baselines.utils.common import (
+    IncrementalObservationBatcher,
     batch_obs,
     generate_video,
     get_action_space_info,
@@ -71,6 +82,77 @@ from habitat_baselines.utils.info_dict import (
 from habitat_baselines.utils.timing import g_timer
 
 
+class _CheckpointEvaluation:
+    r"""The evaluation of one checkpoint by
+    :ref:`PPOTrainer._eval_checkpoints`. Its environments are a contiguous
+    range of the environments that are not paused.
+    """
+
+    def __init__(
+        self,
+        checkpoint_index: int,
+        ckpt_dict: Dict[str, Any],
+        agent: AgentAccessMgr,
+        num_envs: int,
+        scheduler: Optional[EvalEpisodeScheduler],
+        video_writer: Optional[StreamingVideoWriter],
+        pbar: tqdm.tqdm,
+        device: torch.device,
+    ) -> None:
+        self.checkpoint_index = checkpoint_index
+        self.ckpt_dict = ckpt_dict
+        self.agent = agent
+        # The number of environments that are not paused
+        self.num_envs = num_envs
+        self.scheduler = scheduler
+        self.video_writer = video_writer
+        self.pbar = pbar
+
+        action_shape, discrete_actions = get_action_space_info(
+            agent.policy_action_space
+        )
+        self.test_recurrent_hidden_states = torch.zeros(
+            (num_envs, *agent.hidden_state_shape), device=device
+        )
+        self.prev_actions = torch.zeros(
+            num_envs,
+            *action_shape,
+            device=device,
+            dtype=torch.long if discrete_actions else torch.float,
+        )
+        self.not_done_masks = torch.zeros(
+            num_envs, 1, device=device, dtype=torch.bool
+        )
+        self.current_episode_reward = torch.zeros(num_envs, 1, device="cpu")
+        self.rgb_frames: List[List[np.ndarray]] = [[] for _ in range(num_envs)]
+
+        # dict of dicts that stores stats per episode
+        self.stats_episodes: Dict[Any, Any] = {}
+        self.ep_eval_count: Dict[Any, int] = defaultdict(lambda: 0)
+        self.num_eval_steps = 0
+        # The time from the start of the evaluation until all the
+        # environments of the checkpoint are paused
+        self.eval_time: Optional[float] = None
+
+    def pause_envs(self, envs_to_pause: List[int]) -> None:
+        r"""Removes the state of the environments at the indices
+        :p:`envs_to_pause`, in increasing order.
+        """
+        if len(envs_to_pause) == 0:
+            return
+        state_index = list(range(self.num_envs))
+        for idx in reversed(envs_to_pause):
+            state_index.pop(idx)
+        self.test_recurrent_hidden_states = self.test_recurrent_hidden_states[
+            state_index
+        ]
+        self.prev_actions = self.prev_actions[state_index]
+        self.not_done_masks = self.not_done_masks[state_index]
+        self.current_episode_reward = self.current_episode_reward[state_index]
+        self.rgb_frames = [self.rgb_frames[i] for i in state_index]
+        self.num_envs = len(state_index)
+
+
 @baseline_registry.register_trainer(name="ddppo")
 @baseline_registry.register_trainer(name="ppo")
 class PPOTrainer(BaseRLTrainer):
@@ -92,6 +174,10 @@ class PPOTrainer(BaseRLTrainer):
         self._is_static_encoder = False
         self._encoder = None
         self._env_spec = None
+        # The key of the evaluation environments kept alive between
+        # checkpoints, see _init_eval_envs
+        self._eval_envs_key: Optional[Tuple] = None
+        self._checkpoint_writer: Optional[AsyncCheckpointWriter] = None
 
         # Distributed if the world size would be
         # greater than 1
@@ -136,7 +222,12 @@ class PPOTrainer(BaseRLTrainer):
             **kwargs,
         )
 
-    def _init_envs(self, config=None, is_eval: bool = False):
+    def _init_envs(
+        self,
+        config=None,
+        is_eval: bool = False,
+        split_scenes: bool = True,
+    ):
         if config is None:
             config = self.config
 
@@ -148,12 +239,9 @@ class PPOTrainer(BaseRLTrainer):
                 not torch.distributed.is_initialized()
                 or torch.distributed.get_rank() == 0
             ),
+            split_scenes=split_scenes,
         )
-        self._env_spec = EnvironmentSpec(
-            observation_space=self.envs.observation_spaces[0],
-            action_space=self.envs.action_spaces[0],
-            orig_action_space=self.envs.orig_action_spaces[0],
-        )
+        self._set_env_spec()
 
         # The measure keys that should only be logged on rank0,gpu0 and nowhere
         # else. They will be excluded from all other workers and only reported
@@ -167,6 +255,60 @@ class PPOTrainer(BaseRLTrainer):
         # `self.window_episode_stats`.
         self._single_proc_infos: Dict[str, List[float]] = {}
 
+    def _set_env_spec(self) -> None:
+        self._env_spec = EnvironmentSpec(
+            observation_space=self.envs.observation_spaces[0],
+            action_space=self.envs.action_spaces[0],
+            orig_action_space=self.envs.orig_action_spaces[0],
+        )
+
+    @staticmethod
+    def _get_eval_envs_key(config, split_scenes: bool) -> Tuple:
+        r"""The parts of the config that the evaluation environments are
+        created from.
+        """
+        return (
+            OmegaConf.to_container(config.habitat, resolve=True),
+            split_scenes,
+            *(
+                config.habitat_baselines[k]
+                for k in (
+                    "num_environments",
+                    "scene_partitioning",
+                    "scene_cost_profile",
+                    "shared_memory_observations",
+                    "top_down_map_deltas",
+                    "episode_descriptors",
+                )
+            ),
+        )
+
+    def _init_eval_envs(self, config, split_scenes: bool) -> None:
+        r"""Creates the evaluation environments, or only resets the episode
+        iterators of the ones of the previous checkpoint when
+        :py:`eval.keep_envs_alive` is set and they were created with the
+        same environment config.
+        """
+        envs_key = self._get_eval_envs_key(config, split_scenes)
+        if self._eval_envs_key is not None:
+            if self._eval_envs_key == envs_key:
+                self.envs.call(["reset_episode_iterator"] * self.envs.num_envs)
+                return
+            logger.info(
+                "The environment config changed, recreating the evaluation"
+                " environments."
+            )
+            self._close_eval_envs()
+
+        self._init_envs(config, is_eval=True, split_scenes=split_scenes)
+        if self.config.habitat_baselines.eval.keep_envs_alive:
+            self._eval_envs_key = envs_key
+
+    def _close_eval_envs(self) -> None:
+        if self._eval_envs_key is not None:
+            self.envs.close()
+            self._eval_envs_key = None
+
     def _init_train(self, resume_state=None):
         if resume_state is None:
             resume_state = load_resume_state(self.config)
@@ -299,6 +441,10 @@ class PPOTrainer(BaseRLTrainer):
     ) -> None:
         r"""Save checkpoint with specified name.
 
+        The checkpoint is written once and ``latest.pth`` is linked to it,
+        both atomically. With :py:`async_checkpointing`, it is written in
+        the background by the checkpoint writer.
+
         Args:
             file_name: file name for checkpoint
 
@@ -312,18 +458,30 @@ class PPOTrainer(BaseRLTrainer):
         if extra_state is not None:
             checkpoint["extra_state"] = extra_state  # type: ignore
 
-        torch.save(
-            checkpoint,
-            os.path.join(
-                self.config.habitat_baselines.checkpoint_folder, file_name
-            ),
+        checkpoint_path = os.path.join(
+            self.config.habitat_baselines.checkpoint_folder, file_name
         )
-        torch.save(
-            checkpoint,
-            os.path.join(
-                self.config.habitat_baselines.checkpoint_folder, "latest.pth"
-            ),
+        latest_path = os.path.join(
+            self.config.habitat_baselines.checkpoint_folder, "latest.pth"
         )
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.save(
+                checkpoint, checkpoint_path, latest_path
+            )
+        else:
+            save_atomic(checkpoint, checkpoint_path, latest_path)
+
+    def _init_checkpoint_writer(self) -> None:
+        if rank0_only() and self.config.habitat_baselines.async_checkpointing:
+            self._checkpoint_writer = AsyncCheckpointWriter(
+                self.config.habitat_baselines.max_in_flight_checkpoints
+            )
+
+    def _close_checkpoint_writer(self) -> None:
+        r"""Waits for the pending checkpoint and resume state saves."""
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.close()
+            self._checkpoint_writer = None
 
     def load_checkpoint(self, checkpoint_path: str, *args, **kwargs) -> Dict:
         r"""Load checkpoint of specified path as a dict.
@@ -387,6 +545,34 @@ class PPOTrainer(BaseRLTrainer):
                 should_inserts=action_data.should_inserts,
             )
 
+    def _wait_and_batch_pipelined(self, env_slice: slice):
+        r"""Waits for the environments of env_slice and batches their
+        observations in the order the environments finish, so that the
+        observations of the first ones are copied to the device while
+        waiting for the slowest. The results are stored at the index of
+        their environment, so the batch doesn't depend on that order.
+        """
+        num_envs = env_slice.stop - env_slice.start
+        batcher = IncrementalObservationBatcher(num_envs, device=self.device)
+        rewards_l: List[Any] = [None] * num_envs
+        dones: List[Any] = [None] * num_envs
+        infos: List[Any] = [None] * num_envs
+        for index_env, (
+            observations,
+            reward,
+            done,
+            info,
+        ) in self.envs.wait_step_as_completed(
+            range(env_slice.start, env_slice.stop)
+        ):
+            i = index_env - env_slice.start
+            batcher.add(i, observations)
+            rewards_l[i] = reward
+            dones[i] = done
+            infos[i] = info
+
+        return batcher.get(), rewards_l, dones, infos
+
     def _collect_environment_result(self, buffer_index: int = 0):
         num_envs = self.envs.num_envs
         env_slice = slice(
@@ -394,18 +580,28 @@ class PPOTrainer(BaseRLTrainer):
             int((buffer_index + 1) * num_envs / self._agent.nbuffers),
         )
 
+        pipelined = self._ppo_cfg.use_pipelined_env_results
         with g_timer.avg_time("trainer.step_env"):
-            outputs = [
-                self.envs.wait_step_at(index_env)
-                for index_env in range(env_slice.start, env_slice.stop)
-            ]
+            if pipelined:
+                (
+                    batch,
+                    rewards_l,
+                    dones,
+                    infos,
+                ) = self._wait_and_batch_pipelined(env_slice)
+            else:
+                outputs = [
+                    self.envs.wait_step_at(index_env)
+                    for index_env in range(env_slice.start, env_slice.stop)
+                ]
 
-            observations, rewards_l, dones, infos = [
-                list(x) for x in zip(*outputs)
-            ]
+                observations, rewards_l, dones, infos = [
+                    list(x) for x in zip(*outputs)
+                ]
 
         with g_timer.avg_time("trainer.update_stats"):
-            batch = batch_obs(observations, device=self.device)
+            if not pipelined:
+                batch = batch_obs(observations, device=self.device)
             batch = apply_obs_transforms_batch(batch, self.obs_transforms)  # type: ignore
 
             rewards = torch.tensor(
@@ -669,6 +865,7 @@ class PPOTrainer(BaseRLTrainer):
             )
             resume_run_id = requeue_stats.get("run_id", None)
 
+        self._init_checkpoint_writer()
         with (
             get_writer(
                 self.config,
@@ -704,12 +901,14 @@ class PPOTrainer(BaseRLTrainer):
                             requeue_stats=requeue_stats,
                         ),
                         self.config,
+                        checkpoint_writer=self._checkpoint_writer,
                     )
 
                 if EXIT.is_set():
                     profiling_wrapper.range_pop()  # train update
 
                     self.envs.close()
+                    self._close_checkpoint_writer()
 
                     requeue_job()
 
@@ -780,6 +979,7 @@ class PPOTrainer(BaseRLTrainer):
                 profiling_wrapper.range_pop()  # train update
 
             self.envs.close()
+            self._close_checkpoint_writer()
 
     def _eval_checkpoint(
         self,
@@ -797,21 +997,9 @@ class PPOTrainer(BaseRLTrainer):
         Returns:
             None
         """
-        if self._is_distributed:
-            raise RuntimeError("Evaluation does not support distributed mode")
-
-        # Some configurations require not to load the checkpoint, like when using
-        # a hierarchial policy
-        if self.config.habitat_baselines.eval.should_load_ckpt:
-            # map_location="cpu" is almost always better than mapping to a CUDA device.
-            ckpt_dict = self.load_checkpoint(
-                checkpoint_path, map_location="cpu"
-            )
-            step_id = ckpt_dict["extra_state"]["step"]
-            print(step_id)
-        else:
-            ckpt_dict = {"config": None}
+        self._eval_checkpoints([checkpoint_path], writer, [checkpoint_index])
 
+    def _get_eval_config(self, ckpt_dict: Dict[str, Any]):
         config = self._get_resume_state_config_or_new_config(
             ckpt_dict["config"]
         )
@@ -836,63 +1024,101 @@ class PPOTrainer(BaseRLTrainer):
 
         if config.habitat_baselines.verbose:
             logger.info(f"env config: {OmegaConf.to_yaml(config)}")
+        return config
 
-        self._init_envs(config, is_eval=True)
-
-        self._agent = self._create_agent(None)
-        action_shape, discrete_actions = get_action_space_info(
-            self._agent.policy_action_space
-        )
+    def _eval_checkpoints(
+        self,
+        checkpoint_paths: List[str],
+        writer: TensorboardWriter,
+        checkpoint_indices: List[int],
+    ) -> None:
+        r"""Evaluates the checkpoints at the same time, each with its own
+        policy on its own contiguous range of the environments. The
+        checkpoints are evaluated one after the other if their environment
+        configs differ.
 
-        if self._agent.actor_critic.should_load_agent_state:
-            self._agent.load_state_dict(ckpt_dict)
+        Args:
+            checkpoint_paths: paths of the checkpoints
+            writer: tensorboard writer object for logging to tensorboard
+            checkpoint_indices: indices of the checkpoints for logging
 
-        observations = self.envs.reset()
-        batch = batch_obs(observations, device=self.device)
-        batch = apply_obs_transforms_batch(batch, self.obs_transforms)  # type: ignore
+        Returns:
+            None
+        """
+        if self._is_distributed:
+            raise RuntimeError("Evaluation does not support distributed mode")
 
-        current_episode_reward = torch.zeros(
-            self.envs.num_envs, 1, device="cpu"
+        episode_scheduling = (
+            self.config.habitat_baselines.eval.episode_scheduling
         )
+        if episode_scheduling not in ("static", "work_stealing"):
+            raise ValueError(
+                f"Unknown episode_scheduling {episode_scheduling}"
+            )
+        use_scheduler = episode_scheduling == "work_stealing"
+        num_checkpoints = len(checkpoint_paths)
+        if num_checkpoints > 1 and not use_scheduler:
+            raise ValueError(
+                "Evaluating several checkpoints at the same time requires"
+                " episode_scheduling work_stealing"
+            )
 
-        test_recurrent_hidden_states = torch.zeros(
-            (
-                self.config.habitat_baselines.num_environments,
-                *self._agent.hidden_state_shape,
-            ),
-            device=self.device,
-        )
-        prev_actions = torch.zeros(
-            self.config.habitat_baselines.num_environments,
-            *action_shape,
-            device=self.device,
-            dtype=torch.long if discrete_actions else torch.float,
-        )
-        not_done_masks = torch.zeros(
-            self.config.habitat_baselines.num_environments,
-            1,
-            device=self.device,
-            dtype=torch.bool,
-        )
-        stats_episodes: Dict[
-            Any, Any
-        ] = {}  # dict of dicts that stores stats per episode
-        ep_eval_count: Dict[Any, int] = defaultdict(lambda: 0)
+        ckpt_dicts = []
+        for checkpoint_path in checkpoint_paths:
+            # Some configurations require not to load the checkpoint, like when using
+            # a hierarchial policy
+            if self.config.habitat_baselines.eval.should_load_ckpt:
+                # map_location="cpu" is almost always better than mapping to a CUDA device.
+                ckpt_dict = self.load_checkpoint(
+                    checkpoint_path, map_location="cpu"
+                )
+                step_id = ckpt_dict["extra_state"]["step"]
+                print(step_id)
+            else:
+                ckpt_dict = {"config": None}
+            ckpt_dicts.append(ckpt_dict)
 
-        rgb_frames: List[List[np.ndarray]] = [
-            [] for _ in range(self.config.habitat_baselines.num_environments)
+        configs = [self._get_eval_config(d) for d in ckpt_dicts]
+        envs_keys = [
+            self._get_eval_envs_key(c, split_scenes=not use_scheduler)
+            for c in configs
         ]
-        if len(self.config.habitat_baselines.eval.video_option) > 0:
-            os.makedirs(self.config.habitat_baselines.video_dir, exist_ok=True)
+        if any(k != envs_keys[0] for k in envs_keys[1:]):
+            logger.info(
+                "The checkpoints have different environment configs,"
+                " evaluating them one after the other."
+            )
+            for checkpoint_path, checkpoint_index in zip(
+                checkpoint_paths, checkpoint_indices
+            ):
+                self._eval_checkpoints(
+                    [checkpoint_path], writer, [checkpoint_index]
+                )
+            return
+        config = configs[0]
+
+        eval_start_time = time.time()
+        self._init_eval_envs(config, split_scenes=not use_scheduler)
+        envs_setup_time = time.time() - eval_start_time
+        if num_checkpoints > self.envs.num_envs:
+            raise ValueError(
+                f"Can't evaluate {num_checkpoints} checkpoints at the same"
+                f" time with {self.envs.num_envs} environments"
+            )
 
         number_of_eval_episodes = (
             self.config.habitat_baselines.test_episode_count
         )
         evals_per_ep = self.config.habitat_baselines.eval.evals_per_ep
-        if number_of_eval_episodes == -1:
-            number_of_eval_episodes = sum(self.envs.number_of_episodes)
+        if use_scheduler:
+            # All the environments have all the episodes
+            episode_keys = self.envs.call_at(0, "get_episode_keys")
+            total_num_eps = len(episode_keys)
         else:
             total_num_eps = sum(self.envs.number_of_episodes)
+        if number_of_eval_episodes == -1:
+            number_of_eval_episodes = total_num_eps
+        else:
             # if total_num_eps is negative, it means the number of evaluation episodes is unknown
             if total_num_eps < number_of_eval_episodes and total_num_eps > 1:
                 logger.warn(
@@ -907,62 +1133,141 @@ class PPOTrainer(BaseRLTrainer):
             number_of_eval_episodes > 0
         ), "You must specify a number of evaluation episodes with test_episode_count"
 
-        pbar = tqdm.tqdm(total=number_of_eval_episodes * evals_per_ep)
-        self._agent.eval()
-        while (
-            len(stats_episodes) < (number_of_eval_episodes * evals_per_ep)
-            and self.envs.num_envs > 0
+        if len(self.config.habitat_baselines.eval.video_option) > 0:
+            os.makedirs(self.config.habitat_baselines.video_dir, exist_ok=True)
+
+        evaluations: List[_CheckpointEvaluation] = []
+        env_start = 0
+        for ckpt_idx, (ckpt_dict, checkpoint_index) in enumerate(
+            zip(ckpt_dicts, checkpoint_indices)
         ):
-            current_episodes_info = self.envs.current_episodes()
+            num_envs = self.envs.num_envs // num_checkpoints + (
+                ckpt_idx < self.envs.num_envs % num_checkpoints
+            )
+            # The observation transforms of the previous agent changed the
+            # observation space of the env spec
+            self._set_env_spec()
+            self._agent = self._create_agent(None)
+            if self._agent.actor_critic.should_load_agent_state:
+                self._agent.load_state_dict(ckpt_dict)
+            self._agent.eval()
+
+            scheduler: Optional[EvalEpisodeScheduler] = None
+            if use_scheduler:
+                scheduler = EvalEpisodeScheduler(
+                    episode_keys[:number_of_eval_episodes],
+                    evals_per_ep,
+                    num_envs,
+                )
+                for i, env_queue in enumerate(scheduler.start()):
+                    self.envs.call_at(env_start + i, "use_episode_queue")
+                    for scene_id, episode_id in env_queue:
+                        self.envs.call_at(
+                            env_start + i,
+                            "queue_episode",
+                            {"scene_id": scene_id, "episode_id": episode_id},
+                        )
 
-            with inference_mode():
-                action_data = self._agent.actor_critic.act(
-                    batch,
-                    test_recurrent_hidden_states,
-                    prev_actions,
-                    not_done_masks,
-                    deterministic=False,
+            video_writer: Optional[StreamingVideoWriter] = None
+            if (
+                len(self.config.habitat_baselines.eval.video_option) > 0
+                and self.config.habitat_baselines.eval.stream_videos
+            ):
+                video_writer = StreamingVideoWriter(
+                    video_option=self.config.habitat_baselines.eval.video_option,
+                    video_dir=self.config.habitat_baselines.video_dir,
+                    num_envs=num_envs,
+                    checkpoint_idx=checkpoint_index,
+                    tb_writer=writer,
+                    fps=self.config.habitat_baselines.video_fps,
+                    max_queued_frames=self.config.habitat_baselines.eval.video_max_queued_frames,
+                    keys_to_include_in_name=self.config.habitat_baselines.eval_keys_to_include_in_name,
+                )
+
+            evaluations.append(
+                _CheckpointEvaluation(
+                    checkpoint_index,
+                    ckpt_dict,
+                    self._agent,
+                    num_envs,
+                    scheduler,
+                    video_writer,
+                    tqdm.tqdm(
+                        total=number_of_eval_episodes * evals_per_ep,
+                        desc=f"Checkpoint {checkpoint_index}"
+                        if num_checkpoints > 1
+                        else None,
+                        position=ckpt_idx,
+                    ),
+                    self.device,
                 )
-                if action_data.should_inserts is None:
-                    test_recurrent_hidden_states = (
-                        action_data.rnn_hidden_states
+            )
+            env_start += num_envs
+
+        observations = self.envs.reset()
+        batch = batch_obs(observations, device=self.device)
+        batch = apply_obs_transforms_batch(batch, self.obs_transforms)  # type: ignore
+
+        while self.envs.num_envs > 0:
+            current_episodes_info = self.envs.current_episodes()
+
+            step_data = []
+            action_datas = []
+            for evaluation, env_slice in self._get_eval_slices(evaluations):
+                with inference_mode():
+                    action_data = evaluation.agent.actor_critic.act(
+                        {k: v[env_slice] for k, v in batch.items()},
+                        evaluation.test_recurrent_hidden_states,
+                        evaluation.prev_actions,
+                        evaluation.not_done_masks,
+                        deterministic=False,
                     )
-                    prev_actions.copy_(action_data.actions)  # type: ignore
+                    if action_data.should_inserts is None:
+                        evaluation.test_recurrent_hidden_states = (
+                            action_data.rnn_hidden_states
+                        )
+                        evaluation.prev_actions.copy_(action_data.actions)  # type: ignore
+                    else:
+                        for i, should_insert in enumerate(
+                            action_data.should_inserts
+                        ):
+                            if should_insert.item():
+                                evaluation.test_recurrent_hidden_states[
+                                    i
+                                ] = action_data.rnn_hidden_states[i]
+                                evaluation.prev_actions[i].copy_(action_data.actions[i])  # type: ignore
+                action_datas.append(action_data)
+                # NB: Move actions to CPU.  If CUDA tensors are
+                # sent in to env.step(), that will create CUDA contexts
+                # in the subprocesses.
+                if is_continuous_action_space(self._env_spec.action_space):
+                    # Clipping actions to the specified limits
+                    step_data += [
+                        np.clip(
+                            a.numpy(),
+                            self._env_spec.action_space.low,
+                            self._env_spec.action_space.high,
+                        )
+                        for a in action_data.env_actions.cpu()
+                    ]
                 else:
-                    for i, should_insert in enumerate(
-                        action_data.should_inserts
-                    ):
-                        if should_insert.item():
-                            test_recurrent_hidden_states[
-                                i
-                            ] = action_data.rnn_hidden_states[i]
-                            prev_actions[i].copy_(action_data.actions[i])  # type: ignore
-            # NB: Move actions to CPU.  If CUDA tensors are
-            # sent in to env.step(), that will create CUDA contexts
-            # in the subprocesses.
-            if is_continuous_action_space(self._env_spec.action_space):
-                # Clipping actions to the specified limits
-                step_data = [
-                    np.clip(
-                        a.numpy(),
-                        self._env_spec.action_space.low,
-                        self._env_spec.action_space.high,
-                    )
-                    for a in action_data.env_actions.cpu()
-                ]
-            else:
-                step_data = [a.item() for a in action_data.env_actions.cpu()]
+                    step_data += [
+                        a.item() for a in action_data.env_actions.cpu()
+                    ]
 
             outputs = self.envs.step(step_data)
 
             observations, rewards_l, dones, infos = [
                 list(x) for x in zip(*outputs)
             ]
-            policy_infos = self._agent.actor_critic.get_extra(
-                action_data, infos, dones
-            )
-            for i in range(len(policy_infos)):
-                infos[i].update(policy_infos[i])
+            for (evaluation, env_slice), action_data in zip(
+                self._get_eval_slices(evaluations), action_datas
+            ):
+                policy_infos = evaluation.agent.actor_critic.get_extra(
+                    action_data, infos[env_slice], dones[env_slice]
+                )
+                for i in range(len(policy_infos)):
+                    infos[env_slice.start + i].update(policy_infos[i])
             batch = batch_obs(  # type: ignore
                 observations,
                 device=self.device,
@@ -978,109 +1283,217 @@ class PPOTrainer(BaseRLTrainer):
             rewards = torch.tensor(
                 rewards_l, dtype=torch.float, device="cpu"
             ).unsqueeze(1)
-            current_episode_reward += rewards
             next_episodes_info = self.envs.current_episodes()
             envs_to_pause = []
-            n_envs = self.envs.num_envs
-            for i in range(n_envs):
-                if (
-                    ep_eval_count[
-                        (
-                            next_episodes_info[i].scene_id,
-                            next_episodes_info[i].episode_id,
-                        )
-                    ]
-                    == evals_per_ep
-                ):
-                    envs_to_pause.append(i)
-
-                # Exclude the keys from `_rank0_env0_keys`.
-                infos[i] = {
-                    k: v
-                    for k, v in infos[i].items()
-                    if k not in self._rank0_env0_keys
-                }
+            for evaluation, env_slice in self._get_eval_slices(evaluations):
+                evaluation.current_episode_reward += rewards[env_slice]
+                evaluation.not_done_masks = not_done_masks[env_slice].to(
+                    device=self.device
+                )
+                scheduler = evaluation.scheduler
+                evaluation_envs_to_pause = []
+                n_envs = evaluation.num_envs
+                evaluation.num_eval_steps += n_envs
+                for i in range(n_envs):
+                    j = env_slice.start + i
+                    if scheduler is None and (
+                        evaluation.ep_eval_count[
+                            (
+                                next_episodes_info[j].scene_id,
+                                next_episodes_info[j].episode_id,
+                            )
+                        ]
+                        == evals_per_ep
+                    ):
+                        evaluation_envs_to_pause.append(i)
 
-                if len(self.config.habitat_baselines.eval.video_option) > 0:
-                    # TODO move normalization / channel changing out of the policy and undo it here
-                    frame = observations_to_image(
-                        {k: v[i] for k, v in batch.items()}, infos[i]
-                    )
-                    if not not_done_masks[i].item():
-                        # The last frame corresponds to the first frame of the next episode
-                        # but the info is correct. So we use a black frame
-                        frame = observations_to_image(
-                            {k: v[i] * 0.0 for k, v in batch.items()}, infos[i]
-                        )
-                    frame = overlay_frame(frame, infos[i])
-                    rgb_frames[i].append(frame)
-
-                # episode ended
-                if not not_done_masks[i].item():
-                    pbar.update()
-                    episode_stats = {
-                        "reward": current_episode_reward[i].item()
+                    # Exclude the keys from `_rank0_env0_keys`.
+                    infos[j] = {
+                        k: v
+                        for k, v in infos[j].items()
+                        if k not in self._rank0_env0_keys
                     }
-                    episode_stats.update(extract_scalars_from_info(infos[i]))
-                    current_episode_reward[i] = 0
-                    k = (
-                        current_episodes_info[i].scene_id,
-                        current_episodes_info[i].episode_id,
-                    )
-                    ep_eval_count[k] += 1
-                    # use scene_id + episode_id as unique id for storing stats
-                    stats_episodes[(k, ep_eval_count[k])] = episode_stats
 
-                    if (
+                    if evaluation.video_writer is not None:
+                        # The last frame corresponds to the first frame of the
+                        # next episode but the info is correct, it is blank
+                        evaluation.video_writer.add_frame(
+                            i,
+                            {k: v[j] for k, v in batch.items()},
+                            infos[j],
+                            blank=not not_done_masks[j].item(),
+                        )
+                    elif (
                         len(self.config.habitat_baselines.eval.video_option)
                         > 0
                     ):
-                        generate_video(
-                            video_option=self.config.habitat_baselines.eval.video_option,
-                            video_dir=self.config.habitat_baselines.video_dir,
-                            images=rgb_frames[i],
-                            episode_id=current_episodes_info[i].episode_id,
-                            checkpoint_idx=checkpoint_index,
-                            metrics=extract_scalars_from_info(infos[i]),
-                            fps=self.config.habitat_baselines.video_fps,
-                            tb_writer=writer,
-                            keys_to_include_in_name=self.config.habitat_baselines.eval_keys_to_include_in_name,
+                        # TODO move normalization / channel changing out of the policy and undo it here
+                        frame = observations_to_image(
+                            {k: v[j] for k, v in batch.items()}, infos[j]
                         )
+                        if not not_done_masks[j].item():
+                            # The last frame corresponds to the first frame of the next episode
+                            # but the info is correct. So we use a black frame
+                            frame = observations_to_image(
+                                {k: v[j] * 0.0 for k, v in batch.items()},
+                                infos[j],
+                            )
+                        frame = overlay_frame(frame, infos[j])
+                        evaluation.rgb_frames[i].append(frame)
 
-                        rgb_frames[i] = []
-
-                    gfx_str = infos[i].get(GfxReplayMeasure.cls_uuid, "")
-                    if gfx_str != "":
-                        write_gfx_replay(
-                            gfx_str,
-                            self.config.habitat.task,
-                            current_episodes_info[i].episode_id,
+                    # episode ended
+                    if not not_done_masks[j].item() and (
+                        scheduler is None
+                        or scheduler.current_episode(i) is not None
+                    ):
+                        if scheduler is not None:
+                            _, next_key = scheduler.episode_done(i)
+                            if next_key is not None:
+                                self.envs.call_at(
+                                    j,
+                                    "queue_episode",
+                                    {
+                                        "scene_id": next_key[0],
+                                        "episode_id": next_key[1],
+                                    },
+                                )
+                        evaluation.pbar.update()
+                        episode_stats = {
+                            "reward": evaluation.current_episode_reward[
+                                i
+                            ].item()
+                        }
+                        episode_stats.update(
+                            extract_scalars_from_info(infos[j])
+                        )
+                        evaluation.current_episode_reward[i] = 0
+                        k = (
+                            current_episodes_info[j].scene_id,
+                            current_episodes_info[j].episode_id,
                         )
+                        evaluation.ep_eval_count[k] += 1
+                        # use scene_id + episode_id as unique id for storing stats
+                        evaluation.stats_episodes[
+                            (k, evaluation.ep_eval_count[k])
+                        ] = episode_stats
+
+                        if evaluation.video_writer is not None:
+                            evaluation.video_writer.episode_done(
+                                i,
+                                current_episodes_info[j].episode_id,
+                                extract_scalars_from_info(infos[j]),
+                            )
+                        elif (
+                            len(
+                                self.config.habitat_baselines.eval.video_option
+                            )
+                            > 0
+                        ):
+                            generate_video(
+                                video_option=self.config.habitat_baselines.eval.video_option,
+                                video_dir=self.config.habitat_baselines.video_dir,
+                                images=evaluation.rgb_frames[i],
+                                episode_id=current_episodes_info[j].episode_id,
+                                checkpoint_idx=evaluation.checkpoint_index,
+                                metrics=extract_scalars_from_info(infos[j]),
+                                fps=self.config.habitat_baselines.video_fps,
+                                tb_writer=writer,
+                                keys_to_include_in_name=self.config.habitat_baselines.eval_keys_to_include_in_name,
+                            )
+
+                            evaluation.rgb_frames[i] = []
 
-            not_done_masks = not_done_masks.to(device=self.device)
-            (
-                self.envs,
-                test_recurrent_hidden_states,
-                not_done_masks,
-                current_episode_reward,
-                prev_actions,
-                batch,
-                rgb_frames,
-            ) = self._pause_envs(
-                envs_to_pause,
-                self.envs,
-                test_recurrent_hidden_states,
-                not_done_masks,
-                current_episode_reward,
-                prev_actions,
-                batch,
-                rgb_frames,
+                        gfx_str = infos[j].get(GfxReplayMeasure.cls_uuid, "")
+                        if gfx_str != "":
+                            write_gfx_replay(
+                                gfx_str,
+                                self.config.habitat.task,
+                                current_episodes_info[j].episode_id,
+                            )
+
+                if scheduler is not None:
+                    evaluation_envs_to_pause = [
+                        i
+                        for i in range(n_envs)
+                        if scheduler.current_episode(i) is None
+                    ]
+                    scheduler.pause_envs(evaluation_envs_to_pause)
+                if len(evaluation.stats_episodes) >= (
+                    number_of_eval_episodes * evals_per_ep
+                ):
+                    # All the episodes of the checkpoint were evaluated
+                    evaluation_envs_to_pause = list(range(n_envs))
+                if evaluation.video_writer is not None:
+                    evaluation.video_writer.pause_envs(
+                        evaluation_envs_to_pause
+                    )
+                evaluation.pause_envs(evaluation_envs_to_pause)
+                if evaluation.num_envs == 0 and evaluation.eval_time is None:
+                    evaluation.eval_time = time.time() - eval_start_time
+                envs_to_pause += [
+                    env_slice.start + i for i in evaluation_envs_to_pause
+                ]
+
+            # pausing self.envs with no new episode
+            if len(envs_to_pause) > 0:
+                state_index = list(range(self.envs.num_envs))
+                for idx in reversed(envs_to_pause):
+                    state_index.pop(idx)
+                    self.envs.pause_at(idx)
+                for sensor_name, sensor in batch.items():
+                    batch[sensor_name] = sensor[state_index]
+
+        for evaluation in evaluations:
+            evaluation.pbar.close()
+            if evaluation.video_writer is not None:
+                evaluation.video_writer.close()
+        for evaluation in evaluations:
+            if num_checkpoints > 1:
+                logger.info(f"Checkpoint {evaluation.checkpoint_index}:")
+            self._log_eval_results(
+                evaluation,
+                writer,
+                number_of_eval_episodes,
+                envs_setup_time,
             )
 
-        pbar.close()
+        if self._eval_envs_key is not None:
+            # Kept for the next checkpoint
+            self.envs.resume_all()
+        else:
+            self.envs.close()
+
+    @staticmethod
+    def _get_eval_slices(
+        evaluations: List["_CheckpointEvaluation"],
+    ) -> List[Tuple["_CheckpointEvaluation", slice]]:
+        r"""The evaluations that still have environments, with the slice of
+        their environments in the environments that are not paused.
+        """
+        slices = []
+        env_start = 0
+        for evaluation in evaluations:
+            if evaluation.num_envs > 0:
+                slices.append(
+                    (
+                        evaluation,
+                        slice(env_start, env_start + evaluation.num_envs),
+                    )
+                )
+            env_start += evaluation.num_envs
+        return slices
+
+    def _log_eval_results(
+        self,
+        evaluation: "_CheckpointEvaluation",
+        writer: TensorboardWriter,
+        number_of_eval_episodes: int,
+        envs_setup_time: float,
+    ) -> None:
+        stats_episodes = evaluation.stats_episodes
         assert (
-            len(ep_eval_count) >= number_of_eval_episodes
-        ), f"Expected {number_of_eval_episodes} episodes, got {len(ep_eval_count)}."
+            len(evaluation.ep_eval_count) >= number_of_eval_episodes
+        ), f"Expected {number_of_eval_episodes} episodes, got {len(evaluation.ep_eval_count)}."
 
         aggregated_stats = {}
         for stat_key in next(iter(stats_episodes.values())).keys():
@@ -1090,8 +1503,19 @@ class PPOTrainer(BaseRLTrainer):
 
         for k, v in aggregated_stats.items():
             logger.info(f"Average episode {k}: {v:.4f}")
+        assert evaluation.eval_time is not None
+        eval_time = evaluation.eval_time
+        logger.info(
+            f"Evaluated {len(stats_episodes)} episodes in"
+            f" {eval_time:.1f} seconds"
+            f" ({self.config.habitat_baselines.eval.episode_scheduling}"
+            " episode scheduling),"
+            f" {envs_setup_time:.1f} seconds of environment setup,"
+            f" {evaluation.num_eval_steps / eval_time:.1f} steps per second."
+        )
 
-        step_id = checkpoint_index
+        step_id = evaluation.checkpoint_index
+        ckpt_dict = evaluation.ckpt_dict
         if "extra_state" in ckpt_dict and "step" in ckpt_dict["extra_state"]:
             step_id = ckpt_dict["extra_state"]["step"]
 
@@ -1102,5 +1526,22 @@ class PPOTrainer(BaseRLTrainer):
         metrics = {k: v for k, v in aggregated_stats.items() if k != "reward"}
         for k, v in metrics.items():
             writer.add_scalar(f"eval_metrics/{k}", v, step_id)
+        writer.add_scalar(
+            "eval_perf/steps_per_sec",
+            evaluation.num_eval_steps / eval_time,
+            step_id,
+        )
+        writer.add_scalar(
+            "eval_perf/episodes_per_sec",
+            len(stats_episodes) / eval_time,
+            step_id,
+        )
+        writer.add_scalar(
+            "eval_perf/envs_setup_time", envs_setup_time, step_id
+        )
 
-        self.envs.close()
+    def eval(self) -> None:
+        try:
+            super().eval()
+        finally:
+            self._close_eval_envs()
@@ -22,41 +22,9 @@ if not TYPE_CHECKING and use_faster_fifo:
 
     BatchedQueue = faster_fifo.Queue
 else:
-    import queue
-    import time
-    import warnings
-
-    import torch
-
-    warnings.warn(
-        "Unable to import faster_fifo."
-        " Using the fallback. This may reduce performance."
-    )
-
-    class BatchedQueue(torch.multiprocessing.Queue):
-        def get_many(
-            self,
-            block=True,
-            timeout=10.0,
-            max_messages_to_get=1_000_000_000,
-        ):
-            msgs = [self.get(block, timeout)]
-            while len(msgs) < max_messages_to_get:
-                try:
-                    msgs.append(self.get_nowait())
-                except queue.Empty:
-                    break
-
-            return msgs
-
-        def put_many(self, xs, block=True, timeout=10.0):
-            t_start = time.perf_counter()
-            n_put = 0
-            for x in xs:
-                self.put(x, block, timeout - (t_start - time.perf_counter()))
-                n_put += 1
-
-            if n_put != len(xs):
-                raise RuntimeError(
-                    f"Couldn't put all. Put {n_put}, needed to put {len(xs)}"
-                )
+    from habitat_baselines.rl.ver.shared_memory_queue import SharedMemoryQueue
+
+    # Shared memory ring buffer with the same interface, messages are
+    # written and read in batches under a lock instead of one by one
+    # through a pipe.
+    BatchedQueue = SharedMemoryQueue
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import multiprocessing
+import queue
+import struct
+import time
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.multiprocessing  # noqa: F401, registers the tensor reductions
+
+# Each message is a record: its size (uint32), its kind (uint8) and its
+# payload. Integers, the most common messages (environment indices), are
+# stored as int64 instead of being pickled. The other messages are pickled
+# with the ForkingPickler, like with multiprocessing queues, so that shared
+# memory tensors are sent as handles to their memory instead of copies.
+_RECORD_HEADER = struct.Struct("<IB")
+_INT_PAYLOAD = struct.Struct("<q")
+_KIND_INT = 0
+_KIND_PICKLE = 1
+
+_READ_POS = 0
+_WRITE_POS = 1
+
+
+def _encode(x: Any) -> bytes:
+    if type(x) is int and -(2**63) <= x < 2**63:
+        return _RECORD_HEADER.pack(
+            _INT_PAYLOAD.size, _KIND_INT
+        ) + _INT_PAYLOAD.pack(x)
+    payload = ForkingPickler.dumps(x)
+    return _RECORD_HEADER.pack(len(payload), _KIND_PICKLE) + payload
+
+
+def _decode(kind: int, payload: memoryview) -> Any:
+    if kind == _KIND_INT:
+        return _INT_PAYLOAD.unpack(payload)[0]
+    return ForkingPickler.loads(payload)
+
+
+class SharedMemoryQueue:
+    r"""Multi-producer multi-consumer queue backed by a ring buffer of bytes
+    in shared memory, with the :py:`get_many`/:py:`put_many` interface of
+    :py:`faster_fifo.Queue`.
+
+    :ref:`put_many` encodes all the messages first and then writes them in
+    a single copy, and :ref:`get_many` takes all the messages it can in a
+    single copy and decodes them after releasing the lock, so the lock is
+    only held for the copies. Producers and consumers wait on a condition
+    instead of polling.
+
+    The queue can be passed to processes started with
+    :py:`torch.multiprocessing` (the buffers are shared torch tensors).
+    """
+
+    def __init__(self, max_size_bytes: int = 1024 * 1024) -> None:
+        self._capacity = max_size_bytes
+        self._buffer = torch.zeros((max_size_bytes,), dtype=torch.uint8)
+        self._buffer.share_memory_()
+        self._positions = torch.zeros((2,), dtype=torch.int64)
+        self._positions.share_memory_()
+        # The spawn context creates named semaphores, which can be
+        # shared with processes started by any method.
+        self._cond = multiprocessing.get_context("spawn").Condition()
+        self._make_views()
+
+    def _make_views(self) -> None:
+        self._buffer_np = self._buffer.numpy()
+        self._positions_np = self._positions.numpy()
+
+    def __getstate__(self):
+        return (self._capacity, self._buffer, self._positions, self._cond)
+
+    def __setstate__(self, state):
+        self._capacity, self._buffer, self._positions, self._cond = state
+        self._make_views()
+
+    def _num_bytes_used(self) -> int:
+        return int(
+            self._positions_np[_WRITE_POS] - self._positions_np[_READ_POS]
+        )
+
+    def _wait(
+        self, is_ready, block: bool, timeout: float, error: type
+    ) -> None:
+        r"""Waits with the lock held until is_ready()."""
+        if is_ready():
+            return
+        if not block:
+            raise error()
+        deadline = time.perf_counter() + timeout
+        while not is_ready():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise error()
+            self._cond.wait(remaining)
+
+    def _write(self, data: bytes) -> None:
+        start = int(self._positions_np[_WRITE_POS]) % self._capacity
+        first = min(len(data), self._capacity - start)
+        data_np = np.frombuffer(data, dtype=np.uint8)
+        self._buffer_np[start : start + first] = data_np[:first]
+        self._buffer_np[: len(data) - first] = data_np[first:]
+        self._positions_np[_WRITE_POS] += len(data)
+
+    def _read(self, num_bytes: int, offset: int = 0) -> bytes:
+        r"""Reads num_bytes bytes, offset bytes after the read position."""
+        start = (int(self._positions_np[_READ_POS]) + offset) % self._capacity
+        first = min(num_bytes, self._capacity - start)
+        data = self._buffer_np[start : start + first].tobytes()
+        if first < num_bytes:
+            data += self._buffer_np[: num_bytes - first].tobytes()
+        return data
+
+    def put_many(
+        self, xs: Sequence[Any], block: bool = True, timeout: float = 10.0
+    ) -> None:
+        data = b"".join([_encode(x) for x in xs])
+        if len(data) > self._capacity:
+            raise ValueError(
+                f"Messages of {len(data)} bytes do not fit in a queue of"
+                f" {self._capacity} bytes"
+            )
+
+        with self._cond:
+            self._wait(
+                lambda: self._capacity - self._num_bytes_used() >= len(data),
+                block,
+                timeout,
+                queue.Full,
+            )
+            self._write(data)
+            self._cond.notify_all()
+
+    def put(self, x: Any, block: bool = True, timeout: float = 10.0) -> None:
+        self.put_many([x], block, timeout)
+
+    def put_nowait(self, x: Any) -> None:
+        self.put(x, block=False)
+
+    def get_many(
+        self,
+        block: bool = True,
+        timeout: float = 10.0,
+        max_messages_to_get: int = 1_000_000_000,
+    ) -> List[Any]:
+        with self._cond:
+            self._wait(
+                lambda: self._num_bytes_used() > 0, block, timeout, queue.Empty
+            )
+            # Find the messages to take, the others stay in the queue
+            num_bytes_used = self._num_bytes_used()
+            num_bytes = 0
+            records: List[Tuple[int, int, int]] = []
+            while (
+                num_bytes < num_bytes_used
+                and len(records) < max_messages_to_get
+            ):
+                size, kind = _RECORD_HEADER.unpack(
+                    self._read(_RECORD_HEADER.size, num_bytes)
+                )
+                num_bytes += _RECORD_HEADER.size
+                records.append((kind, num_bytes, size))
+                num_bytes += size
+
+            data = memoryview(self._read(num_bytes))
+            self._positions_np[_READ_POS] += num_bytes
+            self._cond.notify_all()
+
+        return [
+            _decode(kind, data[start : start + size])
+            for kind, start, size in records
+        ]
+
+    def get(self, block: bool = True, timeout: float = 10.0) -> Any:
+        return self.get_many(block, timeout, max_messages_to_get=1)[0]
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def empty(self) -> bool:
+        return self._num_bytes_used() == 0
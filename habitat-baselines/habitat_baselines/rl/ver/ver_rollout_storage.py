@@ -6,13 +6,13 @@
 
 from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import numba
 import numpy as np
 import torch
 
 from habitat_baselines.common.rollout_storage import RolloutStorage
 from habitat_baselines.common.tensor_dict import DictTree, TensorDict
 from habitat_baselines.rl.models.rnn_state_encoder import (
-    _np_invert_permutation,
     build_pack_info_from_episode_ids,
     build_rnn_build_seq_info,
 )
@@ -119,6 +119,62 @@ def generate_ver_mini_batches(
         ]
 
 
+@numba.jit(nopython=True)
+def _compute_packed_returns(
+    rewards: np.ndarray,
+    values: np.ndarray,
+    is_not_stale: np.ndarray,
+    returns: np.ndarray,
+    select_inds: np.ndarray,
+    num_seqs_at_step: np.ndarray,
+    sequence_lengths: np.ndarray,
+    last_sequence_in_batch_mask: np.ndarray,
+    gamma: float,
+    tau: float,
+) -> int:
+    r"""Computes the GAE returns in place, stepping backwards through the
+    packed sequences given by build_pack_info_from_episode_ids.
+
+    The GAE is accumulated in float64 for each sequence.
+    The returns of stale steps that already have a finite return are left as
+    they are, and the last step of each environment (whose value is only used
+    as the bootstrap) is marked with a NaN.
+
+    Returns the number of steps that were not visited, i.e. 0.
+    """
+    gae = np.zeros((num_seqs_at_step[0],), dtype=np.float64)
+    last_values = np.zeros((num_seqs_at_step[0],), dtype=np.float64)
+    tau_gamma = tau * gamma
+    ptr = select_inds.shape[0]
+    for len_minus_1 in range(num_seqs_at_step.shape[0] - 1, -1, -1):
+        n_seqs = num_seqs_at_step[len_minus_1]
+        ptr -= n_seqs
+        for i in range(n_seqs):
+            ind = select_inds[ptr + i]
+            value = np.float64(values[ind])
+            q_est = np.float64(rewards[ind]) + gamma * last_values[i]
+            gae[i] = (q_est - value) + tau_gamma * gae[i]
+
+            if (
+                sequence_lengths[i] == len_minus_1 + 1
+                and last_sequence_in_batch_mask[i]
+            ):
+                # For the last step from each worker, we do an extra loop
+                # to fill last_values with the bootstrap.  So we re-zero
+                # the GAE value here and mark the return with a nan
+                gae[i] = 0.0
+                returns[ind] = np.nan
+            elif is_not_stale[ind] or not np.isfinite(returns[ind]):
+                # If the step isn't stale or we don't have a return
+                # calculate, use the newly calculated return value,
+                # otherwise keep the current one
+                returns[ind] = gae[i] + value
+
+            last_values[i] = value
+
+    return ptr
+
+
 class VERRolloutStorage(RolloutStorage):
     r"""Rollout storage for VER."""
     ptr: np.ndarray
@@ -499,55 +555,20 @@ class VERRolloutStorage(RolloutStorage):
         if self.device.type == "cuda":
             torch.cuda.synchronize(self.device)
 
-        rewards, values, is_not_stale = map(
-            lambda t: t.view(-1, 1).numpy()[self.select_inds],
-            (rewards_t, values_t, is_not_stale_t),
+        ptr = _compute_packed_returns(
+            rewards_t.view(-1).numpy(),
+            values_t.view(-1).numpy(),
+            is_not_stale_t.view(-1).numpy(),
+            returns_t.view(-1).numpy(),
+            self.select_inds,
+            self.num_seqs_at_step,
+            self.sequence_lengths,
+            self.last_sequence_in_batch_mask,
+            float(gamma),
+            float(tau),
         )
-        returns = returns_t.view(-1, 1).numpy()
-        returns[:] = returns[self.select_inds]
-
-        gae = np.zeros((self.num_seqs_at_step[0], 1))
-        last_values = gae.copy()
-        ptr = returns.size
-        for len_minus_1, n_seqs in reversed(
-            list(enumerate(self.num_seqs_at_step))
-        ):
-            curr_slice = slice(ptr - n_seqs, ptr)
-            q_est = rewards[curr_slice] + gamma * last_values[:n_seqs]
-            delta = q_est - values[curr_slice]
-            gae[:n_seqs] = delta + (tau * gamma) * gae[:n_seqs]
-
-            is_last_step = self.sequence_lengths == (len_minus_1 + 1)
-            is_last_step_for_env = (
-                is_last_step & self.last_sequence_in_batch_mask
-            )
-
-            # For the last step from each worker, we do an extra loop
-            # to fill last_values with the bootstrap.  So we re-zero
-            # the GAE value here
-            gae[is_last_step_for_env] = 0.0
-
-            # If the step isn't stale or we don't have a return
-            # calculate, use the newly calculated return value,
-            # otherwise keep the current one
-            use_new_value = is_not_stale[curr_slice] | np.logical_not(
-                np.isfinite(returns[curr_slice])
-            )
-            returns[curr_slice][use_new_value] = (
-                gae[:n_seqs] + values[curr_slice]
-            )[use_new_value]
-
-            # We also mark these with a nan
-            returns[curr_slice][is_last_step_for_env[:n_seqs]] = float("nan")
-
-            last_values[:n_seqs] = values[curr_slice]
-
-            ptr -= n_seqs
-
         assert ptr == 0
 
-        returns[:] = returns[_np_invert_permutation(self.select_inds)]
-
         if not self.variable_experience:
             assert torch.all(torch.isfinite(returns_t[:-1])), dict(
                 returns=returns_t.squeeze(),
@@ -557,9 +578,7 @@ class VERRolloutStorage(RolloutStorage):
                     -1, self._num_envs
                 ),
                 step_ids=self.step_ids_cpu.reshape(-1, self._num_envs),
-                is_not_stale=is_not_stale[
-                    _np_invert_permutation(self.select_inds)
-                ].reshape(-1, self._num_envs),
+                is_not_stale=is_not_stale_t.view(-1, self._num_envs),
             )
         else:
             assert torch.isfinite(returns_t).long().sum() == (
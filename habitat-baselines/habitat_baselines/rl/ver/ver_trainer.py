@@ -459,6 +459,7 @@ class VERTrainer(PPOTrainer):
             ]
             count_checkpoints = requeue_stats["count_checkpoints"]
 
+        self._init_checkpoint_writer()
         if self.ver_config.overlap_rollouts_and_learn:
             self.preemption_decider.start_rollout()
 
@@ -484,12 +485,14 @@ class VERTrainer(PPOTrainer):
                 save_resume_state(
                     resume_state,
                     self.config,
+                    checkpoint_writer=self._checkpoint_writer,
                 )
 
             if EXIT.is_set():
                 profiling_wrapper.range_pop()  # train update
                 [w.close() for w in self._all_workers]
                 [w.join() for w in self._all_workers]
+                self._close_checkpoint_writer()
 
                 requeue_job()
                 break
@@ -572,6 +575,7 @@ class VERTrainer(PPOTrainer):
 
         [w.close() for w in self._all_workers]
         [w.join() for w in self._all_workers]
+        self._close_checkpoint_writer()
 
         if self._is_distributed:
             torch.distributed.barrier()
@@ -6,11 +6,11 @@
 
 import glob
 import math
-import numbers
 import os
 import re
 import shutil
 import tarfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
 from typing import (
     TYPE_CHECKING,
@@ -190,12 +190,74 @@ def linear_decay(epoch: int, total_num_updates: int) -> float:
     return 1 - (epoch / float(total_num_updates))
 
 
+def _get_space_key(tree: DictTree) -> Tuple[Any, ...]:
+    r"""Returns a hashable description of the keys, shapes and dtypes of all
+    the leaves of an observation, in order.
+    """
+    return tuple(
+        (k, _get_space_key(v))
+        if isinstance(v, dict)
+        else (k, tuple(getattr(v, "shape", ())), getattr(v, "dtype", type(v)))
+        for k, v in tree.items()
+    )
+
+
+def _get_leaf(tree: DictTree, key: Tuple[str, ...]) -> Any:
+    if len(key) == 1:
+        return tree[key[0]]
+    for k in key:
+        tree = tree[k]  # type: ignore
+    return tree
+
+
+def _cpu_tensor_to_numpy(t: Any) -> Any:
+    if isinstance(t, torch.Tensor) and t.device.type == "cpu":
+        return t.numpy()
+    return t
+
+
+def _copy_rows(
+    batched: Union[torch.Tensor, np.ndarray],
+    sensors: List[Any],
+    start: int,
+    stop: int,
+) -> None:
+    for i in range(start, stop):
+        sensor = sensors[i]
+        # Use isinstance(sensor, np.ndarray) here instead of
+        # np.asarray as this is quickier for the more common
+        # path of sensor being an np.ndarray
+        # np.asarray is ~3x slower than checking
+        if isinstance(sensor, np.ndarray):
+            batched[i] = sensor  # type: ignore
+        elif isinstance(sensor, torch.Tensor):
+            batched[i].copy_(sensor, non_blocking=True)  # type: ignore
+        # If the sensor wasn't a tensor, then it's some CPU side data
+        # so use a numpy array
+        else:
+            batched[i] = np.asarray(sensor)  # type: ignore
+
+
 @attr.s(auto_attribs=True, slots=True)
 class _ObservationBatchingCache(metaclass=Singleton):
     r"""Helper for batching observations that maintains a cpu-side tensor
     that is the right size and is pinned to cuda memory
+
+    The key of each leaf of the observations is computed once per
+    observation space (the keys, shapes and dtypes of all the leaves), and
+    the copies of large sensors into the cpu-side tensors are split over
+    num_threads threads (numpy releases the GIL while copying).
     """
     _pool: Dict[Any, Union[torch.Tensor, np.ndarray]] = {}
+    _layouts: Dict[Tuple[Any, ...], List[Tuple[str, ...]]] = {}
+    # Number of threads used to copy the sensors, 1 to copy them on the
+    # calling thread only
+    num_threads: int = min(4, os.cpu_count() or 1)
+    # Sensors smaller than this (in bytes, for the whole batch) are copied
+    # on the calling thread
+    min_parallel_bytes: int = 1 << 20
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_threads: int = 0
 
     def get(
         self,
@@ -243,57 +305,79 @@ class _ObservationBatchingCache(metaclass=Singleton):
         self._pool[key] = cache
         return cache
 
+    def _get_layout(self, observation: DictTree) -> List[Tuple[str, ...]]:
+        space_key = _get_space_key(observation)
+        layout = self._layouts.get(space_key, None)
+        if layout is None:
+            layout, _ = TensorOrNDArrayDict.from_tree(observation).flatten()
+            self._layouts[space_key] = layout
+        return layout
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if (
+            self._executor is None
+            or self._executor_threads != self.num_threads
+        ):
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_threads, thread_name_prefix="batch_obs"
+            )
+            self._executor_threads = self.num_threads
+        return self._executor
+
     def batch_obs(
         self,
         observations: List[DictTree],
         device: Optional[torch.device] = None,
     ) -> TensorDict:
-        observations = [
-            TensorOrNDArrayDict.from_tree(o).map(
-                lambda t: t.numpy()
-                if isinstance(t, torch.Tensor) and t.device.type == "cpu"
-                else t
-            )
-            for o in observations
+        num_obs = len(observations)
+        observation_keys = self._get_layout(observations[0])
+        all_sensors = [
+            [_cpu_tensor_to_numpy(_get_leaf(o, key)) for o in observations]
+            for key in observation_keys
+        ]
+
+        batched_tensors = [
+            self.get(num_obs, key, torch.as_tensor(sensors[0]), device)
+            for key, sensors in zip(observation_keys, all_sensors)
         ]
-        observation_keys, _ = observations[0].flatten()
-        observation_tensors = [o.flatten()[1] for o in observations]
+
+        # Start the copies of the large sensors on the thread pool
+        pending: Dict[int, List[Future]] = {}
+        if self.num_threads > 1:
+            for idx, batched in enumerate(batched_tensors):
+                if (
+                    isinstance(batched, np.ndarray)
+                    and batched.nbytes >= self.min_parallel_bytes
+                ):
+                    bounds = np.linspace(
+                        0, num_obs, min(self.num_threads, num_obs) + 1
+                    ).astype(int)
+                    pending[idx] = [
+                        self._get_executor().submit(
+                            _copy_rows,
+                            batched,
+                            all_sensors[idx],
+                            start,
+                            stop,
+                        )
+                        for start, stop in zip(bounds[:-1], bounds[1:])
+                    ]
 
         # Order sensors by size, stack and move the largest first
         upload_ordering = sorted(
             range(len(observation_keys)),
-            key=lambda idx: 1
-            if isinstance(observation_tensors[0][idx], numbers.Number)
-            else int(np.prod(observation_tensors[0][idx].shape)),  # type: ignore
+            key=lambda idx: int(np.prod(batched_tensors[idx].shape)),
             reverse=True,
         )
 
-        batched_tensors = []
-        for sensor_name, obs in zip(observation_keys, observation_tensors[0]):
-            batched_tensors.append(
-                self.get(
-                    len(observations),
-                    sensor_name,
-                    torch.as_tensor(obs),
-                    device,
-                )
-            )
-
         for idx in upload_ordering:
-            for i, all_obs in enumerate(observation_tensors):
-                obs = all_obs[idx]
-                # Use isinstance(sensor, np.ndarray) here instead of
-                # np.asarray as this is quickier for the more common
-                # path of sensor being an np.ndarray
-                # np.asarray is ~3x slower than checking
-                if isinstance(obs, np.ndarray):
-                    batched_tensors[idx][i] = obs  # type: ignore
-                elif isinstance(obs, torch.Tensor):
-                    batched_tensors[idx][i].copy_(obs, non_blocking=True)  # type: ignore
-                # If the sensor wasn't a tensor, then it's some CPU side data
-                # so use a numpy array
-                else:
-                    batched_tensors[idx][i] = np.asarray(obs)  # type: ignore
+            if idx in pending:
+                for future in pending[idx]:
+                    future.result()
+            else:
+                _copy_rows(batched_tensors[idx], all_sensors[idx], 0, num_obs)
 
             # With the batching cache, we use pinned mem
             # so we can start the move to the GPU async
@@ -332,6 +416,93 @@ def batch_obs(
     return _ObservationBatchingCache().batch_obs(observations, device)
 
 
+class IncrementalObservationBatcher:
+    r"""Batches observations one at a time, in any order, so that the
+    observations that are already there can be copied to the device while
+    waiting for the others.
+
+    Each observation is written to its row of a cpu-side (pinned if device
+    is a cuda device) batch, and that row is copied to the device right
+    away with a non-blocking copy. The batch is the same as what
+    :ref:`batch_obs` returns for the observations in index order.
+    """
+
+    def __init__(
+        self, num_obs: int, device: Optional[torch.device] = None
+    ) -> None:
+        r"""
+        Args:
+            num_obs: The number of observations in the batch.
+            device: The torch.device to put the resulting tensors on.
+                Will not move the tensors if None
+        """
+        self._num_obs = num_obs
+        self._device = device
+        self._keys: Optional[Tuple[Any, ...]] = None
+        self._cpu_tensors: List[Union[torch.Tensor, np.ndarray]] = []
+        self._device_tensors: List[Optional[torch.Tensor]] = []
+
+    def _allocate(self, tensors: List[Any]) -> None:
+        cache = _ObservationBatchingCache()
+        for sensor_name, obs in zip(self._keys, tensors):
+            cpu_tensor = cache.get(
+                self._num_obs, sensor_name, torch.as_tensor(obs), self._device
+            )
+            self._cpu_tensors.append(cpu_tensor)
+            if (
+                self._device is not None
+                and isinstance(cpu_tensor, np.ndarray)
+                and self._device.type != "cpu"
+            ):
+                self._device_tensors.append(
+                    torch.empty(
+                        cpu_tensor.shape,
+                        dtype=torch.from_numpy(cpu_tensor[:0]).dtype,
+                        device=self._device,
+                    )
+                )
+            else:
+                self._device_tensors.append(None)
+
+    def add(self, index: int, observation: DictTree) -> None:
+        r"""Adds the observation in the index-th row of the batch."""
+        keys = _ObservationBatchingCache()._get_layout(observation)
+        tensors = [
+            _cpu_tensor_to_numpy(_get_leaf(observation, k)) for k in keys
+        ]
+        if self._keys is None:
+            self._keys = tuple(keys)
+            self._allocate(tensors)
+
+        for obs, cpu_tensor, device_tensor in zip(
+            tensors, self._cpu_tensors, self._device_tensors
+        ):
+            if isinstance(obs, torch.Tensor):
+                cpu_tensor[index].copy_(obs, non_blocking=True)  # type: ignore
+            else:
+                cpu_tensor[index] = obs
+            if device_tensor is not None:
+                device_tensor[index].copy_(
+                    torch.from_numpy(cpu_tensor[index]), non_blocking=True  # type: ignore
+                )
+
+    def get(self) -> TensorDict:
+        r"""Returns the batch once all the observations were added."""
+        assert self._keys is not None, "No observation was added"
+        batched_tensors = []
+        for cpu_tensor, device_tensor in zip(
+            self._cpu_tensors, self._device_tensors
+        ):
+            if device_tensor is None:
+                if isinstance(cpu_tensor, np.ndarray):
+                    cpu_tensor = torch.from_numpy(cpu_tensor)
+                device_tensor = cpu_tensor.to(  # type: ignore
+                    self._device, non_blocking=True
+                )
+            batched_tensors.append(device_tensor)
+        return TensorDict.from_flattened(list(self._keys), batched_tensors)
+
+
 def get_checkpoint_id(ckpt_path: str) -> Optional[int]:
     r"""Attempts to extract the ckpt_id from the filename of a checkpoint.
     Assumes structure of ckpt.ID.path .
@@ -379,6 +550,38 @@ def poll_checkpoint_folder(
     return None
 
 
+def get_video_name(
+    episode_id: Union[int, str],
+    checkpoint_idx: int,
+    metrics: Dict[str, float],
+    keys_to_include_in_name: Optional[List[str]] = None,
+) -> str:
+    r"""The name of the video of an evaluation episode, see
+    :ref:`generate_video`.
+    """
+    metric_strs = []
+    if (
+        keys_to_include_in_name is not None
+        and len(keys_to_include_in_name) > 0
+    ):
+        use_metrics_k = [
+            k
+            for k in metrics
+            if any(
+                to_include_k in k for to_include_k in keys_to_include_in_name
+            )
+        ]
+    else:
+        use_metrics_k = list(metrics.keys())
+
+    for k in use_metrics_k:
+        metric_strs.append(f"{k}={metrics[k]:.2f}")
+
+    return f"episode={episode_id}-ckpt={checkpoint_idx}-" + "-".join(
+        metric_strs
+    )
+
+
 def generate_video(
     video_option: List[str],
     video_dir: Optional[str],
@@ -409,26 +612,8 @@ def generate_video(
     if len(images) < 1:
         return
 
-    metric_strs = []
-    if (
-        keys_to_include_in_name is not None
-        and len(keys_to_include_in_name) > 0
-    ):
-        use_metrics_k = [
-            k
-            for k in metrics
-            if any(
-                to_include_k in k for to_include_k in keys_to_include_in_name
-            )
-        ]
-    else:
-        use_metrics_k = list(metrics.keys())
-
-    for k in use_metrics_k:
-        metric_strs.append(f"{k}={metrics[k]:.2f}")
-
-    video_name = f"episode={episode_id}-ckpt={checkpoint_idx}-" + "-".join(
-        metric_strs
+    video_name = get_video_name(
+        episode_id, checkpoint_idx, metrics, keys_to_include_in_name
     )
     if "disk" in video_option:
         assert video_dir is not None
@@ -614,7 +614,13 @@ class InstructionSensorConfig(LabSensorConfig):
 # -----------------------------------------------------------------------------
 @dataclass
 class MeasurementConfig(HabitatBaseConfig):
+    r"""
+    :property update_policy: When the measure is updated during an episode: "every_step", "every_k_steps" (every `update_interval` steps), "episode_end" (only after the last step) or "on_demand" (when its metric is read with `Measure.get_metric`, e.g. by a measure that depends on it). Uses the default policy of the measure if None. The metrics of the steps have the last value of the measures that are not updated on the step, all the measures are up to date after the last step. Measures that end the episode should be updated on every step, and an on demand measure used as the reward or success measure is updated on every step.
+    :property update_interval: The number of steps between two updates with the "every_k_steps" policy. Uses the default interval of the measure if None.
+    """
     type: str = MISSING
+    update_policy: Optional[str] = None
+    update_interval: Optional[int] = None
 
 
 @dataclass
@@ -659,6 +665,11 @@ class FogOfWarConfig:
     draw: bool = True
     visibility_dist: float = 5.0
     fov: int = 90
+    # If true, the fog of war mask is updated in place with precomputed
+    # rays (snapped to the closest of the angle steps) and the top_down_map
+    # metric has a "dirty_rect" entry with the region of the map and mask
+    # changed by the step.
+    incremental: bool = False
 
 
 @dataclass
@@ -677,6 +688,13 @@ class TopDownMapMeasurementConfig(MeasurementConfig):
     # axes aligned bounding boxes
     draw_goal_aabbs: bool = True
     fog_of_war: FogOfWarConfig = FogOfWarConfig()
+    # Number of maps (one per scene and floor height) kept in memory so that
+    # the map is only computed from the navmesh once per scene. Episode
+    # specific drawings are done on a copy. 0 disables the cache.
+    map_cache_size: int = 8
+    # If set, the maps are also saved in this directory and reused by other
+    # processes and runs.
+    map_cache_dir: str = ""
 
 
 @dataclass
@@ -1065,9 +1083,17 @@ class DistanceToGoalMeasurementConfig(MeasurementConfig):
     In Navigation tasks only, measures the geodesic distance to the goal.
 
     :property distance_to: If 'POINT' measures the distance to the closest episode goal. If 'VIEW_POINTS' measures the distance to the episode's goal's viewpoint.
+    :property use_distance_field: If True, the distances to the goals of the episode are precomputed at reset over a grid of the floor (shared by the episodes with the same goals in the scene) and looked up at each step instead of being queried to the simulator. They overestimate the exact distances by up to a few percent. The distance at reset is always exact.
+    :property distance_field_meters_per_pixel: The size of the cells of the distance field.
+    :property distance_field_exact_radius: Distances below this are queried to the simulator, so that success is decided with exact distances.
+    :property distance_field_cache_size: Number of distance fields kept in memory.
     """
     type: str = "DistanceToGoal"
     distance_to: str = "POINT"
+    use_distance_field: bool = False
+    distance_field_meters_per_pixel: float = 0.1
+    distance_field_exact_radius: float = 1.0
+    distance_field_cache_size: int = 16
 
 
 @dataclass
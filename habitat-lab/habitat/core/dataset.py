@@ -11,6 +11,7 @@ of a ``habitat.Agent`` inside ``habitat.Env``.
 import copy
 import os
 import random
+from collections import deque
 from itertools import groupby
 from typing import (
     TYPE_CHECKING,
@@ -22,6 +23,7 @@ from typing import (
     List,
     Optional,
     Sequence,
+    Tuple,
     TypeVar,
     Union,
 )
@@ -109,7 +111,9 @@ T = TypeVar("T", bound=Episode)
 
 class Dataset(Generic[T]):
     r"""Base class for dataset specification."""
-    episodes: List[T]
+    # A list, or a lazy sequence for datasets that build their episodes
+    # when they are accessed
+    episodes: Sequence[T]
 
     @staticmethod
     def scene_from_scene_path(scene_path: str) -> str:
@@ -136,6 +140,18 @@ class Dataset(Generic[T]):
         dataset = cls(config)  # type: ignore[call-arg]
         return list(map(cls.scene_from_scene_path, dataset.scene_ids))
 
+    @classmethod
+    def get_scene_episode_counts(
+        cls, config: "DictConfig"
+    ) -> Optional[Dict[str, int]]:
+        r"""Returns the number of episodes of each scene of the dataset, if it
+        can be known without loading the dataset.
+
+        :param config: The config for the dataset
+
+        :return: A dict from scene names to episode counts, or :py:`None`
+        """
+
     @classmethod
     def build_content_scenes_filter(cls, config) -> Callable[[T], bool]:
         r"""Returns a filter function that takes an episode and returns True if that
@@ -179,6 +195,16 @@ class Dataset(Generic[T]):
         """
         return [self.episodes[episode_id] for episode_id in indexes]
 
+    def get_episode_keys(self) -> List[Tuple[str, str]]:
+        r"""..
+
+        :return: the :py:`(scene_id, episode_id)` of the episodes, in the
+            order of :ref:`episodes`.
+        """
+        return [
+            (episode.scene_id, episode.episode_id) for episode in self.episodes
+        ]
+
     def get_episode_iterator(self, *args: Any, **kwargs: Any) -> Iterator[T]:
         r"""Gets episode iterator with options. Options are specified in
         :ref:`EpisodeIterator` documentation.
@@ -443,23 +469,30 @@ class EpisodeIterator(Iterator[T]):
 
             next_episode = next(self._iterator)
 
+        next_scene_id = self._get_scene_id(next_episode)
         if (
-            self._prev_scene_id != next_episode.scene_id
+            self._prev_scene_id != next_scene_id
             and self._prev_scene_id is not None
         ):
             self._rep_count = 0
             self._step_count = 0
 
-        self._prev_scene_id = next_episode.scene_id
+        self._prev_scene_id = next_scene_id
         return next_episode
 
+    def _get_scene_id(self, episode: Any) -> str:
+        r"""Returns the scene id of an element of :py:`self.episodes`. This is
+        the only attribute of the episodes the iterator needs, so subclasses
+        can iterate over lightweight episode handles by overriding it.
+        """
+        return episode.scene_id
+
     def _forced_scene_switch(self) -> None:
         r"""Internal method to switch the scene. Moves remaining episodes
         from current scene to the end and switch to next scene episodes.
         """
         grouped_episodes = [
-            list(g)
-            for k, g in groupby(self._iterator, key=lambda x: x.scene_id)
+            list(g) for k, g in groupby(self._iterator, key=self._get_scene_id)
         ]
 
         if len(grouped_episodes) > 1:
@@ -496,10 +529,11 @@ class EpisodeIterator(Iterator[T]):
 
         scene_sort_keys: Dict[str, int] = {}
         for e in episodes:
-            if e.scene_id not in scene_sort_keys:
-                scene_sort_keys[e.scene_id] = len(scene_sort_keys)
+            scene_id = self._get_scene_id(e)
+            if scene_id not in scene_sort_keys:
+                scene_sort_keys[scene_id] = len(scene_sort_keys)
 
-        return sorted(episodes, key=lambda e: scene_sort_keys[e.scene_id])  # type: ignore[arg-type]
+        return sorted(episodes, key=lambda e: scene_sort_keys[self._get_scene_id(e)])  # type: ignore[arg-type]
 
     def step_taken(self) -> None:
         self._step_count += 1
@@ -544,3 +578,55 @@ class EpisodeIterator(Iterator[T]):
         if do_switch:
             self._forced_scene_switch()
             self._set_shuffle_intervals()
+
+
+class EpisodeQueue(Iterator[T]):
+    r"""Episode iterator that returns the episodes put in its queue with
+    :ref:`put`, so that the next episodes of an environment can be chosen
+    from outside of it while it runs, e.g. by an evaluation scheduler.
+
+    When the queue is empty, the last returned episode is returned again.
+    """
+
+    def __init__(
+        self,
+        episodes: Sequence[T],
+        episode_keys: Optional[Sequence[Tuple[str, str]]] = None,
+    ) -> None:
+        r"""..
+
+        :param episodes: the episodes that can be queued. They are identified
+            by their :py:`(scene_id, episode_id)`.
+        :param episode_keys: the :py:`(scene_id, episode_id)` of
+            :p:`episodes`, e.g. from :ref:`Dataset.get_episode_keys`, so that
+            the episodes are only accessed when they are returned. Read from
+            :p:`episodes` if not given.
+        """
+        self.episodes = episodes
+        if episode_keys is None:
+            episode_keys = [
+                (episode.scene_id, episode.episode_id) for episode in episodes
+            ]
+        self._episode_indices: Dict[Tuple[str, str], int] = {
+            key: idx for idx, key in enumerate(episode_keys)
+        }
+        self._queue: "deque[int]" = deque()
+        self._last_episode: Optional[T] = None
+
+    def __iter__(self) -> "EpisodeQueue":
+        return self
+
+    def __len__(self) -> int:
+        r"""The number of queued episodes."""
+        return len(self._queue)
+
+    def put(self, scene_id: str, episode_id: str) -> None:
+        r"""Queues the episode :p:`episode_id` of the scene :p:`scene_id`."""
+        self._queue.append(self._episode_indices[(scene_id, episode_id)])
+
+    def __next__(self) -> T:
+        if len(self._queue) > 0:
+            self._last_episode = self.episodes[self._queue.popleft()]
+        if self._last_episode is None:
+            raise StopIteration
+        return self._last_episode
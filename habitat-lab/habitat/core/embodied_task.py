@@ -9,7 +9,19 @@ r"""Implements task and measurements needed for training and benchmarking of
 
 import time
 from collections import OrderedDict
-from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
+from enum import Enum
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
 import numpy as np
 from omegaconf import OmegaConf
@@ -80,6 +92,22 @@ class SimulatorTaskAction(Action):
         raise NotImplementedError
 
 
+class MeasureUpdatePolicy(Enum):
+    r"""When :ref:`Measurements` updates a :ref:`Measure` during an episode.
+    Whatever the policy, all the measures are up to date after the last step
+    of an episode.
+    """
+    #: On every step.
+    EVERY_STEP = "every_step"
+    #: Every :ref:`Measure.update_interval` steps.
+    EVERY_K_STEPS = "every_k_steps"
+    #: Only after the last step of the episode.
+    EPISODE_END = "episode_end"
+    #: When its metric is read with :ref:`Measure.get_metric`, from the state
+    #: of the last step.
+    ON_DEMAND = "on_demand"
+
+
 class Measure:
     r"""Represents a measure that provides measurement on top of environment
     and task.
@@ -93,11 +121,19 @@ class Measure:
     :ref:`update_metric()` method and the user is also required to set the
     :ref:`uuid <Measure.uuid>` and :ref:`_metric` attributes.
 
+    A measure that is expensive to update and whose metric is not needed on
+    every step can set a lazier :ref:`update_policy`, which can also be set
+    from the measure config.
+
     .. (uuid is a builtin Python module, so just :ref:`uuid` would link there)
     """
 
     _metric: Any
     uuid: str
+    update_policy: MeasureUpdatePolicy = MeasureUpdatePolicy.EVERY_STEP
+    update_interval: int = 1
+    # Set by :ref:`Measurements` while an on demand measure is not up to date
+    _pending_update: Optional[Callable[[], None]] = None
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.uuid = self._get_uuid(*args, **kwargs)
@@ -123,11 +159,17 @@ class Measure:
 
         :return: the current metric for :ref:`Measure`.
         """
+        if self._pending_update is not None:
+            self._pending_update()
         return self._metric
 
 
 class Metrics(dict):
-    r"""Dictionary containing measurements."""
+    r"""Dictionary containing measurements.
+
+    The measures that were not updated on the last step, like the on demand
+    measures that weren't read, have their last metric.
+    """
 
     def __init__(self, measures: Dict[str, Measure]) -> None:
         """Constructor
@@ -136,7 +178,13 @@ class Metrics(dict):
             packaged.
         """
         data = [
-            (uuid, measure.get_metric()) for uuid, measure in measures.items()
+            (
+                uuid,
+                measure._metric
+                if measure._pending_update is not None
+                else measure.get_metric(),
+            )
+            for uuid, measure in measures.items()
         ]
         super().__init__(data)
 
@@ -144,9 +192,20 @@ class Metrics(dict):
 class Measurements:
     r"""Represents a set of Measures, with each :ref:`Measure` being
     identified through a unique id.
+
+    Measures are updated according to their :ref:`Measure.update_policy`. A
+    measure that is not updated on a step is updated later with the
+    arguments of the last step, before the measures that depend on it (see
+    :ref:`check_measure_dependencies`) are updated, when its metric is read
+    with :ref:`Measure.get_metric` if it is on demand, and after the last
+    step of the episode (see :ref:`update_stale_measures`). The
+    :ref:`Metrics` of a step have the last metric of the measures that are
+    not up to date, so that all the steps have the same metrics.
     """
 
     measures: Dict[str, Measure]
+    _dependencies: Dict[str, List[str]]
+    _stale_measures: Set[str]
 
     def __init__(self, measures: Iterable[Measure]) -> None:
         """Constructor
@@ -160,17 +219,69 @@ class Measurements:
                 measure.uuid not in self.measures
             ), "'{}' is duplicated measure uuid".format(measure.uuid)
             self.measures[measure.uuid] = measure
+            assert (
+                measure.update_interval >= 1
+            ), f"'{measure.uuid}' update_interval must be at least 1"
+        self._dependencies = {}
+        self._stale_measures = set()
+        self._num_steps = 0
+        self._step_args: Optional[tuple] = None
 
     def reset_measures(self, *args: Any, **kwargs: Any) -> None:
+        self._clear_stale_measures()
+        self._num_steps = 0
+        self._step_args = None
         for measure in self.measures.values():
             measure.reset_metric(*args, **kwargs)
 
+    def _is_update_due(self, measure: Measure) -> bool:
+        if measure.update_policy == MeasureUpdatePolicy.EVERY_STEP:
+            return True
+        if measure.update_policy == MeasureUpdatePolicy.EVERY_K_STEPS:
+            return self._num_steps % measure.update_interval == 0
+        return False
+
+    def _clear_stale_measures(self) -> None:
+        for measure_name in self._stale_measures:
+            self.measures[measure_name]._pending_update = None
+        self._stale_measures.clear()
+
+    def _update_measure(self, measure_name: str) -> None:
+        measure = self.measures[measure_name]
+        measure._pending_update = None
+        self._stale_measures.discard(measure_name)
+        for dependency_measure in self._dependencies.get(measure_name, []):
+            if dependency_measure in self._stale_measures:
+                self._update_measure(dependency_measure)
+
+        args, kwargs = self._step_args
+        t_start = time.time()
+        measure.update_metric(*args, **kwargs)
+        kwargs["task"].add_perf_timing(
+            f"measures.{measure._get_uuid(*args, **kwargs)}", t_start
+        )
+
     def update_measures(self, *args: Any, task, **kwargs: Any) -> None:
-        for measure in self.measures.values():
-            t_start = time.time()
-            measure.update_metric(*args, task=task, **kwargs)
-            measure_name = measure._get_uuid(*args, task=task, **kwargs)
-            task.add_perf_timing(f"measures.{measure_name}", t_start)
+        self._num_steps += 1
+        self._step_args = (args, dict(kwargs, task=task))
+        for measure_name, measure in self.measures.items():
+            if self._is_update_due(measure):
+                self._update_measure(measure_name)
+            else:
+                self._stale_measures.add(measure_name)
+                if measure.update_policy == MeasureUpdatePolicy.ON_DEMAND:
+                    measure._pending_update = partial(
+                        self._update_measure, measure_name
+                    )
+
+    def update_stale_measures(self) -> None:
+        r"""Updates the measures that were not updated on the last step, this
+        method is called from :ref:`env.Env` after the last step of an
+        episode.
+        """
+        for measure_name in self.measures:
+            if measure_name in self._stale_measures:
+                self._update_measure(measure_name)
 
     def get_metrics(self) -> Metrics:
         r"""Collects measurement from all :ref:`Measure`\ s and returns it
@@ -190,6 +301,7 @@ class Measurements:
         the measure.
         :return:
         """
+        self._dependencies[measure_name] = list(dependencies)
         measure_index = self._get_measure_index(measure_name)
         for dependency_measure in dependencies:
             assert (
@@ -246,12 +358,12 @@ class EmbodiedTask:
             self._physics_target_sps > 0
         ), "physics_target_sps must be positive"
 
-        self.measurements = Measurements(
-            self._init_entities(
-                entities_configs=config.measurements,
-                register_func=registry.get_measure,
-            ).values()
+        measures = self._init_entities(
+            entities_configs=config.measurements,
+            register_func=registry.get_measure,
         )
+        self._set_measure_update_policies(measures, config.measurements)
+        self.measurements = Measurements(measures.values())
 
         self.sensor_suite = SensorSuite(
             self._init_entities(
@@ -272,6 +384,17 @@ class EmbodiedTask:
         if hasattr(self._sim, "add_perf_timing"):
             self._sim.add_perf_timing(*args, **kwargs)
 
+    @staticmethod
+    def _set_measure_update_policies(measures, measures_configs) -> None:
+        for measure_name, measure in measures.items():
+            measure_cfg = OmegaConf.create(measures_configs[measure_name])
+            if measure_cfg.get("update_policy", None) is not None:
+                measure.update_policy = MeasureUpdatePolicy(
+                    measure_cfg.update_policy
+                )
+            if measure_cfg.get("update_interval", None) is not None:
+                measure.update_interval = measure_cfg.update_interval
+
     def _init_entities(self, entities_configs, register_func) -> OrderedDict:
         entities = OrderedDict()
         for entity_name, entity_cfg in entities_configs.items():
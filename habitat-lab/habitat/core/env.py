@@ -13,6 +13,7 @@ from typing import (
     Iterator,
     List,
     Optional,
+    Sequence,
     Tuple,
     Union,
     cast,
@@ -24,7 +25,13 @@ import numpy as np
 from gym import spaces
 
 from habitat.config import read_write
-from habitat.core.dataset import BaseEpisode, Dataset, Episode, EpisodeIterator
+from habitat.core.dataset import (
+    BaseEpisode,
+    Dataset,
+    Episode,
+    EpisodeIterator,
+    EpisodeQueue,
+)
 from habitat.core.embodied_task import EmbodiedTask, Metrics
 from habitat.core.simulator import Observations, Simulator
 from habitat.datasets import make_dataset
@@ -147,6 +154,14 @@ class Env:
             **iter_option_dict
         )
 
+    def reset_episode_iterator(self) -> None:
+        r"""Recreates the episode iterator from the dataset and the config,
+        so that the next resets go through the episodes like those of a new
+        :ref:`Env`, without reloading the dataset.
+        """
+        self._setup_episode_iterator()
+        self.current_episode = next(self.episode_iterator)
+
     @property
     def current_episode(self) -> Episode:
         assert self._current_episode is not None
@@ -171,7 +186,7 @@ class Env:
         self._episode_from_iter_on_reset = True
 
     @property
-    def episodes(self) -> List[Episode]:
+    def episodes(self) -> Sequence[Episode]:
         return (
             self._dataset.episodes
             if self._dataset
@@ -318,6 +333,8 @@ class Env:
         )
 
         self._update_step_stats()
+        if self.episode_over:
+            self._task.measurements.update_stale_measures()
 
         return observations
 
@@ -394,7 +411,7 @@ class RLEnv(gym.Env):
         return self._env
 
     @property
-    def episodes(self) -> List[Episode]:
+    def episodes(self) -> Sequence[Episode]:
         return self._env.episodes
 
     @episodes.setter
@@ -417,6 +434,38 @@ class RLEnv(gym.Env):
                 scene_id=self._env.current_episode.scene_id,
             )
 
+    def get_episode_keys(self) -> List[Tuple[str, str]]:
+        r"""Returns the :py:`(scene_id, episode_id)` of the episodes of the
+        environment, in the order of :ref:`episodes`.
+        """
+        if self._env._dataset is None:
+            return []
+        return self._env._dataset.get_episode_keys()
+
+    def use_episode_queue(self) -> None:
+        r"""Replaces the episode iterator by an :ref:`EpisodeQueue`, the
+        episodes of the next resets are then the ones queued with
+        :ref:`queue_episode`. Must be called before a reset.
+        """
+        self._env.episode_iterator = EpisodeQueue(
+            self._env.episodes, self.get_episode_keys()
+        )
+
+    def reset_episode_iterator(self) -> None:
+        r"""See :ref:`Env.reset_episode_iterator`. Also replaces the
+        :ref:`EpisodeQueue` of :ref:`use_episode_queue`.
+        """
+        self._env.reset_episode_iterator()
+
+    def queue_episode(self, scene_id: str, episode_id: str) -> None:
+        r"""Queues an episode to be used by a next reset, see
+        :ref:`use_episode_queue`.
+        """
+        assert isinstance(
+            self._env.episode_iterator, EpisodeQueue
+        ), "use_episode_queue must be called before queuing episodes"
+        self._env.episode_iterator.put(scene_id, episode_id)
+
     @profiling_wrapper.RangeContext("RLEnv.reset")
     def reset(
         self, *, return_info: bool = False, **kwargs
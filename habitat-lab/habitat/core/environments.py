@@ -11,7 +11,7 @@ in habitat. Customized environments should be registered using
 """
 
 import importlib
-from typing import TYPE_CHECKING, Dict, Optional, Tuple, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type, Union
 
 import gym
 import numpy as np
@@ -71,7 +71,7 @@ class RLTaskEnv(habitat.RLEnv):
         return (-np.inf, np.inf)
 
     def get_reward(self, observations):
-        current_measure = self._env.get_metrics()[self._reward_measure_name]
+        current_measure = self._get_metric(self._reward_measure_name)
         reward = self._slack_reward
 
         reward += current_measure
@@ -81,8 +81,13 @@ class RLTaskEnv(habitat.RLEnv):
 
         return reward
 
+    def _get_metric(self, measure_name: str) -> Any:
+        # Reads the measure itself, which updates it if it is on demand,
+        # unlike the metrics of the step
+        return self._env.task.measurements.measures[measure_name].get_metric()
+
     def _episode_success(self):
-        return self._env.get_metrics()[self._success_measure_name]
+        return self._get_metric(self._success_measure_name)
 
     def get_done(self, observations):
         done = False
@@ -90,6 +95,10 @@ class RLTaskEnv(habitat.RLEnv):
             done = True
         if self._end_on_success and self._episode_success():
             done = True
+            if not self._env.episode_over:
+                # The info of the last step has all the metrics, like when
+                # the episode is over
+                self._env.task.measurements.update_stale_measures()
         return done
 
     def get_info(self, observations):
@@ -6,9 +6,12 @@
 
 import cmath
 import dataclasses
+import functools
 import json
 import math
-from typing import Any, Dict, List, Optional
+import os
+import tempfile
+from typing import IO, Any, Callable, Dict, List, Optional
 
 import attr
 import numpy as np
@@ -116,6 +119,48 @@ def center_crop(obs, new_shape):
     return obs
 
 
+@functools.lru_cache(maxsize=None)
+def _get_umask() -> int:
+    # The umask can only be read by setting it, so only do it once
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def atomic_write(
+    path: str, writer: Callable[[IO[bytes]], Any], fsync: bool = False
+) -> None:
+    r"""Writes the file at :p:`path` atomically: :p:`writer` writes to a
+    temporary file next to :p:`path` that is then renamed to :p:`path`, so
+    that :p:`path` is either the previous file or the complete new one,
+    e.g. for the caches that several workers can write and read at the same
+    time, or if the process dies while writing. The temporary file starts
+    with a dot and is removed if the writing fails.
+
+    The file gets the permissions of a file created by :py:`open` with the
+    current umask, not the private ones of a temporary file.
+
+    :param writer: writes the content to the binary file it is given.
+    :param fsync: also flush the file to the disk before renaming it.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f".{os.path.basename(path)}.",
+        suffix=".tmp",
+    )
+    try:
+        os.fchmod(fd, 0o666 & ~_get_umask())
+        with os.fdopen(fd, "wb") as f:
+            writer(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
 class DatasetJSONEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, np.ndarray):
@@ -6,7 +6,7 @@
 
 import signal
 import warnings
-from multiprocessing.connection import Connection
+from multiprocessing.connection import Connection, wait
 from multiprocessing.context import BaseContext
 from queue import Queue
 from threading import Thread
@@ -15,6 +15,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
     Iterator,
     List,
     Optional,
@@ -33,6 +34,7 @@ from gym import spaces
 
 import habitat
 from habitat.core.batch_rendering.env_batch_renderer import EnvBatchRenderer
+from habitat.core.dataset import BaseEpisode
 from habitat.core.env import Env, RLEnv
 from habitat.core.logging import logger
 from habitat.core.utils import tile_images
@@ -43,6 +45,10 @@ from habitat.utils.pickle5_multiprocessing import (
     CloudpickleWrapper,
     ConnectionWrapper,
 )
+from habitat.utils.visualizations.top_down_map_deltas import (
+    TopDownMapDeltaDecoder,
+    TopDownMapDeltaEncoder,
+)
 
 try:
     # Use torch.multiprocessing if we can.
@@ -51,6 +57,11 @@ try:
     # between processes
     import torch
     from torch import multiprocessing as mp  # type:ignore
+
+    from habitat.utils.shared_memory_observations import (
+        SharedObservationBuffers,
+        SharedObservationsHeader,
+    )
 except ImportError:
     torch = None
     import multiprocessing as mp  # type:ignore
@@ -65,6 +76,9 @@ RENDER_COMMAND = "render"
 CLOSE_COMMAND = "close"
 CALL_COMMAND = "call"
 COUNT_EPISODES_COMMAND = "count_episodes"
+SHARED_OBSERVATIONS_COMMAND = "shared_observations"
+TOP_DOWN_MAP_DELTAS_COMMAND = "top_down_map_deltas"
+EPISODE_DESCRIPTOR_COMMAND = "episode_descriptor"
 
 EPISODE_OVER_NAME = "episode_over"
 GET_METRICS_NAME = "get_metrics"
@@ -92,6 +106,28 @@ def _make_env_fn(
     return habitat_env
 
 
+@attr.s(auto_attribs=True, kw_only=True)
+class EpisodeDescriptor(BaseEpisode):
+    r"""The current episode of an environment as returned by
+    :ref:`VectorEnv.current_episodes` when the workers send episode
+    descriptors.
+
+    :property episode_index: index of the episode among the episodes the
+        environment was reset to, it tells apart two runs of a same episode.
+    """
+
+    episode_index: int = 0
+
+
+def _get_episode_descriptor(
+    env: gym.Env, num_resets: int
+) -> Tuple[str, str, int]:
+    episode = env.current_episode
+    if callable(episode):
+        episode = episode()
+    return (episode.scene_id, episode.episode_id, max(num_resets - 1, 0))
+
+
 @attr.s(auto_attribs=True, slots=True)
 class _ReadWrapper:
     r"""Convenience wrapper to track if a connection to a worker process
@@ -100,6 +136,9 @@ class _ReadWrapper:
     read_fn: Callable[[], Any]
     rank: int
     is_waiting: bool = False
+    # Object that multiprocessing.connection.wait can wait on until
+    # read_fn has something to read, None if there is none
+    wait_object: Optional[Any] = None
 
     def __call__(self) -> Any:
         if not self.is_waiting:
@@ -151,6 +190,9 @@ class VectorEnv:
     _connection_read_fns: List[_ReadWrapper]
     _connection_write_fns: List[_WriteWrapper]
     _batch_renderer: Optional[EnvBatchRenderer] = None
+    _shared_observations: Dict[int, "SharedObservationBuffers"]
+    _top_down_map_decoders: Dict[int, TopDownMapDeltaDecoder]
+    _episode_descriptors: Optional[Dict[int, Optional[EpisodeDescriptor]]]
 
     def __init__(
         self,
@@ -159,6 +201,9 @@ class VectorEnv:
         auto_reset_done: bool = True,
         multiprocessing_start_method: str = "forkserver",
         workers_ignore_signals: bool = False,
+        shared_memory_observations: bool = False,
+        top_down_map_deltas: bool = False,
+        episode_descriptors: bool = False,
     ) -> None:
         """..
 
@@ -176,6 +221,27 @@ class VectorEnv:
             used, the subproccess  must be started before any other GPU usage.
         :param workers_ignore_signals: Whether or not workers will ignore SIGINT and SIGTERM
             and instead will only exit when :ref:`close` is called
+        :param shared_memory_observations: Whether or not workers will write
+            their observations into shared memory buffers instead of sending
+            them through the pipe. Only a small header crosses the pipe and
+            the observations returned by :ref:`step` and :ref:`reset` are
+            views of the shared buffers. These views are overwritten by the
+            next step or reset of the same environment, so they must be
+            consumed (i.e. batched) before that. Requires PyTorch.
+        :param top_down_map_deltas: Whether or not workers will only send
+            the regions of the top down map and fog of war mask that changed
+            since the previous step, instead of the whole arrays, in the
+            :py:`"top_down_map"` entry of the step infos. The maps are
+            rebuilt before :ref:`step` returns. The rebuilt arrays are
+            updated in place by the next step of the same environment.
+        :param episode_descriptors: Whether or not workers send an
+            :ref:`EpisodeDescriptor` of their new episode with the results of
+            the steps and resets that start one. The descriptors are cached
+            so that :ref:`current_episodes` doesn't need to ask the workers.
+            The episodes it returns then only have a scene id, an episode id
+            and an episode index. The cached descriptor of an environment is
+            dropped when a function of the environment is called with
+            :ref:`call` or :ref:`call_at`, as it may change the episode.
         """
         self._is_closed = True
 
@@ -226,6 +292,102 @@ class VectorEnv:
         ]
         self._paused: List[Tuple] = []
 
+        self._shared_observations = {}
+        if shared_memory_observations:
+            self._init_shared_observations()
+
+        self._top_down_map_decoders = {}
+        if top_down_map_deltas:
+            for write_fn in self._connection_write_fns:
+                write_fn((TOP_DOWN_MAP_DELTAS_COMMAND, None))
+            for read_fn in self._connection_read_fns:
+                read_fn()
+                self._top_down_map_decoders[
+                    read_fn.rank
+                ] = TopDownMapDeltaDecoder()
+
+        self._episode_descriptors = None
+        if episode_descriptors:
+            self._episode_descriptors = {}
+            self._fetch_episode_descriptors(range(self.num_envs))
+
+    def _init_shared_observations(self) -> None:
+        r"""Allocates shared observation buffers for every environment from
+        its observation space and hands them to the workers.
+        """
+        if torch is None:
+            raise ImportError(
+                "shared_memory_observations requires PyTorch to be installed"
+            )
+
+        for write_fn, read_fn, observation_space in zip(
+            self._connection_write_fns,
+            self._connection_read_fns,
+            self.observation_spaces,
+        ):
+            buffers = SharedObservationBuffers.from_observation_space(
+                observation_space
+            )
+            self._shared_observations[read_fn.rank] = buffers
+            write_fn((SHARED_OBSERVATIONS_COMMAND, buffers))
+
+        for read_fn in self._connection_read_fns:
+            read_fn()
+
+    def _read_observations(self, index_env: int, observations: Any) -> Any:
+        r"""Rebuilds the observations of the index_env environment if they
+        were written to shared memory by the worker.
+        """
+        if len(self._shared_observations) == 0 or not isinstance(
+            observations, SharedObservationsHeader
+        ):
+            return observations
+
+        rank = self._connection_read_fns[index_env].rank
+        return self._shared_observations[rank].read(observations)
+
+    def _fetch_episode_descriptors(self, index_envs: Iterable[int]) -> None:
+        r"""Asks the index_envs environments for the descriptors of their
+        current episodes, this also makes them send the descriptors of their
+        next episodes with the step and reset results.
+        """
+        index_envs = list(index_envs)
+        for index_env in index_envs:
+            self._connection_write_fns[index_env](
+                (EPISODE_DESCRIPTOR_COMMAND, None)
+            )
+        for index_env in index_envs:
+            read_fn = self._connection_read_fns[index_env]
+            self._set_episode_descriptor(read_fn.rank, read_fn())
+
+    def _set_episode_descriptor(
+        self, rank: int, descriptor: Optional[Tuple[str, str, int]]
+    ) -> None:
+        if descriptor is not None:
+            scene_id, episode_id, episode_index = descriptor
+            self._episode_descriptors[rank] = EpisodeDescriptor(
+                scene_id=scene_id,
+                episode_id=episode_id,
+                episode_index=episode_index,
+            )
+
+    def _read_reset_result(self, index_env: int, result: Any) -> Any:
+        r"""Caches the episode descriptor sent with the result of a reset of
+        the index_env environment and returns its observations.
+        """
+        if self._episode_descriptors is not None:
+            result, descriptor = result
+            self._set_episode_descriptor(
+                self._connection_read_fns[index_env].rank, descriptor
+            )
+        return self._read_observations(index_env, result)
+
+    def _drop_episode_descriptor(self, index_env: int) -> None:
+        if self._episode_descriptors is not None:
+            self._episode_descriptors[
+                self._connection_read_fns[index_env].rank
+            ] = None
+
     @property
     def num_envs(self):
         r"""number of individual environments."""
@@ -253,20 +415,62 @@ class VectorEnv:
         env = EnvCountEpisodeWrapper(EnvObsDictWrapper(env_fn(*env_fn_args)))
         if parent_pipe is not None:
             parent_pipe.close()
+        shared_observations: Optional["SharedObservationBuffers"] = None
+        top_down_map_encoder: Optional[TopDownMapDeltaEncoder] = None
+        send_episode_descriptors = False
+        num_resets = 0
         try:
             command, data = connection_read_fn()
             while command != CLOSE_COMMAND:
                 if command == STEP_COMMAND:
                     observations, reward, done, info = env.step(data)
 
+                    episode_descriptor = None
                     if auto_reset_done and done:
                         observations = env.reset()
-
-                    connection_write_fn((observations, reward, done, info))
+                        num_resets += 1
+                        if send_episode_descriptors:
+                            episode_descriptor = _get_episode_descriptor(
+                                env, num_resets
+                            )
+
+                    if shared_observations is not None and isinstance(
+                        observations, dict
+                    ):
+                        observations = shared_observations.write(observations)
+
+                    if top_down_map_encoder is not None:
+                        info = top_down_map_encoder.encode(info)
+
+                    if send_episode_descriptors:
+                        connection_write_fn(
+                            (
+                                observations,
+                                reward,
+                                done,
+                                info,
+                                episode_descriptor,
+                            )
+                        )
+                    else:
+                        connection_write_fn((observations, reward, done, info))
 
                 elif command == RESET_COMMAND:
                     observations = env.reset()
-                    connection_write_fn(observations)
+                    num_resets += 1
+                    if shared_observations is not None and isinstance(
+                        observations, dict
+                    ):
+                        observations = shared_observations.write(observations)
+                    if send_episode_descriptors:
+                        connection_write_fn(
+                            (
+                                observations,
+                                _get_episode_descriptor(env, num_resets),
+                            )
+                        )
+                    else:
+                        connection_write_fn(observations)
 
                 elif command == RENDER_COMMAND:
                     connection_write_fn(env.render(*data[0], **data[1]))
@@ -288,6 +492,20 @@ class VectorEnv:
                 elif command == COUNT_EPISODES_COMMAND:
                     connection_write_fn(len(env.episodes))
 
+                elif command == SHARED_OBSERVATIONS_COMMAND:
+                    shared_observations = data
+                    connection_write_fn(True)
+
+                elif command == TOP_DOWN_MAP_DELTAS_COMMAND:
+                    top_down_map_encoder = TopDownMapDeltaEncoder()
+                    connection_write_fn(True)
+
+                elif command == EPISODE_DESCRIPTOR_COMMAND:
+                    send_episode_descriptors = True
+                    connection_write_fn(
+                        _get_episode_descriptor(env, num_resets)
+                    )
+
                 else:
                     raise NotImplementedError(f"Unknown command {command}")
 
@@ -335,7 +553,7 @@ class VectorEnv:
             worker_conn.close()
 
         read_fns = [
-            _ReadWrapper(p.recv, rank)
+            _ReadWrapper(p.recv, rank, wait_object=p.conn)
             for rank, p in enumerate(parent_connections)
         ]
         write_fns = [
@@ -346,6 +564,16 @@ class VectorEnv:
         return read_fns, write_fns
 
     def current_episodes(self):
+        if self._episode_descriptors is not None:
+            self._fetch_episode_descriptors(
+                index_env
+                for index_env, read_fn in enumerate(self._connection_read_fns)
+                if self._episode_descriptors.get(read_fn.rank) is None
+            )
+            return [
+                self._episode_descriptors[read_fn.rank]
+                for read_fn in self._connection_read_fns
+            ]
         for write_fn in self._connection_write_fns:
             write_fn((CALL_COMMAND, (CURRENT_EPISODE_NAME, None)))
         results = []
@@ -385,8 +613,8 @@ class VectorEnv:
         for write_fn in self._connection_write_fns:
             write_fn((RESET_COMMAND, None))
         results = []
-        for read_fn in self._connection_read_fns:
-            results.append(read_fn())
+        for index_env, read_fn in enumerate(self._connection_read_fns):
+            results.append(self._read_reset_result(index_env, read_fn()))
         return results
 
     def reset_at(self, index_env: int):
@@ -396,7 +624,11 @@ class VectorEnv:
         :return: list containing the output of reset method of indexed env.
         """
         self._connection_write_fns[index_env]((RESET_COMMAND, None))
-        results = [self._connection_read_fns[index_env]()]
+        results = [
+            self._read_reset_result(
+                index_env, self._connection_read_fns[index_env]()
+            )
+        ]
         return results
 
     def async_step_at(
@@ -407,7 +639,29 @@ class VectorEnv:
 
     @profiling_wrapper.RangeContext("wait_step_at")
     def wait_step_at(self, index_env: int) -> Any:
-        return self._connection_read_fns[index_env]()
+        read_fn = self._connection_read_fns[index_env]
+        step_result = read_fn()
+        if self._episode_descriptors is not None:
+            *step_result, descriptor = step_result
+            self._set_episode_descriptor(read_fn.rank, descriptor)
+            step_result = tuple(step_result)
+        if (
+            len(self._shared_observations) == 0
+            and len(self._top_down_map_decoders) == 0
+        ):
+            return step_result
+
+        observations, reward, done, info = step_result
+        if read_fn.rank in self._top_down_map_decoders and isinstance(
+            info, dict
+        ):
+            info = self._top_down_map_decoders[read_fn.rank].decode(info)
+        return (
+            self._read_observations(index_env, observations),
+            reward,
+            done,
+            info,
+        )
 
     def step_at(self, index_env: int, action: Union[int, np.ndarray]):
         r"""Step in the index_env environment in the vector.
@@ -430,6 +684,33 @@ class VectorEnv:
         for index_env, act in enumerate(data):
             self.async_step_at(index_env, act)
 
+    def wait_step_as_completed(
+        self, index_envs: Sequence[int]
+    ) -> Iterator[Tuple[int, Any]]:
+        r"""Waits for the asynchronous steps of the :p:`index_envs`
+        environments and yields them as soon as they are done, instead of
+        in index order.
+
+        :param index_envs: indices of the environments that were stepped
+            with :ref:`async_step_at`.
+        :return: iterator of (index of the environment, output of
+            :ref:`wait_step_at`) pairs, in the order the environments
+            finished. Environments without a pipe (i.e. in
+            :ref:`ThreadedVectorEnv`) are yielded in index order.
+        """
+        pending = {}
+        for index_env in index_envs:
+            wait_object = self._connection_read_fns[index_env].wait_object
+            if wait_object is None:
+                yield index_env, self.wait_step_at(index_env)
+            else:
+                pending[wait_object] = index_env
+
+        while len(pending) > 0:
+            for wait_object in wait(list(pending.keys())):
+                index_env = pending.pop(wait_object)
+                yield index_env, self.wait_step_at(index_env)
+
     @profiling_wrapper.RangeContext("wait_step")
     def wait_step(self) -> List[Any]:
         r"""Wait until all the asynchronous environments have synchronized."""
@@ -492,6 +773,7 @@ class VectorEnv:
         """
         if self._connection_read_fns[index].is_waiting:
             self._connection_read_fns[index]()
+        self._drop_episode_descriptor(index)
         read_fn = self._connection_read_fns.pop(index)
         write_fn = self._connection_write_fns.pop(index)
         worker = self._workers.pop(index)
@@ -519,6 +801,7 @@ class VectorEnv:
         :param function_args: optional function args.
         :return: result of calling the function.
         """
+        self._drop_episode_descriptor(index)
         self._connection_write_fns[index](
             (CALL_COMMAND, (function_name, function_args))
         )
@@ -543,6 +826,8 @@ class VectorEnv:
             function_args_list = [None] * len(function_names)
         assert len(function_names) == len(function_args_list)
         func_args = zip(function_names, function_args_list)
+        for index_env in range(self.num_envs):
+            self._drop_episode_descriptor(index_env)
         for write_fn, func_args_on in zip(
             self._connection_write_fns, func_args
         ):
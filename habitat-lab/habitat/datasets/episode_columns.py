@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+r"""A columnar, memory-mapped on-disk format for navigation episodes.
+
+Loading a ``.json.gz`` split parses every episode and builds its attrs
+objects up front, which takes minutes and gigabytes per worker on large
+splits. The episode columns format instead stores a split as a directory of
+``.npy`` arrays that are memory-mapped on load:
+
+- start positions / rotations, goal positions / radii and shortest path
+  points are float arrays, with offset arrays for the variable length goals
+  and paths.
+- scene ids and scene dataset configs are indices into small string tables.
+- episode ids and any other episode field are stored as utf-8 strings
+  (the other fields as JSON).
+
+The dataset then only holds a :ref:`LazyEpisodes` sequence and
+:ref:`Episode` objects are built when they are accessed, typically when
+:ref:`LazyEpisodeIterator` yields them. A dataset is converted with
+
+.. code:: sh
+
+    python -m habitat.datasets.episode_columns \
+        --config benchmark/nav/pointnav/pointnav_gibson.yaml \
+        --split train --output data/datasets/pointnav/gibson/v1/train/train.columns
+
+and loaded by pointing ``habitat.dataset.data_path`` to the output.
+"""
+
+import json
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+import attr
+import numpy as np
+
+from habitat.core.dataset import Episode, EpisodeIterator, T
+from habitat.core.utils import DatasetJSONEncoder
+
+if TYPE_CHECKING:
+    from habitat.tasks.nav.nav import NavigationEpisode
+
+
+EPISODE_COLUMNS_EXT = ".columns"
+EPISODE_COLUMNS_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+# Fields that are stored as columns. All the other fields of the episodes are
+# stored as JSON in the "extra" string column if they differ from their
+# default value.
+_COLUMN_FIELDS = {
+    "episode_id",
+    "scene_id",
+    "scene_dataset_config",
+    "start_position",
+    "start_rotation",
+    "goals",
+    "shortest_paths",
+}
+
+
+def _save_strings(output_path: str, name: str, strings: Sequence[str]) -> None:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in encoded], out=offsets[1:])
+    np.save(os.path.join(output_path, f"{name}_offsets.npy"), offsets)
+    np.save(
+        os.path.join(output_path, f"{name}_data.npy"),
+        np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    )
+
+
+def _optional_floats(values: Optional[Sequence[float]], size: int) -> List:
+    if values is None:
+        return [np.nan] * size
+    return list(values)
+
+
+def _to_optional_list(values: List[float]) -> Optional[List[float]]:
+    # Missing vectors are stored as NaNs
+    if values[0] != values[0]:
+        return None
+    return values
+
+
+def _is_float_vector(values: Any, size: int) -> bool:
+    return (
+        isinstance(values, (list, tuple, np.ndarray)) and len(values) == size
+    )
+
+
+def _is_columnar_shortest_path_point(point: Any) -> bool:
+    return bool(
+        (point.position is None or _is_float_vector(point.position, 3))
+        and (point.rotation is None or _is_float_vector(point.rotation, 4))
+        and (
+            point.action is None
+            or (
+                isinstance(point.action, (int, np.integer))
+                and point.action >= 0
+            )
+        )
+    )
+
+
+def write_episode_columns(
+    output_path: str,
+    episodes: Sequence["NavigationEpisode"],
+    scenes_dir: Optional[str] = None,
+    write_goals: bool = True,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    r"""Writes navigation episodes in the episode columns format.
+
+    :param output_path: The directory to write to, should end with
+        :py:`EPISODE_COLUMNS_EXT`.
+    :param episodes: The episodes to write.
+    :param scenes_dir: If the scene ids of the episodes were prefixed by the
+        scenes_dir of the dataset config when loaded, it is removed so that the
+        stored scene ids are the ones found in the json files.
+    :param write_goals: If False, the goals of the episodes are not stored.
+        This is used by datasets that deduplicate their goals and store them
+        in the metadata instead.
+    :param metadata: Dataset level information that is JSON serializable.
+    """
+    from habitat.tasks.nav.nav import NavigationGoal
+
+    os.makedirs(output_path, exist_ok=True)
+    num_episodes = len(episodes)
+
+    scene_prefix = None
+    if scenes_dir is not None:
+        scene_prefix = os.path.join(scenes_dir, "")
+
+    scene_table: Dict[str, int] = {}
+    scene_dataset_config_table: Dict[str, int] = {}
+    scene_index = np.empty(num_episodes, dtype=np.int32)
+    scene_dataset_config_index = np.empty(num_episodes, dtype=np.int32)
+    start_position = np.empty((num_episodes, 3), dtype=np.float64)
+    start_rotation = np.empty((num_episodes, 4), dtype=np.float64)
+    episode_ids = []
+    extras = []
+
+    goal_offsets = np.zeros(num_episodes + 1, dtype=np.int64)
+    goal_position: List[List[float]] = []
+    goal_radius: List[float] = []
+
+    # -1 marks an episode without shortest paths (None)
+    shortest_path_offsets = np.zeros(num_episodes + 1, dtype=np.int64)
+    has_shortest_paths = np.zeros(num_episodes, dtype=bool)
+    path_offsets = [0]
+    point_position: List[List[float]] = []
+    point_rotation: List[List[float]] = []
+    point_action: List[int] = []
+
+    for i, episode in enumerate(episodes):
+        scene_id = episode.scene_id
+        if scene_prefix is not None and scene_id.startswith(scene_prefix):
+            scene_id = scene_id[len(scene_prefix) :]
+        scene_index[i] = scene_table.setdefault(scene_id, len(scene_table))
+        scene_dataset_config_index[i] = scene_dataset_config_table.setdefault(
+            episode.scene_dataset_config, len(scene_dataset_config_table)
+        )
+        episode_ids.append(str(episode.episode_id))
+        start_position[i] = episode.start_position
+        start_rotation[i] = episode.start_rotation
+
+        extra = {}
+        for field in attr.fields(type(episode)):
+            if not field.init or field.name in _COLUMN_FIELDS:
+                continue
+            value = getattr(episode, field.name)
+            default = field.default
+            if isinstance(default, attr.Factory):  # type: ignore[arg-type]
+                default = default.factory()  # type: ignore[attr-defined]
+            if value != default:
+                extra[field.name] = value
+
+        if write_goals:
+            for goal in episode.goals:
+                if type(goal) is not NavigationGoal:
+                    raise ValueError(
+                        f"Goals of type {type(goal).__name__} are not"
+                        " supported by the episode columns format"
+                    )
+                goal_position.append(list(goal.position))
+                goal_radius.append(
+                    np.nan if goal.radius is None else goal.radius
+                )
+        goal_offsets[i + 1] = len(goal_radius)
+
+        shortest_paths = episode.shortest_paths
+        if shortest_paths is not None and not all(
+            _is_columnar_shortest_path_point(point)
+            for path in shortest_paths
+            for point in path
+        ):
+            # Unusual points (i.e. with string actions) are kept as JSON
+            extra["shortest_paths"] = shortest_paths
+            shortest_paths = None
+
+        if shortest_paths is not None:
+            has_shortest_paths[i] = True
+            for path in shortest_paths:
+                for point in path:
+                    point_position.append(_optional_floats(point.position, 3))
+                    point_rotation.append(_optional_floats(point.rotation, 4))
+                    point_action.append(
+                        -1 if point.action is None else int(point.action)
+                    )
+                path_offsets.append(len(point_action))
+        shortest_path_offsets[i + 1] = len(path_offsets) - 1
+
+        extras.append(
+            json.dumps(extra, cls=DatasetJSONEncoder) if extra else ""
+        )
+
+    arrays: Dict[str, np.ndarray] = dict(
+        scene_index=scene_index,
+        scene_dataset_config_index=scene_dataset_config_index,
+        start_position=start_position,
+        start_rotation=start_rotation,
+        goal_offsets=goal_offsets,
+        goal_position=np.asarray(goal_position, dtype=np.float64).reshape(
+            -1, 3
+        ),
+        goal_radius=np.asarray(goal_radius, dtype=np.float64),
+        has_shortest_paths=has_shortest_paths,
+        shortest_path_offsets=shortest_path_offsets,
+        path_offsets=np.asarray(path_offsets, dtype=np.int64),
+        point_position=np.asarray(point_position, dtype=np.float64).reshape(
+            -1, 3
+        ),
+        point_rotation=np.asarray(point_rotation, dtype=np.float64).reshape(
+            -1, 4
+        ),
+        point_action=np.asarray(point_action, dtype=np.int64),
+    )
+    for name, array in arrays.items():
+        np.save(os.path.join(output_path, f"{name}.npy"), array)
+
+    _save_strings(output_path, "episode_id", episode_ids)
+    _save_strings(output_path, "extra", extras)
+
+    with open(os.path.join(output_path, METADATA_FILE), "w") as f:
+        json.dump(
+            dict(
+                version=EPISODE_COLUMNS_VERSION,
+                num_episodes=num_episodes,
+                scene_ids=list(scene_table.keys()),
+                scene_dataset_configs=list(scene_dataset_config_table.keys()),
+                dataset=metadata if metadata is not None else {},
+            ),
+            f,
+            cls=DatasetJSONEncoder,
+        )
+
+
+class EpisodeColumns:
+    r"""Read access to a directory written by :ref:`write_episode_columns`.
+    All the arrays are memory-mapped, so opening is independent of the number
+    of episodes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, METADATA_FILE), "r") as f:
+            metadata = json.load(f)
+
+        if metadata["version"] != EPISODE_COLUMNS_VERSION:
+            raise RuntimeError(
+                f"Episode columns at {path} have version {metadata['version']}"
+                f", expected {EPISODE_COLUMNS_VERSION}. Convert the dataset"
+                " again."
+            )
+
+        self.num_episodes: int = metadata["num_episodes"]
+        self.scene_ids: List[str] = metadata["scene_ids"]
+        self.scene_dataset_configs: List[str] = metadata[
+            "scene_dataset_configs"
+        ]
+        self.dataset_metadata: Dict[str, Any] = metadata["dataset"]
+
+        # np.asarray drops the np.memmap subclass, whose indexing is much
+        # slower, but keeps the memory-mapped buffer.
+        load = lambda name: np.asarray(
+            np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        )
+        self.scene_index = load("scene_index")
+        self._scene_dataset_config_index = load("scene_dataset_config_index")
+        self._start_position = load("start_position")
+        self._start_rotation = load("start_rotation")
+        self._goal_offsets = load("goal_offsets")
+        self._goal_position = load("goal_position")
+        self._goal_radius = load("goal_radius")
+        self._has_shortest_paths = load("has_shortest_paths")
+        self._shortest_path_offsets = load("shortest_path_offsets")
+        self._path_offsets = load("path_offsets")
+        self._point_position = load("point_position")
+        self._point_rotation = load("point_rotation")
+        self._point_action = load("point_action")
+        self._episode_id_offsets = load("episode_id_offsets")
+        self._episode_id_data = load("episode_id_data")
+        self._extra_offsets = load("extra_offsets")
+        self._extra_data = load("extra_data")
+
+    @staticmethod
+    def _get_string(offsets: np.ndarray, data: np.ndarray, index: int) -> str:
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        return data[start:end].tobytes().decode()
+
+    def episode_ids(self, indices: np.ndarray) -> List[str]:
+        r"""Returns the episode ids of the episodes at :p:`indices`, without
+        reading the other columns.
+        """
+        starts = self._episode_id_offsets[indices].tolist()
+        ends = self._episode_id_offsets[indices + 1].tolist()
+        data = self._episode_id_data.tobytes()
+        return [data[start:end].decode() for start, end in zip(starts, ends)]
+
+    def episode_dict(self, index: int) -> Dict[str, Any]:
+        r"""Returns the episode at :p:`index` in the same form as in the json
+        files of the dataset, i.e. goals and shortest path points are dicts.
+        """
+        episode: Dict[str, Any] = dict(
+            episode_id=self._get_string(
+                self._episode_id_offsets, self._episode_id_data, index
+            ),
+            scene_id=self.scene_ids[self.scene_index[index]],
+            scene_dataset_config=self.scene_dataset_configs[
+                self._scene_dataset_config_index[index]
+            ],
+            start_position=self._start_position[index].tolist(),
+            start_rotation=self._start_rotation[index].tolist(),
+        )
+
+        goals = slice(self._goal_offsets[index], self._goal_offsets[index + 1])
+        episode["goals"] = [
+            dict(
+                position=position,
+                radius=None if np.isnan(radius) else radius,
+            )
+            for position, radius in zip(
+                self._goal_position[goals].tolist(),
+                self._goal_radius[goals].tolist(),
+            )
+        ]
+
+        if self._has_shortest_paths[index]:
+            shortest_paths = []
+            for path_index in range(
+                self._shortest_path_offsets[index],
+                self._shortest_path_offsets[index + 1],
+            ):
+                points = slice(
+                    self._path_offsets[path_index],
+                    self._path_offsets[path_index + 1],
+                )
+                shortest_paths.append(
+                    [
+                        dict(
+                            position=_to_optional_list(position),
+                            rotation=_to_optional_list(rotation),
+                            action=None if action < 0 else action,
+                        )
+                        for position, rotation, action in zip(
+                            self._point_position[points].tolist(),
+                            self._point_rotation[points].tolist(),
+                            self._point_action[points].tolist(),
+                        )
+                    ]
+                )
+            episode["shortest_paths"] = shortest_paths
+        else:
+            episode["shortest_paths"] = None
+
+        extra = self._get_string(self._extra_offsets, self._extra_data, index)
+        if len(extra) > 0:
+            episode.update(json.loads(extra))
+
+        return episode
+
+    def __getstate__(self):
+        # Don't pickle the memory-mapped arrays, map them again instead.
+        return self.path
+
+    def __setstate__(self, path: str) -> None:
+        self.__init__(path)  # type: ignore[misc]
+
+
+class LazyEpisodes(Sequence[T]):
+    r"""Sequence of the episodes of a dataset stored as episode columns.
+    Episodes are only built when accessed, the sequence itself only holds
+    the indices of the episodes in the columns.
+
+    :param columns: The episode columns.
+    :param indices: The indices of the episodes of the sequence in the
+        columns.
+    :param scene_ids: The scene ids of the dataset, as they would be in
+        the built episodes, for each scene of :py:`columns.scene_ids`.
+    :param build_episode: Builds an episode from the dict returned by
+        :ref:`EpisodeColumns.episode_dict`.
+    """
+
+    def __init__(
+        self,
+        columns: EpisodeColumns,
+        indices: np.ndarray,
+        scene_ids: List[str],
+        build_episode: Callable[[Dict[str, Any]], T],
+    ) -> None:
+        self.columns = columns
+        self.indices = indices
+        self._scene_ids = scene_ids
+        self._build_episode = build_episode
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "LazyEpisodes[T]":
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[T, "LazyEpisodes[T]"]:
+        if isinstance(index, slice):
+            return LazyEpisodes(
+                self.columns,
+                self.indices[index],
+                self._scene_ids,
+                self._build_episode,
+            )
+        return self.build(int(self.indices[index]))
+
+    def __iter__(self) -> Iterator[T]:
+        for column_index in self.indices.tolist():
+            yield self.build(column_index)
+
+    def build(self, column_index: int) -> T:
+        r"""Builds the episode stored at :p:`column_index` in the columns."""
+        return self._build_episode(self.columns.episode_dict(column_index))
+
+    def scene_id(self, column_index: int) -> str:
+        return self._scene_ids[self.columns.scene_index[column_index]]
+
+    def episode_keys(self) -> List[Tuple[str, str]]:
+        r"""The :py:`(scene_id, episode_id)` of the episodes of the sequence,
+        read from the columns without building the episodes.
+        """
+        scene_ids = [
+            self._scene_ids[i]
+            for i in self.columns.scene_index[self.indices].tolist()
+        ]
+        return list(zip(scene_ids, self.columns.episode_ids(self.indices)))
+
+    @property
+    def scene_ids(self) -> List[str]:
+        r"""Unique scene ids of the episodes in the sequence."""
+        scene_indices = np.unique(self.columns.scene_index[self.indices])
+        return sorted({self._scene_ids[i] for i in scene_indices})
+
+
+class LazyEpisodeIterator(EpisodeIterator[T]):
+    r""":ref:`EpisodeIterator` over :ref:`LazyEpisodes`. The iterator orders
+    the column indices of the episodes and only builds an episode when it is
+    returned by :ref:`__next__`.
+    """
+
+    def __init__(
+        self, episodes: LazyEpisodes[T], *args: Any, **kwargs: Any
+    ) -> None:
+        self._lazy_episodes = episodes
+        super().__init__(episodes.indices.tolist(), *args, **kwargs)  # type: ignore[arg-type]
+
+    def _get_scene_id(self, episode: Any) -> str:
+        return self._lazy_episodes.scene_id(episode)
+
+    def __next__(self) -> Episode:
+        return self._lazy_episodes.build(super().__next__())  # type: ignore[arg-type]
+
+
+def _filter_scenes(
+    columns: EpisodeColumns,
+    scene_ids: List[str],
+    scenes_filter: Callable[[str], bool],
+) -> np.ndarray:
+    r"""Returns the column indices of the episodes whose scene id passes
+    :p:`scenes_filter`. Only the scene index column is read.
+    """
+    keep_scene = np.array(
+        [scenes_filter(scene_id) for scene_id in scene_ids], dtype=bool
+    )
+    if len(keep_scene) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(keep_scene[columns.scene_index])
+
+
+def load_lazy_episodes(
+    path: str,
+    join_scenes_dir: Callable[[str], str],
+    scenes_filter: Callable[[str], bool],
+    build_episode: Callable[[Dict[str, Any]], T],
+) -> Tuple[LazyEpisodes[T], Dict[str, Any]]:
+    r"""Opens the episode columns at :p:`path`.
+
+    :param join_scenes_dir: Maps a stored scene id to the scene id of the
+        built episodes.
+    :param scenes_filter: Whether the episodes of a (joined) scene id should
+        be loaded.
+    :param build_episode: See :ref:`LazyEpisodes`.
+    :return: The lazy episodes and the dataset metadata.
+    """
+    columns = EpisodeColumns(path)
+    scene_ids = [join_scenes_dir(scene_id) for scene_id in columns.scene_ids]
+    indices = _filter_scenes(columns, scene_ids, scenes_filter)
+    return (
+        LazyEpisodes(columns, indices, scene_ids, build_episode),
+        columns.dataset_metadata,
+    )
+
+
+def main():
+    import argparse
+
+    from habitat.config import get_config, read_write
+    from habitat.core.dataset import ALL_SCENES_MASK
+    from habitat.datasets import make_dataset
+
+    parser = argparse.ArgumentParser(
+        description="Converts a navigation dataset to episode columns."
+    )
+    parser.add_argument("--config", type=str, required=True)
+    parser.add_argument("--split", type=str, default=None)
+    parser.add_argument("--output", type=str, required=True)
+    parser.add_argument("opts", nargs="*", default=[])
+    args = parser.parse_args()
+
+    if not args.output.endswith(EPISODE_COLUMNS_EXT):
+        raise ValueError(f"--output must end with {EPISODE_COLUMNS_EXT}")
+
+    config = get_config(args.config, args.opts)
+    with read_write(config):
+        if args.split is not None:
+            config.habitat.dataset.split = args.split
+        config.habitat.dataset.content_scenes = [ALL_SCENES_MASK]
+
+    dataset = make_dataset(
+        config.habitat.dataset.type, config=config.habitat.dataset
+    )
+    if not hasattr(dataset, "write_episode_columns"):
+        raise ValueError(
+            f"{config.habitat.dataset.type} does not support episode columns"
+        )
+    dataset.write_episode_columns(args.output, config.habitat.dataset)
+    print(f"Wrote {dataset.num_episodes} episodes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,17 @@
 # LICENSE file in the root directory of this source tree.
 
 import json
-import os
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
 
 from habitat.core.registry import registry
 from habitat.core.simulator import AgentState, ShortestPathPoint
 from habitat.core.utils import DatasetFloatJSONEncoder
+from habitat.datasets.episode_columns import (
+    LazyEpisodes,
+    write_episode_columns,
+)
 from habitat.datasets.pointnav.pointnav_dataset import (
     CONTENT_SCENES_PATH_FIELD,
-    DEFAULT_SCENE_PATH_PREFIX,
     PointNavDatasetV1,
 )
 from habitat.tasks.nav.object_nav_task import (
@@ -31,9 +33,12 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
     r"""Class inherited from PointNavDataset that loads Object Navigation dataset."""
     category_to_task_category_id: Dict[str, int]
     category_to_scene_annotation_category_id: Dict[str, int]
-    episodes: List[ObjectGoalNavEpisode] = []  # type: ignore
+    episodes: Union[
+        List[ObjectGoalNavEpisode], LazyEpisodes[ObjectGoalNavEpisode]
+    ] = []  # type: ignore[assignment]
     content_scenes_path: str = "{data_path}/content/{scene}.json.gz"
     goals_by_category: Dict[str, Sequence[ObjectGoal]]
+    _episode_ids_from_file_position: bool = True
 
     @staticmethod
     def dedup_goals(dataset: Dict[str, Any]) -> Dict[str, Any]:
@@ -74,7 +79,8 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
     def __init__(self, config: Optional["DictConfig"] = None) -> None:
         self.goals_by_category = {}
         super().__init__(config)
-        self.episodes = list(self.episodes)
+        if not isinstance(self.episodes, LazyEpisodes):
+            self.episodes = list(self.episodes)
 
     @staticmethod
     def __deserialize_goal(serialized_goal: Dict[str, Any]) -> ObjectGoal:
@@ -126,30 +132,64 @@ class ObjectNavDatasetV1(PointNavDatasetV1):
         for k, v in deserialized["goals_by_category"].items():
             self.goals_by_category[k] = [self.__deserialize_goal(g) for g in v]
 
+        assert isinstance(
+            self.episodes, list
+        ), "Cannot add episodes to the lazy episodes of episode columns"
         for i, episode in enumerate(deserialized["episodes"]):
-            episode = ObjectGoalNavEpisode(**episode)
+            episode = self._deserialize_episode(episode, scenes_dir=scenes_dir)
             episode.episode_id = str(i)
+            self.episodes.append(episode)
+
+    def _deserialize_episode(
+        self, serialized_episode: Dict[str, Any], scenes_dir: Optional[str]
+    ) -> ObjectGoalNavEpisode:
+        episode = ObjectGoalNavEpisode(**serialized_episode)
+        episode.scene_id = self._join_scenes_dir(episode.scene_id, scenes_dir)
+
+        # The goals are shared by the episodes of the category
+        episode.goals = self.goals_by_category[episode.goals_key]  # type: ignore[assignment]
+
+        if episode.shortest_paths is not None:
+            # The points of the episode are still the serialized values
+            for path in serialized_episode["shortest_paths"]:
+                for p_index, point in enumerate(path):
+                    if point is None or isinstance(point, (int, str)):
+                        point = {
+                            "action": point,
+                            "rotation": None,
+                            "position": None,
+                        }
+
+                    path[p_index] = ShortestPathPoint(**point)
+
+        return episode
+
+    def _get_episode_columns_metadata(self) -> Dict[str, Any]:
+        return dict(
+            category_to_task_category_id=self.category_to_task_category_id,
+            category_to_scene_annotation_category_id=self.category_to_scene_annotation_category_id,
+            goals_by_category=self.goals_by_category,
+        )
 
-            if scenes_dir is not None:
-                if episode.scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
-                    episode.scene_id = episode.scene_id[
-                        len(DEFAULT_SCENE_PATH_PREFIX) :
-                    ]
-
-                episode.scene_id = os.path.join(scenes_dir, episode.scene_id)
-
-            episode.goals = self.goals_by_category[episode.goals_key]
-
-            if episode.shortest_paths is not None:
-                for path in episode.shortest_paths:
-                    for p_index, point in enumerate(path):
-                        if point is None or isinstance(point, (int, str)):
-                            point = {
-                                "action": point,
-                                "rotation": None,
-                                "position": None,
-                            }
-
-                        path[p_index] = ShortestPathPoint(**point)
+    def _set_episode_columns_metadata(self, metadata: Dict[str, Any]) -> None:
+        self.category_to_task_category_id = metadata[
+            "category_to_task_category_id"
+        ]
+        self.category_to_scene_annotation_category_id = metadata[
+            "category_to_scene_annotation_category_id"
+        ]
+        for k, v in metadata["goals_by_category"].items():
+            self.goals_by_category[k] = [self.__deserialize_goal(g) for g in v]
 
-            self.episodes.append(episode)  # type: ignore [attr-defined]
+    def write_episode_columns(
+        self, output_path: str, config: Optional["DictConfig"] = None
+    ) -> None:
+        # The goals are deduplicated in goals_by_category, which is stored
+        # in the metadata.
+        write_episode_columns(
+            output_path,
+            self.episodes,
+            scenes_dir=None if config is None else config.scenes_dir,
+            write_goals=False,
+            metadata=self._get_episode_columns_metadata(),
+        )
@@ -7,11 +7,32 @@
 import gzip
 import json
 import os
-from typing import TYPE_CHECKING, List, Optional
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
 
 from habitat.config import read_write
 from habitat.core.dataset import ALL_SCENES_MASK, Dataset
 from habitat.core.registry import registry
+from habitat.datasets.episode_columns import (
+    EPISODE_COLUMNS_EXT,
+    EpisodeColumns,
+    LazyEpisodeIterator,
+    LazyEpisodes,
+    load_lazy_episodes,
+    write_episode_columns,
+)
+from habitat.datasets.scene_episode_index import get_scene_index, select_scenes
 from habitat.tasks.nav.nav import (
     NavigationEpisode,
     NavigationGoal,
@@ -30,8 +51,12 @@ DEFAULT_SCENE_PATH_PREFIX = "data/scene_datasets/"
 class PointNavDatasetV1(Dataset):
     r"""Class inherited from Dataset that loads Point Navigation dataset."""
 
-    episodes: List[NavigationEpisode]
+    # The episodes are lazy when the dataset is stored as episode columns
+    episodes: Union[List[NavigationEpisode], LazyEpisodes[NavigationEpisode]]
     content_scenes_path: str = "{data_path}/content/{scene}.json.gz"
+    # Whether from_json sets the id of the episodes to their position in the
+    # file instead of reading it.
+    _episode_ids_from_file_position: bool = False
 
     @staticmethod
     def check_config_paths_exist(config: "DictConfig") -> bool:
@@ -52,14 +77,31 @@ class PointNavDatasetV1(Dataset):
                 f"Could not find dataset file `{dataset_dir}`"
             )
 
+        datasetfile_path = config.data_path.format(split=config.split)
+        if not datasetfile_path.endswith(EPISODE_COLUMNS_EXT):
+            # Only the scene index is read if the dataset doesn't have
+            # separate files per scene
+            index = get_scene_index(
+                datasetfile_path, lambda: cls._read_json(datasetfile_path)
+            )
+            if index is not None and not cls._has_individual_scene_files(
+                index["content_scenes_path"] or cls.content_scenes_path,
+                dataset_dir,
+            ):
+                scene_ids = {
+                    cls._join_scenes_dir(scene_id, config.scenes_dir)
+                    for scene_id in index["scenes"]
+                }
+                return list(map(cls.scene_from_scene_path, sorted(scene_ids)))
+
         cfg = config.copy()
         with read_write(cfg):
             cfg.content_scenes = []
             dataset = cls(cfg)
-            has_individual_scene_files = os.path.exists(
-                dataset.content_scenes_path.split("{scene}")[0].format(
-                    data_path=dataset_dir
-                )
+            has_individual_scene_files = not isinstance(
+                dataset.episodes, LazyEpisodes
+            ) and cls._has_individual_scene_files(
+                dataset.content_scenes_path, dataset_dir
             )
             if has_individual_scene_files:
                 return cls._get_scenes_from_folder(
@@ -72,6 +114,38 @@ class PointNavDatasetV1(Dataset):
                 dataset = cls(cfg)
                 return list(map(cls.scene_from_scene_path, dataset.scene_ids))
 
+    @classmethod
+    def get_scene_episode_counts(
+        cls, config: "DictConfig"
+    ) -> Optional[Dict[str, int]]:
+        datasetfile_path = config.data_path.format(split=config.split)
+        counts: Dict[str, int] = {}
+        if datasetfile_path.endswith(EPISODE_COLUMNS_EXT):
+            columns = EpisodeColumns(datasetfile_path)
+            for scene_id, count in zip(
+                columns.scene_ids,
+                np.bincount(
+                    columns.scene_index, minlength=len(columns.scene_ids)
+                ).tolist(),
+            ):
+                scene = cls.scene_from_scene_path(scene_id)
+                counts[scene] = counts.get(scene, 0) + count
+            return counts
+
+        index = get_scene_index(
+            datasetfile_path, lambda: cls._read_json(datasetfile_path)
+        )
+        if index is None or cls._has_individual_scene_files(
+            index["content_scenes_path"] or cls.content_scenes_path,
+            os.path.dirname(datasetfile_path),
+        ):
+            return None
+
+        for scene_id, scene_index in index["scenes"].items():
+            scene = cls.scene_from_scene_path(scene_id)
+            counts[scene] = counts.get(scene, 0) + scene_index["num_episodes"]
+        return counts
+
     @staticmethod
     def _get_scenes_from_folder(
         content_scenes_path: str, dataset_dir: str
@@ -97,15 +171,21 @@ class PointNavDatasetV1(Dataset):
             return
 
         datasetfile_path = config.data_path.format(split=config.split)
-        with gzip.open(datasetfile_path, "rt") as f:
-            self.from_json(f.read(), scenes_dir=config.scenes_dir)
+        if datasetfile_path.endswith(EPISODE_COLUMNS_EXT):
+            self._load_episode_columns(datasetfile_path, config)
+            return
 
-        # Read separate file for each scene
+        json_str = self._read_json(datasetfile_path)
         dataset_dir = os.path.dirname(datasetfile_path)
-        has_individual_scene_files = os.path.exists(
-            self.content_scenes_path.split("{scene}")[0].format(
-                data_path=dataset_dir
-            )
+        if (
+            ALL_SCENES_MASK in config.content_scenes
+            or not self._from_json_scenes(datasetfile_path, json_str, config)
+        ):
+            self.from_json(json_str, scenes_dir=config.scenes_dir)
+
+        # Read separate file for each scene
+        has_individual_scene_files = self._has_individual_scene_files(
+            self.content_scenes_path, dataset_dir
         )
         if has_individual_scene_files:
             scenes = config.content_scenes
@@ -127,6 +207,54 @@ class PointNavDatasetV1(Dataset):
                 filter(self.build_content_scenes_filter(config), self.episodes)
             )
 
+    @staticmethod
+    def _read_json(datasetfile_path: str) -> str:
+        with gzip.open(datasetfile_path, "rt") as f:
+            return f.read()
+
+    @staticmethod
+    def _has_individual_scene_files(
+        content_scenes_path: str, dataset_dir: str
+    ) -> bool:
+        return os.path.exists(
+            content_scenes_path.split("{scene}")[0].format(
+                data_path=dataset_dir
+            )
+        )
+
+    def _from_json_scenes(
+        self, datasetfile_path: str, json_str: str, config: "DictConfig"
+    ) -> bool:
+        r"""Only deserializes the episodes of the :py:`content_scenes` of
+        :p:`json_str`, using the scene index of the dataset file.
+
+        :return: Whether the episodes were loaded. They are not if the file
+            can't be indexed or if the dataset has separate files per scene,
+            in which case all the episodes of the file are used.
+        """
+        index = get_scene_index(datasetfile_path, lambda: json_str)
+        if index is None or self._has_individual_scene_files(
+            index["content_scenes_path"] or self.content_scenes_path,
+            os.path.dirname(datasetfile_path),
+        ):
+            return False
+
+        scenes_to_load = set(config.content_scenes)
+        selected_json, episode_indices = select_scenes(
+            json_str,
+            index,
+            lambda scene_id: self.scene_from_scene_path(scene_id)
+            in scenes_to_load,
+        )
+        num_loaded = len(self.episodes)
+        self.from_json(selected_json, scenes_dir=config.scenes_dir)
+        if self._episode_ids_from_file_position:
+            for episode, episode_index in zip(
+                self.episodes[num_loaded:], episode_indices
+            ):
+                episode.episode_id = str(episode_index)
+        return True
+
     def from_json(
         self, json_str: str, scenes_dir: Optional[str] = None
     ) -> None:
@@ -134,21 +262,102 @@ class PointNavDatasetV1(Dataset):
         if CONTENT_SCENES_PATH_FIELD in deserialized:
             self.content_scenes_path = deserialized[CONTENT_SCENES_PATH_FIELD]
 
+        assert isinstance(
+            self.episodes, list
+        ), "Cannot add episodes to the lazy episodes of episode columns"
         for episode in deserialized["episodes"]:
-            episode = NavigationEpisode(**episode)
-
-            if scenes_dir is not None:
-                if episode.scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
-                    episode.scene_id = episode.scene_id[
-                        len(DEFAULT_SCENE_PATH_PREFIX) :
-                    ]
-
-                episode.scene_id = os.path.join(scenes_dir, episode.scene_id)
-
-            for g_index, goal in enumerate(episode.goals):
-                episode.goals[g_index] = NavigationGoal(**goal)
-            if episode.shortest_paths is not None:
-                for path in episode.shortest_paths:
-                    for p_index, point in enumerate(path):
-                        path[p_index] = ShortestPathPoint(**point)
-            self.episodes.append(episode)
+            self.episodes.append(
+                self._deserialize_episode(episode, scenes_dir=scenes_dir)
+            )
+
+    @staticmethod
+    def _join_scenes_dir(scene_id: str, scenes_dir: Optional[str]) -> str:
+        if scenes_dir is None:
+            return scene_id
+
+        if scene_id.startswith(DEFAULT_SCENE_PATH_PREFIX):
+            scene_id = scene_id[len(DEFAULT_SCENE_PATH_PREFIX) :]
+
+        return os.path.join(scenes_dir, scene_id)
+
+    def _deserialize_episode(
+        self, serialized_episode: Dict[str, Any], scenes_dir: Optional[str]
+    ) -> NavigationEpisode:
+        episode = NavigationEpisode(**serialized_episode)
+        episode.scene_id = self._join_scenes_dir(episode.scene_id, scenes_dir)
+
+        # The goals and points of the episode are still the serialized dicts
+        for g_index, goal in enumerate(serialized_episode["goals"]):
+            episode.goals[g_index] = NavigationGoal(**goal)
+        if episode.shortest_paths is not None:
+            for path in serialized_episode["shortest_paths"]:
+                for p_index, point in enumerate(path):
+                    path[p_index] = ShortestPathPoint(**point)
+        return episode
+
+    def _load_episode_columns(self, path: str, config: "DictConfig") -> None:
+        r"""Loads episodes converted by :ref:`write_episode_columns`. The
+        episodes are memory-mapped and only built when they are accessed.
+        """
+        scenes_to_load = set(config.content_scenes)
+
+        def _scenes_filter(scene_id: str) -> bool:
+            return (
+                ALL_SCENES_MASK in scenes_to_load
+                or self.scene_from_scene_path(scene_id) in scenes_to_load
+            )
+
+        self.episodes, metadata = load_lazy_episodes(
+            path,
+            join_scenes_dir=lambda scene_id: self._join_scenes_dir(
+                scene_id, config.scenes_dir
+            ),
+            scenes_filter=_scenes_filter,
+            build_episode=partial(
+                self._deserialize_episode, scenes_dir=config.scenes_dir
+            ),
+        )
+        self._set_episode_columns_metadata(metadata)
+
+    def _get_episode_columns_metadata(self) -> Dict[str, Any]:
+        r"""Dataset level fields to store along with the episode columns."""
+        return {}
+
+    def _set_episode_columns_metadata(self, metadata: Dict[str, Any]) -> None:
+        pass
+
+    def write_episode_columns(
+        self, output_path: str, config: Optional["DictConfig"] = None
+    ) -> None:
+        r"""Writes the episodes of the dataset in the episode columns format,
+        that can then be loaded by setting :py:`data_path` to
+        :p:`output_path`.
+
+        :param output_path: Output directory, ends with ``.columns``.
+        :param config: The dataset config the episodes were loaded with,
+            used to strip the scenes_dir from the scene ids.
+        """
+        write_episode_columns(
+            output_path,
+            self.episodes,
+            scenes_dir=None if config is None else config.scenes_dir,
+            metadata=self._get_episode_columns_metadata(),
+        )
+
+    @property
+    def scene_ids(self) -> List[str]:
+        if isinstance(self.episodes, LazyEpisodes):
+            return self.episodes.scene_ids
+        return super().scene_ids
+
+    def get_episode_keys(self) -> List[Tuple[str, str]]:
+        if isinstance(self.episodes, LazyEpisodes):
+            return self.episodes.episode_keys()
+        return super().get_episode_keys()
+
+    def get_episode_iterator(
+        self, *args: Any, **kwargs: Any
+    ) -> Iterator[NavigationEpisode]:
+        if isinstance(self.episodes, LazyEpisodes):
+            return LazyEpisodeIterator(self.episodes, *args, **kwargs)
+        return super().get_episode_iterator(*args, **kwargs)
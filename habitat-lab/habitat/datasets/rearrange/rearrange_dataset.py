@@ -47,6 +47,7 @@ class RearrangeDatasetV0(PointNavDatasetV1):
     r"""Class inherited from PointNavDataset that loads Rearrangement dataset."""
     episodes: List[RearrangeEpisode] = []  # type: ignore
     content_scenes_path: str = "{data_path}/content/{scene}.json.gz"
+    _episode_ids_from_file_position: bool = True
 
     def to_json(self) -> str:
         result = DatasetFloatJSONEncoder().encode(self)
@@ -68,15 +68,22 @@ class RearrangeEpisodeGenerator:
         cfg: DictConfig,
         debug_visualization: bool = False,
         limit_scene_set: Optional[str] = None,
+        scene_shard: Optional[Tuple[int, int]] = None,
     ) -> None:
         """
         Initialize the generator object for a particular configuration.
         Loads yaml, sets up samplers and debug visualization settings.
+
+        :param scene_shard: Optional (shard index, number of shards). Only the
+            scenes at the shard index modulo the number of shards in the sorted
+            scene set of a "subset" scene sampler are sampled, so that the
+            generators of different shards use disjoint scenes.
         """
         # load and cache the config
         self.cfg = cfg
         self.start_cfg = self.cfg.copy()
         self._limit_scene_set = limit_scene_set
+        self._scene_shard = scene_shard
 
         # debug visualization settings
         self._render_debug_obs = self._make_debug_video = debug_visualization
@@ -297,6 +304,16 @@ class RearrangeEpisodeGenerator:
 
             # cull duplicates
             unified_scene_set = sorted(set(unified_scene_set))
+            if self._scene_shard is not None:
+                shard_idx, num_shards = self._scene_shard
+                if len(unified_scene_set) >= num_shards:
+                    unified_scene_set = unified_scene_set[
+                        shard_idx::num_shards
+                    ]
+                else:
+                    logger.warning(
+                        f"Only {len(unified_scene_set)} scenes for {num_shards} shards, all the shards sample from all the scenes."
+                    )
             self._scene_sampler = samplers.MultiSceneSampler(unified_scene_set)
         else:
             logger.error(
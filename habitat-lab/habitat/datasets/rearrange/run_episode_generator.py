@@ -7,8 +7,9 @@
 import os
 import os.path as osp
 import random
+import sys
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, List
+from typing import TYPE_CHECKING, Any, List, Optional
 
 import numpy as np
 from omegaconf import OmegaConf
@@ -21,6 +22,9 @@ from habitat.datasets.rearrange.rearrange_generator import (
 from habitat.datasets.rearrange.samplers.receptacle import (
     get_all_scenedataset_receptacles,
 )
+from habitat.datasets.rearrange.sharded_episode_generator import (
+    generate_sharded_dataset,
+)
 
 if TYPE_CHECKING:
     from habitat.config import DictConfig
@@ -312,9 +316,48 @@ def get_arg_parser():
         help="The number of episodes to generate.",
     )
     parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=None,
+        help="Generate the episodes in this many worker processes, each with its own seed and subset of the scenes, saving their episodes as they are generated. See sharded_episode_generator.py.",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        default=None,
+        help="Where the workers save their episodes. Defaults to the output path with a '.shards' suffix.",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=10,
+        help="The number of episodes a worker generates between two saves of its episodes to disk.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted generation with workers from the episodes in the shard directory.",
+    )
     return parser
 
 
+def get_output_path(out: Optional[str]) -> str:
+    """
+    The path of the generated dataset from the `--out` argument.
+    """
+    if out is None:
+        # default
+        return "rearrange_ep_dataset.json.gz"
+    if osp.isdir(out) or out.endswith("/"):
+        # append a default filename
+        return osp.abspath(out) + "/rearrange_ep_dataset.json.gz"
+    # filename
+    if not out.endswith(".json.gz"):
+        out += ".json.gz"
+    return out
+
+
 if __name__ == "__main__":
     parser = get_arg_parser()
     args, _ = parser.parse_known_args()
@@ -335,6 +378,23 @@ if __name__ == "__main__":
 
     logger.info(f"\n\nModified Config:\n{cfg}\n\n")
 
+    if args.num_workers is not None and not args.list:
+        output_path = get_output_path(args.out)
+        generate_sharded_dataset(
+            cfg,
+            num_episodes=args.num_episodes,
+            num_workers=args.num_workers,
+            shard_dir=args.shard_dir
+            if args.shard_dir is not None
+            else output_path[: -len(".json.gz")] + ".shards",
+            output_path=output_path,
+            seed=args.seed,
+            checkpoint_interval=args.checkpoint_interval,
+            limit_scene_set=args.limit_scene_set,
+            resume=args.resume,
+        )
+        sys.exit(0)
+
     dataset = RearrangeDatasetV0()
     with RearrangeEpisodeGenerator(
         cfg=cfg,
@@ -357,19 +417,7 @@ if __name__ == "__main__":
             dataset.episodes += ep_gen.generate_episodes(
                 args.num_episodes, args.verbose
             )
-            output_path = args.out
-            if output_path is None:
-                # default
-                output_path = "rearrange_ep_dataset.json.gz"
-            elif osp.isdir(output_path) or output_path.endswith("/"):
-                # append a default filename
-                output_path = (
-                    osp.abspath(output_path) + "/rearrange_ep_dataset.json.gz"
-                )
-            else:
-                # filename
-                if not output_path.endswith(".json.gz"):
-                    output_path += ".json.gz"
+            output_path = get_output_path(args.out)
 
             if (
                 not osp.exists(osp.dirname(output_path))
@@ -245,16 +245,18 @@ class ObjectSampler:
             [sim.pathfinder.island_radius(p) for p in navmesh_vertices]
         )
 
-        while num_placement_tries < self.max_placement_attempts:
-            num_placement_tries += 1
+        # sample the object locations of all the tries at once
+        target_object_positions = receptacle.sample_uniform_global_many(
+            sim,
+            self.max_placement_attempts,
+            self.sample_region_ratio[receptacle.name],
+        ) + self._translation_up_offset * np.array(receptacle.up)
 
-            # sample the object location
-            target_object_position = (
-                receptacle.sample_uniform_global(
-                    sim, self.sample_region_ratio[receptacle.name]
-                )
-                + self._translation_up_offset * receptacle.up
+        while num_placement_tries < self.max_placement_attempts:
+            target_object_position = mn.Vector3(
+                *target_object_positions[num_placement_tries]
             )
+            num_placement_tries += 1
 
             # instance the new potential object from the handle
             if new_object == None:
@@ -10,7 +10,7 @@ import random
 from abc import ABC, abstractmethod
 from copy import deepcopy
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import corrade as cr
 import magnum as mn
@@ -18,12 +18,21 @@ import numpy as np
 
 import habitat_sim
 from habitat.core.logging import logger
+from habitat.core.utils import atomic_write
 from habitat.sims.habitat_simulator.sim_utilities import add_wire_box
 from habitat.utils.geometry_utils import random_triangle_point
 
 # global module singleton for mesh importing instantiated upon first import
 _manager = mn.trade.ImporterManager()
 
+# The imported receptacle meshes are saved next to the mesh file with this suffix
+RECEPTACLE_MESH_CACHE_SUFFIX = ".receptacle_meshes.npz"
+RECEPTACLE_MESH_CACHE_VERSION = 1
+# The receptacle meshes imported by this process, by mesh file path, size and modification time
+_receptacle_mesh_cache: Dict[
+    Tuple[str, int, int], List["ReceptacleMeshData"]
+] = {}
+
 
 class Receptacle(ABC):
     """
@@ -84,6 +93,22 @@ class Receptacle(ABC):
         :param sample_region_scale: defines a XZ scaling of the sample region around its center. For example to constrain object spawning toward the center of a receptacle.
         """
 
+    def sample_uniform_local_many(
+        self, num_samples: int, sample_region_scale: float = 1.0
+    ) -> np.ndarray:
+        """
+        Sample `num_samples` uniform random points within Receptacle in local space. Returns an array of shape (num_samples, 3).
+
+        :param sample_region_scale: defines a XZ scaling of the sample region around its center. For example to constrain object spawning toward the center of a receptacle.
+        """
+        return np.array(
+            [
+                self.sample_uniform_local(sample_region_scale)
+                for _ in range(num_samples)
+            ],
+            dtype=np.float32,
+        ).reshape(-1, 3)
+
     def get_global_transform(self, sim: habitat_sim.Simulator) -> mn.Matrix4:
         """
         Isolates boilerplate necessary to extract receptacle global transform of the Receptacle at the current state.
@@ -118,6 +143,26 @@ class Receptacle(ABC):
         local_sample = self.sample_uniform_local(sample_region_scale)
         return self.get_global_transform(sim).transform_point(local_sample)
 
+    def sample_uniform_global_many(
+        self,
+        sim: habitat_sim.Simulator,
+        num_samples: int,
+        sample_region_scale: float,
+    ) -> np.ndarray:
+        """
+        Sample `num_samples` uniform random points in the local Receptacle volume and then transform them into global space. Returns an array of shape (num_samples, 3).
+
+        :param sample_region_scale: defines a XZ scaling of the sample region around its center.
+        """
+        local_samples = self.sample_uniform_local_many(
+            num_samples, sample_region_scale
+        )
+        global_transform = np.array(self.get_global_transform(sim))
+        return (
+            local_samples @ global_transform[:3, :3].T
+            + global_transform[:3, 3]
+        )
+
     def add_receptacle_visualization(
         self, sim: habitat_sim.Simulator
     ) -> List[habitat_sim.physics.ManagedRigidObject]:
@@ -218,6 +263,27 @@ class AABBReceptacle(Receptacle):
 
         return np.random.uniform(sample_range[0], sample_range[1])
 
+    def sample_uniform_local_many(
+        self, num_samples: int, sample_region_scale: float = 1.0
+    ) -> np.ndarray:
+        """
+        Sample `num_samples` uniform random points in the local AABB. Returns an array of shape (num_samples, 3).
+
+        :param sample_region_scale: defines a XZ scaling of the sample region around its center. For example to constrain object spawning toward the center of a receptacle.
+        """
+        scaled_region = mn.Range3D.from_center(
+            self.bounds.center(), sample_region_scale * self.bounds.size() / 2
+        )
+
+        # NOTE: does not scale the "up" direction
+        sample_range = [scaled_region.min, scaled_region.max]
+        sample_range[0][self.up_axis] = self.bounds.min[self.up_axis]
+        sample_range[1][self.up_axis] = self.bounds.max[self.up_axis]
+
+        return np.random.uniform(
+            sample_range[0], sample_range[1], size=(num_samples, 3)
+        )
+
     def get_global_transform(self, sim: habitat_sim.Simulator) -> mn.Matrix4:
         """
         Isolates boilerplate necessary to extract receptacle global transform of the Receptacle at the current state.
@@ -313,7 +379,7 @@ class AABBReceptacle(Receptacle):
         # TODO: test this
 
 
-def assert_triangles(indices: List[int]) -> None:
+def assert_triangles(indices: Union[List[int], np.ndarray]) -> None:
     """
     Assert that an index array is divisible by 3 as a heuristic for triangle-only faces.
     """
@@ -322,6 +388,36 @@ def assert_triangles(indices: List[int]) -> None:
     ), "TriangleMeshReceptacles must be exclusively composed of triangles. The provided mesh_data is not."
 
 
+class ReceptacleMeshData:
+    """
+    The vertex positions and triangle indices of a receptacle mesh, as NumPy arrays. Provides the parts of the magnum.trade.MeshData API used by TriangleMeshReceptacle, so that receptacle meshes can be read from the receptacle mesh cache without importing the mesh asset.
+    """
+
+    def __init__(self, positions: np.ndarray, indices: np.ndarray) -> None:
+        """
+        :param positions: The vertex positions, of shape (N, 3).
+        :param indices: The vertex indices of the triangles, of shape (3 * F,).
+        """
+        self.positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        self.indices = np.asarray(indices, dtype=np.uint32).reshape(-1)
+        assert_triangles(self.indices)
+
+    @classmethod
+    def from_mesh_data(
+        cls, mesh_data: mn.trade.MeshData
+    ) -> "ReceptacleMeshData":
+        return cls(
+            mesh_data.attribute(mn.trade.MeshAttribute.POSITION),
+            mesh_data.indices,
+        )
+
+    def attribute(self, name: mn.trade.MeshAttribute) -> np.ndarray:
+        assert (
+            name == mn.trade.MeshAttribute.POSITION
+        ), "ReceptacleMeshData only has vertex positions."
+        return self.positions
+
+
 class TriangleMeshReceptacle(Receptacle):
     """
     Defines a Receptacle surface as a triangle mesh.
@@ -331,7 +427,7 @@ class TriangleMeshReceptacle(Receptacle):
     def __init__(
         self,
         name: str,
-        mesh_data: mn.trade.MeshData,
+        mesh_data: Union[mn.trade.MeshData, ReceptacleMeshData],
         parent_object_handle: str = None,
         parent_link: Optional[int] = None,
         up: Optional[mn.Vector3] = None,
@@ -340,36 +436,40 @@ class TriangleMeshReceptacle(Receptacle):
         Initialize the TriangleMeshReceptacle from mesh data and pre-compute the area weighted accumulator.
 
         :param name: The name of the Receptacle. Should be unique and descriptive for any one object.
-        :param mesh_data: The Receptacle's mesh data. A magnum.trade.MeshData object (indices len divisible by 3).
+        :param mesh_data: The Receptacle's mesh data. A magnum.trade.MeshData or ReceptacleMeshData object (indices len divisible by 3).
         :param parent_object_handle: The rigid or articulated object instance handle for the parent object to which the Receptacle is attached. None for globally defined stage Receptacles.
         :param parent_link: Index of the link to which the Receptacle is attached if the parent is an ArticulatedObject. -1 denotes the base link. None for rigid objects and stage Receptables.
         :param up: The "up" direction of the Receptacle in local AABB space. Used for optionally culling receptacles in un-supportive states such as inverted surfaces.
         """
         super().__init__(name, parent_object_handle, parent_link, up)
         self.mesh_data = mesh_data
-        self.area_weighted_accumulator = (
-            []
-        )  # normalized float weights for each triangle for sampling
         assert_triangles(mesh_data.indices)
 
+        # the mesh vertex positions and the vertex indices of each triangle face
+        self.vertices = np.asarray(
+            mesh_data.attribute(mn.trade.MeshAttribute.POSITION),
+            dtype=np.float32,
+        ).reshape(-1, 3)
+        self.face_vertex_indices = np.asarray(
+            mesh_data.indices, dtype=np.int64
+        ).reshape(-1, 3)
+        # the three vertices of each triangle face, of shape (num_faces, 3, 3)
+        self.face_verts = self.vertices[self.face_vertex_indices]
+
         # pre-compute the normalized cumulative area of all triangle faces for later sampling
-        self.total_area = 0.0
-        for f_ix in range(int(len(mesh_data.indices) / 3)):
-            v = self.get_face_verts(f_ix)
-            w1 = v[1] - v[0]
-            w2 = v[2] - v[1]
-            self.area_weighted_accumulator.append(
-                0.5 * mn.math.cross(w1, w2).length()
-            )
-            self.total_area += self.area_weighted_accumulator[-1]
-        for f_ix in range(len(self.area_weighted_accumulator)):
-            self.area_weighted_accumulator[f_ix] = (
-                self.area_weighted_accumulator[f_ix] / self.total_area
-            )
-            if f_ix > 0:
-                self.area_weighted_accumulator[
-                    f_ix
-                ] += self.area_weighted_accumulator[f_ix - 1]
+        w1 = self.face_verts[:, 1] - self.face_verts[:, 0]
+        w2 = self.face_verts[:, 2] - self.face_verts[:, 1]
+        face_areas = 0.5 * np.linalg.norm(
+            np.cross(w1.astype(np.float64), w2.astype(np.float64)), axis=1
+        )
+        self.total_area = float(face_areas.sum())
+        # normalized float weights for each triangle for sampling
+        self.area_weighted_accumulator = (
+            np.cumsum(face_areas) / self.total_area
+        )
+        if len(self.area_weighted_accumulator) > 0:
+            # no sample can be past the last triangle because of rounding
+            self.area_weighted_accumulator[-1] = 1.0
 
     def get_face_verts(self, f_ix: int) -> List[mn.Vector3]:
         """
@@ -377,14 +477,7 @@ class TriangleMeshReceptacle(Receptacle):
 
         :param f_ix: The index of the mesh triangle.
         """
-        verts: List[mn.Vector3] = []
-        for ix in range(3):
-            index = int(f_ix * 3 + ix)
-            v_ix = self.mesh_data.indices[index]
-            verts.append(
-                self.mesh_data.attribute(mn.trade.MeshAttribute.POSITION)[v_ix]
-            )
-        return verts
+        return [mn.Vector3(*v) for v in self.face_verts[f_ix]]
 
     def sample_area_weighted_triangle(self) -> int:
         """
@@ -393,20 +486,15 @@ class TriangleMeshReceptacle(Receptacle):
         Returns a random triangle index sampled with area weighting.
         """
 
-        def find_ge(a: List[Any], x) -> Any:
-            "Find leftmost item greater than or equal to x"
-            from bisect import bisect_left
-
-            i = bisect_left(a, x)
-            if i != len(a):
-                return i
-            raise ValueError(
-                f"Value '{x}' is greater than all items in the list. Maximum value should be <1."
-            )
-
         # first area weighted sampling of a triangle
         sample_val = random.random()
-        tri_index = find_ge(self.area_weighted_accumulator, sample_val)
+        tri_index = int(
+            np.searchsorted(self.area_weighted_accumulator, sample_val)
+        )
+        if tri_index == len(self.area_weighted_accumulator):
+            raise ValueError(
+                f"Value '{sample_val}' is greater than all items in the list. Maximum value should be <1."
+            )
         return tri_index
 
     def sample_uniform_local(
@@ -431,6 +519,37 @@ class TriangleMeshReceptacle(Receptacle):
 
         return rand_point
 
+    def sample_uniform_local_many(
+        self, num_samples: int, sample_region_scale: float = 1.0
+    ) -> np.ndarray:
+        """
+        Sample `num_samples` uniform random points from the mesh. Returns an array of shape (num_samples, 3).
+
+        :param sample_region_scale: defines a XZ scaling of the sample region around its center. For example to constrain object spawning toward the center of a receptacle.
+        """
+
+        if sample_region_scale != 1.0:
+            logger.warning(
+                "TriangleMeshReceptacle does not support 'sample_region_scale' != 1.0."
+            )
+
+        # area weighted sampling of the triangles
+        tri_indices = np.searchsorted(
+            self.area_weighted_accumulator, np.random.random(num_samples)
+        )
+        v = self.face_verts[tri_indices]
+
+        # then sample a random point in each triangle, see random_triangle_point()
+        coefs = np.random.random((num_samples, 2))
+        outside = coefs.sum(axis=1) >= 1
+        # transform "outside" points back inside
+        coefs[outside] = 1 - coefs[outside]
+        return (
+            v[:, 0]
+            + coefs[:, :1] * (v[:, 1] - v[:, 0])
+            + coefs[:, 1:] * (v[:, 2] - v[:, 0])
+        )
+
     def debug_draw(
         self, sim: habitat_sim.Simulator, color: Optional[mn.Color4] = None
     ) -> None:
@@ -591,6 +710,85 @@ def import_tri_mesh(mesh_file: str) -> List[mn.trade.MeshData]:
     return mesh_data
 
 
+def _read_receptacle_meshes(
+    cache_path: str, mesh_key: Tuple[str, int, int]
+) -> Optional[List[ReceptacleMeshData]]:
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with np.load(cache_path) as data:
+            if (
+                int(data["version"]) != RECEPTACLE_MESH_CACHE_VERSION
+                or int(data["mesh_size"]) != mesh_key[1]
+                or int(data["mesh_mtime_ns"]) != mesh_key[2]
+            ):
+                return None
+            return [
+                ReceptacleMeshData(
+                    data[f"positions_{mesh_ix}"], data[f"indices_{mesh_ix}"]
+                )
+                for mesh_ix in range(int(data["mesh_count"]))
+            ]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_receptacle_meshes(
+    cache_path: str,
+    mesh_key: Tuple[str, int, int],
+    meshes: List[ReceptacleMeshData],
+) -> None:
+    arrays: Dict[str, np.ndarray] = {}
+    for mesh_ix, mesh in enumerate(meshes):
+        arrays[f"positions_{mesh_ix}"] = mesh.positions
+        arrays[f"indices_{mesh_ix}"] = mesh.indices
+    # Several generator processes can import the same mesh at the same time
+    atomic_write(
+        cache_path,
+        lambda f: np.savez(
+            f,
+            version=RECEPTACLE_MESH_CACHE_VERSION,
+            mesh_size=mesh_key[1],
+            mesh_mtime_ns=mesh_key[2],
+            mesh_count=len(meshes),
+            **arrays,
+        ),
+    )
+
+
+def import_receptacle_meshes(mesh_file: str) -> List[ReceptacleMeshData]:
+    """
+    Returns the filtered and transformed triangle meshes of a receptacle mesh asset, as imported by import_tri_mesh.
+
+    The meshes are only imported if they are neither in memory nor saved next to the mesh asset with the RECEPTACLE_MESH_CACHE_SUFFIX suffix, for the current size and modification time of the asset.
+
+    :param mesh_file: The input meshes file. NOTE: must contain only triangles.
+    """
+    stat = os.stat(mesh_file)
+    mesh_key = (os.path.abspath(mesh_file), stat.st_size, stat.st_mtime_ns)
+    meshes = _receptacle_mesh_cache.get(mesh_key, None)
+    if meshes is not None:
+        return meshes
+
+    cache_path = mesh_file + RECEPTACLE_MESH_CACHE_SUFFIX
+    meshes = _read_receptacle_meshes(cache_path, mesh_key)
+    if meshes is None:
+        meshes = [
+            ReceptacleMeshData.from_mesh_data(mesh_data)
+            for mesh_data in import_tri_mesh(mesh_file)
+        ]
+        try:
+            _write_receptacle_meshes(cache_path, mesh_key, meshes)
+        except OSError as e:
+            logger.warning(
+                f"Could not save the receptacle meshes of {mesh_file}: {e}"
+            )
+
+    _receptacle_mesh_cache[mesh_key] = meshes
+    return meshes
+
+
 def parse_receptacles_from_user_config(
     user_subconfig: habitat_sim._ext.habitat_sim_bindings.Configuration,
     parent_object_handle: Optional[str] = None,
@@ -694,7 +892,9 @@ def parse_receptacles_from_user_config(
                     mesh_file
                 ), f"Configured receptacle mesh asset '{mesh_file}' not found."
                 # TODO: build the mesh_data entry from scale and mesh
-                mesh_data: List[mn.trade.MeshData] = import_tri_mesh(mesh_file)
+                mesh_data: List[ReceptacleMeshData] = import_receptacle_meshes(
+                    mesh_file
+                )
 
                 for mix, single_mesh_data in enumerate(mesh_data):
                     single_receptacle_name = (
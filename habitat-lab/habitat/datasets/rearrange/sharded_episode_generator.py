@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Generates a rearrange dataset with several `RearrangeEpisodeGenerator` worker
+processes, each with its own seed and its own subset of the scenes. Each
+worker is a shard of the dataset: it appends the episodes it generates to
+`shard_<i>.episodes.jsonl` in the shard directory, one JSON episode per line,
+and flushes the file to disk every `checkpoint_interval` episodes. An
+interrupted generation is resumed from the episodes in these files. Once all
+the shards are done, they are merged with `combine_datasets`.
+
+Used by `run_episode_generator.py` with `--num-workers`:
+```
+python habitat/datasets/rearrange/run_episode_generator.py --run --config data/config.yaml --num-episodes 10000 --num-workers 16 --out data/datasets/rearrange.json.gz
+```
+Rerun the same command with `--resume` to continue an interrupted generation.
+"""
+
+import gzip
+import json
+import os
+import os.path as osp
+import random
+import time
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from omegaconf import OmegaConf
+
+from habitat.core.logging import logger
+from habitat.core.utils import DatasetFloatJSONEncoder, atomic_write
+from habitat.datasets.rearrange.combine_datasets import combine_datasets
+from habitat.datasets.rearrange.rearrange_generator import (
+    RearrangeEpisodeGenerator,
+)
+
+if TYPE_CHECKING:
+    from habitat.config import DictConfig
+
+SHARDS_INFO_FILE = "shards.json"
+SHARD_EPISODES_FILE = "shard_{shard_idx}.episodes.jsonl"
+SHARD_DATASET_FILE = "shard_{shard_idx}.json.gz"
+
+
+def get_shard_num_episodes(num_episodes: int, num_shards: int) -> List[int]:
+    """
+    Splits `num_episodes` between `num_shards` shards, the first shards get
+    one more episode when it doesn't divide evenly.
+    """
+    return [
+        num_episodes // num_shards + int(shard_idx < num_episodes % num_shards)
+        for shard_idx in range(num_shards)
+    ]
+
+
+def get_shard_episode_id_offsets(shard_num_episodes: List[int]) -> List[int]:
+    """
+    The id of the first episode of each shard, the shards number their
+    episodes after those of the previous shards so that the ids of the
+    merged dataset are unique, like with a single generator.
+    """
+    return [
+        sum(shard_num_episodes[:shard_idx])
+        for shard_idx in range(len(shard_num_episodes))
+    ]
+
+
+def get_shard_seed(seed: int, shard_idx: int, num_done: int) -> int:
+    """
+    The seed of a shard that already has `num_done` episodes, so that the
+    shards, and a resumed shard, don't repeat the random draws of each other.
+    """
+    return int(
+        np.random.SeedSequence([seed, shard_idx, num_done]).generate_state(1)[
+            0
+        ]
+    )
+
+
+def read_shard_episodes(episodes_path: str) -> List[str]:
+    """
+    Returns the JSON episodes saved in a shard episodes file. A last episode
+    that was only partly written when the generation was interrupted is
+    removed from the file.
+    """
+    if not osp.exists(episodes_path):
+        return []
+    with open(episodes_path, "rb") as f:
+        data = f.read()
+    complete_len = data.rfind(b"\n") + 1
+    if complete_len < len(data):
+        with open(episodes_path, "r+b") as f:
+            f.truncate(complete_len)
+    return data[:complete_len].decode().splitlines()
+
+
+def _episodes_per_hour(num_episodes: int, seconds: float) -> float:
+    return num_episodes / max(seconds / 3600, 1e-9)
+
+
+def write_shard_dataset(episode_lines: List[str], dataset_path: str) -> None:
+    """
+    Saves the JSON episodes of a shard as a dataset that `combine_datasets`
+    can read.
+    """
+
+    def write_fn(f):
+        with gzip.open(f, "wt") as gz_f:
+            gz_f.write(
+                '{"config": null, "episodes": ['
+                + ", ".join(episode_lines)
+                + "]}"
+            )
+
+    atomic_write(dataset_path, write_fn)
+
+
+def generate_shard(
+    cfg: "DictConfig",
+    shard_idx: int,
+    num_shards: int,
+    num_episodes: int,
+    shard_dir: str,
+    seed: int,
+    checkpoint_interval: int = 10,
+    limit_scene_set: Optional[str] = None,
+    episode_id_offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Generates the episodes of a shard that are not in its episodes file yet,
+    then saves the shard dataset. Returns the generation statistics of the
+    shard.
+
+    :param episode_id_offset: The id of the first episode of the shard, see
+        `get_shard_episode_id_offsets`.
+    """
+    episodes_path = osp.join(
+        shard_dir, SHARD_EPISODES_FILE.format(shard_idx=shard_idx)
+    )
+    dataset_path = osp.join(
+        shard_dir, SHARD_DATASET_FILE.format(shard_idx=shard_idx)
+    )
+    episode_lines = read_shard_episodes(episodes_path)
+    num_resumed = len(episode_lines)
+    num_tries = 0
+    start_time = time.time()
+
+    if num_resumed < num_episodes:
+        shard_seed = get_shard_seed(seed, shard_idx, num_resumed)
+        random.seed(shard_seed)
+        np.random.seed(shard_seed % 2**32)
+        with RearrangeEpisodeGenerator(
+            cfg=cfg,
+            limit_scene_set=limit_scene_set,
+            scene_shard=(shard_idx, num_shards),
+        ) as ep_gen, open(episodes_path, "a") as f:
+            ep_gen.num_ep_generated = episode_id_offset + num_resumed
+            num_unsaved = 0
+            while len(episode_lines) < num_episodes:
+                num_tries += 1
+                new_episode = ep_gen.generate_single_episode()
+                if new_episode is None:
+                    continue
+                episode_line = DatasetFloatJSONEncoder().encode(new_episode)
+                f.write(episode_line + "\n")
+                episode_lines.append(episode_line)
+                num_unsaved += 1
+                if (
+                    num_unsaved >= checkpoint_interval
+                    or len(episode_lines) == num_episodes
+                ):
+                    f.flush()
+                    os.fsync(f.fileno())
+                    num_unsaved = 0
+                    episodes_per_hour = _episodes_per_hour(
+                        len(episode_lines) - num_resumed,
+                        time.time() - start_time,
+                    )
+                    logger.info(
+                        f"Shard {shard_idx}: {len(episode_lines)}/{num_episodes} episodes, {episodes_per_hour:.1f} episodes/hour."
+                    )
+
+    if num_tries > 0 or not osp.exists(dataset_path):
+        write_shard_dataset(episode_lines[:num_episodes], dataset_path)
+
+    return {
+        "shard_idx": shard_idx,
+        "num_resumed": num_resumed,
+        "num_generated": len(episode_lines) - num_resumed,
+        "num_tries": num_tries,
+        "elapsed": time.time() - start_time,
+        "dataset_path": dataset_path,
+    }
+
+
+def _generate_shard_star(args: Tuple) -> Dict[str, Any]:
+    cfg_container, *other_args = args
+    return generate_shard(OmegaConf.create(cfg_container), *other_args)
+
+
+def _check_shards_info(shards_info_path: str, shards_info: Dict[str, Any]):
+    with open(shards_info_path, "r") as f:
+        prev_shards_info = json.load(f)
+    for k in ("num_episodes", "num_shards", "config", "limit_scene_set"):
+        if prev_shards_info[k] != shards_info[k]:
+            raise ValueError(
+                f"Cannot resume the generation in {osp.dirname(shards_info_path)}, its '{k}' is different."
+            )
+    # The seed of an unseeded generation is only known from the saved info
+    shards_info["seed"] = prev_shards_info["seed"]
+
+
+def generate_sharded_dataset(
+    cfg: "DictConfig",
+    num_episodes: int,
+    num_workers: int,
+    shard_dir: str,
+    output_path: str,
+    seed: Optional[int] = None,
+    checkpoint_interval: int = 10,
+    limit_scene_set: Optional[str] = None,
+    resume: bool = False,
+) -> None:
+    """
+    Generates `num_episodes` episodes with `num_workers` worker processes,
+    one per shard, and merges the shards into the dataset at `output_path`.
+
+    :param shard_dir: Where the episodes of the shards are saved.
+    :param seed: The seed from which the seeds of the shards are derived. A
+        random seed is used if it is None.
+    :param checkpoint_interval: The number of episodes generated by a worker
+        between two flushes of its episodes to disk.
+    :param resume: Continue the generation from the episodes already in
+        `shard_dir` instead of failing if there are some.
+    """
+    shard_num_episodes = get_shard_num_episodes(num_episodes, num_workers)
+    episode_id_offsets = get_shard_episode_id_offsets(shard_num_episodes)
+    shards_info = {
+        "num_episodes": num_episodes,
+        "num_shards": num_workers,
+        "seed": seed
+        if seed is not None
+        else int(np.random.SeedSequence().generate_state(1)[0]),
+        "config": OmegaConf.to_container(cfg, resolve=True),
+        "limit_scene_set": limit_scene_set,
+    }
+    os.makedirs(shard_dir, exist_ok=True)
+    shards_info_path = osp.join(shard_dir, SHARDS_INFO_FILE)
+    if osp.exists(shards_info_path):
+        if not resume:
+            raise ValueError(
+                f"{shard_dir} already has shards, pass --resume to continue their generation."
+            )
+        _check_shards_info(shards_info_path, shards_info)
+    else:
+        atomic_write(
+            shards_info_path,
+            lambda f: f.write(json.dumps(shards_info).encode()),
+        )
+
+    worker_args = [
+        (
+            shards_info["config"],
+            shard_idx,
+            num_workers,
+            shard_num_episodes[shard_idx],
+            shard_dir,
+            shards_info["seed"],
+            checkpoint_interval,
+            limit_scene_set,
+            episode_id_offsets[shard_idx],
+        )
+        for shard_idx in range(num_workers)
+    ]
+    start_time = time.time()
+    shard_stats = []
+    # The simulator can't be used in forked processes.
+    with get_context("spawn").Pool(num_workers) as pool:
+        for stats in pool.imap_unordered(_generate_shard_star, worker_args):
+            logger.info(
+                f"Shard {stats['shard_idx']} done: {stats['num_generated']} new episodes ({stats['num_resumed']} resumed) in {stats['num_tries']} tries, {_episodes_per_hour(stats['num_generated'], stats['elapsed']):.1f} episodes/hour."
+            )
+            shard_stats.append(stats)
+
+    shard_stats.sort(key=lambda stats: stats["shard_idx"])
+    dirname = osp.dirname(output_path)
+    if len(dirname) > 0 and not osp.exists(dirname):
+        os.makedirs(dirname)
+    combine_datasets(
+        [stats["dataset_path"] for stats in shard_stats], output_path
+    )
+    num_generated = sum(stats["num_generated"] for stats in shard_stats)
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Generated {num_generated} episodes with {num_workers} workers in {elapsed:.1f} seconds, {_episodes_per_hour(num_generated, elapsed):.1f} episodes/hour."
+    )
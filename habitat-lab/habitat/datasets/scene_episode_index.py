@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+r"""Sidecar index of the episodes of each scene in a ``.json.gz`` dataset
+file.
+
+Datasets that keep all their episodes in a single file (no per scene
+``content`` files) are parsed entirely by every environment worker, even if
+the worker only uses the episodes of a few scenes, and once more to list the
+scenes of the dataset. The index stores, for every scene of the file, the
+character ranges of its episodes in the decompressed JSON. The scenes of the
+dataset can then be listed from the index alone, and a worker only parses
+the episodes of its :py:`content_scenes`.
+
+The index is written next to the dataset file as
+``<data_path>.scene_index.json`` the first time the file is loaded, and is
+rebuilt if the dataset file changes. It can also be built ahead of time with
+
+.. code:: sh
+
+    python -m habitat.datasets.scene_episode_index data/datasets/.../train.json.gz
+"""
+
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from habitat.core.logging import logger
+from habitat.core.utils import atomic_write
+
+SCENE_INDEX_SUFFIX = ".scene_index.json"
+SCENE_INDEX_VERSION = 1
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_whitespace(json_str: str, idx: int) -> int:
+    return _whitespace.match(json_str, idx).end()  # type: ignore[union-attr]
+
+
+def _expect(json_str: str, idx: int, char: str) -> int:
+    if json_str[idx] != char:
+        raise ValueError(
+            f"Expected '{char}' at position {idx}, found '{json_str[idx]}'"
+        )
+    return idx + 1
+
+
+def _scan_episodes(
+    json_str: str, header: Dict[str, Any]
+) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    r"""Yields the start, end and value of every element of the top level
+    ``episodes`` list of :p:`json_str`. The other top level fields are
+    stored in :p:`header`, and the span of the list itself in
+    :py:`header["episodes_span"]`.
+    """
+    idx = _expect(json_str, _skip_whitespace(json_str, 0), "{")
+    while True:
+        idx = _skip_whitespace(json_str, idx)
+        if json_str[idx] == "}":
+            return
+        key, idx = _decoder.raw_decode(json_str, idx)
+        idx = _expect(json_str, _skip_whitespace(json_str, idx), ":")
+        idx = _skip_whitespace(json_str, idx)
+        if key == "episodes":
+            list_start = idx
+            idx = _expect(json_str, idx, "[")
+            while True:
+                idx = _skip_whitespace(json_str, idx)
+                if json_str[idx] == "]":
+                    idx += 1
+                    break
+                start = idx
+                episode, idx = _decoder.raw_decode(json_str, idx)
+                yield start, idx, episode
+                idx = _skip_whitespace(json_str, idx)
+                if json_str[idx] == ",":
+                    idx += 1
+            header["episodes_span"] = [list_start, idx]
+        else:
+            header[key], idx = _decoder.raw_decode(json_str, idx)
+        idx = _skip_whitespace(json_str, idx)
+        if json_str[idx] == ",":
+            idx += 1
+
+
+def _source_stat(datasetfile_path: str) -> Dict[str, int]:
+    stat = os.stat(datasetfile_path)
+    return dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+def build_scene_index(
+    datasetfile_path: str, json_str: str
+) -> Optional[Dict[str, Any]]:
+    r"""Builds the scene index of :p:`json_str`, the content of
+    :p:`datasetfile_path`.
+
+    :return: The index, or :py:`None` if the file doesn't have a top level
+        ``episodes`` list of episodes with a ``scene_id``.
+    """
+    header: Dict[str, Any] = {}
+    scenes: Dict[str, Dict[str, Any]] = {}
+    num_episodes = 0
+    prev_scene_id = None
+    try:
+        for episode_index, (start, end, episode) in enumerate(
+            _scan_episodes(json_str, header)
+        ):
+            scene_id = episode["scene_id"]
+            scene = scenes.setdefault(scene_id, dict(num_episodes=0, runs=[]))
+            scene["num_episodes"] += 1
+            # Consecutive episodes of the same scene are stored as a single
+            # run: [start, end, index of the first episode, episode count]
+            if scene_id == prev_scene_id:
+                scene["runs"][-1][1] = end
+                scene["runs"][-1][3] += 1
+            else:
+                scene["runs"].append([start, end, episode_index, 1])
+            prev_scene_id = scene_id
+            num_episodes += 1
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        logger.warning(
+            f"Could not build the scene index of {datasetfile_path}: {e}"
+        )
+        return None
+
+    if "episodes_span" not in header:
+        return None
+
+    return dict(
+        version=SCENE_INDEX_VERSION,
+        source=_source_stat(datasetfile_path),
+        num_episodes=num_episodes,
+        episodes_span=header["episodes_span"],
+        content_scenes_path=header.get("content_scenes_path", None),
+        scenes=scenes,
+    )
+
+
+def _write_scene_index(index_path: str, index: Dict[str, Any]) -> None:
+    # Several workers can build the index at the same time
+    atomic_write(index_path, lambda f: f.write(json.dumps(index).encode()))
+
+
+def read_scene_index(datasetfile_path: str) -> Optional[Dict[str, Any]]:
+    r"""Reads the scene index of :p:`datasetfile_path`.
+
+    :return: The index, or :py:`None` if it doesn't exist or is outdated.
+    """
+    index_path = datasetfile_path + SCENE_INDEX_SUFFIX
+    if not os.path.exists(index_path):
+        return None
+
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if index.get("version") != SCENE_INDEX_VERSION or index.get(
+        "source"
+    ) != _source_stat(datasetfile_path):
+        return None
+
+    return index
+
+
+def get_scene_index(
+    datasetfile_path: str, read_json: Callable[[], str]
+) -> Optional[Dict[str, Any]]:
+    r"""Returns the scene index of :p:`datasetfile_path`, building and saving
+    it if needed.
+
+    :param read_json: Returns the decompressed content of the dataset file,
+        only called if the index has to be built.
+    """
+    index = read_scene_index(datasetfile_path)
+    if index is not None:
+        return index
+
+    index = build_scene_index(datasetfile_path, read_json())
+    if index is not None:
+        try:
+            _write_scene_index(datasetfile_path + SCENE_INDEX_SUFFIX, index)
+        except OSError as e:
+            logger.warning(
+                f"Could not save the scene index of {datasetfile_path}: {e}"
+            )
+    return index
+
+
+def select_scenes(
+    json_str: str,
+    index: Dict[str, Any],
+    scenes_filter: Callable[[str], bool],
+) -> Tuple[str, List[int]]:
+    r"""Removes the episodes of the scenes that don't pass
+    :p:`scenes_filter` from :p:`json_str` without parsing it.
+
+    :param json_str: The content of the indexed dataset file.
+    :param index: The scene index of the file.
+    :param scenes_filter: Whether the episodes of a scene id of the file
+        are kept.
+    :return: The JSON with the episodes of the selected scenes, in the same
+        order as in the file, and the positions of these episodes in the
+        file.
+    """
+    runs = sorted(
+        (
+            run
+            for scene_id, scene in index["scenes"].items()
+            if scenes_filter(scene_id)
+            for run in scene["runs"]
+        ),
+        key=lambda run: run[2],
+    )
+    episode_indices: List[int] = []
+    for _, _, first, count in runs:
+        episode_indices.extend(range(first, first + count))
+
+    span_start, span_end = index["episodes_span"]
+    selected_json = "".join(
+        [
+            json_str[:span_start],
+            "[",
+            ",".join(json_str[start:end] for start, end, _, _ in runs),
+            "]",
+            json_str[span_end:],
+        ]
+    )
+    return selected_json, episode_indices
+
+
+def main():
+    import argparse
+    import gzip
+
+    parser = argparse.ArgumentParser(
+        description="Builds the scene index of .json.gz dataset files."
+    )
+    parser.add_argument("dataset_files", type=str, nargs="+")
+    args = parser.parse_args()
+
+    for datasetfile_path in args.dataset_files:
+
+        def _read_json() -> str:
+            with gzip.open(datasetfile_path, "rt") as f:
+                return f.read()
+
+        index = get_scene_index(datasetfile_path, _read_json)
+        if index is None:
+            print(f"{datasetfile_path}: no episodes to index")
+        else:
+            print(
+                f"{datasetfile_path}: {index['num_episodes']} episodes in"
+                f" {len(index['scenes'])} scenes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+r"""Precomputed geodesic distances to a set of goals.
+
+:ref:`HabitatSim.geodesic_distance` runs a path search to all the goals
+every time it is called, which is slow when the goals are the hundreds of
+view points of an ObjectNav episode. A :ref:`GeodesicDistanceField` instead
+computes, once per goal set, the distance to the goals of every cell of the
+navigable top-down grid of a floor, with a Dijkstra search over the grid.
+The distance of a position is then looked up with bilinear interpolation.
+
+The search moves between cells along 16 directions, which overestimates
+distances by at most a few percent, and the grid doesn't see obstacles
+smaller than a cell, so exact queries should still be used where precision
+matters, such as close to the goals.
+"""
+
+import heapq
+import math
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple, Union
+
+import numba
+import numpy as np
+
+if TYPE_CHECKING:
+    from habitat.sims.habitat_simulator.habitat_simulator import HabitatSim
+
+# Positions more than this above or below the floor of the field are on
+# another floor. This is the max_y_delta of the navigability test of
+# PathFinder.get_topdown_view.
+FLOOR_HEIGHT_TOLERANCE = 0.5
+
+# The moves of the search, as (row, column) offsets.
+_MOVES = np.array(
+    [
+        (dr, dc)
+        for dr in range(-2, 3)
+        for dc in range(-2, 3)
+        if (abs(dr), abs(dc)) in ((0, 1), (1, 0), (1, 1), (1, 2), (2, 1))
+    ],
+    dtype=np.int64,
+)
+
+
+@numba.jit(nopython=True)
+def _can_move(navigable, r, c, dr, dc):
+    r"""Whether the move doesn't cut through a cell that isn't navigable."""
+    if abs(dr) + abs(dc) == 1:
+        return True
+    if abs(dr) == 1 and abs(dc) == 1:
+        return navigable[r + dr, c] and navigable[r, c + dc]
+    if abs(dc) == 2:
+        mid_c = c + dc // 2
+        return navigable[r, mid_c] and navigable[r + dr, mid_c]
+    mid_r = r + dr // 2
+    return navigable[mid_r, c] and navigable[mid_r, c + dc]
+
+
+@numba.jit(nopython=True)
+def _compute_distance_field(
+    navigable, seed_rows, seed_cols, seed_distances, moves, meters_per_pixel
+):
+    height, width = navigable.shape
+    distances = np.full((height, width), np.inf)
+    heap = [(0.0, 0, 0)]
+    heap.pop()
+    for i in range(len(seed_rows)):
+        r, c, d = seed_rows[i], seed_cols[i], seed_distances[i]
+        if d < distances[r, c]:
+            distances[r, c] = d
+            heapq.heappush(heap, (d, r, c))
+
+    move_lengths = np.empty(len(moves))
+    for i in range(len(moves)):
+        move_lengths[i] = (
+            np.sqrt(moves[i, 0] ** 2 + moves[i, 1] ** 2) * meters_per_pixel
+        )
+
+    while len(heap) > 0:
+        d, r, c = heapq.heappop(heap)
+        if d > distances[r, c]:
+            continue
+        for i in range(len(moves)):
+            nr = r + moves[i, 0]
+            nc = c + moves[i, 1]
+            if nr < 0 or nr >= height or nc < 0 or nc >= width:
+                continue
+            if not navigable[nr, nc]:
+                continue
+            if not _can_move(navigable, r, c, moves[i, 0], moves[i, 1]):
+                continue
+            nd = d + move_lengths[i]
+            if nd < distances[nr, nc]:
+                distances[nr, nc] = nd
+                heapq.heappush(heap, (nd, nr, nc))
+
+    return distances.astype(np.float32)
+
+
+class GeodesicDistanceField:
+    r"""Geodesic distances to a set of goals on one floor.
+
+    :param navigable: The navigable grid of the floor, as returned by
+        :py:`PathFinder.get_topdown_view`. Cell :py:`(row, col)` is at
+        :py:`x = origin[0] + col * meters_per_pixel` and
+        :py:`z = origin[1] + row * meters_per_pixel`.
+    :param origin: The :py:`(x, z)` position of the first cell.
+    :param height: The height of the floor.
+    :param meters_per_pixel: The size of a cell.
+    :param goals: The goal positions, of shape (N, 3). The goals that are
+        not on the floor are ignored.
+    :param seed_radius: Cells at most this many cells away from a goal start
+        the search with their euclidean distance to the goal, so that goals
+        at the edge of the navigable area are reached.
+    """
+
+    def __init__(
+        self,
+        navigable: np.ndarray,
+        origin: Tuple[float, float],
+        height: float,
+        meters_per_pixel: float,
+        goals: np.ndarray,
+        seed_radius: int = 2,
+    ) -> None:
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.height = float(height)
+        self.meters_per_pixel = float(meters_per_pixel)
+
+        seed_rows, seed_cols, seed_distances = [], [], []
+        for goal in np.asarray(goals, dtype=np.float64).reshape(-1, 3):
+            if abs(goal[1] - self.height) > FLOOR_HEIGHT_TOLERANCE:
+                continue
+            goal_row = (goal[2] - self.origin[1]) / self.meters_per_pixel
+            goal_col = (goal[0] - self.origin[0]) / self.meters_per_pixel
+            for r in range(
+                max(int(np.floor(goal_row)) - seed_radius + 1, 0),
+                min(int(np.floor(goal_row)) + seed_radius + 1, len(navigable)),
+            ):
+                for c in range(
+                    max(int(np.floor(goal_col)) - seed_radius + 1, 0),
+                    min(
+                        int(np.floor(goal_col)) + seed_radius + 1,
+                        navigable.shape[1],
+                    ),
+                ):
+                    if navigable[r, c]:
+                        seed_rows.append(r)
+                        seed_cols.append(c)
+                        seed_distances.append(
+                            np.hypot(r - goal_row, c - goal_col)
+                            * self.meters_per_pixel
+                        )
+
+        self.num_seeds = len(seed_rows)
+        self.distances = _compute_distance_field(
+            np.ascontiguousarray(navigable, dtype=np.bool_),
+            np.array(seed_rows, dtype=np.int64),
+            np.array(seed_cols, dtype=np.int64),
+            np.array(seed_distances, dtype=np.float64),
+            _MOVES,
+            self.meters_per_pixel,
+        )
+
+    def get_distance(
+        self, position: Union[Sequence[float], np.ndarray]
+    ) -> Optional[float]:
+        r"""Returns the geodesic distance from :p:`position` to the closest
+        goal, interpolated from the cells around it, or :py:`None` if the
+        position is not on the floor or not next to a cell that reaches a
+        goal.
+        """
+        if abs(position[1] - self.height) > FLOOR_HEIGHT_TOLERANCE:
+            return None
+        row = (float(position[2]) - self.origin[1]) / self.meters_per_pixel
+        col = (float(position[0]) - self.origin[0]) / self.meters_per_pixel
+        r0 = math.floor(row)
+        c0 = math.floor(col)
+        height, width = self.distances.shape
+        if r0 < 0 or c0 < 0 or r0 + 1 >= height or c0 + 1 >= width:
+            return None
+
+        fr = row - r0
+        fc = col - c0
+        total = 0.0
+        total_weight = 0.0
+        for r, c, weight in (
+            (r0, c0, (1 - fr) * (1 - fc)),
+            (r0, c0 + 1, (1 - fr) * fc),
+            (r0 + 1, c0, fr * (1 - fc)),
+            (r0 + 1, c0 + 1, fr * fc),
+        ):
+            d = self.distances[r, c]
+            if weight > 0 and d != np.inf:
+                total += weight * d
+                total_weight += weight
+        if total_weight == 0:
+            return None
+        return float(total / total_weight)
+
+
+class GeodesicDistanceFieldCache:
+    r"""LRU cache of the :ref:`GeodesicDistanceField` of the goal sets of a
+    simulator, so that episodes with the same goals in the same scene (the
+    same object category in ObjectNav) share one.
+
+    :param max_size: Maximum number of fields kept in memory.
+    :param meters_per_pixel: The size of the cells of the fields.
+    """
+
+    def __init__(self, max_size: int = 16, meters_per_pixel: float = 0.1):
+        self._max_size = max_size
+        self._meters_per_pixel = meters_per_pixel
+        self._fields: "OrderedDict[Tuple, Optional[GeodesicDistanceField]]" = (
+            OrderedDict()
+        )
+
+    def get_distance_field(
+        self, sim: "HabitatSim", goals: Sequence[Sequence[float]], height
+    ) -> Optional[GeodesicDistanceField]:
+        r"""Returns the field of :p:`goals` on the floor at :p:`height`, or
+        :py:`None` if none of the goals are on that floor.
+        """
+        goals = np.asarray(goals, dtype=np.float64).reshape(-1, 3)
+        # Heights on a same floor can differ slightly
+        height = round(float(height), 1)
+        lower_bound, upper_bound = sim.pathfinder.get_bounds()
+        key = (
+            sim.habitat_config.scene_dataset,
+            sim.habitat_config.scene,
+            tuple(float(v) for v in lower_bound),
+            tuple(float(v) for v in upper_bound),
+            float(sim.pathfinder.navigable_area),
+            height,
+            goals.tobytes(),
+        )
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+
+        field = GeodesicDistanceField(
+            sim.pathfinder.get_topdown_view(
+                meters_per_pixel=self._meters_per_pixel, height=height
+            ),
+            (lower_bound[0], lower_bound[2]),
+            height,
+            self._meters_per_pixel,
+            goals,
+        )
+        if field.num_seeds == 0:
+            field = None
+        if self._max_size > 0:
+            self._fields[key] = field
+            while len(self._fields) > self._max_size:
+                self._fields.popitem(last=False)
+        return field
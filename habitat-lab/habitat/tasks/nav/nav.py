@@ -6,7 +6,16 @@
 
 # TODO, lots of typing errors in here
 
-from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 import attr
 import numpy as np
@@ -34,6 +43,10 @@ from habitat.core.simulator import (
 from habitat.core.spaces import ActionSpace
 from habitat.core.utils import not_none_validator, try_cv2_import
 from habitat.sims.habitat_simulator.actions import HabitatSimActions
+from habitat.tasks.nav.geodesic_distance_field import (
+    GeodesicDistanceField,
+    GeodesicDistanceFieldCache,
+)
 from habitat.tasks.utils import cartesian_to_polar
 from habitat.utils.geometry_utils import (
     quaternion_from_coeff,
@@ -699,6 +712,7 @@ class TopDownMap(Measure):
         self._ind_y_max: Optional[int] = None
         self._previous_xy_location: List[Optional[Tuple[int, int]]] = None
         self._top_down_map: Optional[np.ndarray] = None
+        self._dirty_rect: Optional[Tuple[int, int, int, int]] = None
         self._shortest_path_points: Optional[List[Tuple[int, int]]] = None
         self.line_thickness = int(
             np.round(self._map_resolution * 2 / MAP_THICKNESS_SCALAR)
@@ -706,13 +720,16 @@ class TopDownMap(Measure):
         self.point_padding = 2 * int(
             np.ceil(self._map_resolution / MAP_THICKNESS_SCALAR)
         )
+        self._map_cache = maps.TopDownMapCache(
+            max_size=config.map_cache_size, cache_dir=config.map_cache_dir
+        )
         super().__init__()
 
     def _get_uuid(self, *args: Any, **kwargs: Any) -> str:
         return "top_down_map"
 
     def get_original_map(self):
-        top_down_map = maps.get_topdown_map_from_sim(
+        top_down_map = self._map_cache.get_topdown_map_from_sim(
             self._sim,
             map_resolution=self._map_resolution,
             draw_border=self._config.draw_border,
@@ -867,9 +884,18 @@ class TopDownMap(Measure):
 
         self.update_metric(episode, None)
         self._step_count = 0
+        if self._config.fog_of_war.incremental:
+            # The whole map is new
+            self._metric["dirty_rect"] = (
+                0,
+                self._top_down_map.shape[0],
+                0,
+                self._top_down_map.shape[1],
+            )
 
     def update_metric(self, episode, action, *args: Any, **kwargs: Any):
         self._step_count += 1
+        self._dirty_rect = None
         map_positions: List[Tuple[float]] = []
         map_angles = []
         for agent_index in range(len(self._sim.habitat_config.agents)):
@@ -882,6 +908,30 @@ class TopDownMap(Measure):
             "agent_map_coord": map_positions,
             "agent_angle": map_angles,
         }
+        if self._config.fog_of_war.incremental:
+            self._metric["dirty_rect"] = self._dirty_rect
+
+    def _add_dirty_rect(
+        self, rect: Optional[Tuple[int, int, int, int]]
+    ) -> None:
+        r"""Grows the region changed by the current step to contain
+        :p:`rect`, given as (x_min, x_max, y_min, y_max) with the max
+        excluded.
+        """
+        if rect is None:
+            return
+        x_min, x_max, y_min, y_max = rect
+        x_min, y_min = max(x_min, 0), max(y_min, 0)
+        x_max = min(x_max, self._top_down_map.shape[0])
+        y_max = min(y_max, self._top_down_map.shape[1])
+        if x_max <= x_min or y_max <= y_min:
+            return
+        if self._dirty_rect is not None:
+            x_min = min(x_min, self._dirty_rect[0])
+            x_max = max(x_max, self._dirty_rect[1])
+            y_min = min(y_min, self._dirty_rect[2])
+            y_max = max(y_max, self._dirty_rect[3])
+        self._dirty_rect = (x_min, x_max, y_min, y_max)
 
     @staticmethod
     def get_polar_angle(agent_state):
@@ -916,6 +966,16 @@ class TopDownMap(Measure):
                     color,
                     thickness=thickness,
                 )
+                if self._config.fog_of_war.incremental:
+                    prev_y, prev_x = self._previous_xy_location[agent_index]
+                    self._add_dirty_rect(
+                        (
+                            min(prev_x, a_x) - thickness,
+                            max(prev_x, a_x) + thickness + 1,
+                            min(prev_y, a_y) - thickness,
+                            max(prev_y, a_y) + thickness + 1,
+                        )
+                    )
         angle = TopDownMap.get_polar_angle(agent_state)
         self.update_fog_of_war_mask(np.array([a_x, a_y]), angle)
 
@@ -924,17 +984,32 @@ class TopDownMap(Measure):
 
     def update_fog_of_war_mask(self, agent_position, angle):
         if self._config.fog_of_war.draw:
-            self._fog_of_war_mask = fog_of_war.reveal_fog_of_war(
-                self._top_down_map,
-                self._fog_of_war_mask,
-                agent_position,
-                angle,
-                fov=self._config.fog_of_war.fov,
-                max_line_len=self._config.fog_of_war.visibility_dist
+            max_line_len = (
+                self._config.fog_of_war.visibility_dist
                 / maps.calculate_meters_per_pixel(
                     self._map_resolution, sim=self._sim
-                ),
+                )
             )
+            if self._config.fog_of_war.incremental:
+                self._add_dirty_rect(
+                    fog_of_war.reveal_fog_of_war_incremental(
+                        self._top_down_map,
+                        self._fog_of_war_mask,
+                        agent_position,
+                        angle,
+                        fov=self._config.fog_of_war.fov,
+                        max_line_len=max_line_len,
+                    )
+                )
+            else:
+                self._fog_of_war_mask = fog_of_war.reveal_fog_of_war(
+                    self._top_down_map,
+                    self._fog_of_war_mask,
+                    agent_position,
+                    angle,
+                    fov=self._config.fog_of_war.fov,
+                    max_line_len=max_line_len,
+                )
 
 
 @registry.register_measure
@@ -953,6 +1028,13 @@ class DistanceToGoal(Measure):
             List[Tuple[float, float, float]]
         ] = None
         self._distance_to = self._config.distance_to
+        self._distance_field_cache: Optional[GeodesicDistanceFieldCache] = None
+        if self._config.use_distance_field:
+            self._distance_field_cache = GeodesicDistanceFieldCache(
+                max_size=self._config.distance_field_cache_size,
+                meters_per_pixel=self._config.distance_field_meters_per_pixel,
+            )
+        self._distance_field: Optional[GeodesicDistanceField] = None
 
         super().__init__(**kwargs)
 
@@ -967,8 +1049,33 @@ class DistanceToGoal(Measure):
                 for goal in episode.goals
                 for view_point in goal.view_points
             ]
+        if self._distance_field_cache is not None:
+            self._distance_field = (
+                self._distance_field_cache.get_distance_field(
+                    cast("HabitatSim", self._sim),
+                    [goal.position for goal in episode.goals]
+                    if self._distance_to == "POINT"
+                    else self._episode_view_points,
+                    self._sim.get_agent_state().position[1],
+                )
+            )
         self.update_metric(episode=episode, *args, **kwargs)  # type: ignore
 
+    def _get_distance_field_distance(self, position) -> Optional[float]:
+        r"""The distance from the distance field, or None if it must be
+        queried to the simulator: at reset, near the goals or away from the
+        floor of the field.
+        """
+        if self._distance_field is None or self._previous_position is None:
+            return None
+        distance = self._distance_field.get_distance(position)
+        if (
+            distance is None
+            or distance < self._config.distance_field_exact_radius
+        ):
+            return None
+        return distance
+
     def update_metric(
         self, episode: NavigationEpisode, *args: Any, **kwargs: Any
     ):
@@ -977,20 +1084,24 @@ class DistanceToGoal(Measure):
         if self._previous_position is None or not np.allclose(
             self._previous_position, current_position, atol=1e-4
         ):
-            if self._distance_to == "POINT":
-                distance_to_target = self._sim.geodesic_distance(
-                    current_position,
-                    [goal.position for goal in episode.goals],
-                    episode,
-                )
-            elif self._distance_to == "VIEW_POINTS":
-                distance_to_target = self._sim.geodesic_distance(
-                    current_position, self._episode_view_points, episode
-                )
-            else:
-                logger.error(
-                    f"Non valid distance_to parameter was provided: {self._distance_to }"
-                )
+            distance_to_target = self._get_distance_field_distance(
+                current_position
+            )
+            if distance_to_target is None:
+                if self._distance_to == "POINT":
+                    distance_to_target = self._sim.geodesic_distance(
+                        current_position,
+                        [goal.position for goal in episode.goals],
+                        episode,
+                    )
+                elif self._distance_to == "VIEW_POINTS":
+                    distance_to_target = self._sim.geodesic_distance(
+                        current_position, self._episode_view_points, episode
+                    )
+                else:
+                    logger.error(
+                        f"Non valid distance_to parameter was provided: {self._distance_to }"
+                    )
 
             self._previous_position = (
                 current_position[0],
@@ -4,7 +4,6 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-import itertools
 import os.path as osp
 import time
 from typing import (
@@ -28,6 +27,10 @@ from habitat.tasks.rearrange.multi_task.pddl_action import (
     ActionTaskInfo,
     PddlAction,
 )
+from habitat.tasks.rearrange.multi_task.pddl_grounding import (
+    PddlGroundingIndex,
+    PredicateSet,
+)
 from habitat.tasks.rearrange.multi_task.pddl_logical_expr import (
     LogicalExpr,
     LogicalExprType,
@@ -72,6 +75,7 @@ class PddlDomain:
         self._sim_info: Optional[PddlSimInfo] = None
         self._config = cur_task_config
         self._orig_actions: Dict[str, PddlAction] = {}
+        self._clear_grounding()
 
         if not osp.isabs(domain_file_path):
             parent_dir = osp.dirname(__file__)
@@ -100,6 +104,7 @@ class PddlDomain:
     def set_actions(self, actions: Dict[str, PddlAction]) -> None:
         self._orig_actions = actions
         self._actions = dict(actions)
+        self._clear_grounding()
 
     def _parse_actions(self, domain_def) -> None:
         """
@@ -212,12 +217,14 @@ class PddlDomain:
         Add a type to `self.expr_types`. Clears every episode
         """
         self._added_expr_types[expr_type.name] = expr_type
+        self._clear_grounding()
 
     def register_episode_entity(self, pddl_entity: PddlEntity) -> None:
         """
         Add an entity to appear in `self.all_entities`. Clears every episode.
         """
         self._added_entities[pddl_entity.name] = pddl_entity
+        self._clear_grounding()
 
     def _parse_expr_types(self, domain_def):
         """
@@ -349,6 +356,7 @@ class PddlDomain:
 
         self._added_entities = {}
         self._added_expr_types = {}
+        self._clear_grounding()
 
         id_to_name = {}
         for k, i in sim.handle_to_object_id.items():
@@ -403,6 +411,30 @@ class PddlDomain:
                 new_ac.set_post_cond_search(assigns)
 
             self._actions[k] = new_ac
+        self._clear_grounding()
+
+    def _clear_grounding(self) -> None:
+        """
+        Clears the grounded predicates and actions, which must be done when
+        the entities, types or actions change.
+        """
+        self._grounding_index: Optional[PddlGroundingIndex] = None
+        self._grounded_preds: Optional[List[Predicate]] = None
+        self._grounded_actions: Dict[
+            str, List[Tuple[Tuple[int, ...], PddlAction]]
+        ] = {}
+
+    @property
+    def grounding_index(self) -> PddlGroundingIndex:
+        """
+        The type compatible argument values of the predicates and actions
+        over `self.all_entities`.
+        """
+        if self._grounding_index is None:
+            self._grounding_index = PddlGroundingIndex(
+                self.all_entities.values()
+            )
+        return self._grounding_index
 
     @property
     def sim_info(self) -> PddlSimInfo:
@@ -432,23 +464,24 @@ class PddlDomain:
     def get_true_predicates(self) -> List[Predicate]:
         """
         Get all the predicates that are true in the current simulator state.
-        """
-
-        all_entities = self.all_entities.values()
-        true_preds: List[Predicate] = []
-        for pred in self.predicates.values():
-            for entity_input in itertools.permutations(
-                all_entities, pred.n_args
-            ):
-                if not pred.are_args_compatible(list(entity_input)):
-                    continue
-
-                use_pred = pred.clone()
-                use_pred.set_param_values(entity_input)
-
-                if use_pred.is_true(self.sim_info):
-                    true_preds.append(use_pred)
-        return true_preds
+        The predicates are only grounded the first time and are shared
+        between calls, they must not be modified.
+        """
+
+        if self._grounded_preds is None:
+            index = self.grounding_index
+            self._grounded_preds = []
+            for pred in self.predicates.values():
+                for arg_values in index.get_arg_values(pred.args):
+                    use_pred = pred.clone()
+                    use_pred.set_param_values(index.to_entities(arg_values))
+                    self._grounded_preds.append(use_pred)
+
+        return [
+            pred
+            for pred in self._grounded_preds
+            if pred.is_true(self.sim_info)
+        ]
 
     def get_possible_predicates(self) -> List[Predicate]:
         """
@@ -457,17 +490,12 @@ class PddlDomain:
         arguments.
         """
 
-        all_entities = self.all_entities.values()
+        index = self.grounding_index
         poss_preds: List[Predicate] = []
         for pred in self.predicates.values():
-            for entity_input in itertools.combinations(
-                all_entities, pred.n_args
-            ):
-                if not pred.are_args_compatible(entity_input):
-                    continue
-
+            for arg_values in index.get_unordered_arg_values(pred.args):
                 use_pred = pred.clone()
-                use_pred.set_param_values(entity_input)
+                use_pred.set_param_values(index.to_entities(arg_values))
                 if use_pred.are_types_compatible(self.expr_types):
                     poss_preds.append(use_pred)
         return poss_preds
@@ -491,7 +519,22 @@ class PddlDomain:
         if restricted_action_names is None:
             restricted_action_names = []
 
-        all_entities = list(self.all_entities.values())
+        index = self.grounding_index
+        filter_idxs = set()
+        for filter_entity in filter_entities:
+            entity_idxs = [
+                i
+                for i, entity in enumerate(index.entities)
+                if entity == filter_entity
+            ]
+            if len(entity_idxs) == 0:
+                # No action can have an entity that isn't in the problem
+                return []
+            filter_idxs.update(entity_idxs)
+
+        if true_preds is not None:
+            true_preds = cast(List[Predicate], PredicateSet(true_preds))
+
         matching_actions = []
         for action in self.actions.values():
             if (
@@ -503,31 +546,34 @@ class PddlDomain:
             if action.name in restricted_action_names:
                 continue
 
-            for entity_input in itertools.combinations(
-                all_entities, action.n_args
-            ):
-                # Check that all the filter_entities are in entity_input
-                matches_filter = all(
-                    filter_entity in entity_input
-                    for filter_entity in filter_entities
-                )
-                if not matches_filter:
+            if action.name not in self._grounded_actions:
+                grounded_actions = []
+                for arg_values in index.get_grouped_arg_values(action.params):
+                    grounded_action = action.clone()
+                    grounded_action.set_param_values(
+                        index.to_entities(arg_values)
+                    )
+                    grounded_actions.append((arg_values, grounded_action))
+                self._grounded_actions[action.name] = grounded_actions
+
+            for arg_values, grounded_action in self._grounded_actions[
+                action.name
+            ]:
+                # Check that all the filter_entities are in the arguments
+                if not filter_idxs.issubset(arg_values):
                     continue
-
-                for entity_input_perm in itertools.permutations(entity_input):
-                    entity_inputs = cast(List[PddlEntity], entity_input_perm)
-                    if not action.are_args_compatible(entity_inputs):
-                        continue
-                    new_action = action.clone()
-                    new_action.set_param_values(entity_inputs)
-                    if (
-                        true_preds is not None
-                        and not new_action.is_precond_satisfied_from_predicates(
-                            true_preds
-                        )
-                    ):
-                        continue
-                    matching_actions.append(new_action)
+                if (
+                    true_preds is not None
+                    and not grounded_action.is_precond_satisfied_from_predicates(
+                        true_preds
+                    )
+                ):
+                    continue
+                # The returned actions can be modified (like the truth values
+                # of their preconditions), give a copy.
+                new_action = action.clone()
+                new_action.set_param_values(index.to_entities(arg_values))
+                matching_actions.append(new_action)
         return matching_actions
 
     def get_ordered_actions(self) -> List[PddlAction]:
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import itertools
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from habitat.tasks.rearrange.multi_task.pddl_predicate import Predicate
+from habitat.tasks.rearrange.multi_task.rearrange_pddl import (
+    ExprType,
+    PddlEntity,
+)
+
+
+class PddlGroundingIndex:
+    """
+    The argument values of predicates and actions that are compatible with
+    their argument types, for a fixed list of entities. The entities
+    compatible with each type and the argument values of each list of
+    argument types are only searched once.
+
+    Argument values are returned as tuples of entity indices in the list
+    of entities. They are in the order of `itertools.permutations` over the
+    entities, with the type incompatible tuples left out.
+    """
+
+    def __init__(self, entities: Iterable[PddlEntity]):
+        self._entities = list(entities)
+        self._type_entities: Dict[str, List[int]] = {}
+        self._arg_values: Dict[Tuple[str, ...], List[Tuple[int, ...]]] = {}
+
+    @property
+    def entities(self) -> List[PddlEntity]:
+        return self._entities
+
+    def _get_type_entities(self, expr_type: ExprType) -> List[int]:
+        """
+        The indices of the entities that are of `expr_type` or a sub-type.
+        """
+        if expr_type.name not in self._type_entities:
+            self._type_entities[expr_type.name] = [
+                i
+                for i, entity in enumerate(self._entities)
+                if entity.expr_type.is_subtype_of(expr_type)
+            ]
+        return self._type_entities[expr_type.name]
+
+    def get_arg_values(
+        self, args: Sequence[PddlEntity]
+    ) -> List[Tuple[int, ...]]:
+        """
+        All the tuples of distinct entities that can be the values of
+        `args`.
+        """
+        key = tuple(arg.expr_type.name for arg in args)
+        if key not in self._arg_values:
+            self._arg_values[key] = [
+                arg_values
+                for arg_values in itertools.product(
+                    *(self._get_type_entities(arg.expr_type) for arg in args)
+                )
+                if len(set(arg_values)) == len(arg_values)
+            ]
+        return self._arg_values[key]
+
+    def get_unordered_arg_values(
+        self, args: Sequence[PddlEntity]
+    ) -> List[Tuple[int, ...]]:
+        """
+        Same as `get_arg_values`, but in the order of
+        `itertools.combinations` over the entities, with only the first
+        ordering of each set of entities.
+        """
+        return [
+            arg_values
+            for arg_values in self.get_arg_values(args)
+            if all(i < j for i, j in zip(arg_values, arg_values[1:]))
+        ]
+
+    def get_grouped_arg_values(
+        self, args: Sequence[PddlEntity]
+    ) -> List[Tuple[int, ...]]:
+        """
+        Same as `get_arg_values`, but with the orderings of a set of entities
+        next to each other: in the order of `itertools.permutations` over
+        each `itertools.combinations` of the entities.
+        """
+        return sorted(
+            self.get_arg_values(args),
+            key=lambda arg_values: (tuple(sorted(arg_values)), arg_values),
+        )
+
+    def to_entities(self, arg_values: Tuple[int, ...]) -> List[PddlEntity]:
+        return [self._entities[i] for i in arg_values]
+
+
+def _entities_key(entities) -> Hashable:
+    if entities is None:
+        return None
+    return tuple((e.name, e.expr_type.name) for e in entities)
+
+
+class PredicateSet:
+    """
+    Set of predicates that can be passed instead of a list to
+    `LogicalExpr.is_true_from_predicates`. Checking if it contains a
+    predicate takes constant time instead of comparing it with every
+    predicate of the list.
+    """
+
+    def __init__(self, preds: Sequence[Predicate]):
+        self._keys = {self._get_key(pred) for pred in preds}
+
+    @staticmethod
+    def _get_key(pred: Predicate) -> Hashable:
+        # The same fields as `Predicate.__eq__`
+        return (
+            pred.name,
+            _entities_key(pred.args),
+            _entities_key(pred.arg_values),
+        )
+
+    def __contains__(self, pred: Predicate) -> bool:
+        return self._get_key(pred) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
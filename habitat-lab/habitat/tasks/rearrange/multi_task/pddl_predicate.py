@@ -68,6 +68,14 @@ class Predicate:
     def n_args(self):
         return len(self._args)
 
+    @property
+    def args(self) -> List[PddlEntity]:
+        return self._args
+
+    @property
+    def arg_values(self) -> Optional[List[PddlEntity]]:
+        return self._arg_values
+
     @property
     def name(self):
         return self._name
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import magnum as mn
+import numpy as np
+
+import habitat_sim
+from habitat.sims.habitat_simulator.sim_utilities import get_ao_global_bb
+from habitat.tasks.rearrange.marker_info import MarkerInfo
+
+if TYPE_CHECKING:
+    from habitat.tasks.rearrange.rearrange_sim import RearrangeSim
+
+
+class PddlSimSnapshot:
+    """
+    The simulator values that the PDDL predicates check, read from the
+    simulator at most once per simulator state (see `RearrangeSim.state_id`)
+    and shared by all the predicates evaluated in that state. Each value is
+    only read the first time it is needed.
+    """
+
+    def __init__(self, sim: "RearrangeSim"):
+        self._sim = sim
+        self.state_id = sim.state_id
+        self._obj_pos: Optional[np.ndarray] = None
+        self._target_pos: Optional[Dict[int, np.ndarray]] = None
+        self._marker_bbs: Dict[Tuple[MarkerInfo, bool], mn.Range3D] = {}
+        self._marker_js: Dict[MarkerInfo, float] = {}
+
+    def is_valid(self) -> bool:
+        """
+        If the simulator is still in the state of the snapshot.
+        """
+        return self._sim.state_id == self.state_id
+
+    @property
+    def obj_pos(self) -> np.ndarray:
+        """
+        The positions of the objects of `RearrangeSim.scene_obj_ids`, of
+        shape (N, 3).
+        """
+        if self._obj_pos is None:
+            rom = self._sim.get_rigid_object_manager()
+            self._obj_pos = np.array(
+                [
+                    rom.get_object_by_id(obj_id).translation
+                    for obj_id in self._sim.scene_obj_ids
+                ],
+                dtype=np.float32,
+            ).reshape(-1, 3)
+        return self._obj_pos
+
+    def get_target_pos(self, targ_idx: int) -> np.ndarray:
+        """
+        The goal position of the object at `targ_idx` in
+        `RearrangeSim.scene_obj_ids`, as returned by `RearrangeSim.get_targets`.
+        """
+        if self._target_pos is None:
+            idxs, pos_targs = self._sim.get_targets()
+            self._target_pos = {}
+            for idx, pos in zip(idxs.tolist(), pos_targs):
+                self._target_pos.setdefault(idx, pos)
+        return self._target_pos[targ_idx]
+
+    def get_marker_bb(self, marker: MarkerInfo, use_ao_bb: bool) -> mn.Range3D:
+        """
+        The global bounding box of the link of `marker`, or of its whole
+        articulated object if `use_ao_bb`.
+        """
+        key = (marker, use_ao_bb)
+        if key not in self._marker_bbs:
+            if use_ao_bb:
+                global_bb = get_ao_global_bb(marker.ao_parent)
+            else:
+                global_bb = habitat_sim.geo.get_transformed_bb(
+                    marker.link_node.cumulative_bb,
+                    marker.link_node.transformation,
+                )
+            self._marker_bbs[key] = global_bb
+        return self._marker_bbs[key]
+
+    def get_marker_js(self, marker: MarkerInfo) -> float:
+        """
+        The position of the joint of `marker`.
+        """
+        if marker not in self._marker_js:
+            self._marker_js[marker] = marker.get_targ_js()
+        return self._marker_js[marker]
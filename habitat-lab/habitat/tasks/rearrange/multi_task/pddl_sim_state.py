@@ -10,8 +10,6 @@ from typing import Any, Dict, Optional, cast
 import magnum as mn
 import numpy as np
 
-import habitat_sim
-from habitat.sims.habitat_simulator.sim_utilities import get_ao_global_bb
 from habitat.tasks.rearrange.marker_info import MarkerInfo
 from habitat.tasks.rearrange.multi_task.rearrange_pddl import (
     PddlEntity,
@@ -284,13 +282,9 @@ class PddlSimState:
             MarkerInfo,
             sim_info.search_for_entity(target),
         )
-        if sim_info.check_type_matches(target, FRIDGE_TYPE):
-            global_bb = get_ao_global_bb(check_marker.ao_parent)
-        else:
-            bb = check_marker.link_node.cumulative_bb
-            global_bb = habitat_sim.geo.get_transformed_bb(
-                bb, check_marker.link_node.transformation
-            )
+        global_bb = sim_info.get_sim_snapshot().get_marker_bb(
+            check_marker, sim_info.check_type_matches(target, FRIDGE_TYPE)
+        )
 
         return global_bb.contains(entity_pos)
 
@@ -339,16 +333,18 @@ class PddlSimState:
         Throws exception if the arguments are not compatible.
         """
 
+        # The simulator values are read from the snapshot of the current
+        # simulator state, shared with the other predicates.
+        snapshot = sim_info.get_sim_snapshot()
+
         # Check object states.
-        rom = sim_info.sim.get_rigid_object_manager()
         for entity, target in self._obj_states.items():
             if not sim_info.check_type_matches(
                 entity, SimulatorObjectType.MOVABLE_ENTITY.value
             ):
                 raise ValueError(f"Got unexpected entity {entity}")
             obj_idx = cast(int, sim_info.search_for_entity(entity))
-            abs_obj_id = sim_info.sim.scene_obj_ids[obj_idx]
-            entity_obj = rom.get_object_by_id(abs_obj_id)
+            cur_pos = snapshot.obj_pos[obj_idx]
 
             if sim_info.check_type_matches(
                 target, SimulatorObjectType.ARTICULATED_RECEPTACLE_ENTITY.value
@@ -360,14 +356,11 @@ class PddlSimState:
             elif sim_info.check_type_matches(
                 target, SimulatorObjectType.GOAL_ENTITY.value
             ):
-                cur_pos = entity_obj.transformation.translation
-
                 targ_idx = cast(
                     int,
                     sim_info.search_for_entity(target),
                 )
-                idxs, pos_targs = sim_info.sim.get_targets()
-                targ_pos = pos_targs[list(idxs).index(targ_idx)]
+                targ_pos = snapshot.get_target_pos(targ_idx)
 
                 dist = np.linalg.norm(cur_pos - targ_pos)
                 if dist >= sim_info.obj_thresh:
@@ -376,7 +369,7 @@ class PddlSimState:
                 target, SimulatorObjectType.STATIC_RECEPTACLE_ENTITY.value
             ):
                 recep = cast(mn.Range3D, sim_info.search_for_entity(target))
-                return recep.contains(entity_obj.translation)
+                return recep.contains(mn.Vector3(cur_pos))
             else:
                 raise ValueError(
                     f"Got unexpected combination of {entity} and {target}"
@@ -395,7 +388,7 @@ class PddlSimState:
                     art_entity,
                 ),
             )
-            prev_art_pos = marker.get_targ_js()
+            prev_art_pos = snapshot.get_marker_js(marker)
             if not set_art.is_satisfied(prev_art_pos, sim_info.art_thresh):
                 return False
         return all(
@@ -407,6 +400,7 @@ class PddlSimState:
         """
         Set this state in the simulator. Warning, this steps the simulator.
         """
+        sim_info.invalidate_sim_snapshot()
         sim = sim_info.sim
         # Set all desired object states.
         for entity, target in self._obj_states.items():
@@ -505,7 +499,11 @@ class PddlSimState:
                 diff_pos = post_link_pos - pre_link_pos
                 for move_obj in move_objs:
                     move_obj.translation += diff_pos
+            # The joints and objects were set without stepping the simulator
+            sim_info.invalidate_sim_snapshot()
 
         # Set all desired robot states.
         for robot_entity, robot_state in self._robot_states.items():
             robot_state.set_state(sim_info, robot_entity)
+            # The robot and the object it holds were teleported
+            sim_info.invalidate_sim_snapshot()
@@ -4,7 +4,7 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -14,6 +14,9 @@ import numpy as np
 from habitat.core.dataset import Episode
 from habitat.datasets.rearrange.rearrange_dataset import RearrangeDatasetV0
 from habitat.tasks.rearrange.marker_info import MarkerInfo
+from habitat.tasks.rearrange.multi_task.pddl_sim_snapshot import (
+    PddlSimSnapshot,
+)
 from habitat.tasks.rearrange.rearrange_sim import RearrangeSim
 from habitat.tasks.rearrange.rearrange_task import RearrangeTask
 
@@ -147,10 +150,28 @@ class PddlSimInfo:
     recep_place_shrink_factor: float
 
     pred_truth_cache: Optional[Dict[str, bool]] = None
+    _sim_snapshot: Optional[PddlSimSnapshot] = field(
+        default=None, init=False, repr=False
+    )
 
     def reset_pred_truth_cache(self):
         self.pred_truth_cache = {}
 
+    def get_sim_snapshot(self) -> PddlSimSnapshot:
+        """
+        The snapshot of the current simulator state, created again once the
+        simulator state changes.
+        """
+        if self._sim_snapshot is None or not self._sim_snapshot.is_valid():
+            self._sim_snapshot = PddlSimSnapshot(self.sim)
+        return self._sim_snapshot
+
+    def invalidate_sim_snapshot(self) -> None:
+        """
+        Must be called after moving objects without stepping the simulator.
+        """
+        self._sim_snapshot = None
+
     def get_predicate(self, pred_name: str):
         return self.predicates[pred_name]
 
@@ -173,9 +194,7 @@ class PddlSimInfo:
             entity, SimulatorObjectType.GOAL_ENTITY.value
         ):
             idx = self.target_ids[ename]
-            targ_idxs, pos_targs = self.sim.get_targets()
-            rel_idx = targ_idxs.tolist().index(idx)
-            return pos_targs[rel_idx]
+            return self.get_sim_snapshot().get_target_pos(idx)
         if self.check_type_matches(
             entity, SimulatorObjectType.STATIC_RECEPTACLE_ENTITY.value
         ):
@@ -184,13 +203,8 @@ class PddlSimInfo:
         if self.check_type_matches(
             entity, SimulatorObjectType.MOVABLE_ENTITY.value
         ):
-            rom = self.sim.get_rigid_object_manager()
             idx = self.obj_ids[ename]
-            abs_obj_id = self.sim.scene_obj_ids[idx]
-            cur_pos = rom.get_object_by_id(
-                abs_obj_id
-            ).transformation.translation
-            return cur_pos
+            return mn.Vector3(self.get_sim_snapshot().obj_pos[idx])
         raise ValueError()
 
     def search_for_entity(
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+r"""Island information of the navmesh vertices of a scene.
+
+Finding the largest island of a navmesh takes an
+:py:`island_radius` query per navmesh vertex, which is slow for large
+scenes. The result only depends on the navmesh file, so it is computed once
+and saved next to the navmesh as ``<navmesh_path>.islands.npz``, keyed by
+the hash of the navmesh file. It is also kept in memory so that switching
+back to a scene doesn't read it again.
+"""
+
+import hashlib
+import os
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import attr
+import numpy as np
+from scipy.spatial import cKDTree
+
+from habitat.core.logging import logger
+from habitat.core.utils import atomic_write
+
+try:
+    from habitat_sim import __version__ as _habitat_sim_version
+except ImportError:
+    _habitat_sim_version = ""
+
+if TYPE_CHECKING:
+    from habitat_sim.nav import PathFinder
+
+NAVMESH_ISLANDS_SUFFIX = ".islands.npz"
+NAVMESH_ISLANDS_VERSION = 1
+
+# The islands of the navmeshes loaded by this process, by navmesh hash.
+_islands_cache: Dict[str, "NavmeshIslands"] = {}
+# The hashes of the navmesh files, by path, size and modification time.
+_hash_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+@attr.s(auto_attribs=True, kw_only=True)
+class NavmeshIslands:
+    r"""The navmesh vertices and the size of the island of each of them.
+
+    :property vertices: The navmesh vertices, of shape (N, 3).
+    :property island_sizes: The :py:`island_radius` of each vertex.
+    :property max_island_size: The radius of the largest island.
+    :property largest_island_idx: The path finder index of the largest
+        island.
+    """
+    vertices: np.ndarray
+    island_sizes: np.ndarray
+    max_island_size: float
+    largest_island_idx: int
+    _largest_island_vertices: np.ndarray = attr.ib(init=False)
+    _kdtree: cKDTree = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        self._largest_island_vertices = self.vertices[
+            self.island_sizes == self.max_island_size
+        ]
+        self._kdtree = cKDTree(self._largest_island_vertices)
+
+    def closest_largest_island_vertex(self, pos: np.ndarray) -> np.ndarray:
+        r"""Returns the navmesh vertex of the largest island that is the
+        closest to :p:`pos`.
+        """
+        _, idx = self._kdtree.query(np.asarray(pos).reshape(3))
+        return self._largest_island_vertices[idx]
+
+
+def compute_navmesh_islands(pathfinder: "PathFinder") -> NavmeshIslands:
+    r"""Computes the islands of the navmesh loaded in :p:`pathfinder`."""
+    vertices = np.stack(pathfinder.build_navmesh_vertices(), axis=0)
+    island_sizes = np.array(
+        [pathfinder.island_radius(p) for p in vertices], dtype=np.float64
+    )
+    return NavmeshIslands(
+        vertices=vertices,
+        island_sizes=island_sizes,
+        max_island_size=float(island_sizes.max()),
+        largest_island_idx=int(
+            pathfinder.get_island(vertices[np.argmax(island_sizes)])
+        ),
+    )
+
+
+def _navmesh_hash(navmesh_path: str) -> str:
+    stat = os.stat(navmesh_path)
+    key = (os.path.abspath(navmesh_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_cache:
+        sha1 = hashlib.sha1()
+        with open(navmesh_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha1.update(chunk)
+        # Versions of habitat-sim can compute the islands differently
+        sha1.update(str(_habitat_sim_version).encode())
+        _hash_cache[key] = sha1.hexdigest()
+    return _hash_cache[key]
+
+
+def _read_navmesh_islands(
+    islands_path: str, navmesh_hash: str
+) -> Optional[NavmeshIslands]:
+    if not os.path.exists(islands_path):
+        return None
+
+    try:
+        with np.load(islands_path) as data:
+            if (
+                int(data["version"]) != NAVMESH_ISLANDS_VERSION
+                or str(data["navmesh_hash"]) != navmesh_hash
+            ):
+                return None
+            return NavmeshIslands(
+                vertices=data["vertices"],
+                island_sizes=data["island_sizes"],
+                max_island_size=float(data["max_island_size"]),
+                largest_island_idx=int(data["largest_island_idx"]),
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_navmesh_islands(
+    islands_path: str, navmesh_hash: str, islands: NavmeshIslands
+) -> None:
+    # Several workers can load the same scene at the same time
+    atomic_write(
+        islands_path,
+        lambda f: np.savez(
+            f,
+            version=NAVMESH_ISLANDS_VERSION,
+            navmesh_hash=navmesh_hash,
+            vertices=islands.vertices,
+            island_sizes=islands.island_sizes,
+            max_island_size=islands.max_island_size,
+            largest_island_idx=islands.largest_island_idx,
+        ),
+    )
+
+
+def get_navmesh_islands(
+    pathfinder: "PathFinder", navmesh_path: str
+) -> NavmeshIslands:
+    r"""Returns the islands of the navmesh at :p:`navmesh_path`, which must
+    be the navmesh loaded in :p:`pathfinder`. They are only computed if they
+    are neither in memory nor saved next to the navmesh.
+    """
+    navmesh_hash = _navmesh_hash(navmesh_path)
+    islands = _islands_cache.get(navmesh_hash, None)
+    if islands is not None:
+        return islands
+
+    islands_path = navmesh_path + NAVMESH_ISLANDS_SUFFIX
+    islands = _read_navmesh_islands(islands_path, navmesh_hash)
+    if islands is None:
+        islands = compute_navmesh_islands(pathfinder)
+        try:
+            _write_navmesh_islands(islands_path, navmesh_hash, islands)
+        except OSError as e:
+            logger.warning(
+                f"Could not save the navmesh islands of {navmesh_path}: {e}"
+            )
+
+    _islands_cache[navmesh_hash] = islands
+    return islands
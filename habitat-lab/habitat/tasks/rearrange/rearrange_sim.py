@@ -40,6 +40,7 @@ from habitat.tasks.rearrange.articulated_agent_manager import (
     ArticulatedAgentManager,
 )
 from habitat.tasks.rearrange.marker_info import MarkerInfo
+from habitat.tasks.rearrange.navmesh_islands import get_navmesh_islands
 from habitat.tasks.rearrange.rearrange_grasp_manager import (
     RearrangeGraspManager,
 )
@@ -127,6 +128,8 @@ class RearrangeSim(HabitatSim):
             self.habitat_config.update_articulated_agent
         )
         self._step_physics = self.habitat_config.step_physics
+        # Changed every time the simulator state may have changed.
+        self._state_id = 0
         self._additional_object_paths = (
             self.habitat_config.additional_object_paths
         )
@@ -259,8 +262,19 @@ class RearrangeSim(HabitatSim):
         for m in self._markers.values():
             m.update()
 
+    @property
+    def state_id(self) -> int:
+        """
+        Changes every time the simulator is stepped, reset, reconfigured or
+        has its state set with `set_state`. Values read from the
+        simulator can be reused while it stays the same. Objects moved
+        directly, without stepping the simulator, don't change it.
+        """
+        return self._state_id
+
     @add_perf_timing_func()
     def reset(self):
+        self._state_id += 1
         SimulatorBackend.reset(self)
         for i in range(len(self.agents)):
             self.reset_agent(i)
@@ -268,6 +282,7 @@ class RearrangeSim(HabitatSim):
 
     @add_perf_timing_func()
     def reconfigure(self, config: "DictConfig", ep_info: RearrangeEpisode):
+        self._state_id += 1
         self._handle_to_goal_name = ep_info.info["object_labels"]
 
         with read_write(config):
@@ -429,16 +444,14 @@ class RearrangeSim(HabitatSim):
         navmesh_path = osp.join(base_dir, "navmeshes", scene_name + ".navmesh")
         self.pathfinder.load_nav_mesh(navmesh_path)
 
-        self._navmesh_vertices = np.stack(
-            self.pathfinder.build_navmesh_vertices(), axis=0
-        )
-        self._island_sizes = [
-            self.pathfinder.island_radius(p) for p in self._navmesh_vertices
-        ]
-        self._max_island_size = max(self._island_sizes)
-        self._largest_island_idx = self.pathfinder.get_island(
-            self._navmesh_vertices[np.argmax(self._island_sizes)]
+        # Computed once per navmesh and saved next to it
+        self._navmesh_islands = get_navmesh_islands(
+            self.pathfinder, navmesh_path
         )
+        self._navmesh_vertices = self._navmesh_islands.vertices
+        self._island_sizes = self._navmesh_islands.island_sizes
+        self._max_island_size = self._navmesh_islands.max_island_size
+        self._largest_island_idx = self._navmesh_islands.largest_island_idx
 
     @property
     def largest_island_idx(self) -> int:
@@ -513,16 +526,7 @@ class RearrangeSim(HabitatSim):
 
         if np.isnan(new_pos[0]) or island_radius != self._max_island_size:
             # This is a last resort, take a navmesh vertex that is closest
-            use_verts = [
-                x
-                for s, x in zip(self._island_sizes, self._navmesh_vertices)
-                if s == self._max_island_size
-            ]
-            distances = np.linalg.norm(
-                np.array(pos).reshape(1, 3) - use_verts, axis=-1
-            )
-            closest_idx = np.argmin(distances)
-            new_pos = self._navmesh_vertices[closest_idx]
+            new_pos = self._navmesh_islands.closest_largest_island_vertex(pos)
 
         return new_pos
 
@@ -730,6 +734,7 @@ class RearrangeSim(HabitatSim):
           TODO: This should probably be True by default, but I am not sure the effect
           it will have.
         """
+        self._state_id += 1
         rom = self.get_rigid_object_manager()
 
         if state["articulated_agent_T"] is not None:
@@ -917,6 +922,7 @@ class RearrangeSim(HabitatSim):
 
         Never call sim.step_world directly or miss updating the articulated_agent.
         """
+        self._state_id += 1
         # Optionally step physics and update the articulated_agent for benchmarking purposes
         if self._step_physics:
             self.step_world(dt)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from typing import Any, Dict, Tuple
+
+import attr
+import numpy as np
+import torch
+from gym import spaces
+
+
+@attr.s(auto_attribs=True, slots=True)
+class SharedObservationsHeader:
+    r"""What is sent through the pipe in place of an observation dict when
+    shared memory observations are enabled.
+
+    :property keys: The keys of the observation dict, in their original order.
+    :property extra: Observations that could not be written to the shared
+        buffers (non Box spaces, shape or dtype mismatch) and are pickled.
+    """
+    keys: Tuple[str, ...]
+    extra: Dict[str, Any]
+
+
+class SharedObservationBuffers:
+    r"""Shared memory buffers for the observations of a single environment,
+    laid out from its observation space.
+
+    The worker writes its observations into the buffers and only sends a
+    :ref:`SharedObservationsHeader` back through the pipe. The parent then
+    reads the observations as numpy views of the same buffers, so no pixels
+    are pickled or copied. These views are only valid until the next
+    step or reset of that environment.
+
+    The buffers are torch tensors in shared memory so that they are sent to
+    the worker process by :py:`torch.multiprocessing` reductions.
+    """
+
+    def __init__(self, tensors: Dict[str, torch.Tensor]) -> None:
+        self._tensors = tensors
+        self._arrays = {k: t.numpy() for k, t in tensors.items()}
+
+    @classmethod
+    def from_observation_space(
+        cls, observation_space: spaces.Dict
+    ) -> "SharedObservationBuffers":
+        tensors = {}
+        for k, space in observation_space.spaces.items():
+            if not isinstance(space, spaces.Box):
+                continue
+            try:
+                tensor = torch.from_numpy(
+                    np.empty(space.shape, dtype=space.dtype)
+                )
+            except TypeError:
+                # The dtype isn't supported by torch, this
+                # observation will go through the pipe.
+                continue
+
+            tensors[k] = tensor.share_memory_()
+
+        return cls(tensors)
+
+    @property
+    def num_bytes(self) -> int:
+        return sum(a.nbytes for a in self._arrays.values())
+
+    def write(self, observations: Dict[str, Any]) -> SharedObservationsHeader:
+        r"""Writes the observations into the shared buffers. Called
+        in the worker.
+        """
+        extra = {}
+        for k, v in observations.items():
+            buffer = self._arrays.get(k, None)
+            if (
+                buffer is not None
+                and isinstance(v, np.ndarray)
+                and v.shape == buffer.shape
+                and v.dtype == buffer.dtype
+            ):
+                np.copyto(buffer, v)
+            else:
+                extra[k] = v
+
+        return SharedObservationsHeader(tuple(observations.keys()), extra)
+
+    def read(self, header: SharedObservationsHeader) -> Dict[str, Any]:
+        r"""Rebuilds the observation dict from the shared buffers. Called
+        in the parent.
+        """
+        return {
+            k: header.extra[k] if k in header.extra else self._arrays[k]
+            for k in header.keys
+        }
+
+    def __getstate__(self):
+        return self._tensors
+
+    def __setstate__(self, tensors: Dict[str, torch.Tensor]) -> None:
+        self.__init__(tensors)  # type: ignore[misc]
@@ -4,6 +4,9 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from functools import lru_cache
+from typing import Optional, Tuple
+
 import numba
 import numpy as np
 
@@ -161,3 +164,141 @@ def reveal_fog_of_war(
     )
 
     return fog_of_war_mask
+
+
+class FogOfWarRayTable:
+    r"""Precomputed rays used by :ref:`reveal_fog_of_war_incremental`.
+
+    The line points of :ref:`bresenham_supercover_line` only depend on the
+    direction of the line relative to its (integer) start point, so the
+    rays of all the directions, spaced by the angle step used by
+    :ref:`reveal_fog_of_war`, are drawn once. The ray of the closest
+    direction in the table is then used at each step, instead of the exact
+    direction, which moves the ray by less than half a pixel at its end.
+
+    Use :ref:`get_fog_of_war_ray_table` to share the tables.
+    """
+
+    def __init__(self, fov: float, max_line_len: float):
+        fov = np.deg2rad(fov)
+        self.num_angles = int(np.ceil(2 * np.pi * max_line_len))
+        self.angle_step = 2 * np.pi / self.num_angles
+        # Same number of rays as reveal_fog_of_war
+        self.num_fov_rays = len(
+            np.arange(
+                -fov / 2, fov / 2, step=1.0 / max_line_len, dtype=np.float32
+            )
+        )
+        self.half_fov = fov / 2
+
+        origin = np.zeros(2, dtype=np.int64)
+        rays = [
+            np.array(
+                bresenham_supercover_line(
+                    origin,
+                    max_line_len
+                    * np.array(
+                        [
+                            np.cos(i * self.angle_step),
+                            np.sin(i * self.angle_step),
+                        ]
+                    ),
+                ),
+                dtype=np.int32,
+            )
+            for i in range(self.num_angles)
+        ]
+        self.ray_starts = np.zeros(self.num_angles + 1, dtype=np.int64)
+        np.cumsum([len(ray) for ray in rays], out=self.ray_starts[1:])
+        self.ray_offsets = np.concatenate(rays, axis=0)
+
+    def first_ray(self, current_angle: float) -> int:
+        return (
+            int(np.round((current_angle - self.half_fov) / self.angle_step))
+            % self.num_angles
+        )
+
+
+@lru_cache(maxsize=8)
+def get_fog_of_war_ray_table(
+    fov: float, max_line_len: float
+) -> FogOfWarRayTable:
+    return FogOfWarRayTable(fov, max_line_len)
+
+
+@numba.jit(nopython=True)
+def _reveal_rays(
+    top_down_map,
+    fog_of_war_mask,
+    current_point,
+    ray_offsets,
+    ray_starts,
+    first_ray,
+    num_rays,
+):
+    num_angles = len(ray_starts) - 1
+    x_min, y_min = fog_of_war_mask.shape[0], fog_of_war_mask.shape[1]
+    x_max, y_max = -1, -1
+    for i in range(num_rays):
+        ray = (first_ray + i) % num_angles
+        for j in range(ray_starts[ray], ray_starts[ray + 1]):
+            x = current_point[0] + ray_offsets[j, 0]
+            y = current_point[1] + ray_offsets[j, 1]
+
+            if x < 0 or x >= fog_of_war_mask.shape[0]:
+                break
+
+            if y < 0 or y >= fog_of_war_mask.shape[1]:
+                break
+
+            if top_down_map[x, y] == maps.MAP_INVALID_POINT:
+                break
+
+            if fog_of_war_mask[x, y] == 0:
+                fog_of_war_mask[x, y] = 1
+                x_min = min(x_min, x)
+                x_max = max(x_max, x)
+                y_min = min(y_min, y)
+                y_max = max(y_max, y)
+
+    return x_min, x_max + 1, y_min, y_max + 1
+
+
+def reveal_fog_of_war_incremental(
+    top_down_map: np.ndarray,
+    fog_of_war_mask: np.ndarray,
+    current_point: np.ndarray,
+    current_angle: float,
+    fov: float = 90,
+    max_line_len: float = 100,
+) -> Optional[Tuple[int, int, int, int]]:
+    r"""Reveals the fog-of-war at the current location, in place
+
+    Same as :ref:`reveal_fog_of_war`, but the mask is updated in place and
+    the rays come from a :ref:`FogOfWarRayTable`.
+
+    Args:
+        top_down_map: The current top down map.  Used for respecting walls when revealing
+        fog_of_war_mask: The fog-of-war mask to reveal the fog-of-war on
+        current_point: The current location of the agent on the fog_of_war_mask
+        current_angle: The current look direction of the agent on the fog_of_war_mask
+        fov: The feild of view of the agent
+        max_line_len: The maximum length of the lines used to reveal the fog-of-war
+
+    Returns:
+        The rectangle (x_min, x_max, y_min, y_max), max excluded, of the
+        newly revealed pixels, or None if no pixel was revealed
+    """
+    ray_table = get_fog_of_war_ray_table(fov, max_line_len)
+    x_min, x_max, y_min, y_max = _reveal_rays(
+        top_down_map,
+        fog_of_war_mask,
+        np.asarray(current_point, dtype=np.int64),
+        ray_table.ray_offsets,
+        ray_table.ray_starts,
+        ray_table.first_ray(float(current_angle)),
+        ray_table.num_fov_rays,
+    )
+    if x_max <= x_min:
+        return None
+    return int(x_min), int(x_max), int(y_min), int(y_max)
@@ -4,14 +4,17 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
 import os
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import imageio
 import numpy as np
 import scipy.ndimage
 
-from habitat.core.utils import try_cv2_import
+from habitat.core.logging import logger
+from habitat.core.utils import atomic_write, try_cv2_import
 from habitat.utils.visualizations import utils
 
 try:
@@ -346,6 +349,104 @@ def get_topdown_map_from_sim(
     )
 
 
+class TopDownMapCache:
+    r"""LRU cache of the top-down maps returned by
+    :ref:`get_topdown_map_from_sim`. Computing a map samples the whole navmesh,
+    while episodes in the same scene and on the same floor share it.
+
+    Maps are keyed by the scene, the navmesh (its bounds and navigable
+    area, which change if it is recomputed with other settings), the map
+    resolution, the border flag and the height of the agent. They can also
+    be saved to a directory to be shared between processes and runs.
+
+    :param max_size: Maximum number of maps kept in memory.
+    :param cache_dir: If set, maps are read from and saved to this
+        directory.
+    """
+
+    def __init__(self, max_size: int = 8, cache_dir: Optional[str] = None):
+        self._max_size = max_size
+        self._cache_dir = cache_dir if cache_dir else None
+        self._maps: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+
+    @staticmethod
+    def _get_key(
+        sim: "HabitatSim", map_resolution: int, draw_border: bool, height
+    ) -> Tuple:
+        lower_bound, upper_bound = sim.pathfinder.get_bounds()
+        return (
+            sim.habitat_config.scene_dataset,
+            sim.habitat_config.scene,
+            tuple(float(v) for v in lower_bound),
+            tuple(float(v) for v in upper_bound),
+            float(sim.pathfinder.navigable_area),
+            map_resolution,
+            draw_border,
+            float(height),
+        )
+
+    def _get_cache_file(self, key: Tuple) -> str:
+        assert self._cache_dir is not None
+        key_hash = hashlib.sha1(repr(key).encode()).hexdigest()
+        scene_name = os.path.splitext(os.path.basename(key[1]))[0]
+        return os.path.join(self._cache_dir, f"{scene_name}_{key_hash}.npy")
+
+    def _load(self, key: Tuple) -> Optional[np.ndarray]:
+        if self._cache_dir is None:
+            return None
+        cache_file = self._get_cache_file(key)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            return np.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, key: Tuple, top_down_map: np.ndarray) -> None:
+        if self._cache_dir is None:
+            return
+        # The cache is only an optimization, a read-only or full cache
+        # directory must not stop the episode
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            atomic_write(
+                self._get_cache_file(key), lambda f: np.save(f, top_down_map)
+            )
+        except OSError as e:
+            logger.warning(
+                f"Could not save the top-down map to {self._cache_dir}: {e}"
+            )
+
+    def get_topdown_map_from_sim(
+        self,
+        sim: "HabitatSim",
+        map_resolution: int = 1024,
+        draw_border: bool = True,
+        agent_id: int = 0,
+    ) -> np.ndarray:
+        r"""Same as :ref:`get_topdown_map_from_sim`, but only computes the map
+        the first time. Returns a copy that can be drawn on.
+        """
+        height = sim.get_agent(agent_id).state.position[1]
+        key = self._get_key(sim, map_resolution, draw_border, height)
+        top_down_map = self._maps.get(key, None)
+        if top_down_map is None:
+            top_down_map = self._load(key)
+            if top_down_map is None:
+                top_down_map = get_topdown_map(
+                    sim.pathfinder, height, map_resolution, draw_border
+                )
+                self._save(key, top_down_map)
+            if self._max_size > 0:
+                self._maps[key] = top_down_map
+                while len(self._maps) > self._max_size:
+                    self._maps.popitem(last=False)
+        else:
+            self._maps.move_to_end(key)
+
+        return top_down_map.copy()
+
+
 def colorize_topdown_map(
     top_down_map: np.ndarray,
     fog_of_war_mask: Optional[np.ndarray] = None,
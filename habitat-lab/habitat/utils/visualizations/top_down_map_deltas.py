@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from typing import Any, Dict, Optional, Tuple
+
+import attr
+import numpy as np
+
+TOP_DOWN_MAP_KEY = "top_down_map"
+MAP_KEY = "map"
+FOG_OF_WAR_MASK_KEY = "fog_of_war_mask"
+DIRTY_RECT_KEY = "dirty_rect"
+
+
+@attr.s(auto_attribs=True, slots=True)
+class TopDownMapDelta:
+    r"""What is sent in place of the :ref:`TopDownMap` metric when the map
+    and the fog of war mask have already been sent for the current episode.
+
+    :property rect: The region of the map that changed since the previous
+        step as (x_min, x_max, y_min, y_max) with the max excluded, or
+        :py:`None` if nothing changed.
+    :property map_patch: The content of :py:`rect` in the map.
+    :property fog_patch: The content of :py:`rect` in the fog of war mask,
+        :py:`None` if the fog of war is disabled.
+    :property others: The other entries of the metric (agent coordinates
+        and angles), sent as they are.
+    """
+    rect: Optional[Tuple[int, int, int, int]]
+    map_patch: Optional[np.ndarray]
+    fog_patch: Optional[np.ndarray]
+    others: Dict[str, Any]
+
+
+def _bounding_rect(changed: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    rows = np.flatnonzero(changed.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    return (
+        int(rows[0]),
+        int(rows[-1]) + 1,
+        int(cols[0]),
+        int(cols[-1]) + 1,
+    )
+
+
+def _crop(
+    array: Optional[np.ndarray], rect: Optional[Tuple[int, int, int, int]]
+) -> Optional[np.ndarray]:
+    if array is None or rect is None:
+        return None
+    x_min, x_max, y_min, y_max = rect
+    return np.array(array[x_min:x_max, y_min:y_max])
+
+
+class TopDownMapDeltaEncoder:
+    r"""Replaces the :ref:`TopDownMap` metric of the step infos of an
+    environment by :ref:`TopDownMapDelta` after the first step of each
+    episode.
+
+    The map and the fog of war mask are sent whole the first time they are
+    seen (a new episode allocates new arrays) and then only the region that
+    changed at each step is sent. The region is the :py:`"dirty_rect"` of
+    the metric if the measure reports it (incremental fog of war), otherwise
+    it is found by comparing with a copy of the previous step.
+
+    Every info of the environment must go through :ref:`encode`, in order,
+    and be decoded by a single :ref:`TopDownMapDeltaDecoder`.
+    """
+
+    def __init__(self) -> None:
+        self._map: Optional[np.ndarray] = None
+        self._prev_map: Optional[np.ndarray] = None
+        self._prev_fog: Optional[np.ndarray] = None
+
+    def _changed_rect(
+        self, metric: Dict[str, Any]
+    ) -> Optional[Tuple[int, int, int, int]]:
+        if DIRTY_RECT_KEY in metric:
+            return metric[DIRTY_RECT_KEY]
+
+        top_down_map = metric[MAP_KEY]
+        fog = metric.get(FOG_OF_WAR_MASK_KEY, None)
+        changed = top_down_map != self._prev_map
+        if fog is not None:
+            changed |= fog != self._prev_fog
+        rect = _bounding_rect(changed)
+        if rect is not None:
+            x_min, x_max, y_min, y_max = rect
+            self._prev_map[x_min:x_max, y_min:y_max] = top_down_map[
+                x_min:x_max, y_min:y_max
+            ]
+            if fog is not None:
+                self._prev_fog[x_min:x_max, y_min:y_max] = fog[
+                    x_min:x_max, y_min:y_max
+                ]
+        return rect
+
+    def encode(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        r"""Returns :p:`info` with its top down map metric replaced by a
+        :ref:`TopDownMapDelta` if possible. :p:`info` is not modified.
+        """
+        metric = info.get(TOP_DOWN_MAP_KEY, None)
+        if not isinstance(metric, dict) or not isinstance(
+            metric.get(MAP_KEY, None), np.ndarray
+        ):
+            return info
+
+        top_down_map = metric[MAP_KEY]
+        if top_down_map is not self._map:
+            # New episode, the map is sent whole
+            self._map = top_down_map
+            if DIRTY_RECT_KEY in metric:
+                self._prev_map = self._prev_fog = None
+            else:
+                self._prev_map = np.copy(top_down_map)
+                fog = metric.get(FOG_OF_WAR_MASK_KEY, None)
+                self._prev_fog = None if fog is None else np.copy(fog)
+            return info
+
+        rect = self._changed_rect(metric)
+        delta = TopDownMapDelta(
+            rect=rect,
+            map_patch=_crop(top_down_map, rect),
+            fog_patch=_crop(metric.get(FOG_OF_WAR_MASK_KEY, None), rect),
+            others={
+                k: v
+                for k, v in metric.items()
+                if k not in (MAP_KEY, FOG_OF_WAR_MASK_KEY)
+            },
+        )
+        return {**info, TOP_DOWN_MAP_KEY: delta}
+
+
+class TopDownMapDeltaDecoder:
+    r"""Rebuilds the top down map metric of the infos encoded by a
+    :ref:`TopDownMapDeltaEncoder`.
+
+    The decoder owns a copy of the map and fog of war mask of the current
+    episode and applies the received patches to it in place, the same way
+    the :ref:`TopDownMap` measure updates its own arrays. The arrays of a
+    decoded info are therefore only valid until the next step of the same
+    environment.
+    """
+
+    def __init__(self) -> None:
+        self._map: Optional[np.ndarray] = None
+        self._fog: Optional[np.ndarray] = None
+
+    def decode(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        r"""Returns :p:`info` with its top down map metric rebuilt."""
+        metric = info.get(TOP_DOWN_MAP_KEY, None)
+        if isinstance(metric, dict):
+            if isinstance(metric.get(MAP_KEY, None), np.ndarray):
+                # Copied so that a threaded worker never shares its arrays
+                self._map = np.copy(metric[MAP_KEY])
+                fog = metric.get(FOG_OF_WAR_MASK_KEY, None)
+                self._fog = None if fog is None else np.copy(fog)
+                metric = {
+                    **metric,
+                    MAP_KEY: self._map,
+                    FOG_OF_WAR_MASK_KEY: self._fog,
+                }
+                return {**info, TOP_DOWN_MAP_KEY: metric}
+            return info
+        if not isinstance(metric, TopDownMapDelta):
+            return info
+
+        assert (
+            self._map is not None
+        ), "Received a top down map delta before the map"
+        if metric.rect is not None:
+            x_min, x_max, y_min, y_max = metric.rect
+            self._map[x_min:x_max, y_min:y_max] = metric.map_patch
+            if self._fog is not None:
+                self._fog[x_min:x_max, y_min:y_max] = metric.fog_patch
+
+        decoded = {MAP_KEY: self._map, FOG_OF_WAR_MASK_KEY: self._fog}
+        decoded.update(metric.others)
+        return {**info, TOP_DOWN_MAP_KEY: decoded}
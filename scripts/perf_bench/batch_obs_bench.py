@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Benchmarks batch_obs against the per environment TensorOrNDArrayDict
+collation it replaces, over numbers of environments, sensor resolutions and
+numbers of copy threads, and checks that both give the same batch.
+
+python scripts/perf_bench/batch_obs_bench.py --device cuda --num-threads 1 4
+"""
+
+import argparse
+import numbers
+import time
+from typing import Any, Callable, List
+
+import numpy as np
+import torch
+
+from habitat_baselines.common.tensor_dict import (
+    DictTree,
+    TensorDict,
+    TensorOrNDArrayDict,
+)
+from habitat_baselines.utils.common import _ObservationBatchingCache, batch_obs
+
+
+def reference_batch_obs(
+    observations: List[DictTree], device: torch.device
+) -> TensorDict:
+    cache = _ObservationBatchingCache()
+    observation_dicts = [
+        TensorOrNDArrayDict.from_tree(o).map(
+            lambda t: t.numpy()
+            if isinstance(t, torch.Tensor) and t.device.type == "cpu"
+            else t
+        )
+        for o in observations
+    ]
+    observation_keys, _ = observation_dicts[0].flatten()
+    observation_tensors = [o.flatten()[1] for o in observation_dicts]
+
+    upload_ordering = sorted(
+        range(len(observation_keys)),
+        key=lambda idx: 1
+        if isinstance(observation_tensors[0][idx], numbers.Number)
+        else int(np.prod(observation_tensors[0][idx].shape)),
+        reverse=True,
+    )
+
+    batched_tensors: List[Any] = []
+    for sensor_name, obs in zip(observation_keys, observation_tensors[0]):
+        batched_tensors.append(
+            cache.get(
+                len(observations),
+                ("reference", sensor_name),
+                torch.as_tensor(obs),
+                device,
+            )
+        )
+
+    for idx in upload_ordering:
+        for i, all_obs in enumerate(observation_tensors):
+            obs = all_obs[idx]
+            if isinstance(obs, np.ndarray):
+                batched_tensors[idx][i] = obs
+            elif isinstance(obs, torch.Tensor):
+                batched_tensors[idx][i].copy_(obs, non_blocking=True)
+            else:
+                batched_tensors[idx][i] = np.asarray(obs)
+        if isinstance(batched_tensors[idx], np.ndarray):
+            batched_tensors[idx] = torch.from_numpy(batched_tensors[idx])
+        batched_tensors[idx] = batched_tensors[idx].to(
+            device, non_blocking=True
+        )
+
+    return TensorDict.from_flattened(observation_keys, batched_tensors)
+
+
+def make_observations(
+    num_envs: int, resolution: int, rng: np.random.Generator
+) -> List[DictTree]:
+    return [
+        {
+            "rgb": rng.integers(
+                255, size=(resolution, resolution, 3), dtype=np.uint8
+            ),
+            "depth": rng.random((resolution, resolution, 1), np.float32),
+            "pointgoal_with_gps_compass": rng.random(2, np.float32),
+            "objectgoal": np.array([rng.integers(6)]),
+        }
+        for _ in range(num_envs)
+    ]
+
+
+def timeit(
+    fn: Callable[[], Any], device: torch.device, num_repeats: int
+) -> float:
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    t_start = time.perf_counter()
+    for _ in range(num_repeats):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return (time.perf_counter() - t_start) / num_repeats * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument(
+        "--resolution", type=int, nargs="+", default=[128, 256, 512]
+    )
+    parser.add_argument("--num-threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--num-repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    cache = _ObservationBatchingCache()
+    rng = np.random.default_rng(0)
+
+    print(
+        f"{'envs':>5} {'res':>5} {'threads':>8} {'reference ms':>13}"
+        f" {'new ms':>8} {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        for resolution in args.resolution:
+            observations = make_observations(num_envs, resolution, rng)
+            expected = {
+                k: v.clone()
+                for k, v in reference_batch_obs(observations, device).items()
+            }
+            reference_ms = timeit(
+                lambda: reference_batch_obs(observations, device),
+                device,
+                args.num_repeats,
+            )
+            for num_threads in args.num_threads:
+                cache.num_threads = num_threads
+                batch = batch_obs(observations, device=device)
+                for k, v in expected.items():
+                    assert torch.equal(batch[k], v), k
+
+                new_ms = timeit(
+                    lambda: batch_obs(observations, device=device),
+                    device,
+                    args.num_repeats,
+                )
+                print(
+                    f"{num_envs:>5} {resolution:>5} {num_threads:>8}"
+                    f" {reference_ms:>13.2f} {new_ms:>8.2f}"
+                    f" {reference_ms / new_ms:>7.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the time the training loop is blocked by PPOTrainer.save_checkpoint
+when the checkpoint is saved twice with torch.save (the numbered file and
+latest.pth), when it is saved once atomically with latest.pth linked to it
+(save_atomic), and when it is saved by an AsyncCheckpointWriter
+(async_checkpointing=True).
+
+The state is --size-mb of float32 parameters and as much optimizer state,
+and --update-ms of work is done between two checkpoints.
+
+python scripts/perf_bench/checkpoint_writer_bench.py --size-mb 200
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+
+from habitat_baselines.common.checkpoint_writer import (
+    AsyncCheckpointWriter,
+    save_atomic,
+)
+
+
+def busy_wait(ms):
+    t_end = time.perf_counter() + ms / 1e3
+    while time.perf_counter() < t_end:
+        pass
+
+
+def run(args, folder, mode):
+    numel = args.size_mb * 2**20 // 4
+    state = {
+        "state_dict": {"weight": torch.randn(numel)},
+        "optim_state": {"exp_avg": torch.randn(numel)},
+    }
+    latest_path = os.path.join(folder, "latest.pth")
+    writer = AsyncCheckpointWriter() if mode == "async" else None
+    blocked_s = 0.0
+    t_start = time.perf_counter()
+    for i in range(args.num_checkpoints):
+        busy_wait(args.update_ms)
+        path = os.path.join(folder, f"ckpt.{mode}.{i}.pth")
+        t_save = time.perf_counter()
+        if mode == "torch.save x2":
+            torch.save(state, path)
+            torch.save(state, latest_path)
+        elif mode == "atomic":
+            save_atomic(state, path, latest_path)
+        else:
+            writer.save(state, path, latest_path)
+        blocked_s += time.perf_counter() - t_save
+    if writer is not None:
+        writer.close()
+    return blocked_s, time.perf_counter() - t_start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--num-checkpoints", type=int, default=5)
+    parser.add_argument("--update-ms", type=float, default=1000.0)
+    parser.add_argument("--dir", type=str, default=None)
+    args = parser.parse_args()
+
+    print(f"{'mode':>14} {'blocked s':>10} {'total s':>8}")
+    for mode in ("torch.save x2", "atomic", "async"):
+        with tempfile.TemporaryDirectory(dir=args.dir) as folder:
+            blocked_s, total_s = run(args, folder, mode)
+        print(f"{mode:>14} {blocked_s:>10.2f} {total_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
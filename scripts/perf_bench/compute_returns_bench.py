@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Benchmarks RolloutStorage.compute_returns against the step by step tensor
+loop it replaces, over rollout lengths and numbers of environments, and
+checks that both give bitwise identical returns.
+
+python scripts/perf_bench/compute_returns_bench.py --device cuda
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from gym import spaces
+
+from habitat_baselines.common.rollout_storage import RolloutStorage
+
+
+def reference_compute_returns(
+    buffers, num_steps, next_value, use_gae, gamma, tau
+):
+    returns = buffers["returns"].clone()
+    value_preds = buffers["value_preds"].clone()
+    if use_gae:
+        value_preds[num_steps] = next_value
+        gae = 0.0
+        for step in reversed(range(num_steps)):
+            delta = (
+                buffers["rewards"][step]
+                + gamma * value_preds[step + 1] * buffers["masks"][step + 1]
+                - value_preds[step]
+            )
+            gae = delta + gamma * tau * gae * buffers["masks"][step + 1]
+            returns[step] = gae + value_preds[step]
+    else:
+        returns[num_steps] = next_value
+        for step in reversed(range(num_steps)):
+            returns[step] = (
+                gamma * returns[step + 1] * buffers["masks"][step + 1]
+                + buffers["rewards"][step]
+            )
+    return returns
+
+
+def make_rollouts(num_steps, num_envs, device):
+    rollouts = RolloutStorage(
+        num_steps,
+        num_envs,
+        spaces.Dict({}),
+        spaces.Discrete(4),
+        recurrent_hidden_state_size=1,
+    )
+    rollouts.to(device)
+    rollouts.buffers["rewards"].normal_()
+    rollouts.buffers["value_preds"].normal_()
+    rollouts.buffers["masks"].copy_(
+        torch.rand(num_steps + 1, num_envs, 1, device=device) > 0.02
+    )
+    rollouts.current_rollout_step_idxs[0] = num_steps
+    return rollouts
+
+
+def timeit(fn, device, num_repeats):
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    t_start = time.perf_counter()
+    for _ in range(num_repeats):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    return (time.perf_counter() - t_start) / num_repeats * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument(
+        "--num-steps", type=int, nargs="+", default=[128, 256, 512]
+    )
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--num-repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    torch.manual_seed(0)
+    gamma, tau = 0.99, 0.95
+
+    print(
+        f"{'gae':>5} {'steps':>6} {'envs':>5} {'loop ms':>8}"
+        f" {'new ms':>8} {'speedup':>8}"
+    )
+    for use_gae in (True, False):
+        for num_steps in args.num_steps:
+            for num_envs in args.num_envs:
+                rollouts = make_rollouts(num_steps, num_envs, device)
+                next_value = torch.randn(num_envs, 1, device=device)
+
+                expected = reference_compute_returns(
+                    rollouts.buffers,
+                    num_steps,
+                    next_value,
+                    use_gae,
+                    gamma,
+                    tau,
+                )
+                rollouts.compute_returns(next_value, use_gae, gamma, tau)
+                assert np.array_equal(
+                    expected.cpu().numpy(),
+                    rollouts.buffers["returns"].cpu().numpy(),
+                ), "Returns are not bitwise identical"
+
+                loop_ms = timeit(
+                    lambda: reference_compute_returns(
+                        rollouts.buffers,
+                        num_steps,
+                        next_value,
+                        use_gae,
+                        gamma,
+                        tau,
+                    ),
+                    device,
+                    args.num_repeats,
+                )
+                new_ms = timeit(
+                    lambda: rollouts.compute_returns(
+                        next_value, use_gae, gamma, tau
+                    ),
+                    device,
+                    args.num_repeats,
+                )
+                print(
+                    f"{str(use_gae):>5} {num_steps:>6} {num_envs:>5}"
+                    f" {loop_ms:>8.2f} {new_ms:>8.2f}"
+                    f" {loop_ms / new_ms:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the load time and resident memory of a PointNav dataset loaded from
+.json.gz and from episode columns (habitat.datasets.episode_columns).
+
+A synthetic dataset with --num-episodes episodes is generated in --tmp-dir.
+Each load runs in its own process so that the memory measurements are
+independent.
+
+python scripts/perf_bench/episode_columns_bench.py --num-episodes 100000 1000000
+"""
+
+import argparse
+import gzip
+import json
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+from omegaconf import OmegaConf
+
+from habitat.datasets.pointnav.pointnav_dataset import PointNavDatasetV1
+
+
+def generate_dataset(output_dir: str, num_episodes: int) -> None:
+    rng = np.random.default_rng(0)
+    episodes = []
+    for i in range(num_episodes):
+        path = [
+            dict(
+                position=rng.random(3).tolist(),
+                rotation=rng.random(4).tolist(),
+                action=int(rng.integers(4)),
+            )
+            for _ in range(rng.integers(10, 30))
+        ]
+        episodes.append(
+            dict(
+                episode_id=str(i),
+                scene_id=f"gibson/scene_{i % 72}.glb",
+                start_position=rng.random(3).tolist(),
+                start_rotation=rng.random(4).tolist(),
+                info={"geodesic_distance": float(rng.random())},
+                goals=[dict(position=rng.random(3).tolist(), radius=0.2)],
+                shortest_paths=[path],
+            )
+        )
+    with gzip.open(os.path.join(output_dir, "train.json.gz"), "wt") as f:
+        json.dump(dict(episodes=episodes), f)
+
+
+def _load(data_path: str, scenes_dir: str, queue: mp.Queue) -> None:
+    config = OmegaConf.create(
+        dict(
+            data_path=data_path,
+            split="train",
+            scenes_dir=scenes_dir,
+            content_scenes=["*"],
+        )
+    )
+    t_start = time.perf_counter()
+    dataset = PointNavDatasetV1(config)
+    load_time = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    iterator = dataset.get_episode_iterator(cycle=False)
+    for _ in range(min(1000, dataset.num_episodes)):
+        next(iterator)
+    iter_time = time.perf_counter() - t_start
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((load_time, iter_time, max_rss_mb))
+
+
+def measure(data_path: str, scenes_dir: str):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_load, args=(data_path, scenes_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-episodes", type=int, nargs="+", default=[10000, 100000]
+    )
+    parser.add_argument("--tmp-dir", type=str, default=None)
+    args = parser.parse_args()
+
+    print(
+        f"{'episodes':>9} {'format':>8} {'load s':>8}"
+        f" {'1k iter s':>10} {'max rss MB':>11}"
+    )
+    for num_episodes in args.num_episodes:
+        with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+            generate_dataset(tmp_dir, num_episodes)
+            config = OmegaConf.create(
+                dict(
+                    data_path=os.path.join(tmp_dir, "{split}.json.gz"),
+                    split="train",
+                    scenes_dir=tmp_dir,
+                    content_scenes=["*"],
+                )
+            )
+            PointNavDatasetV1(config).write_episode_columns(
+                os.path.join(tmp_dir, "train.columns"), config
+            )
+
+            for name, data_path in [
+                ("json", "{split}.json.gz"),
+                ("columns", "{split}.columns"),
+            ]:
+                load_time, iter_time, max_rss_mb = measure(
+                    os.path.join(tmp_dir, data_path), tmp_dir
+                )
+                print(
+                    f"{num_episodes:>9} {name:>8} {load_time:>8.2f}"
+                    f" {iter_time:>10.3f} {max_rss_mb:>11.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the steps per second of the PPOTrainer._eval_checkpoint loop
+(current_episodes, step, current_episodes) when VectorEnv asks every worker
+for its current episode (episode_descriptors=False), and when the workers
+send the descriptor of their new episodes with the step results
+(episode_descriptors=True) so that current_episodes is a local read.
+
+The environments return small observations after --step-ms of work and end
+their episodes every --episode-length steps, so no scene data is needed and
+mostly the inter-process communication is measured.
+
+python scripts/perf_bench/episode_descriptors_bench.py --num-envs 16 32
+"""
+
+import argparse
+import time
+
+import gym
+import numpy as np
+from gym import spaces
+
+from habitat import VectorEnv
+from habitat.core.dataset import BaseEpisode
+
+
+class EpisodicEnv(gym.Env):
+    def __init__(self, env_idx, episode_length, step_ms):
+        self.observation_space = spaces.Dict(
+            {"obs": spaces.Box(0, 1, (8,), dtype=np.float32)}
+        )
+        self.action_space = spaces.Discrete(2)
+        self.original_action_space = self.action_space
+        self.number_of_episodes = 1000
+        self._env_idx = env_idx
+        self._episode_length = episode_length
+        self._step_ms = step_ms
+        self._num_episodes = 0
+        self._num_steps = 0
+        self._obs = {"obs": np.zeros(8, dtype=np.float32)}
+
+    def current_episode(self, all_info=False):
+        return BaseEpisode(
+            episode_id=str(self._num_episodes),
+            scene_id=f"scene_{self._env_idx}",
+        )
+
+    def reset(self):
+        self._num_episodes += 1
+        self._num_steps = 0
+        return self._obs
+
+    def step(self, action):
+        t_end = time.perf_counter() + self._step_ms / 1e3
+        while time.perf_counter() < t_end:
+            pass
+        self._num_steps += 1
+        done = self._num_steps >= self._episode_length
+        return self._obs, 0.0, done, {}
+
+
+def run_eval_loop(envs, num_steps):
+    envs.reset()
+    actions = [0] * envs.num_envs
+    t_start = time.perf_counter()
+    for _ in range(num_steps):
+        current_episodes = envs.current_episodes()
+        envs.step(actions)
+        next_episodes = envs.current_episodes()
+        assert len(current_episodes) == len(next_episodes)
+    return num_steps / (time.perf_counter() - t_start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--num-steps", type=int, default=500)
+    parser.add_argument("--episode-length", type=int, default=100)
+    parser.add_argument("--step-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(
+        f"{'envs':>5} {'call steps/s':>13} {'descriptor steps/s':>19}"
+        f" {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        env_fn_args = tuple(
+            (env_idx, args.episode_length, args.step_ms)
+            for env_idx in range(num_envs)
+        )
+        steps_per_sec = []
+        for episode_descriptors in (False, True):
+            with VectorEnv(
+                make_env_fn=EpisodicEnv,
+                env_fn_args=env_fn_args,
+                episode_descriptors=episode_descriptors,
+            ) as envs:
+                run_eval_loop(envs, 20)
+                steps_per_sec.append(run_eval_loop(envs, args.num_steps))
+        print(
+            f"{num_envs:>5} {steps_per_sec[0]:>13.0f}"
+            f" {steps_per_sec[1]:>19.0f}"
+            f" {steps_per_sec[1] / steps_per_sec[0]:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the wall-clock time of the evaluation of a checkpoint folder when
+the environments are created for each checkpoint, like in
+PPOTrainer._eval_checkpoint with eval.keep_envs_alive=False, with one where
+the environments of the first checkpoint are kept and only their episode
+iterators are reset for the next checkpoints (eval.keep_envs_alive=True).
+
+The environments sleep --load-ms when they are created, for the dataset and
+scene loading, and --step-ms per step, so no scene data is needed.
+
+python scripts/perf_bench/eval_env_pool_bench.py --num-envs 4 --num-checkpoints 5
+"""
+
+import argparse
+import time
+
+import gym
+import numpy as np
+from gym import spaces
+
+from habitat import VectorEnv
+from habitat.core.dataset import BaseEpisode
+
+
+class LoadingEnv(gym.Env):
+    def __init__(self, num_episodes, episode_length, step_ms, load_ms):
+        time.sleep(load_ms / 1e3)
+        self.observation_space = spaces.Dict(
+            {"obs": spaces.Box(0, 1, (1,), dtype=np.float32)}
+        )
+        self.action_space = spaces.Discrete(2)
+        self.original_action_space = self.action_space
+        self.number_of_episodes = num_episodes
+        self._episode_length = episode_length
+        self._step_ms = step_ms
+        self.reset_episode_iterator()
+
+    def reset_episode_iterator(self):
+        self._iterator = iter(range(self.number_of_episodes))
+        self._episode_idx = None
+
+    def current_episode(self, all_info=False):
+        return BaseEpisode(episode_id=str(self._episode_idx), scene_id="s")
+
+    def reset(self):
+        self._episode_idx = next(self._iterator)
+        self._num_steps = 0
+        return {"obs": np.zeros(1, dtype=np.float32)}
+
+    def step(self, action):
+        time.sleep(self._step_ms / 1e3)
+        self._num_steps += 1
+        done = self._num_steps >= self._episode_length
+        return {"obs": np.zeros(1, dtype=np.float32)}, 0.0, done, {}
+
+
+def eval_checkpoint(envs, num_episodes):
+    envs.reset()
+    num_done = 0
+    while num_done < num_episodes:
+        outputs = envs.step([0] * envs.num_envs)
+        num_done += sum(done for _, _, done, _ in outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-envs", type=int, default=4)
+    parser.add_argument("--num-checkpoints", type=int, default=5)
+    parser.add_argument("--episodes-per-env", type=int, default=4)
+    parser.add_argument("--episode-length", type=int, default=50)
+    parser.add_argument("--step-ms", type=float, default=2.0)
+    parser.add_argument("--load-ms", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    env_fn_args = tuple(
+        (
+            args.episodes_per_env + 1,
+            args.episode_length,
+            args.step_ms,
+            args.load_ms,
+        )
+        for _ in range(args.num_envs)
+    )
+    num_episodes = args.num_envs * args.episodes_per_env
+
+    t_start = time.perf_counter()
+    for _ in range(args.num_checkpoints):
+        with VectorEnv(
+            make_env_fn=LoadingEnv, env_fn_args=env_fn_args
+        ) as envs:
+            eval_checkpoint(envs, num_episodes)
+    recreate_s = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    with VectorEnv(make_env_fn=LoadingEnv, env_fn_args=env_fn_args) as envs:
+        for _ in range(args.num_checkpoints):
+            envs.call(["reset_episode_iterator"] * envs.num_envs)
+            eval_checkpoint(envs, num_episodes)
+    reuse_s = time.perf_counter() - t_start
+
+    print(
+        f"{args.num_checkpoints} checkpoints, {args.num_envs} envs:"
+        f" recreated {recreate_s:.2f}s"
+        f" ({recreate_s / args.num_checkpoints:.2f}s per checkpoint),"
+        f" kept alive {reuse_s:.2f}s"
+        f" ({reuse_s / args.num_checkpoints:.2f}s per checkpoint),"
+        f" {recreate_s / reuse_s:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the wall-clock time of an evaluation where each environment runs
+the episodes of its own split of the scenes and is paused when it is done
+(episode_scheduling=static), with one where the episodes are handed out by
+an EvalEpisodeScheduler to whichever environment finishes an episode
+(episode_scheduling=work_stealing).
+
+The scenes have very different numbers of episodes, so the static split is
+unbalanced. The environments sleep --step-ms per step and --load-ms when
+they switch scene, so no scene data is needed. The evaluation loops follow
+PPOTrainer._eval_checkpoint without the policy.
+
+python scripts/perf_bench/eval_episode_scheduler_bench.py --num-envs 4 8
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional, Tuple
+
+import gym
+import numpy as np
+from gym import spaces
+
+from habitat import VectorEnv
+from habitat.core.dataset import BaseEpisode, EpisodeQueue
+from habitat_baselines.common.eval_episode_scheduler import (
+    EpisodeKey,
+    EvalEpisodeScheduler,
+)
+
+
+class SleepEpisodeEnv(gym.Env):
+    def __init__(
+        self,
+        episodes: List[BaseEpisode],
+        lengths: Dict[EpisodeKey, int],
+        step_ms: float,
+        load_ms: float,
+    ) -> None:
+        self.observation_space = spaces.Dict(
+            {"obs": spaces.Box(0, 1, (1,), dtype=np.float32)}
+        )
+        self.action_space = spaces.Discrete(2)
+        self.original_action_space = self.action_space
+        self.episodes = episodes
+        self.number_of_episodes = len(episodes)
+        self._lengths = lengths
+        self._step_ms = step_ms
+        self._load_ms = load_ms
+        self._iterator: Iterator[BaseEpisode] = iter(episodes * 2)
+        self._episode: Optional[BaseEpisode] = None
+        self._steps_left = 0
+
+    def get_episode_keys(self) -> List[EpisodeKey]:
+        return [(ep.scene_id, ep.episode_id) for ep in self.episodes]
+
+    def use_episode_queue(self) -> None:
+        self._iterator = EpisodeQueue(self.episodes, self.get_episode_keys())
+
+    def queue_episode(self, scene_id: str, episode_id: str) -> None:
+        assert isinstance(self._iterator, EpisodeQueue)
+        self._iterator.put(scene_id, episode_id)
+
+    def current_episode(self, all_info: bool = False) -> Optional[BaseEpisode]:
+        return self._episode
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        prev_episode = self._episode
+        self._episode = next(self._iterator)
+        if (
+            prev_episode is None
+            or prev_episode.scene_id != self._episode.scene_id
+        ):
+            time.sleep(self._load_ms / 1e3)
+        self._steps_left = self._lengths[
+            (self._episode.scene_id, self._episode.episode_id)
+        ]
+        return {"obs": np.zeros(1, dtype=np.float32)}
+
+    def step(
+        self, action: int
+    ) -> Tuple[Dict[str, np.ndarray], float, bool, Dict[str, Any]]:
+        time.sleep(self._step_ms / 1e3)
+        self._steps_left -= 1
+        obs = {"obs": np.zeros(1, dtype=np.float32)}
+        return obs, 0.0, self._steps_left <= 0, {}
+
+
+def make_episodes(
+    num_scenes: int, seed: int
+) -> Tuple[List[BaseEpisode], Dict[EpisodeKey, int]]:
+    rng = random.Random(seed)
+    episodes: List[BaseEpisode] = []
+    lengths: Dict[EpisodeKey, int] = {}
+    for scene_idx in range(num_scenes):
+        # A few scenes have most of the episodes
+        num_episodes = max(int(40 * 0.6**scene_idx), 1)
+        for _ in range(num_episodes):
+            episode = BaseEpisode(
+                episode_id=str(len(episodes)), scene_id=f"scene_{scene_idx}"
+            )
+            episodes.append(episode)
+            lengths[(episode.scene_id, episode.episode_id)] = rng.randint(
+                10, 60
+            )
+    return episodes, lengths
+
+
+def run_eval(
+    envs: VectorEnv,
+    num_episodes: int,
+    scheduler: Optional[EvalEpisodeScheduler],
+) -> float:
+    if scheduler is not None:
+        for i, env_queue in enumerate(scheduler.start()):
+            envs.call_at(i, "use_episode_queue")
+            for scene_id, episode_id in env_queue:
+                envs.call_at(
+                    i,
+                    "queue_episode",
+                    {"scene_id": scene_id, "episode_id": episode_id},
+                )
+    envs.reset()
+    t_start = time.perf_counter()
+    ep_eval_count: DefaultDict[EpisodeKey, int] = defaultdict(int)
+    num_done = 0
+    while num_done < num_episodes and envs.num_envs > 0:
+        current_episodes = envs.current_episodes()
+        outputs = envs.step([0] * envs.num_envs)
+        next_episodes = envs.current_episodes()
+        for i, (_, _, done, _) in enumerate(outputs):
+            if not done or (
+                scheduler is not None and scheduler.current_episode(i) is None
+            ):
+                continue
+            if scheduler is not None:
+                _, next_key = scheduler.episode_done(i)
+                if next_key is not None:
+                    envs.call_at(
+                        i,
+                        "queue_episode",
+                        {"scene_id": next_key[0], "episode_id": next_key[1]},
+                    )
+            ep_eval_count[
+                (current_episodes[i].scene_id, current_episodes[i].episode_id)
+            ] += 1
+            num_done += 1
+        if scheduler is not None:
+            envs_to_pause = [
+                i
+                for i in range(envs.num_envs)
+                if scheduler.current_episode(i) is None
+            ]
+            scheduler.pause_envs(envs_to_pause)
+        else:
+            # The environment cycled back to an episode it already ran
+            envs_to_pause = [
+                i
+                for i, ep in enumerate(next_episodes)
+                if ep_eval_count[(ep.scene_id, ep.episode_id)] > 0
+            ]
+        for i in reversed(envs_to_pause):
+            envs.pause_at(i)
+    elapsed = time.perf_counter() - t_start
+    assert num_done == num_episodes
+    assert all(count == 1 for count in ep_eval_count.values())
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--num-scenes", type=int, default=16)
+    parser.add_argument("--step-ms", type=float, default=2.0)
+    parser.add_argument("--load-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    episodes, lengths = make_episodes(args.num_scenes, seed=0)
+    print(
+        f"{len(episodes)} episodes in {args.num_scenes} scenes,"
+        f" {sum(lengths.values())} steps"
+    )
+    print(
+        f"{'envs':>5} {'static s':>9} {'work stealing s':>16} {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        scenes = sorted({ep.scene_id for ep in episodes})
+        splits = [scenes[i::num_envs] for i in range(num_envs)]
+        static_args = tuple(
+            (
+                [ep for ep in episodes if ep.scene_id in split],
+                lengths,
+                args.step_ms,
+                args.load_ms,
+            )
+            for split in splits
+        )
+        with VectorEnv(
+            make_env_fn=SleepEpisodeEnv, env_fn_args=static_args
+        ) as envs:
+            static_s = run_eval(envs, len(episodes), None)
+
+        all_args = tuple(
+            (episodes, lengths, args.step_ms, args.load_ms)
+            for _ in range(num_envs)
+        )
+        with VectorEnv(
+            make_env_fn=SleepEpisodeEnv, env_fn_args=all_args
+        ) as envs:
+            scheduler = EvalEpisodeScheduler(
+                [(ep.scene_id, ep.episode_id) for ep in episodes],
+                1,
+                num_envs,
+            )
+            scheduled_s = run_eval(envs, len(episodes), scheduler)
+
+        print(
+            f"{num_envs:>5} {static_s:>9.2f} {scheduled_s:>16.2f}"
+            f" {static_s / scheduled_s:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
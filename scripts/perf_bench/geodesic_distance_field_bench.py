@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Measures the time to build a GeodesicDistanceField
+(habitat.tasks.nav.geodesic_distance_field), the time of a distance lookup,
+and the error of the distances in a room without obstacles, where the
+geodesic distances are the euclidean ones. No scene data is needed.
+
+python scripts/perf_bench/geodesic_distance_field_bench.py --size 20 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from habitat.tasks.nav.geodesic_distance_field import GeodesicDistanceField
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, nargs="+", default=[10, 20, 50])
+    parser.add_argument(
+        "--meters-per-pixel", type=float, nargs="+", default=[0.05, 0.1]
+    )
+    parser.add_argument("--num-goals", type=int, nargs="+", default=[1, 200])
+    parser.add_argument("--num-lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Compile
+    GeodesicDistanceField(
+        np.ones((10, 10), dtype=bool), (0, 0), 0, 1, np.zeros((1, 3))
+    )
+
+    print(
+        f"{'size m':>7} {'m/px':>5} {'goals':>6} {'build ms':>9}"
+        f" {'lookup us':>10} {'mean err':>9} {'max err':>8}"
+    )
+    for size in args.size:
+        for meters_per_pixel in args.meters_per_pixel:
+            num_cells = int(size / meters_per_pixel)
+            navigable = np.ones((num_cells, num_cells), dtype=bool)
+            for num_goals in args.num_goals:
+                goals = rng.uniform(0.4 * size, 0.6 * size, (num_goals, 3))
+                goals[:, 1] = 0
+
+                t_start = time.perf_counter()
+                field = GeodesicDistanceField(
+                    navigable, (0, 0), 0, meters_per_pixel, goals
+                )
+                build_ms = (time.perf_counter() - t_start) * 1e3
+
+                positions = rng.uniform(0, size - 1, (args.num_lookups, 3))
+                positions[:, 1] = 0
+                t_start = time.perf_counter()
+                distances = np.array(
+                    [field.get_distance(p) for p in positions]
+                )
+                lookup_us = (
+                    (time.perf_counter() - t_start) / args.num_lookups * 1e6
+                )
+
+                euclidean = np.linalg.norm(
+                    positions[:, None, [0, 2]] - goals[None, :, [0, 2]],
+                    axis=-1,
+                ).min(1)
+                far = euclidean > 1.0
+                rel_err = (distances[far] - euclidean[far]) / euclidean[far]
+                print(
+                    f"{size:>7.0f} {meters_per_pixel:>5.2f} {num_goals:>6}"
+                    f" {build_ms:>9.1f} {lookup_us:>10.1f}"
+                    f" {rel_err.mean():>8.2%} {rel_err.max():>7.2%}"
+                )
+
+
+if __name__ == "__main__":
+    main()
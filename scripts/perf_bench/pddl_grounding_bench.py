@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares PddlDomain.get_true_predicates, get_possible_predicates and
+get_possible_actions, which use the grounding index
+(habitat.tasks.rearrange.multi_task.pddl_grounding), with the enumeration
+over all the permutations of the entities they replace, for problems with
+increasing numbers of entities, and checks that both give the same results.
+
+The truth values of the predicates are taken from a fake simulator info so
+that no scene is needed and only the enumeration is measured.
+
+python scripts/perf_bench/pddl_grounding_bench.py --num-entities 10 50 200
+"""
+
+import argparse
+import itertools
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from habitat.tasks.rearrange.multi_task.pddl_action import PddlAction
+from habitat.tasks.rearrange.multi_task.pddl_domain import PddlDomain
+from habitat.tasks.rearrange.multi_task.pddl_predicate import Predicate
+from habitat.tasks.rearrange.multi_task.rearrange_pddl import PddlEntity
+
+
+class FakeTruthCache(dict):
+    """Predicate truth values, a fixed pseudo random half of them is true."""
+
+    def __contains__(self, k: object) -> bool:
+        return True
+
+    def __getitem__(self, k: Any) -> bool:
+        return hash(k) % 2 == 0
+
+
+class FakeSimInfo:
+    pred_truth_cache = FakeTruthCache()
+
+
+def reference_get_true_predicates(domain: PddlDomain) -> List[Predicate]:
+    all_entities = domain.all_entities.values()
+    true_preds = []
+    for pred in domain.predicates.values():
+        for entity_input in itertools.permutations(all_entities, pred.n_args):
+            if not pred.are_args_compatible(list(entity_input)):
+                continue
+            use_pred = pred.clone()
+            use_pred.set_param_values(list(entity_input))
+            if use_pred.is_true(domain.sim_info):
+                true_preds.append(use_pred)
+    return true_preds
+
+
+def reference_get_possible_predicates(
+    domain: PddlDomain,
+) -> List[Predicate]:
+    all_entities = domain.all_entities.values()
+    poss_preds = []
+    for pred in domain.predicates.values():
+        for entity_input in itertools.combinations(all_entities, pred.n_args):
+            if not pred.are_args_compatible(list(entity_input)):
+                continue
+            use_pred = pred.clone()
+            use_pred.set_param_values(list(entity_input))
+            if use_pred.are_types_compatible(domain.expr_types):
+                poss_preds.append(use_pred)
+    return poss_preds
+
+
+def reference_get_possible_actions(
+    domain: PddlDomain, true_preds: Optional[List[Predicate]] = None
+) -> List[PddlAction]:
+    all_entities = list(domain.all_entities.values())
+    matching_actions = []
+    for action in domain.actions.values():
+        for entity_input in itertools.combinations(
+            all_entities, action.n_args
+        ):
+            for entity_input_perm in itertools.permutations(entity_input):
+                if not action.are_args_compatible(list(entity_input_perm)):
+                    continue
+                new_action = action.clone()
+                new_action.set_param_values(list(entity_input_perm))
+                if (
+                    true_preds is not None
+                    and not new_action.is_precond_satisfied_from_predicates(
+                        true_preds
+                    )
+                ):
+                    continue
+                matching_actions.append(new_action)
+    return matching_actions
+
+
+def make_domain(num_entities: int) -> PddlDomain:
+    domain = PddlDomain("replica_cad")
+    entity_types = [
+        ("obj", "obj_type", 0.4),
+        ("goal", "goal_entity_type", 0.3),
+        ("recep", "static_obj_type", 0.2),
+        ("cab", "cab_type", 0.1),
+    ]
+    num_added = len(domain.all_entities)
+    for prefix, type_name, fraction in entity_types:
+        for i in range(max(int(fraction * num_entities), 1)):
+            if num_added >= num_entities:
+                break
+            domain.register_episode_entity(
+                PddlEntity(f"{prefix}_{i}", domain.expr_types[type_name])
+            )
+            num_added += 1
+    for i in range(2):
+        domain.register_episode_entity(
+            PddlEntity(f"robot_{i}", domain.expr_types["robot_entity_type"])
+        )
+    domain.bind_actions()
+    domain._sim_info = FakeSimInfo()  # type: ignore[assignment]
+    return domain
+
+
+def timeit(fn: Callable[[], Any], num_repeats: int) -> float:
+    t_start = time.perf_counter()
+    for _ in range(num_repeats):
+        fn()
+    return (time.perf_counter() - t_start) / num_repeats * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-entities", type=int, nargs="+", default=[10, 50, 200]
+    )
+    parser.add_argument("--num-repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'entities':>9} {'method':>24} {'reference ms':>13}"
+        f" {'first ms':>9} {'next ms':>9} {'speedup':>8}"
+    )
+    for num_entities in args.num_entities:
+        domain = make_domain(num_entities)
+        true_preds = domain.get_true_predicates()
+        methods: List[
+            Tuple[str, Callable[[], List[Any]], Callable[[], List[Any]]]
+        ] = [
+            (
+                "get_true_predicates",
+                domain.get_true_predicates,
+                lambda: reference_get_true_predicates(domain),
+            ),
+            (
+                "get_possible_predicates",
+                domain.get_possible_predicates,
+                lambda: reference_get_possible_predicates(domain),
+            ),
+            (
+                "get_possible_actions",
+                lambda: domain.get_possible_actions(true_preds=true_preds),
+                lambda: reference_get_possible_actions(domain, true_preds),
+            ),
+        ]
+        for name, fn, reference_fn in methods:
+            # As at the start of an episode
+            domain._clear_grounding()
+            t_start = time.perf_counter()
+            result = fn()
+            first_ms = (time.perf_counter() - t_start) * 1e3
+            expected = reference_fn()
+            assert [repr(x) for x in result] == [repr(x) for x in expected]
+
+            reference_ms = timeit(reference_fn, args.num_repeats)
+            next_ms = timeit(fn, args.num_repeats)
+            print(
+                f"{num_entities:>9} {name:>24} {reference_ms:>13.1f}"
+                f" {first_ms:>9.1f} {next_ms:>9.1f}"
+                f" {reference_ms / next_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
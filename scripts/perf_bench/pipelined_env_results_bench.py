@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the two ways PPOTrainer collects the results of the environments:
+waiting for them in index order and then batching the observations
+(use_pipelined_env_results=False), and batching the observations of each
+environment as soon as it finishes (use_pipelined_env_results=True).
+
+The environments return random RGB and depth frames and take a random time
+per step (lognormal around --step-ms) to simulate scenes of different
+costs, so no scene data is needed.
+
+python scripts/perf_bench/pipelined_env_results_bench.py --device cuda
+"""
+
+import argparse
+import time
+
+import gym
+import numpy as np
+import torch
+from gym import spaces
+
+from habitat import VectorEnv
+from habitat_baselines.utils.common import (
+    IncrementalObservationBatcher,
+    batch_obs,
+)
+
+
+class SlowImageEnv(gym.Env):
+    def __init__(self, resolution, step_ms, seed):
+        self.observation_space = spaces.Dict(
+            {
+                "rgb": spaces.Box(
+                    0, 255, (resolution, resolution, 3), dtype=np.uint8
+                ),
+                "depth": spaces.Box(
+                    0, 1, (resolution, resolution, 1), dtype=np.float32
+                ),
+            }
+        )
+        self.action_space = spaces.Discrete(4)
+        self._step_ms = step_ms
+        self._rng = np.random.default_rng(seed)
+        self._obs = self.observation_space.sample()
+
+    def reset(self):
+        return self._obs
+
+    def step(self, action):
+        time.sleep(self._step_ms * self._rng.lognormal(0, 0.5) / 1e3)
+        return self._obs, 0.0, False, {}
+
+
+def _make_env(resolution, step_ms, seed):
+    return SlowImageEnv(resolution, step_ms, seed)
+
+
+def collect(envs, device, num_steps, pipelined):
+    num_envs = envs.num_envs
+    envs.reset()
+    t_start = time.perf_counter()
+    for _ in range(num_steps):
+        for index_env in range(num_envs):
+            envs.async_step_at(index_env, 1)
+        if pipelined:
+            batcher = IncrementalObservationBatcher(num_envs, device=device)
+            for index_env, (obs, _, _, _) in envs.wait_step_as_completed(
+                range(num_envs)
+            ):
+                batcher.add(index_env, obs)
+            batch = batcher.get()
+        else:
+            observations = [
+                envs.wait_step_at(index_env)[0]
+                for index_env in range(num_envs)
+            ]
+            batch = batch_obs(observations, device=device)
+        # The policy would use the batch here
+        batch["rgb"].float().mean()
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+    return num_envs * num_steps / (time.perf_counter() - t_start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[8, 16])
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--step-ms", type=float, default=5.0)
+    parser.add_argument("--num-steps", type=int, default=200)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print(
+        f"{'envs':>5} {'ordered FPS':>12} {'pipelined FPS':>14}"
+        f" {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        with VectorEnv(
+            make_env_fn=_make_env,
+            env_fn_args=tuple(
+                (args.resolution, args.step_ms, seed)
+                for seed in range(num_envs)
+            ),
+        ) as envs:
+            collect(envs, device, 10, False)
+            ordered_fps = collect(envs, device, args.num_steps, False)
+            pipelined_fps = collect(envs, device, args.num_steps, True)
+        print(
+            f"{num_envs:>5} {ordered_fps:>12.0f} {pipelined_fps:>14.0f}"
+            f" {pipelined_fps / ordered_fps:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
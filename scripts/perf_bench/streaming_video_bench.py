@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the video writing of PPOTrainer._eval_checkpoint with
+eval.stream_videos=False, where the frames of each step are built in the
+evaluation loop and kept until the episode is over to be written by
+generate_video, with eval.stream_videos=True, where a StreamingVideoWriter
+builds and encodes them in a background thread.
+
+The environments are simulated by random observations and the policy by
+--step-ms of work in the evaluation loop, during which the background
+thread can encode. Reports the time of the evaluation loop and the peak
+memory of the frames (tracemalloc, the ffmpeg processes are not counted).
+
+python scripts/perf_bench/streaming_video_bench.py --num-envs 4 --episode-length 200
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from habitat.utils.visualizations.utils import (
+    observations_to_image,
+    overlay_frame,
+)
+from habitat_baselines.common.streaming_video_writer import (
+    StreamingVideoWriter,
+)
+from habitat_baselines.utils.common import generate_video
+
+
+def busy_wait(ms: float) -> None:
+    t_end = time.perf_counter() + ms / 1e3
+    while time.perf_counter() < t_end:
+        pass
+
+
+def run_eval(
+    args: argparse.Namespace, video_dir: str, stream_videos: bool
+) -> Tuple[float, float, float]:
+    rng = np.random.default_rng(0)
+    batch = {
+        "rgb": torch.from_numpy(
+            rng.integers(
+                0,
+                255,
+                (args.num_envs, args.resolution, args.resolution, 3),
+                dtype=np.uint8,
+            )
+        )
+    }
+    info = {"distance_to_goal": 1.0, "spl": 0.5}
+    rgb_frames: List[List[np.ndarray]] = [[] for _ in range(args.num_envs)]
+    video_writer: Optional[StreamingVideoWriter] = None
+    if stream_videos:
+        video_writer = StreamingVideoWriter(
+            video_option=["disk"],
+            video_dir=video_dir,
+            num_envs=args.num_envs,
+            checkpoint_idx=0,
+            tb_writer=None,
+        )
+    tracemalloc.start()
+    t_start = time.perf_counter()
+    for episode_idx in range(args.num_episodes):
+        for step in range(args.episode_length):
+            busy_wait(args.step_ms)
+            done = step == args.episode_length - 1
+            for i in range(args.num_envs):
+                if video_writer is not None:
+                    video_writer.add_frame(
+                        i, {k: v[i] for k, v in batch.items()}, info, done
+                    )
+                else:
+                    frame = observations_to_image(
+                        {k: v[i] for k, v in batch.items()}, info
+                    )
+                    frame = overlay_frame(frame, info)
+                    rgb_frames[i].append(frame)
+            if not done:
+                continue
+            for i in range(args.num_envs):
+                episode_id = f"{i}_{episode_idx}_{stream_videos}"
+                if video_writer is not None:
+                    video_writer.episode_done(i, episode_id, info)
+                else:
+                    generate_video(
+                        video_option=["disk"],
+                        video_dir=video_dir,
+                        images=rgb_frames[i],
+                        episode_id=episode_id,
+                        checkpoint_idx=0,
+                        metrics=info,
+                        tb_writer=None,
+                        verbose=False,
+                    )
+                    rgb_frames[i] = []
+    loop_s = time.perf_counter() - t_start
+    if video_writer is not None:
+        video_writer.close()
+    total_s = time.perf_counter() - t_start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loop_s, total_s, peak_bytes / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-envs", type=int, default=4)
+    parser.add_argument("--num-episodes", type=int, default=2)
+    parser.add_argument("--episode-length", type=int, default=200)
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--step-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'stream_videos':>13} {'loop s':>7} {'total s':>8} {'peak MiB':>9}"
+    )
+    with tempfile.TemporaryDirectory() as video_dir:
+        for stream_videos in (False, True):
+            loop_s, total_s, peak_mib = run_eval(
+                args, video_dir, stream_videos
+            )
+            print(
+                f"{str(stream_videos):>13} {loop_s:>7.2f} {total_s:>8.2f}"
+                f" {peak_mib:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Measures the pickled size of the step infos of an environment with the
+top_down_map measure, with and without top down map deltas
+(habitat.utils.visualizations.top_down_map_deltas), and the time spent
+encoding and decoding them.
+
+The measure is simulated by an agent walking on a random map and revealing
+the fog of war, so no scene data is needed.
+
+python scripts/perf_bench/top_down_map_deltas_bench.py --map-size 1024 2048
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from habitat.utils.visualizations import fog_of_war
+from habitat.utils.visualizations.top_down_map_deltas import (
+    TopDownMapDeltaDecoder,
+    TopDownMapDeltaEncoder,
+)
+
+
+def simulate_infos(map_size, num_steps, incremental, rng):
+    top_down_map = np.ones((map_size, map_size), dtype=np.uint8)
+    top_down_map[rng.random(top_down_map.shape) < 0.01] = 0
+    mask = np.zeros_like(top_down_map)
+    point = np.array([map_size // 2, map_size // 2])
+    angle = 0.0
+    for _ in range(num_steps):
+        angle += rng.normal(scale=0.3)
+        point = np.clip(
+            point + np.round(3 * np.array([np.cos(angle), np.sin(angle)])),
+            0,
+            map_size - 1,
+        ).astype(np.int64)
+        dirty_rect = fog_of_war.reveal_fog_of_war_incremental(
+            top_down_map,
+            mask,
+            point,
+            angle,
+            fov=90,
+            max_line_len=map_size // 10,
+        )
+        top_down_map[point[0], point[1]] = 10
+        point_rect = (point[0], point[0] + 1, point[1], point[1] + 1)
+        if dirty_rect is None:
+            dirty_rect = point_rect
+        else:
+            dirty_rect = (
+                min(dirty_rect[0], point_rect[0]),
+                max(dirty_rect[1], point_rect[1]),
+                min(dirty_rect[2], point_rect[2]),
+                max(dirty_rect[3], point_rect[3]),
+            )
+        metric = {
+            "map": top_down_map,
+            "fog_of_war_mask": mask,
+            "agent_map_coord": [tuple(point)],
+            "agent_angle": [angle],
+        }
+        if incremental:
+            metric["dirty_rect"] = dirty_rect
+        yield {"distance_to_goal": 1.0, "top_down_map": metric}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--map-size", type=int, nargs="+", default=[512, 1024, 2048]
+    )
+    parser.add_argument("--num-steps", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{'map':>5} {'dirty_rect':>10} {'full KB/step':>13}"
+        f" {'delta KB/step':>14} {'ratio':>7} {'full ms':>8}"
+        f" {'delta ms':>9}"
+    )
+    for map_size in args.map_size:
+        for incremental in (True, False):
+            encoder = TopDownMapDeltaEncoder()
+            decoder = TopDownMapDeltaDecoder()
+            full_bytes = delta_bytes = 0
+            full_time = delta_time = 0.0
+            for info in simulate_infos(
+                map_size,
+                args.num_steps,
+                incremental,
+                np.random.default_rng(0),
+            ):
+                t_start = time.perf_counter()
+                payload = pickle.dumps(info, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.loads(payload)
+                full_time += time.perf_counter() - t_start
+                full_bytes += len(payload)
+
+                t_start = time.perf_counter()
+                payload = pickle.dumps(
+                    encoder.encode(info), protocol=pickle.HIGHEST_PROTOCOL
+                )
+                decoded = decoder.decode(pickle.loads(payload))
+                delta_time += time.perf_counter() - t_start
+                delta_bytes += len(payload)
+
+                assert np.array_equal(
+                    decoded["top_down_map"]["fog_of_war_mask"],
+                    info["top_down_map"]["fog_of_war_mask"],
+                )
+
+            print(
+                f"{map_size:>5} {str(incremental):>10}"
+                f" {full_bytes / args.num_steps / 1024:>13.1f}"
+                f" {delta_bytes / args.num_steps / 1024:>14.2f}"
+                f" {full_bytes / delta_bytes:>6.0f}x"
+                f" {full_time / args.num_steps * 1e3:>8.3f}"
+                f" {delta_time / args.num_steps * 1e3:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Compares the steps/sec of VectorEnv when observations are pickled through the
+pipe and when they are written to shared memory buffers.
+
+The environments are synthetic and only produce random RGB, depth and
+semantic observations, so this measures the transport overhead only.
+
+python scripts/perf_bench/vector_env_obs_transport_bench.py --num-envs 8 16 32
+"""
+
+import argparse
+import time
+
+import gym
+import numpy as np
+from gym import spaces
+
+from habitat import VectorEnv
+
+
+class SyntheticVisualEnv(gym.Env):
+    def __init__(self, resolution: int, seed: int):
+        self.observation_space = spaces.Dict(
+            {
+                "rgb": spaces.Box(
+                    low=0,
+                    high=255,
+                    shape=(resolution, resolution, 3),
+                    dtype=np.uint8,
+                ),
+                "depth": spaces.Box(
+                    low=0.0,
+                    high=1.0,
+                    shape=(resolution, resolution, 1),
+                    dtype=np.float32,
+                ),
+                "semantic": spaces.Box(
+                    low=0,
+                    high=1000,
+                    shape=(resolution, resolution, 1),
+                    dtype=np.int32,
+                ),
+                "pointgoal": spaces.Box(
+                    low=-100.0, high=100.0, shape=(2,), dtype=np.float32
+                ),
+            }
+        )
+        self.action_space = spaces.Discrete(4)
+        self.original_action_space = self.action_space
+        self.number_of_episodes = -1
+        self._rng = np.random.default_rng(seed)
+        # Pre-generate the observations so the benchmark isn't bound by
+        # random number generation.
+        self._obs = [
+            {
+                k: self._rng.integers(0, 255, size=v.shape).astype(v.dtype)
+                for k, v in self.observation_space.spaces.items()
+            }
+            for _ in range(4)
+        ]
+        self._step = 0
+
+    def reset(self):
+        self._step = 0
+        return self._obs[0]
+
+    def step(self, action):
+        self._step += 1
+        done = self._step % 500 == 0
+        return self._obs[self._step % len(self._obs)], 0.0, done, {}
+
+
+def _make_env(resolution: int, seed: int) -> gym.Env:
+    return SyntheticVisualEnv(resolution, seed)
+
+
+def benchmark(
+    num_envs: int,
+    resolution: int,
+    num_steps: int,
+    shared_memory_observations: bool,
+) -> float:
+    with VectorEnv(
+        make_env_fn=_make_env,
+        env_fn_args=tuple((resolution, i) for i in range(num_envs)),
+        shared_memory_observations=shared_memory_observations,
+    ) as envs:
+        envs.reset()
+        actions = [0] * num_envs
+        # Warmup
+        for _ in range(10):
+            envs.step(actions)
+
+        t_start = time.perf_counter()
+        for _ in range(num_steps):
+            outputs = envs.step(actions)
+            # Consume the observations like batch_obs would
+            for k in outputs[0][0].keys():
+                np.stack([o[0][k] for o in outputs])
+
+        return num_envs * num_steps / (time.perf_counter() - t_start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--num-steps", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'num_envs':>8} {'pickle sps':>12} {'shared sps':>12} {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        pickle_sps = benchmark(
+            num_envs, args.resolution, args.num_steps, False
+        )
+        shared_sps = benchmark(num_envs, args.resolution, args.num_steps, True)
+        print(
+            f"{num_envs:>8} {pickle_sps:>12.1f} {shared_sps:>12.1f}"
+            f" {shared_sps / pickle_sps:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
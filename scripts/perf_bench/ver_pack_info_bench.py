@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Benchmarks build_pack_info_from_episode_ids and the VER return computation
+against the numpy implementations they replace, on synthetic variable
+experience layouts (environments of different speeds, random episode
+lengths, stale steps and missing returns), and checks that both give the
+same results.
+
+python scripts/perf_bench/ver_pack_info_bench.py --num-envs 64 256 1024
+"""
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+
+from habitat_baselines.rl.models.rnn_state_encoder import (
+    _np_invert_permutation,
+    build_pack_info_from_episode_ids,
+)
+from habitat_baselines.rl.ver.ver_rollout_storage import (
+    _compute_packed_returns,
+)
+
+
+def reference_build_pack_info(
+    episode_ids: np.ndarray,
+    environment_ids: np.ndarray,
+    step_ids: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    r"""Previous implementation of build_pack_info_from_episode_ids.
+
+    Create the indexing info needed to make the PackedSequence
+    based on the dones.
+
+    PackedSequences are PyTorch's way of supporting a single RNN forward
+    call where each input in the batch can have an arbitrary sequence length
+
+    They work as follows: Given the sequences [c], [x, y, z], [a, b],
+    we generate data [x, a, c, y, b, z] and num_seqs_at_step [3, 2, 1].  The
+    data is a flattened out version of the input sequences (the ordering in
+    data is determined by sequence length).  num_seqs_at_step tells you that
+    for each index, how many sequences have a length of (index + 1) or greater.
+
+    This method will generate the new index ordering such that you can
+    construct the data for a PackedSequence from a (T*N, ...) tensor
+    via x.index_select(0, select_inds)
+    """
+    # make episode_ids globally unique. This will make things easier
+    episode_ids = episode_ids * (environment_ids.max() + 1) + environment_ids
+    unsorted_episode_ids = episode_ids
+    # Sort in increasing order of (episode ID, step ID).  This will
+    # put things into an order such that each episode is a contiguous
+    # block. This makes all the following logic MUCH easier
+    sort_keys = episode_ids * (step_ids.max() + 1) + step_ids
+    assert np.unique(sort_keys).size == sort_keys.size
+    episode_id_sorting = np.argsort(
+        episode_ids * (step_ids.max() + 1) + step_ids
+    )
+    episode_ids = episode_ids[episode_id_sorting]
+
+    unique_episode_ids, sequence_lengths = np.unique(
+        episode_ids, return_counts=True
+    )
+    # Exclusive cumsum
+    sequence_starts = np.cumsum(sequence_lengths) - sequence_lengths
+
+    sorted_indices = np.argsort(-sequence_lengths)
+    lengths = sequence_lengths[sorted_indices]
+    #  print(lengths)
+
+    unique_episode_ids = unique_episode_ids[sorted_indices]
+    sequence_starts = sequence_starts[sorted_indices]
+
+    max_length = int(lengths[0])
+
+    select_inds = np.empty((episode_ids.size,), dtype=np.int64)
+
+    # num_seqs_at_step is *always* on the CPU
+    num_seqs_at_step = np.empty((max_length,), dtype=np.int64)
+
+    offset = 0
+    prev_len = 0
+    num_valid_for_length = lengths.shape[0]
+    #  print(lengths)
+
+    for next_len in np.unique(lengths):
+        num_valid_for_length = np.count_nonzero(
+            lengths[0:num_valid_for_length] > prev_len
+        )
+
+        num_seqs_at_step[prev_len:next_len] = num_valid_for_length
+
+        new_inds = (
+            sequence_starts[0:num_valid_for_length][np.newaxis, :]
+            + np.arange(prev_len, next_len)[:, np.newaxis]
+        ).reshape(-1)
+
+        select_inds[offset : offset + new_inds.size] = new_inds
+
+        offset += new_inds.size
+
+        prev_len = int(next_len)
+
+    assert offset == select_inds.size
+
+    select_inds = episode_id_sorting[select_inds]
+    sequence_starts = select_inds[0 : num_seqs_at_step[0]]
+
+    episode_environment_ids = environment_ids[sequence_starts]
+    unique_environment_ids, rnn_state_batch_inds = np.unique(
+        episode_environment_ids, return_inverse=True
+    )
+    episode_ids_for_starts = unsorted_episode_ids[sequence_starts]
+    last_sequence_in_batch_mask = np.zeros_like(episode_environment_ids == 0)
+    first_sequence_in_batch_mask = np.zeros_like(last_sequence_in_batch_mask)
+    first_step_for_env = []
+    for env_id in unique_environment_ids:
+        env_eps = episode_environment_ids == env_id
+        env_eps_ids = episode_ids_for_starts[env_eps]
+
+        last_sequence_in_batch_mask[env_eps] = env_eps_ids == env_eps_ids.max()
+        first_ep_mask = env_eps_ids == env_eps_ids.min()
+        first_sequence_in_batch_mask[env_eps] = first_ep_mask
+
+        first_step_for_env.append(
+            sequence_starts[env_eps][first_ep_mask].item()
+        )
+
+    return {
+        "select_inds": select_inds,
+        "num_seqs_at_step": num_seqs_at_step,
+        "sequence_starts": sequence_starts,
+        "sequence_lengths": lengths,
+        "rnn_state_batch_inds": rnn_state_batch_inds,
+        "last_sequence_in_batch_mask": last_sequence_in_batch_mask,
+        "first_sequence_in_batch_mask": first_sequence_in_batch_mask,
+        "last_sequence_in_batch_inds": np.nonzero(last_sequence_in_batch_mask)[
+            0
+        ],
+        "first_episode_in_batch_inds": np.nonzero(
+            first_sequence_in_batch_mask
+        )[0],
+        "first_step_for_env": np.asarray(first_step_for_env),
+    }
+
+
+def reference_compute_returns(
+    rewards, values, is_not_stale, returns, pack_info, gamma, tau
+):
+    select_inds = pack_info["select_inds"]
+    num_seqs_at_step = pack_info["num_seqs_at_step"]
+    sequence_lengths = pack_info["sequence_lengths"]
+    last_sequence_in_batch_mask = pack_info["last_sequence_in_batch_mask"]
+
+    rewards, values, is_not_stale = map(
+        lambda t: t.reshape(-1, 1)[select_inds],
+        (rewards, values, is_not_stale),
+    )
+    returns = returns.reshape(-1, 1)
+    returns[:] = returns[select_inds]
+
+    gae = np.zeros((num_seqs_at_step[0], 1))
+    last_values = gae.copy()
+    ptr = returns.size
+    for len_minus_1, n_seqs in reversed(list(enumerate(num_seqs_at_step))):
+        curr_slice = slice(ptr - n_seqs, ptr)
+        q_est = rewards[curr_slice] + gamma * last_values[:n_seqs]
+        delta = q_est - values[curr_slice]
+        gae[:n_seqs] = delta + (tau * gamma) * gae[:n_seqs]
+
+        is_last_step = sequence_lengths == (len_minus_1 + 1)
+        is_last_step_for_env = is_last_step & last_sequence_in_batch_mask
+        gae[is_last_step_for_env] = 0.0
+
+        use_new_value = is_not_stale[curr_slice] | np.logical_not(
+            np.isfinite(returns[curr_slice])
+        )
+        returns[curr_slice][use_new_value] = (
+            gae[:n_seqs] + values[curr_slice]
+        )[use_new_value]
+        returns[curr_slice][is_last_step_for_env[:n_seqs]] = float("nan")
+        last_values[:n_seqs] = values[curr_slice]
+        ptr -= n_seqs
+
+    returns[:] = returns[_np_invert_permutation(select_inds)]
+
+
+def make_layout(num_envs, num_steps, rng):
+    r"""Steps from environments of different speeds, in arrival order, as
+    stored by VERRolloutStorage.
+    """
+    num_slots = (num_steps + 1) * num_envs
+    speeds = rng.lognormal(0, 0.5, num_envs)
+    environment_ids = rng.choice(
+        num_envs, size=num_slots, p=speeds / speeds.sum()
+    )
+    # Every environment has at least one step
+    environment_ids[:num_envs] = rng.permutation(num_envs)
+    episode_ids = np.empty_like(environment_ids)
+    step_ids = np.empty_like(environment_ids)
+    current_episode = rng.integers(0, 1000, num_envs)
+    current_step = rng.integers(0, 500, num_envs)
+    for i, env in enumerate(environment_ids):
+        episode_ids[i] = current_episode[env]
+        step_ids[i] = current_step[env]
+        current_step[env] += 1
+        if rng.random() < 0.02:
+            current_episode[env] += 1
+    return episode_ids, environment_ids, step_ids
+
+
+def timeit(fn, num_repeats):
+    fn()
+    t_start = time.perf_counter()
+    for _ in range(num_repeats):
+        fn()
+    return (time.perf_counter() - t_start) / num_repeats * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-envs", type=int, nargs="+", default=[64, 256, 1024]
+    )
+    parser.add_argument("--num-steps", type=int, default=128)
+    parser.add_argument("--num-repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    gamma, tau = 0.99, 0.95
+    print(
+        f"{'envs':>5} {'pack ref ms':>12} {'pack ms':>8} {'speedup':>8}"
+        f" {'returns ref ms':>15} {'returns ms':>11} {'speedup':>8}"
+    )
+    for num_envs in args.num_envs:
+        layout = make_layout(num_envs, args.num_steps, rng)
+        num_slots = layout[0].size
+
+        expected = reference_build_pack_info(*layout)
+        pack_info = build_pack_info_from_episode_ids(*layout)
+        for k, v in expected.items():
+            assert np.array_equal(v, pack_info[k]), k
+
+        rewards = rng.standard_normal(num_slots).astype(np.float32)
+        values = rng.standard_normal(num_slots).astype(np.float32)
+        is_not_stale = rng.random(num_slots) > 0.1
+        initial_returns = rng.standard_normal(num_slots).astype(np.float32)
+        initial_returns[rng.random(num_slots) < 0.05] = np.nan
+
+        expected_returns = initial_returns.copy()
+        reference_compute_returns(
+            rewards,
+            values,
+            is_not_stale,
+            expected_returns,
+            expected,
+            gamma,
+            tau,
+        )
+        returns = initial_returns.copy()
+        _compute_packed_returns(
+            rewards,
+            values,
+            is_not_stale,
+            returns,
+            pack_info["select_inds"],
+            pack_info["num_seqs_at_step"],
+            pack_info["sequence_lengths"],
+            pack_info["last_sequence_in_batch_mask"],
+            gamma,
+            tau,
+        )
+        assert np.array_equal(
+            expected_returns, returns, equal_nan=True
+        ), "Returns are not identical"
+
+        pack_ref_ms = timeit(
+            lambda: reference_build_pack_info(*layout), args.num_repeats
+        )
+        pack_ms = timeit(
+            lambda: build_pack_info_from_episode_ids(*layout),
+            args.num_repeats,
+        )
+        returns_ref_ms = timeit(
+            lambda: reference_compute_returns(
+                rewards,
+                values,
+                is_not_stale,
+                initial_returns.copy(),
+                expected,
+                gamma,
+                tau,
+            ),
+            args.num_repeats,
+        )
+        returns_ms = timeit(
+            lambda: _compute_packed_returns(
+                rewards,
+                values,
+                is_not_stale,
+                initial_returns.copy(),
+                pack_info["select_inds"],
+                pack_info["num_seqs_at_step"],
+                pack_info["sequence_lengths"],
+                pack_info["last_sequence_in_batch_mask"],
+                gamma,
+                tau,
+            ),
+            args.num_repeats,
+        )
+        print(
+            f"{num_envs:>5} {pack_ref_ms:>12.2f} {pack_ms:>8.2f}"
+            f" {pack_ref_ms / pack_ms:>7.1f}x {returns_ref_ms:>15.2f}"
+            f" {returns_ms:>11.2f} {returns_ref_ms / returns_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+# Copyright (c) Meta Platforms, Inc. and its affiliates.
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Measures the throughput of the queues the VER workers can use: the shared
+memory ring buffer (habitat_baselines.rl.ver.shared_memory_queue), the
+previous fallback (a multiprocessing queue read with get_nowait) and
+faster_fifo if it is installed.
+
+Several producer processes send small messages (environment indices, or
+task tuples with a timing record) to a single consumer that reads them
+with get_many, like the environment workers and the inference worker.
+
+python scripts/perf_bench/ver_queue_bench.py --num-producers 1 4 16
+"""
+
+import argparse
+import queue
+import time
+
+import torch
+
+from habitat_baselines.rl.ver.shared_memory_queue import SharedMemoryQueue
+
+try:
+    import faster_fifo
+    import faster_fifo_reduction  # noqa: F401
+except ImportError:
+    faster_fifo = None
+
+
+class MultiprocessingQueue:
+    r"""The previous fallback: get_many and put_many loop over
+    get_nowait and put.
+    """
+
+    def __init__(self, max_size_bytes):
+        self._queue = torch.multiprocessing.get_context("forkserver").Queue()
+
+    def get_many(self, block=True, timeout=10.0, max_messages_to_get=10**9):
+        msgs = [self._queue.get(block, timeout)]
+        while len(msgs) < max_messages_to_get:
+            try:
+                msgs.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return msgs
+
+    def put_many(self, xs, block=True, timeout=10.0):
+        for x in xs:
+            self._queue.put(x, block, timeout)
+
+
+def make_message(kind, producer_idx, i):
+    if kind == "int":
+        return producer_idx
+    return (3, {"env_idx": producer_idx, "step": i, "time": time.time()})
+
+
+def producer(q, barrier, kind, producer_idx, num_messages, batch_size):
+    barrier.wait()
+    for start in range(0, num_messages, batch_size):
+        q.put_many(
+            [
+                make_message(kind, producer_idx, i)
+                for i in range(start, min(start + batch_size, num_messages))
+            ]
+        )
+
+
+def run(queue_cls, kind, num_producers, num_messages, batch_size):
+    ctx = torch.multiprocessing.get_context("forkserver")
+    q = queue_cls(64 * 1024 * 1024)
+    barrier = ctx.Barrier(num_producers + 1)
+    processes = [
+        ctx.Process(
+            target=producer,
+            args=(q, barrier, kind, producer_idx, num_messages, batch_size),
+        )
+        for producer_idx in range(num_producers)
+    ]
+    for p in processes:
+        p.start()
+
+    total = num_producers * num_messages
+    received = 0
+    # Start timing once all the producers are running
+    barrier.wait()
+    t_start = time.perf_counter()
+    while received < total:
+        received += len(q.get_many(timeout=10.0))
+    elapsed = time.perf_counter() - t_start
+
+    for p in processes:
+        p.join()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num-producers", type=int, nargs="+", default=[1, 4, 16]
+    )
+    parser.add_argument("--num-messages", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 32])
+    args = parser.parse_args()
+
+    queues = [
+        ("shared_memory", SharedMemoryQueue),
+        ("mp_fallback", MultiprocessingQueue),
+    ]
+    if faster_fifo is not None:
+        queues.append(("faster_fifo", faster_fifo.Queue))
+
+    print(
+        f"{'kind':>6} {'producers':>10} {'batch':>6}"
+        + "".join(f" {name + ' msg/s':>19}" for name, _ in queues)
+    )
+    for kind in ("int", "tuple"):
+        for num_producers in args.num_producers:
+            for batch_size in args.batch_size:
+                rates = [
+                    run(
+                        queue_cls,
+                        kind,
+                        num_producers,
+                        args.num_messages,
+                        batch_size,
+                    )
+                    for _, queue_cls in queues
+                ]
+                print(
+                    f"{kind:>6} {num_producers:>10} {batch_size:>6}"
+                    + "".join(f" {rate:>19.0f}" for rate in rates)
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,28 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import contextlib
+import functools
 import gc
 import itertools
 import math
 import os
+import queue
 import random
+from collections import defaultdict, deque
 from copy import deepcopy
 from glob import glob
+from types import SimpleNamespace
+from typing import DefaultDict, Deque, Dict, List, Tuple, Union
 
+import gym
+import imageio
+import numpy as np
 import pytest
+from gym import spaces
 
 from habitat.config.default import get_agent_config
-from habitat.core.vector_env import VectorEnv
+from habitat.core.vector_env import ThreadedVectorEnv, VectorEnv
 
 try:
     import torch
@@ -24,10 +34,26 @@ try:
     import habitat_sim.utils.datasets_download as data_downloader
     from habitat_baselines.common.base_trainer import BaseRLTrainer
     from habitat_baselines.common.baseline_registry import baseline_registry
+    from habitat_baselines.common.checkpoint_writer import (
+        AsyncCheckpointWriter,
+    )
+    from habitat_baselines.common.construct_vector_env import partition_scenes
+    from habitat_baselines.common.eval_episode_scheduler import (
+        EvalEpisodeScheduler,
+    )
+    from habitat_baselines.common.rollout_storage import RolloutStorage
+    from habitat_baselines.common.streaming_video_writer import (
+        StreamingVideoWriter,
+    )
     from habitat_baselines.config.default import get_config
     from habitat_baselines.rl.ddppo.ddp_utils import find_free_port
+    from habitat_baselines.rl.ppo.policy import PolicyActionData
+    from habitat_baselines.rl.ver.shared_memory_queue import SharedMemoryQueue
     from habitat_baselines.run import execute_exp
-    from habitat_baselines.utils.common import batch_obs
+    from habitat_baselines.utils.common import (
+        IncrementalObservationBatcher,
+        batch_obs,
+    )
 
     baseline_installed = True
 except ImportError:
@@ -39,6 +65,7 @@ from habitat.config.default_structured_configs import (
     HeadDepthSensorConfig,
     HeadRGBSensorConfig,
 )
+from habitat.core.dataset import Episode, EpisodeQueue
 from habitat.gym import make_gym_from_config
 from habitat_baselines.config.default_structured_configs import (
     Cube2EqConfig,
@@ -437,6 +464,426 @@ def test_pausing():
     __do_pause_test(num_envs, list(range(num_envs)))
 
 
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+def test_partition_scenes():
+    random.seed(0)
+    for _ in range(20):
+        num_partitions = random.randint(1, 8)
+        scenes = [f"scene_{i}" for i in range(random.randint(8, 40))]
+        scene_weights = {
+            s: random.choice([0, 1, 10, 100]) * random.random() for s in scenes
+        }
+
+        partitions = partition_scenes(scenes, num_partitions, scene_weights)
+
+        assert len(partitions) == num_partitions
+        assert sorted(itertools.chain(*partitions)) == sorted(scenes)
+        assert all(len(p) > 0 for p in partitions)
+        # Longest processing time first bound
+        loads = [sum(scene_weights[s] for s in p) for p in partitions]
+        assert max(loads) <= max(
+            sum(loads) / num_partitions + max(scene_weights.values()),
+            1e-6,
+        )
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize(
+    "num_scenes,num_envs,evals_per_ep", [(5, 3, 1), (2, 4, 2), (1, 6, 1)]
+)
+def test_eval_episode_scheduler(num_scenes, num_envs, evals_per_ep):
+    rng = random.Random(0)
+    episodes = [
+        Episode(
+            episode_id=str(i),
+            scene_id=f"scene_{i % num_scenes}",
+            start_position=[],
+            start_rotation=[],
+        )
+        for i in range(4 * num_scenes + 1)
+    ]
+    keys = [(ep.scene_id, ep.episode_id) for ep in episodes]
+    scheduler = EvalEpisodeScheduler(keys, evals_per_ep, num_envs)
+
+    # Simulates environments that reset themselves when an episode is over
+    env_queues = []
+    for env_queue in scheduler.start():
+        episode_queue = EpisodeQueue(episodes)
+        for key in env_queue:
+            episode_queue.put(*key)
+        env_queues.append(episode_queue)
+    env_episodes = [next(q) for q in env_queues]
+    env_steps_left = [rng.randint(1, 5) for _ in env_queues]
+    done_keys = []
+    num_scene_switches = 0
+    while len(env_queues) > 0:
+        for i, episode in enumerate(env_episodes):
+            env_steps_left[i] -= 1
+            if env_steps_left[i] > 0 or scheduler.current_episode(i) is None:
+                continue
+            done_key, next_key = scheduler.episode_done(i)
+            assert done_key == (episode.scene_id, episode.episode_id)
+            done_keys.append(done_key)
+            env_episodes[i] = next(env_queues[i])
+            env_steps_left[i] = rng.randint(1, 5)
+            num_scene_switches += env_episodes[i].scene_id != episode.scene_id
+            if next_key is not None:
+                env_queues[i].put(*next_key)
+        to_pause = [
+            i
+            for i in range(len(env_queues))
+            if scheduler.current_episode(i) is None
+        ]
+        scheduler.pause_envs(to_pause)
+        for i in reversed(to_pause):
+            del env_queues[i], env_episodes[i], env_steps_left[i]
+
+    assert sorted(done_keys) == sorted(keys * evals_per_ep)
+    assert scheduler.num_remaining == 0
+    # Environments only switch scene when theirs has no episode left
+    assert num_scene_switches <= num_scenes + num_envs
+
+
+class _FakeEvalEnv(gym.Env):
+    r"""Environment whose episodes last 1 + episode_id % 3 steps, and whose
+    reward is the action at the end of an episode.
+    """
+
+    def __init__(self, episodes):
+        self.observation_space = spaces.Dict(
+            {"obs": spaces.Box(0, 1, (1,), dtype=np.float32)}
+        )
+        self.action_space = spaces.Discrete(4)
+        self.original_action_space = self.action_space
+        self.episodes = episodes
+        self.number_of_episodes = len(episodes)
+        self.reset_episode_iterator()
+
+    def get_episode_keys(self):
+        return [(ep.scene_id, ep.episode_id) for ep in self.episodes]
+
+    def reset_episode_iterator(self):
+        self._iterator = iter(self.episodes)
+
+    def use_episode_queue(self):
+        self._iterator = EpisodeQueue(self.episodes)
+
+    def queue_episode(self, scene_id, episode_id):
+        self._iterator.put(scene_id, episode_id)
+
+    def current_episode(self, all_info=False):
+        return self._episode
+
+    def reset(self):
+        self._episode = next(self._iterator)
+        self._steps_left = 1 + int(self._episode.episode_id) % 3
+        return {"obs": np.zeros(1, dtype=np.float32)}
+
+    def step(self, action):
+        self._steps_left -= 1
+        done = self._steps_left == 0
+        reward = float(action) if done else 0.0
+        return {"obs": np.zeros(1, dtype=np.float32)}, reward, done, {}
+
+
+class _FakeEvalAgent:
+    r"""Agent whose action is the step of its checkpoint."""
+
+    should_load_agent_state = True
+    hidden_state_shape = (1, 2)
+    policy_action_space = spaces.Discrete(4)
+
+    def __init__(self):
+        self.actor_critic = self
+        self.step = 0
+        self.max_num_envs = 0
+
+    def load_state_dict(self, ckpt_dict):
+        self.step = ckpt_dict["extra_state"]["step"]
+
+    def eval(self):
+        pass
+
+    def act(
+        self, observations, rnn_hidden_states, prev_actions, masks, **kwargs
+    ):
+        self.max_num_envs = max(self.max_num_envs, masks.shape[0])
+        return PolicyActionData(
+            rnn_hidden_states=rnn_hidden_states,
+            actions=torch.full((masks.shape[0], 1), self.step),
+        )
+
+    def get_extra(self, action_data, infos, dones):
+        return [{} for _ in infos]
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize("concurrent_checkpoints", [1, 2])
+@pytest.mark.parametrize("keep_envs_alive", [False, True])
+def test_eval_concurrent_checkpoints(
+    tmp_path, monkeypatch, concurrent_checkpoints, keep_envs_alive
+):
+    import habitat_baselines.common.base_trainer as base_trainer
+    import habitat_baselines.rl.ppo.ppo_trainer as ppo_trainer
+
+    num_checkpoints, num_envs = 3, 5
+    ckpt_dir = tmp_path / "ckpts"
+    ckpt_dir.mkdir()
+    for i in range(num_checkpoints):
+        ckpt_path = ckpt_dir / f"ckpt.{i}.pth"
+        ckpt_path.touch()
+        os.utime(ckpt_path, (i, i))
+
+    config = get_config(
+        "test/config/habitat_baselines/ppo_pointnav_test.yaml",
+        [
+            f"habitat_baselines.num_environments={num_envs}",
+            "habitat_baselines.test_episode_count=-1",
+            f"habitat_baselines.num_checkpoints={num_checkpoints}",
+            f"habitat_baselines.eval_ckpt_path_dir={ckpt_dir}",
+            f"habitat_baselines.checkpoint_folder={tmp_path}",
+            "habitat_baselines.load_resume_state_config=False",
+            "habitat_baselines.eval.video_option=[]",
+            "habitat_baselines.eval.episode_scheduling=work_stealing",
+            f"habitat_baselines.eval.concurrent_checkpoints={concurrent_checkpoints}",
+            f"habitat_baselines.eval.keep_envs_alive={keep_envs_alive}",
+        ],
+    )
+    episodes = [
+        Episode(
+            episode_id=str(i),
+            scene_id=f"scene_{i % 3}",
+            start_position=[],
+            start_rotation=[],
+        )
+        for i in range(20)
+    ]
+    monkeypatch.setattr(
+        ppo_trainer,
+        "construct_envs",
+        lambda config, **kwargs: ThreadedVectorEnv(
+            make_env_fn=_FakeEvalEnv,
+            env_fn_args=tuple((episodes,) for _ in range(num_envs)),
+        ),
+    )
+    agents: List[_FakeEvalAgent] = []
+
+    def create_agent(self, resume_state):
+        agents.append(_FakeEvalAgent())
+        return agents[-1]
+
+    monkeypatch.setattr(ppo_trainer.PPOTrainer, "_create_agent", create_agent)
+    # The checkpoint ckpt.{i}.pth is for step i + 1
+    monkeypatch.setattr(
+        ppo_trainer.PPOTrainer,
+        "load_checkpoint",
+        lambda self, path, **kwargs: {
+            "config": None,
+            "extra_state": {"step": int(path.split(".")[-2]) + 1},
+        },
+    )
+    scalars: Dict[str, Dict[int, float]] = defaultdict(dict)
+    writer = SimpleNamespace(
+        add_scalar=lambda tag, value, step: scalars[tag].update({step: value})
+    )
+    monkeypatch.setattr(
+        base_trainer,
+        "get_writer",
+        lambda config, **kwargs: contextlib.nullcontext(writer),
+    )
+
+    ppo_trainer.PPOTrainer(config).eval()
+
+    if concurrent_checkpoints == 2:
+        # The first two checkpoints were evaluated at the same time, on 3
+        # and 2 of the environments, the last one on all of them
+        assert [(a.step, a.max_num_envs) for a in agents] == [
+            (1, 3),
+            (2, 2),
+            (3, num_envs),
+        ]
+    else:
+        assert [(a.step, a.max_num_envs) for a in agents] == [
+            (i + 1, num_envs) for i in range(num_checkpoints)
+        ]
+    # Each checkpoint ran all the episodes with its own agent
+    assert scalars["eval_reward/average_reward"] == {1: 1.0, 2: 2.0, 3: 3.0}
+    assert sorted(scalars["eval_perf/episodes_per_sec"]) == [1, 2, 3]
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+def test_streaming_video_writer(tmp_path):
+    # The number of steps of the episodes of each environment, the last
+    # episode of environment 1 is not over when it is paused
+    episode_lengths = [[4, 2], [3, 5], [5, 1]]
+    pause_after = [6, 5, 6]
+    num_envs = len(episode_lengths)
+    env_ids = list(range(num_envs))
+    with StreamingVideoWriter(
+        video_option=["disk"],
+        video_dir=str(tmp_path),
+        num_envs=num_envs,
+        checkpoint_idx=7,
+        tb_writer=None,
+        max_queued_frames=1,
+    ) as video_writer:
+        rgb = torch.zeros(num_envs, 32, 32, 3, dtype=torch.uint8)
+        for step in range(max(pause_after)):
+            for i, env_id in enumerate(env_ids):
+                lengths = episode_lengths[env_id]
+                rgb[i] = 100 + 50 * env_id
+                ends = np.cumsum(lengths) - 1
+                done = step in ends
+                video_writer.add_frame(
+                    i, {"rgb": rgb[i]}, {"step": float(step)}, blank=done
+                )
+                if done:
+                    episode_idx = list(ends).index(step)
+                    video_writer.episode_done(
+                        i, f"{env_id}_{episode_idx}", {"spl": 0.5}
+                    )
+            # The frames were copied
+            rgb.fill_(0)
+            to_pause = [
+                i
+                for i, env_id in enumerate(env_ids)
+                if pause_after[env_id] == step + 1
+            ]
+            video_writer.pause_envs(to_pause)
+            for i in reversed(to_pause):
+                del env_ids[i]
+
+    video_names = {
+        f"episode={env_id}_{episode_idx}-ckpt=7-spl=0.50.mp4": length
+        for env_id, lengths in enumerate(episode_lengths)
+        for episode_idx, length in enumerate(lengths)
+        if sum(lengths[: episode_idx + 1]) <= pause_after[env_id]
+    }
+    assert sorted(os.listdir(tmp_path)) == sorted(video_names)
+    for video_name, length in video_names.items():
+        with imageio.get_reader(os.path.join(tmp_path, video_name)) as reader:
+            frames = [np.asarray(frame) for frame in reader]
+        assert len(frames) == length
+        # The last frame of the episode is blank
+        assert frames[0].mean() > frames[-1].mean() or length == 1
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize("max_in_flight", [1, 3])
+def test_async_checkpoint_writer(tmp_path, max_in_flight):
+    latest_path = str(tmp_path / "latest.pth")
+    weight = torch.zeros(64, 64)
+    # Like the window_episode_stats of the VER ReportWorker
+    window_stats: DefaultDict[str, Deque[torch.Tensor]] = defaultdict(
+        functools.partial(deque, maxlen=3)
+    )
+    with AsyncCheckpointWriter(max_in_flight) as writer:
+        for i in range(5):
+            weight.fill_(i)
+            window_stats["reward"].append(torch.tensor(float(i)))
+            writer.save(
+                {
+                    "state_dict": {"weight": weight},
+                    "window_stats": window_stats,
+                    "step": i,
+                },
+                str(tmp_path / f"ckpt.{i}.pth"),
+                latest_path,
+            )
+            assert writer.num_pending <= max_in_flight
+            # The saved state is a snapshot
+            weight.fill_(-1)
+            window_stats["reward"].append(torch.tensor(-1.0))
+
+    # Only the checkpoints and the link, no temporary files
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["latest.pth"] + [f"ckpt.{i}.pth" for i in range(5)]
+    )
+    for i in range(5):
+        ckpt = torch.load(tmp_path / f"ckpt.{i}.pth")
+        assert ckpt["step"] == i
+        assert torch.all(ckpt["state_dict"]["weight"] == i)
+        assert ckpt["window_stats"]["reward"][-1] == i
+        assert ckpt["window_stats"].default_factory is not None
+    assert torch.load(latest_path)["step"] == 4
+    assert os.path.samefile(latest_path, tmp_path / "ckpt.4.pth")
+    # Readable by the other users, e.g. an evaluation job, like the files
+    # written by torch.save
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert os.stat(latest_path).st_mode & 0o777 == 0o666 & ~umask
+
+    # The error of a background save is raised by the next call
+    writer = AsyncCheckpointWriter(max_in_flight)
+    writer.save({"step": 0}, str(tmp_path / "missing_dir" / "ckpt.pth"))
+    with pytest.raises(FileNotFoundError):
+        writer.close()
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize("use_gae", [True, False])
+def test_compute_returns(use_gae):
+    num_steps, num_envs, gamma, tau = 32, 4, 0.99, 0.95
+    rollouts = RolloutStorage(
+        num_steps,
+        num_envs,
+        spaces.Dict({}),
+        spaces.Discrete(4),
+        recurrent_hidden_state_size=1,
+    )
+    rewards = rollouts.buffers["rewards"]
+    value_preds = rollouts.buffers["value_preds"]
+    masks = rollouts.buffers["masks"]
+    returns = rollouts.buffers["returns"]
+    assert isinstance(rewards, torch.Tensor)
+    assert isinstance(value_preds, torch.Tensor)
+    assert isinstance(masks, torch.Tensor)
+    assert isinstance(returns, torch.Tensor)
+    torch.manual_seed(0)
+    rewards.normal_()
+    value_preds.normal_()
+    masks.copy_(torch.rand(num_steps + 1, num_envs, 1) > 0.1)
+    for _ in range(num_steps):
+        rollouts.advance_rollout()
+    next_value = torch.randn(num_envs, 1)
+
+    # Step by step reference
+    values = value_preds.clone()
+    expected = returns.clone()
+    if use_gae:
+        values[num_steps] = next_value
+        gae: Union[float, torch.Tensor] = 0.0
+        for step in reversed(range(num_steps)):
+            delta = (
+                rewards[step]
+                + gamma * values[step + 1] * masks[step + 1]
+                - values[step]
+            )
+            gae = delta + gamma * tau * gae * masks[step + 1]
+            expected[step] = gae + values[step]
+    else:
+        expected[num_steps] = next_value
+        for step in reversed(range(num_steps)):
+            expected[step] = (
+                gamma * expected[step + 1] * masks[step + 1] + rewards[step]
+            )
+
+    rollouts.compute_returns(next_value, use_gae, gamma, tau)
+    assert torch.equal(returns, expected)
+
+
 @pytest.mark.skipif(
     not baseline_installed, reason="baseline sub-module not installed"
 )
@@ -465,3 +912,195 @@ def test_batch_obs(sensor_device, batched_device):
     ]
 
     _ = batch_obs(sensors, device=batched_device)
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize("num_threads", [1, 3])
+def test_batch_obs_values(num_threads):
+    from habitat_baselines.utils.common import _ObservationBatchingCache
+
+    rng = np.random.default_rng(0)
+    observations = [
+        {
+            "rgb": rng.integers(255, size=(64, 64, 3), dtype=np.uint8),
+            "depth": torch.rand(64, 64, 1),
+            "nested": {"gps": rng.random(2), "step": i},
+        }
+        for i in range(7)
+    ]
+
+    cache = _ObservationBatchingCache()
+    prev_num_threads = cache.num_threads
+    prev_min_parallel_bytes = cache.min_parallel_bytes
+    cache.num_threads = num_threads
+    cache.min_parallel_bytes = 0
+    try:
+        for _ in range(2):
+            batch = batch_obs(observations)
+            assert np.array_equal(
+                batch["rgb"].numpy(),
+                np.stack([o["rgb"] for o in observations]),
+            )
+            assert torch.equal(
+                batch["depth"], torch.stack([o["depth"] for o in observations])
+            )
+            assert np.array_equal(
+                batch["nested"]["gps"].numpy(),
+                np.stack([o["nested"]["gps"] for o in observations]),
+            )
+            assert batch["nested"]["step"].tolist() == list(range(7))
+    finally:
+        cache.num_threads = prev_num_threads
+        cache.min_parallel_bytes = prev_min_parallel_bytes
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+def test_batch_obs_nested_layouts():
+    # Same top level keys, but different nested keys
+    for nested_keys in [("gps",), ("gps", "compass"), ("compass",)]:
+        observations = [
+            {
+                "rgb": np.full((4, 4, 3), i, dtype=np.uint8),
+                "nested": {
+                    k: np.full(2, i, dtype=np.float32) for k in nested_keys
+                },
+            }
+            for i in range(3)
+        ]
+        batch = batch_obs(observations)
+        assert sorted(batch["nested"].keys()) == sorted(nested_keys)
+        for k in nested_keys:
+            assert batch["nested"][k][:, 0].tolist() == [0.0, 1.0, 2.0]
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+@pytest.mark.parametrize(
+    "sensor_device,batched_device",
+    [("cpu", "cpu"), ("cpu", "cuda"), ("cuda", "cuda")],
+)
+def test_incremental_observation_batcher(sensor_device, batched_device):
+    if (
+        "cuda" in (sensor_device, batched_device)
+        and not torch.cuda.is_available()
+    ):
+        pytest.skip("CUDA not avaliable")
+
+    sensor_device = torch.device(sensor_device)
+    batched_device = torch.device(batched_device)
+
+    numpy_if = lambda t: t.numpy() if sensor_device.type == "cpu" else t
+
+    observations = [
+        {
+            "rgb": numpy_if(
+                torch.randint(
+                    255, (32, 32, 3), dtype=torch.uint8, device=sensor_device
+                )
+            ),
+            "gps": numpy_if(torch.randn(2, device=sensor_device)),
+            "step": i,
+        }
+        for i in range(6)
+    ]
+    expected = {
+        k: v.clone()
+        for k, v in batch_obs(observations, device=batched_device).items()
+    }
+
+    # Observations added out of order end up at their index
+    batcher = IncrementalObservationBatcher(
+        len(observations), device=batched_device
+    )
+    for i in [3, 0, 5, 1, 4, 2]:
+        batcher.add(i, observations[i])
+    batch = batcher.get()
+
+    assert list(batch.keys()) == list(expected.keys())
+    for k, v in expected.items():
+        assert batch[k].device.type == batched_device.type
+        assert torch.equal(batch[k], v)
+
+
+def _put_messages(q, producer_idx, num_messages):
+    for start in range(0, num_messages, 7):
+        q.put_many(
+            [
+                (producer_idx, i)
+                for i in range(start, min(start + 7, num_messages))
+            ]
+        )
+
+
+def _fill_shared_tensor(q, done_q):
+    tensor = q.get()
+    tensor.fill_(7)
+    done_q.put(True)
+
+
+@pytest.mark.skipif(
+    not baseline_installed, reason="baseline sub-module not installed"
+)
+def test_shared_memory_queue():
+    q = SharedMemoryQueue(max_size_bytes=1024)
+    assert q.empty()
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.01)
+
+    # Ints and pickled objects, written around the end of the buffer
+    msgs = [0, -3, 2**70, "env", {"rgb": np.arange(3)}, (1, None)]
+    for _ in range(10):
+        q.put_many(msgs)
+        assert q.get_many(max_messages_to_get=2) == msgs[:2]
+        assert q.get() == msgs[2]
+        rest = q.get_many()
+        assert rest[0] == "env"
+        assert np.array_equal(rest[1]["rgb"], np.arange(3))
+        assert rest[2] == (1, None)
+        assert q.empty()
+
+    with pytest.raises(ValueError):
+        q.put(b"x" * 1024)
+    q.put_many([b"x" * 400, b"x" * 400])
+    with pytest.raises(queue.Full):
+        q.put(b"x" * 400, timeout=0.01)
+    with pytest.raises(queue.Full):
+        q.put_nowait(b"x" * 400)
+    assert len(q.get_many()) == 2
+
+    # Several producers, the messages of each arrive in order
+    num_producers, num_messages = 3, 200
+    ctx = torch.multiprocessing.get_context("fork")
+    processes = [
+        ctx.Process(target=_put_messages, args=(q, i, num_messages))
+        for i in range(num_producers)
+    ]
+    for p in processes:
+        p.start()
+    received: List[Tuple[int, int]] = []
+    while len(received) < num_producers * num_messages:
+        received += q.get_many(timeout=10.0)
+    for p in processes:
+        p.join()
+
+    for producer_idx in range(num_producers):
+        assert [i for j, i in received if j == producer_idx] == list(
+            range(num_messages)
+        )
+
+    # Shared memory tensors are shared, not copied, like the transfer
+    # buffers VER sends to the environment workers
+    tensor = torch.zeros(4)
+    tensor.share_memory_()
+    done_q = SharedMemoryQueue(max_size_bytes=1024)
+    p = ctx.Process(target=_fill_shared_tensor, args=(q, done_q))
+    p.start()
+    q.put(tensor)
+    assert done_q.get(timeout=10.0)
+    p.join()
+    assert torch.all(tensor == 7)
@@ -187,6 +187,152 @@ def test_threaded_vectorized_env():
             assert len(observations) == num_envs
 
 
+@pytest.mark.parametrize(
+    "vector_env_cls", [habitat.VectorEnv, habitat.ThreadedVectorEnv]
+)
+def test_shared_memory_observations(vector_env_cls):
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+
+    def _run_envs(shared_memory_observations):
+        all_observations = []
+        with vector_env_cls(
+            make_env_fn=_make_dummy_env_func,
+            env_fn_args=env_fn_args,
+            shared_memory_observations=shared_memory_observations,
+        ) as envs:
+            # Same seed for both runs so that they take the same actions
+            action_space = envs.action_spaces[0]
+            action_space.seed(0)
+            actions = [
+                sample_non_stop_action_gym(action_space, num_envs)
+                for _ in range(
+                    configs[0].habitat.environment.max_episode_steps + 5
+                )
+            ]
+            # The shared memory views are overwritten by the next step,
+            # so copy them.
+            all_observations.append(
+                [{k: np.copy(v) for k, v in o.items()} for o in envs.reset()]
+            )
+            for step_actions in actions:
+                outputs = envs.step(step_actions)
+                all_observations.append(
+                    [{k: np.copy(v) for k, v in o[0].items()} for o in outputs]
+                )
+
+        return all_observations
+
+    pickled_observations = _run_envs(False)
+    shared_observations = _run_envs(True)
+    for pickled_obs, shared_obs in zip(
+        itertools.chain(*pickled_observations),
+        itertools.chain(*shared_observations),
+    ):
+        assert list(pickled_obs.keys()) == list(shared_obs.keys())
+        for k in pickled_obs.keys():
+            assert np.array_equal(pickled_obs[k], shared_obs[k])
+
+
+@pytest.mark.parametrize(
+    "vector_env_cls", [habitat.VectorEnv, habitat.ThreadedVectorEnv]
+)
+def test_wait_step_as_completed(vector_env_cls):
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+
+    def _run_envs(as_completed):
+        all_outputs = []
+        with vector_env_cls(
+            make_env_fn=_make_dummy_env_func,
+            env_fn_args=env_fn_args,
+        ) as envs:
+            action_space = envs.action_spaces[0]
+            action_space.seed(0)
+            envs.reset()
+            for _ in range(configs[0].habitat.environment.max_episode_steps):
+                actions = sample_non_stop_action_gym(action_space, num_envs)
+                for index_env, action in enumerate(actions):
+                    envs.async_step_at(index_env, action)
+                if as_completed:
+                    outputs = dict(
+                        envs.wait_step_as_completed(range(num_envs))
+                    )
+                    assert sorted(outputs.keys()) == list(range(num_envs))
+                    all_outputs.append([outputs[i] for i in range(num_envs)])
+                else:
+                    all_outputs.append(envs.wait_step())
+
+        return all_outputs
+
+    for expected, output in zip(
+        itertools.chain(*_run_envs(False)), itertools.chain(*_run_envs(True))
+    ):
+        for k in expected[0].keys():
+            assert np.array_equal(expected[0][k], output[0][k])
+        assert expected[1:3] == output[1:3]
+
+
+@pytest.mark.parametrize(
+    "vector_env_cls", [habitat.VectorEnv, habitat.ThreadedVectorEnv]
+)
+def test_episode_descriptors(vector_env_cls):
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+
+    with vector_env_cls(
+        make_env_fn=_make_dummy_env_func,
+        env_fn_args=env_fn_args,
+        episode_descriptors=True,
+    ) as envs:
+        action_space = envs.action_spaces[0]
+        action_space.seed(0)
+        envs.reset()
+        num_dones = [0] * num_envs
+        for _ in range(3 * configs[0].habitat.environment.max_episode_steps):
+            outputs = envs.step(
+                sample_non_stop_action_gym(action_space, num_envs)
+            )
+            for i, output in enumerate(outputs):
+                num_dones[i] += output[2]
+            descriptors = envs.current_episodes()
+            # Reads the episodes from the workers
+            episodes = envs.call(["current_episode"] * num_envs)
+            for i in range(num_envs):
+                assert descriptors[i].scene_id == episodes[i].scene_id
+                assert descriptors[i].episode_id == episodes[i].episode_id
+                assert descriptors[i].episode_index == num_dones[i]
+        assert envs.current_episodes() == descriptors
+
+
+def test_reset_episode_iterator():
+    configs, datasets = _load_test_data()
+    num_envs = len(configs)
+    env_fn_args = tuple(zip(configs, datasets, range(num_envs)))
+
+    def run_episodes(envs):
+        envs.reset()
+        episodes = [envs.current_episodes()]
+        for _ in range(2 * configs[0].habitat.environment.max_episode_steps):
+            envs.step(sample_non_stop_action_gym(action_space, num_envs))
+            episodes.append(envs.current_episodes())
+        return [[(ep.scene_id, ep.episode_id) for ep in e] for e in episodes]
+
+    with habitat.VectorEnv(
+        make_env_fn=_make_dummy_env_func, env_fn_args=env_fn_args
+    ) as envs:
+        action_space = envs.action_spaces[0]
+        action_space.seed(0)
+        first_run = run_episodes(envs)
+        # The environments are reused like for the next checkpoint of an
+        # evaluation with keep_envs_alive
+        envs.call(["reset_episode_iterator"] * num_envs)
+        assert run_episodes(envs) == first_run
+
+
 @pytest.mark.parametrize("gpu2gpu", [False, True])
 def test_env(gpu2gpu):
     import habitat_sim
@@ -14,6 +14,7 @@ from habitat.config import read_write
 from habitat.config.default import get_agent_config, get_config
 from habitat.sims import make_sim
 from habitat.sims.habitat_simulator.actions import HabitatSimActions
+from habitat.utils.visualizations import maps
 
 
 def init_sim():
@@ -126,3 +127,55 @@ def test_sim_geodesic_distance():
                     ]
                 ),
             ), "Geodesic distance for multi target setup isn't equal to separate single target calls."
+
+
+def test_topdown_map_cache(tmpdir):
+    config = get_config("benchmark/nav/pointnav/pointnav_habitat_test.yaml")
+    if not os.path.exists(config.habitat.simulator.scene):
+        pytest.skip("Please download Habitat test data to data folder.")
+    with make_sim(
+        config.habitat.simulator.type, config=config.habitat.simulator
+    ) as sim:
+        sim.reset()
+        expected = maps.get_topdown_map_from_sim(sim, map_resolution=256)
+
+        map_cache = maps.TopDownMapCache(max_size=1, cache_dir=str(tmpdir))
+        top_down_map = map_cache.get_topdown_map_from_sim(
+            sim, map_resolution=256
+        )
+        assert np.array_equal(top_down_map, expected)
+        # Drawing on the returned map doesn't change the cached one
+        top_down_map[:] = maps.MAP_TARGET_POINT_INDICATOR
+        assert np.array_equal(
+            map_cache.get_topdown_map_from_sim(sim, map_resolution=256),
+            expected,
+        )
+        assert len(os.listdir(str(tmpdir))) == 1
+
+        # A new cache loads the map saved by the first one
+        disk_cache = maps.TopDownMapCache(max_size=1, cache_dir=str(tmpdir))
+        assert np.array_equal(
+            disk_cache.get_topdown_map_from_sim(sim, map_resolution=256),
+            expected,
+        )
+
+
+def test_topdown_map_cache_save_errors(tmpdir, monkeypatch):
+    top_down_map = np.zeros((4, 4), dtype=np.uint8)
+    key = ("dataset", "data/scene.glb", 256)
+
+    # The cache directory can't be created
+    cache_dir = os.path.join(str(tmpdir), "not_a_dir")
+    with open(cache_dir, "w"):
+        pass
+    maps.TopDownMapCache(cache_dir=cache_dir)._save(key, top_down_map)
+
+    # The map can't be written
+    cache_dir = os.path.join(str(tmpdir), "cache")
+
+    def failing_save(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(np, "save", failing_save)
+    maps.TopDownMapCache(cache_dir=cache_dir)._save(key, top_down_map)
+    assert os.listdir(cache_dir) == []
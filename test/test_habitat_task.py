@@ -11,6 +11,13 @@ import pytest
 
 import habitat
 from habitat.config.default_structured_configs import TeleportActionConfig
+from habitat.core.embodied_task import (
+    Measure,
+    Measurements,
+    MeasureUpdatePolicy,
+)
+from habitat.core.environments import RLTaskEnv
+from habitat.tasks.nav.geodesic_distance_field import GeodesicDistanceField
 from habitat.utils.test_utils import sample_non_stop_action
 
 CFG_TEST = "test/config/habitat/habitat_all_sensors_test.yaml"
@@ -100,3 +107,198 @@ def test_task_actions_sampling(config_file):
             env.step(action)
             agent_state = env.sim.get_agent_state()
             habitat.logger.info(agent_state)
+
+
+def test_geodesic_distance_field():
+    meters_per_pixel = 0.05
+    navigable = np.ones((200, 200), dtype=bool)
+    goal = np.array([2.0, 0.0, 2.0])
+
+    # Without obstacles the distances are euclidean, up to the error of the
+    # grid
+    field = GeodesicDistanceField(
+        navigable, (0.0, 0.0), 0.0, meters_per_pixel, goal[None]
+    )
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        position = np.array([rng.uniform(0, 9.9), 0.1, rng.uniform(0, 9.9)])
+        euclidean = np.linalg.norm((position - goal)[[0, 2]])
+        distance = field.get_distance(position)
+        assert euclidean - 1e-3 <= distance <= euclidean * 1.03 + 0.05
+
+    # Positions on another floor or outside of the grid have no distance
+    assert field.get_distance([5.0, 1.0, 5.0]) is None
+    assert field.get_distance([-1.0, 0.0, 5.0]) is None
+
+    # A wall between the position and the goal, with an opening at the end
+    navigable[:190, 100] = False
+    field = GeodesicDistanceField(
+        navigable, (0.0, 0.0), 0.0, meters_per_pixel, goal[None]
+    )
+    position = np.array([8.0, 0.0, 2.0])
+    opening = np.array([5.0, 0.0, 9.6])
+    expected = np.linalg.norm(goal - opening) + np.linalg.norm(
+        opening - position
+    )
+    assert expected <= field.get_distance(position) <= expected * 1.03
+
+    # Cells enclosed by obstacles don't reach the goal
+    navigable[170:180, 170:180] = False
+    navigable[172:178, 172:178] = True
+    field = GeodesicDistanceField(
+        navigable, (0.0, 0.0), 0.0, meters_per_pixel, goal[None]
+    )
+    assert field.get_distance([8.75, 0.0, 8.75]) is None
+
+
+class _CountMeasure(Measure):
+    def __init__(self, name, update_policy, update_interval=1, deps=()):
+        self._name = name
+        self._deps = list(deps)
+        self.update_policy = update_policy
+        self.update_interval = update_interval
+        self.num_updates = 0
+        super().__init__()
+
+    def _get_uuid(self, *args, **kwargs):
+        return self._name
+
+    def reset_metric(self, *args, task, **kwargs):
+        task.measurements.check_measure_dependencies(self.uuid, self._deps)
+        self.num_updates = 0
+        self._metric = kwargs["step"]
+
+    def update_metric(self, *args, task, **kwargs):
+        self.num_updates += 1
+        self._metric = kwargs["step"] + sum(
+            task.measurements.measures[dep].get_metric() for dep in self._deps
+        )
+
+
+class _FakeTask:
+    def __init__(self, measures):
+        self.measurements = Measurements(measures)
+
+    def add_perf_timing(self, *args, **kwargs):
+        pass
+
+
+def test_measure_update_policies():
+    measures = [
+        _CountMeasure("every_step", MeasureUpdatePolicy.EVERY_STEP),
+        _CountMeasure("every_3", MeasureUpdatePolicy.EVERY_K_STEPS, 3),
+        _CountMeasure("episode_end", MeasureUpdatePolicy.EPISODE_END),
+        _CountMeasure("on_demand", MeasureUpdatePolicy.ON_DEMAND),
+        _CountMeasure(
+            "dependent",
+            MeasureUpdatePolicy.EVERY_STEP,
+            deps=["episode_end"],
+        ),
+    ]
+    task = _FakeTask(measures)
+    every_step, every_3, episode_end, on_demand, dependent = measures
+
+    task.measurements.reset_measures(task=task, step=0)
+    for step in range(1, 8):
+        task.measurements.update_measures(task=task, step=step)
+    assert every_step.num_updates == 7
+    assert every_3.num_updates == 2 and every_3.get_metric() == 6
+    # Updated before the measure that depends on it
+    assert episode_end.num_updates == 7
+    assert dependent.get_metric() == 14
+    # The metrics have the last value of the on demand measure
+    assert task.measurements.get_metrics()["on_demand"] == 0
+    assert on_demand.num_updates == 0
+    assert on_demand.get_metric() == 7 and on_demand.num_updates == 1
+    assert task.measurements.get_metrics()["on_demand"] == 7
+    assert on_demand.num_updates == 1
+
+    task.measurements.update_stale_measures()
+    assert every_3.num_updates == 3 and every_3.get_metric() == 7
+    assert on_demand.num_updates == 1
+    assert task.measurements.get_metrics() == {
+        "every_step": 7,
+        "every_3": 7,
+        "episode_end": 7,
+        "on_demand": 7,
+        "dependent": 14,
+    }
+
+    # Without dependents, an episode end measure is only updated at the end
+    dependent.update_policy = MeasureUpdatePolicy.EPISODE_END
+    task.measurements.reset_measures(task=task, step=0)
+    for step in range(1, 4):
+        task.measurements.update_measures(task=task, step=step)
+    assert episode_end.num_updates == 0 and episode_end.get_metric() == 0
+    task.measurements.update_stale_measures()
+    assert episode_end.num_updates == 1 and dependent.num_updates == 1
+    assert dependent.get_metric() == 6
+
+
+class _FakeMeasuredEnv:
+    def __init__(self, measures, max_steps):
+        self.task = _FakeTask(measures)
+        self._max_steps = max_steps
+        self._num_steps = 0
+        self.episode_over = False
+
+    def reset(self):
+        self._num_steps = 0
+        self.episode_over = False
+        self.task.measurements.reset_measures(task=self.task, step=0)
+
+    def step(self, action):
+        self._num_steps += 1
+        self.task.measurements.update_measures(
+            task=self.task, step=self._num_steps
+        )
+        self.episode_over = self._num_steps >= self._max_steps
+        if self.episode_over:
+            self.task.measurements.update_stale_measures()
+        return {}
+
+    def get_metrics(self):
+        return self.task.measurements.get_metrics()
+
+
+def _make_rl_task_env(env, end_on_success):
+    rl_env = RLTaskEnv.__new__(RLTaskEnv)
+    rl_env._env = env
+    rl_env._reward_measure_name = "reward"
+    rl_env._success_measure_name = "success"
+    rl_env._slack_reward = 0.0
+    rl_env._success_reward = 0.0
+    rl_env._end_on_success = end_on_success
+    return rl_env
+
+
+@pytest.mark.parametrize("end_on_success", [False, True])
+def test_rl_task_env_on_demand_measure(end_on_success, monkeypatch):
+    # The reward is read on every step even if it is on demand
+    reward = _CountMeasure("reward", MeasureUpdatePolicy.ON_DEMAND)
+    success = _CountMeasure("success", MeasureUpdatePolicy.EVERY_STEP)
+
+    def update_success(*args, task, step):
+        # Succeeds on the 4th step if the episode ends on success
+        success._metric = end_on_success and step >= 4
+
+    monkeypatch.setattr(success, "update_metric", update_success)
+    on_demand = _CountMeasure("on_demand", MeasureUpdatePolicy.ON_DEMAND)
+    env = _FakeMeasuredEnv([reward, success, on_demand], max_steps=6)
+    rl_env = _make_rl_task_env(env, end_on_success)
+
+    env.reset()
+    num_steps = 4 if end_on_success else 6
+    for step in range(1, num_steps + 1):
+        _, step_reward, done, info = rl_env.step(action=0)
+        assert step_reward == step and reward.num_updates == step
+        assert done == (step == num_steps)
+        # All the steps have the same metrics, so that the trainer can
+        # stack the infos of environments that are done or not
+        assert set(info.keys()) == {"reward", "success", "on_demand"}
+        if not done:
+            assert on_demand.num_updates == 0
+            assert info["on_demand"] == 0
+    # The metrics of the last step are all up to date
+    assert on_demand.num_updates == 1
+    assert info["on_demand"] == num_steps
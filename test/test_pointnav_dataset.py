@@ -4,6 +4,8 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import gzip
+import json
 import os
 import random
 import time
@@ -15,12 +17,15 @@ import habitat
 from habitat.config.default import get_config
 from habitat.core.embodied_task import Episode
 from habitat.core.logging import logger
+from habitat.core.utils import atomic_write
 from habitat.datasets import make_dataset
+from habitat.datasets.episode_columns import EPISODE_COLUMNS_EXT, LazyEpisodes
 from habitat.datasets.pointnav import pointnav_generator as pointnav_generator
 from habitat.datasets.pointnav.pointnav_dataset import (
     DEFAULT_SCENE_PATH_PREFIX,
     PointNavDatasetV1,
 )
+from habitat.datasets.scene_episode_index import SCENE_INDEX_SUFFIX
 from habitat.utils.geometry_utils import (
     angle_between_quaternions,
     quaternion_from_coeff,
@@ -112,6 +117,116 @@ def test_multiple_files_pointnav_dataset():
     check_json_serialization(partial_dataset)
 
 
+def test_episode_columns_pointnav_dataset(tmpdir):
+    dataset_config = get_config(
+        "benchmark/nav/pointnav/pointnav_habitat_test.yaml"
+    ).habitat.dataset
+    if not PointNavDatasetV1.check_config_paths_exist(dataset_config):
+        pytest.skip("Test skipped as dataset files are missing.")
+    dataset = PointNavDatasetV1(config=dataset_config)
+    columns_path = os.path.join(str(tmpdir), "{split}" + EPISODE_COLUMNS_EXT)
+    dataset.write_episode_columns(
+        columns_path.format(split=dataset_config.split), dataset_config
+    )
+
+    with habitat.config.read_write(dataset_config):
+        dataset_config.data_path = columns_path
+    columns_dataset = make_dataset(
+        id_dataset=dataset_config.type, config=dataset_config
+    )
+    assert isinstance(columns_dataset.episodes, LazyEpisodes)
+    assert columns_dataset.num_episodes == dataset.num_episodes
+    assert columns_dataset.scene_ids == dataset.scene_ids
+    assert list(columns_dataset.episodes) == dataset.episodes
+    assert columns_dataset.get_episode_keys() == dataset.get_episode_keys()
+    assert PointNavDatasetV1.get_scenes_to_load(
+        dataset_config
+    ) == PointNavDatasetV1.get_scenes_to_load(
+        get_config(
+            "benchmark/nav/pointnav/pointnav_habitat_test.yaml"
+        ).habitat.dataset
+    )
+
+    scene = PointNavDatasetV1.scene_from_scene_path(dataset.scene_ids[0])
+    with habitat.config.read_write(dataset_config):
+        dataset_config.content_scenes = [scene]
+    scene_dataset = make_dataset(
+        id_dataset=dataset_config.type, config=dataset_config
+    )
+    assert scene_dataset.scene_ids == dataset.scene_ids[:1]
+    assert scene_dataset.get_episode_keys() == [
+        (ep.scene_id, ep.episode_id) for ep in scene_dataset.episodes
+    ]
+    iterated = list(
+        scene_dataset.get_episode_iterator(cycle=False, shuffle=True)
+    )
+    assert sorted(ep.episode_id for ep in iterated) == sorted(
+        ep.episode_id
+        for ep in dataset.episodes
+        if ep.scene_id == dataset.scene_ids[0]
+    )
+
+
+def test_scene_episode_index(tmpdir):
+    episodes = [
+        {
+            "episode_id": str(i),
+            "scene_id": f"{DEFAULT_SCENE_PATH_PREFIX}scene_{i // 3 % 4}.glb",
+            "start_position": [float(i), 0.0, 0.0],
+            "start_rotation": [0.0, 0.0, 0.0, 1.0],
+            "info": {"note": "[{, ]}"},
+            "goals": [{"position": [1.0, 0.0, 1.0], "radius": 0.2}],
+        }
+        for i in range(NUM_EPISODES * 3)
+    ]
+    datasetfile_path = os.path.join(str(tmpdir), "train.json.gz")
+    with gzip.open(datasetfile_path, "wt") as f:
+        json.dump({"episodes": episodes}, f, indent=2)
+
+    dataset_config = get_config(CFG_TEST).habitat.dataset
+    with habitat.config.read_write(dataset_config):
+        dataset_config.data_path = os.path.join(str(tmpdir), "{split}.json.gz")
+        dataset_config.split = "train"
+        dataset_config.scenes_dir = str(tmpdir)
+    full_dataset = PointNavDatasetV1(config=dataset_config)
+
+    scenes = PointNavDatasetV1.get_scenes_to_load(config=dataset_config)
+    assert os.path.exists(datasetfile_path + SCENE_INDEX_SUFFIX)
+    assert scenes == [f"scene_{i}" for i in range(4)]
+
+    with habitat.config.read_write(dataset_config):
+        dataset_config.content_scenes = scenes[1:3]
+    partial_dataset = PointNavDatasetV1(config=dataset_config)
+    assert partial_dataset.episodes == [
+        episode
+        for episode in full_dataset.episodes
+        if PointNavDatasetV1.scene_from_scene_path(episode.scene_id)
+        in scenes[1:3]
+    ]
+
+
+def test_atomic_write(tmpdir):
+    path = os.path.join(str(tmpdir), "file.json")
+    atomic_write(path, lambda f: f.write(b"first"))
+    with open(path, "rb") as f:
+        assert f.read() == b"first"
+    # The permissions of a file written with open, not the private ones of
+    # a temporary file
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+
+    def failing_writer(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(path, failing_writer)
+    with open(path, "rb") as f:
+        assert f.read() == b"first"
+    assert os.listdir(str(tmpdir)) == ["file.json"]
+
+
 @pytest.mark.parametrize("split", ["train", "val"])
 def test_dataset_splitting(split):
     dataset_config = get_config(CFG_MULTI_TEST).habitat.dataset
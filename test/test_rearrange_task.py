@@ -4,10 +4,13 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import gzip
+import itertools
 import json
 import os.path as osp
 import time
 from glob import glob
+from types import SimpleNamespace
 
 import magnum as mn
 import numpy as np
@@ -18,6 +21,8 @@ from omegaconf import DictConfig, OmegaConf
 import habitat
 import habitat.datasets.rearrange.run_episode_generator as rr_gen
 import habitat.datasets.rearrange.samplers.receptacle as hab_receptacle
+import habitat.datasets.rearrange.sharded_episode_generator as sharded_gen
+import habitat.tasks.rearrange.navmesh_islands as navmesh_islands
 import habitat.tasks.rearrange.rearrange_sim
 import habitat.tasks.rearrange.rearrange_task
 import habitat.utils.env_utils
@@ -28,6 +33,12 @@ from habitat.core.environments import get_env_class
 from habitat.core.logging import logger
 from habitat.datasets.rearrange.rearrange_dataset import RearrangeDatasetV0
 from habitat.tasks.rearrange.multi_task.composite_task import CompositeTask
+from habitat.tasks.rearrange.multi_task.pddl_domain import PddlDomain
+from habitat.tasks.rearrange.multi_task.pddl_sim_state import PddlSimState
+from habitat.tasks.rearrange.multi_task.rearrange_pddl import (
+    PddlEntity,
+    PddlSimInfo,
+)
 from habitat.utils.geometry_utils import is_point_in_triangle
 from habitat_baselines.config.default import get_config as baselines_get_config
 
@@ -175,6 +186,96 @@ def test_composite_tasks(test_cfg_path):
             env.reset()
 
 
+class _FakeEpisodeGenerator:
+    r"""Generates episodes that record the shard, and fails every third
+    try.
+    """
+
+    def __init__(self, cfg, limit_scene_set=None, scene_shard=None):
+        self._scene_shard = scene_shard
+        self.num_ep_generated = 0
+        self._num_tries = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def generate_single_episode(self):
+        self._num_tries += 1
+        if self._num_tries % 3 == 0:
+            return None
+        self.num_ep_generated += 1
+        return {
+            "episode_id": str(self.num_ep_generated - 1),
+            "scene_shard": list(self._scene_shard),
+        }
+
+
+def test_sharded_episode_generator(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        sharded_gen, "RearrangeEpisodeGenerator", _FakeEpisodeGenerator
+    )
+    assert sharded_gen.get_shard_num_episodes(10, 4) == [3, 3, 2, 2]
+    assert (
+        len(
+            {sharded_gen.get_shard_seed(0, i, 0) for i in range(4)}
+            | {sharded_gen.get_shard_seed(0, 0, 1)}
+        )
+        == 5
+    )
+
+    shard_dir = str(tmp_path)
+    cfg = rr_gen.get_config_defaults()
+    stats = sharded_gen.generate_shard(
+        cfg, 1, 2, 5, shard_dir, seed=0, checkpoint_interval=2
+    )
+    assert stats["num_generated"] == 5
+    assert stats["num_tries"] == 7
+    episodes_path = osp.join(shard_dir, "shard_1.episodes.jsonl")
+    assert len(sharded_gen.read_shard_episodes(episodes_path)) == 5
+
+    # An interrupted write is dropped and the shard is resumed
+    with open(episodes_path, "a") as f:
+        f.write('{"episode_id": "5", "sce')
+    stats = sharded_gen.generate_shard(
+        cfg, 1, 2, 7, shard_dir, seed=0, checkpoint_interval=2
+    )
+    assert stats["num_resumed"] == 5
+    assert stats["num_generated"] == 2
+    with gzip.open(stats["dataset_path"], "rt") as f:
+        episodes = json.load(f)["episodes"]
+    assert [ep["episode_id"] for ep in episodes] == [str(i) for i in range(7)]
+    assert all(ep["scene_shard"] == [1, 2] for ep in episodes)
+
+    # A done shard isn't generated again
+    stats = sharded_gen.generate_shard(cfg, 1, 2, 7, shard_dir, seed=0)
+    assert stats["num_tries"] == 0
+
+    # The shards of a dataset number their episodes after each other
+    shard_num_episodes = sharded_gen.get_shard_num_episodes(10, 3)
+    offsets = sharded_gen.get_shard_episode_id_offsets(shard_num_episodes)
+    (tmp_path / "dataset").mkdir()
+    episode_ids = []
+    for shard_idx, num_episodes in enumerate(shard_num_episodes):
+        stats = sharded_gen.generate_shard(
+            cfg,
+            shard_idx,
+            3,
+            num_episodes,
+            str(tmp_path / "dataset"),
+            seed=0,
+            episode_id_offset=offsets[shard_idx],
+        )
+        with gzip.open(stats["dataset_path"], "rt") as f:
+            episode_ids += [
+                ep["episode_id"] for ep in json.load(f)["episodes"]
+            ]
+    assert len(set(episode_ids)) == len(episode_ids)
+    assert sorted(episode_ids, key=int) == [str(i) for i in range(10)]
+
+
 # NOTE: set 'debug_visualization' = True to produce videos showing receptacles and final simulation state
 @pytest.mark.parametrize("debug_visualization", [False])
 @pytest.mark.parametrize("num_episodes", [2])
@@ -377,3 +478,355 @@ def test_receptacle_parsing():
                         assert (
                             in_mesh
                         ), "The point must belong to a triangle of the local mesh to be valid."
+
+
+def test_triangle_mesh_receptacle_sampling():
+    # Indexed triangles of a cube of size 2 centered at the origin
+    mesh_data = mn.primitives.cube_solid()
+    receptacle = hab_receptacle.TriangleMeshReceptacle("cube", mesh_data)
+    num_faces = len(mesh_data.indices) // 3
+    assert receptacle.face_verts.shape == (num_faces, 3, 3)
+    assert np.isclose(receptacle.total_area, 24.0)
+    assert np.allclose(
+        receptacle.area_weighted_accumulator,
+        np.arange(1, num_faces + 1) / num_faces,
+    )
+    for f_ix in range(num_faces):
+        positions = mesh_data.attribute(mn.trade.MeshAttribute.POSITION)
+        expected_verts = [
+            positions[mesh_data.indices[f_ix * 3 + i]] for i in range(3)
+        ]
+        assert receptacle.get_face_verts(f_ix) == expected_verts
+
+    np.random.seed(0)
+    samples = receptacle.sample_uniform_local_many(6000)
+    assert samples.shape == (6000, 3)
+    # All the samples are on the faces of the cube, evenly spread
+    assert np.allclose(np.abs(samples).max(axis=1), 1.0)
+    face_axes = np.argmax(np.abs(samples), axis=1) * 2 + (
+        samples[np.arange(6000), np.argmax(np.abs(samples), axis=1)] > 0
+    )
+    assert np.all(np.bincount(face_axes, minlength=6) > 800)
+
+
+def test_receptacle_mesh_cache(tmp_path, monkeypatch):
+    mesh_file = str(tmp_path / "receptacle_mesh.glb")
+    with open(mesh_file, "wb") as f:
+        f.write(b"mesh")
+    # A unit square
+    square = hab_receptacle.ReceptacleMeshData(
+        np.array([[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1]]),
+        np.array([0, 1, 2, 0, 2, 3]),
+    )
+    num_imports = 0
+
+    def import_tri_mesh(mesh_file):
+        nonlocal num_imports
+        num_imports += 1
+        return [square, square]
+
+    monkeypatch.setattr(hab_receptacle, "import_tri_mesh", import_tri_mesh)
+    monkeypatch.setattr(hab_receptacle, "_receptacle_mesh_cache", {})
+    meshes = hab_receptacle.import_receptacle_meshes(mesh_file)
+    assert num_imports == 1
+    assert len(meshes) == 2
+    assert osp.exists(mesh_file + hab_receptacle.RECEPTACLE_MESH_CACHE_SUFFIX)
+    assert hab_receptacle.import_receptacle_meshes(mesh_file) is meshes
+
+    # Read from the disk by another process
+    monkeypatch.setattr(hab_receptacle, "_receptacle_mesh_cache", {})
+    meshes = hab_receptacle.import_receptacle_meshes(mesh_file)
+    assert num_imports == 1
+    for mesh in meshes:
+        assert np.array_equal(mesh.positions, square.positions)
+        assert np.array_equal(mesh.indices, square.indices)
+    receptacle = hab_receptacle.TriangleMeshReceptacle("square", meshes[0])
+    assert np.isclose(receptacle.total_area, 1.0)
+
+    # Imported again once the mesh file changes
+    with open(mesh_file, "wb") as f:
+        f.write(b"other mesh")
+    monkeypatch.setattr(hab_receptacle, "_receptacle_mesh_cache", {})
+    hab_receptacle.import_receptacle_meshes(mesh_file)
+    assert num_imports == 2
+
+
+class _TwoIslandsPathFinder:
+    r"""Navmesh with a large island for x < 5 and a small one otherwise."""
+
+    def __init__(self, num_vertices=200):
+        rng = np.random.default_rng(0)
+        self.vertices = [
+            v.astype(np.float32) for v in rng.uniform(0, 10, (num_vertices, 3))
+        ]
+        self.num_island_radius_calls = 0
+
+    def build_navmesh_vertices(self):
+        return self.vertices
+
+    def island_radius(self, p):
+        self.num_island_radius_calls += 1
+        return 4.0 if p[0] < 5 else 1.5
+
+    def get_island(self, p):
+        return 0 if p[0] < 5 else 1
+
+
+def test_navmesh_islands(tmp_path):
+    navmesh_path = str(tmp_path / "scene.navmesh")
+    with open(navmesh_path, "wb") as f:
+        f.write(b"navmesh")
+
+    pathfinder = _TwoIslandsPathFinder()
+    islands = navmesh_islands.get_navmesh_islands(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == len(pathfinder.vertices)
+    assert islands.max_island_size == 4.0
+    assert islands.largest_island_idx == 0
+    assert osp.exists(navmesh_path + navmesh_islands.NAVMESH_ISLANDS_SUFFIX)
+
+    # The closest vertex of the largest island, even if a vertex of the
+    # small island is closer
+    vertices = np.stack(pathfinder.vertices)
+    for pos in [np.array([9.0, 5.0, 5.0]), np.array([1.0, 2.0, 3.0])]:
+        large = vertices[vertices[:, 0] < 5]
+        expected = large[np.argmin(np.linalg.norm(large - pos, axis=-1))]
+        assert np.array_equal(
+            islands.closest_largest_island_vertex(pos), expected
+        )
+
+    # Loaded from memory, then from the saved file
+    assert (
+        navmesh_islands.get_navmesh_islands(pathfinder, navmesh_path)
+        is islands
+    )
+    navmesh_islands._islands_cache.clear()
+    loaded = navmesh_islands.get_navmesh_islands(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == len(pathfinder.vertices)
+    assert np.array_equal(loaded.vertices, islands.vertices)
+    assert np.array_equal(loaded.island_sizes, islands.island_sizes)
+    assert loaded.max_island_size == islands.max_island_size
+    assert loaded.largest_island_idx == islands.largest_island_idx
+
+    # Recomputed when the navmesh changes
+    with open(navmesh_path, "wb") as f:
+        f.write(b"other navmesh")
+    navmesh_islands.get_navmesh_islands(pathfinder, navmesh_path)
+    assert pathfinder.num_island_radius_calls == 2 * len(pathfinder.vertices)
+
+
+class _HalfTrueCache(dict):
+    r"""Predicate truth cache where a fixed half of the predicates is true."""
+
+    def __contains__(self, k):
+        return True
+
+    def __getitem__(self, k):
+        return sum(map(ord, k)) % 2 == 0
+
+
+def test_pddl_grounding():
+    domain = PddlDomain("replica_cad")
+    for name, type_name in [
+        ("obj_0", "obj_type"),
+        ("obj_1", "obj_type"),
+        ("goal_0", "goal_entity_type"),
+        ("goal_1", "goal_entity_type"),
+        ("recep_0", "static_obj_type"),
+        ("robot_0", "robot_entity_type"),
+    ]:
+        domain.register_episode_entity(
+            PddlEntity(name, domain.expr_types[type_name])
+        )
+    domain.bind_actions()
+
+    class _SimInfo:
+        pred_truth_cache = _HalfTrueCache()
+
+    domain._sim_info = _SimInfo()  # type: ignore[assignment]
+    all_entities = list(domain.all_entities.values())
+
+    # Same predicates, in the same order, as enumerating all the
+    # permutations of the entities
+    expected_preds = []
+    for pred in domain.predicates.values():
+        for entity_input in itertools.permutations(all_entities, pred.n_args):
+            if pred.are_args_compatible(list(entity_input)):
+                use_pred = pred.clone()
+                use_pred.set_param_values(entity_input)
+                if use_pred.is_true(domain.sim_info):
+                    expected_preds.append(use_pred)
+    true_preds = domain.get_true_predicates()
+    assert len(true_preds) > 0
+    assert true_preds == expected_preds
+    assert domain.get_true_predicates() == expected_preds
+
+    expected_possible_preds = []
+    for pred in domain.predicates.values():
+        for entity_input in itertools.combinations(all_entities, pred.n_args):
+            if pred.are_args_compatible(list(entity_input)):
+                use_pred = pred.clone()
+                use_pred.set_param_values(entity_input)
+                if use_pred.are_types_compatible(domain.expr_types):
+                    expected_possible_preds.append(entity_input)
+    assert [
+        tuple(p.arg_values) for p in domain.get_possible_predicates()
+    ] == expected_possible_preds
+
+    robot = domain.get_entity("robot_0")
+    for filter_entities in [
+        None,
+        [robot],
+        [robot, domain.get_entity("obj_1")],
+    ]:
+        expected_actions = []
+        for action in domain.actions.values():
+            for entity_input in itertools.combinations(
+                all_entities, action.n_args
+            ):
+                if filter_entities is not None and not all(
+                    e in entity_input for e in filter_entities
+                ):
+                    continue
+                for perm in itertools.permutations(entity_input):
+                    if not action.are_args_compatible(list(perm)):
+                        continue
+                    new_action = action.clone()
+                    new_action.set_param_values(list(perm))
+                    if new_action.is_precond_satisfied_from_predicates(
+                        true_preds
+                    ):
+                        expected_actions.append(new_action.compact_str)
+        actions = domain.get_possible_actions(
+            filter_entities=filter_entities, true_preds=true_preds
+        )
+        assert len(actions) > 0
+        assert [a.compact_str for a in actions] == expected_actions
+
+    # The grounding is searched again with new entities
+    num_actions = len(domain.get_possible_actions())
+    domain.register_episode_entity(
+        PddlEntity("obj_2", domain.expr_types["obj_type"])
+    )
+    assert len(domain.get_possible_actions()) > num_actions
+    assert (
+        domain.get_possible_actions(
+            filter_entities=[
+                PddlEntity("other", domain.expr_types["obj_type"])
+            ]
+        )
+        == []
+    )
+
+
+class _CountingRigidObjectManager:
+    def __init__(self, positions):
+        self.positions = positions
+        self.num_reads = 0
+
+    def get_object_by_id(self, obj_id):
+        self.num_reads += 1
+        return SimpleNamespace(
+            translation=np.array(self.positions[obj_id], dtype=np.float32)
+        )
+
+
+class _CountingMarker:
+    def __init__(self, js):
+        self.js = js
+        self.num_reads = 0
+
+    def get_targ_js(self):
+        self.num_reads += 1
+        return self.js
+
+
+class _SnapshotSim:
+    r"""Simulator with the values read by the object and articulated
+    states of the PDDL predicates, which counts the reads.
+    """
+
+    def __init__(self):
+        self.state_id = 0
+        self.scene_obj_ids = [10, 11]
+        self.rom = _CountingRigidObjectManager(
+            {10: [1.0, 0.0, 0.0], 11: [5.0, 0.0, 5.0]}
+        )
+        self.num_get_targets = 0
+
+    def get_rigid_object_manager(self):
+        return self.rom
+
+    def get_targets(self):
+        self.num_get_targets += 1
+        return np.array([0, 1]), np.array(
+            [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], dtype=np.float32
+        )
+
+
+def test_pddl_sim_snapshot():
+    domain = PddlDomain("replica_cad")
+    sim = _SnapshotSim()
+    marker = _CountingMarker(0.0)
+    sim_info = PddlSimInfo(
+        obj_ids={"obj_0": 0, "obj_1": 1},
+        target_ids={"goal_0": 0, "goal_1": 1},
+        art_handles={},
+        marker_handles={"cab_push_point_7": marker},  # type: ignore[dict-item]
+        robot_ids={},
+        sim=sim,  # type: ignore[arg-type]
+        dataset=None,
+        env=None,
+        episode=None,
+        obj_thresh=0.1,
+        art_thresh=0.01,
+        robot_at_thresh=2.0,
+        expr_types=domain.expr_types,
+        predicates=domain.predicates,
+        all_entities=domain.all_entities,
+        receptacles={},
+        num_spawn_attempts=1,
+        physics_stability_steps=1,
+        recep_place_shrink_factor=0.8,
+    )
+    obj_0, obj_1 = [
+        PddlEntity(f"obj_{i}", domain.expr_types["movable_entity_type"])
+        for i in range(2)
+    ]
+    goal_0, goal_1 = [
+        PddlEntity(f"goal_{i}", domain.expr_types["goal_entity_type"])
+        for i in range(2)
+    ]
+
+    def is_at_goal(obj, goal):
+        return PddlSimState({}, {obj: goal}, {}).is_true(sim_info)
+
+    closed_cab = domain.predicates["closed_cab"].clone()
+    closed_cab.set_param_values([domain.get_entity("cab_push_point_7")])
+
+    assert is_at_goal(obj_0, goal_0)
+    assert not is_at_goal(obj_0, goal_1)
+    assert not is_at_goal(obj_1, goal_1)
+    assert closed_cab.is_true(sim_info)
+    assert closed_cab.is_true(sim_info)
+    # Everything is read once per simulator state
+    assert sim.rom.num_reads == 2
+    assert sim.num_get_targets == 1
+    assert marker.num_reads == 1
+
+    sim.rom.positions[10] = [0.0, 0.0, 1.0]
+    marker.js = 0.5
+    assert is_at_goal(obj_0, goal_0)
+
+    # Read again once the simulator steps
+    sim.state_id += 1
+    assert not is_at_goal(obj_0, goal_0)
+    assert is_at_goal(obj_0, goal_1)
+    assert not closed_cab.is_true(sim_info)
+    assert sim.rom.num_reads == 4
+    assert sim.num_get_targets == 2
+    assert marker.num_reads == 2
+
+    # Or when objects are moved without stepping the simulator
+    sim.rom.positions[10] = [1.0, 0.0, 0.0]
+    sim_info.invalidate_sim_snapshot()
+    assert is_at_goal(obj_0, goal_0)
@@ -4,6 +4,9 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from typing import List
+
+import numpy as np
 import pytest
 
 torch = pytest.importorskip("torch")
@@ -11,6 +14,7 @@ habitat_baselines = pytest.importorskip("habitat_baselines")
 
 from habitat_baselines.rl.models.rnn_state_encoder import (
     build_pack_info_from_dones,
+    build_pack_info_from_episode_ids,
     build_rnn_build_seq_info,
     build_rnn_state_encoder,
 )
@@ -92,3 +96,65 @@ def test_rnn_state_encoder():
                 assert (
                     torch.norm(reference_hiddens - out_hiddens) < 0.001
                 ), "Failed on (T={}, N={})".format(T, N)
+
+
+def test_build_pack_info_from_episode_ids():
+    rng = np.random.default_rng(0)
+    num_envs, num_slots = 8, 200
+    # Steps of environments of different speeds in arrival order, like in
+    # the VER rollout storage
+    environment_ids = rng.choice(
+        num_envs, size=num_slots, p=np.arange(1, num_envs + 1) / 36
+    )
+    environment_ids[:num_envs] = np.arange(num_envs)
+    episode_ids = np.empty_like(environment_ids)
+    step_ids = np.empty_like(environment_ids)
+    current_episode = rng.integers(0, 10, num_envs)
+    current_step = np.zeros(num_envs, dtype=np.int64)
+    for i, env in enumerate(environment_ids):
+        episode_ids[i] = current_episode[env]
+        step_ids[i] = current_step[env]
+        current_step[env] += 1
+        if rng.random() < 0.1:
+            current_episode[env] += 1
+
+    info = build_pack_info_from_episode_ids(
+        episode_ids, environment_ids, step_ids
+    )
+
+    select_inds = info["select_inds"]
+    assert np.array_equal(np.sort(select_inds), np.arange(num_slots))
+    num_seqs_at_step = info["num_seqs_at_step"]
+    lengths = info["sequence_lengths"]
+    assert np.all(np.diff(lengths) <= 0)
+    assert num_seqs_at_step.sum() == num_slots
+    for step, n_seqs in enumerate(num_seqs_at_step):
+        assert n_seqs == np.count_nonzero(lengths > step)
+
+    # Each sequence is one episode of one environment, in step order
+    ptr = 0
+    seq_steps: List[List[int]] = [[] for _ in range(num_seqs_at_step[0])]
+    for n_seqs in num_seqs_at_step:
+        for seq in range(n_seqs):
+            seq_steps[seq].append(select_inds[ptr + seq])
+        ptr += n_seqs
+    for seq, steps in enumerate(seq_steps):
+        assert steps[0] == info["sequence_starts"][seq]
+        assert len(set(environment_ids[steps])) == 1
+        assert len(set(episode_ids[steps])) == 1
+        assert np.all(np.diff(step_ids[steps]) == 1)
+
+    seq_envs = environment_ids[info["sequence_starts"]]
+    seq_episodes = episode_ids[info["sequence_starts"]]
+    assert np.array_equal(seq_envs, info["rnn_state_batch_inds"])
+    for env in range(num_envs):
+        env_seqs = np.flatnonzero(seq_envs == env)
+        first = env_seqs[np.argmin(seq_episodes[env_seqs])]
+        last = env_seqs[np.argmax(seq_episodes[env_seqs])]
+        assert info["first_sequence_in_batch_mask"][first]
+        assert info["first_sequence_in_batch_mask"][env_seqs].sum() == 1
+        assert info["last_sequence_in_batch_mask"][last]
+        assert info["last_sequence_in_batch_mask"][env_seqs].sum() == 1
+        assert (
+            info["first_step_for_env"][env] == info["sequence_starts"][first]
+        )
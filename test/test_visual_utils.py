@@ -4,8 +4,17 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import pickle
+
 import numpy as np
+import pytest
 
+from habitat.utils.visualizations import fog_of_war
+from habitat.utils.visualizations.top_down_map_deltas import (
+    TopDownMapDelta,
+    TopDownMapDeltaDecoder,
+    TopDownMapDeltaEncoder,
+)
 from habitat.utils.visualizations.utils import observations_to_image
 
 
@@ -57,3 +66,93 @@ def test_different_dim_observations_to_image():
         1570,
         3,
     ), "Resulted image resolution doesn't match."
+
+
+def test_reveal_fog_of_war_incremental():
+    rng = np.random.default_rng(0)
+    top_down_map = np.ones((256, 256), dtype=np.uint8)
+    top_down_map[rng.random(top_down_map.shape) < 0.01] = 0
+
+    mask = np.zeros_like(top_down_map)
+    incremental_mask = np.zeros_like(top_down_map)
+    for step in range(20):
+        point = np.array([100 + 2 * step, 120 + step])
+        angle = 0.3 * step
+        mask = fog_of_war.reveal_fog_of_war(
+            top_down_map, mask, point, angle, fov=90, max_line_len=60
+        )
+        prev_mask = incremental_mask.copy()
+        dirty_rect = fog_of_war.reveal_fog_of_war_incremental(
+            top_down_map,
+            incremental_mask,
+            point,
+            angle,
+            fov=90,
+            max_line_len=60,
+        )
+
+        changed = np.argwhere(prev_mask != incremental_mask)
+        if dirty_rect is None:
+            assert len(changed) == 0
+        else:
+            x_min, x_max, y_min, y_max = dirty_rect
+            assert changed[:, 0].min() == x_min
+            assert changed[:, 0].max() == x_max - 1
+            assert changed[:, 1].min() == y_min
+            assert changed[:, 1].max() == y_max - 1
+
+    # The rays are snapped to the angle steps, so a few pixels at the end
+    # of the rays can differ
+    assert (mask != incremental_mask).sum() < 0.05 * mask.sum()
+
+
+@pytest.mark.parametrize("incremental", [True, False])
+def test_top_down_map_deltas(incremental):
+    rng = np.random.default_rng(0)
+    encoder = TopDownMapDeltaEncoder()
+    decoder = TopDownMapDeltaDecoder()
+    for _ in range(2):
+        # A new episode allocates new arrays, like the TopDownMap measure
+        top_down_map = np.ones((256, 256), dtype=np.uint8)
+        top_down_map[rng.random(top_down_map.shape) < 0.01] = 0
+        mask = np.zeros_like(top_down_map)
+        for step in range(20):
+            point = np.array([100 + 2 * step, 120 + step])
+            dirty_rect = fog_of_war.reveal_fog_of_war_incremental(
+                top_down_map, mask, point, 0.3 * step, fov=90, max_line_len=60
+            )
+            # Agent path drawn on the map
+            top_down_map[point[0], point[1]] = 7
+            point_rect = (point[0], point[0] + 1, point[1], point[1] + 1)
+            if dirty_rect is None:
+                dirty_rect = point_rect
+            else:
+                dirty_rect = (
+                    min(dirty_rect[0], point_rect[0]),
+                    max(dirty_rect[1], point_rect[1]),
+                    min(dirty_rect[2], point_rect[2]),
+                    max(dirty_rect[3], point_rect[3]),
+                )
+            metric = {
+                "map": top_down_map,
+                "fog_of_war_mask": mask,
+                "agent_map_coord": [tuple(point)],
+                "agent_angle": [0.3 * step],
+            }
+            if incremental:
+                metric["dirty_rect"] = dirty_rect
+            info = {"distance_to_goal": float(step), "top_down_map": metric}
+
+            encoded = encoder.encode(info)
+            assert isinstance(encoded["top_down_map"], TopDownMapDelta) == (
+                step > 0
+            )
+            decoded = decoder.decode(pickle.loads(pickle.dumps(encoded)))
+
+            assert decoded["distance_to_goal"] == step
+            assert list(decoded["top_down_map"].keys()) == list(metric.keys())
+            assert np.array_equal(decoded["top_down_map"]["map"], top_down_map)
+            assert np.array_equal(
+                decoded["top_down_map"]["fog_of_war_mask"], mask
+            )
+            assert decoded["top_down_map"]["agent_map_coord"] == [tuple(point)]